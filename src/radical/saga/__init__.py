@@ -6,7 +6,26 @@ __license__   = "MIT"
 
 # ------------------------------------------------------------------------------
 #
+# The API methods are decorated with signature checks (`rus.takes`,
+# `rus.returns`).  `radical.utils` only performs those checks if
+# `RADICAL_DEBUG_SIG` is set, and they then cost time on every API call.
+# `RADICAL_SAGA_SIG_CHECK` overrides that for the radical.saga API: set it to
+# `false` (production mode) to install the decorators as no-ops, or to `true`
+# to enable the checks for radical.saga only.  The setting is evaluated once,
+# when the API modules are imported.
+#
+import os                       as _os
+import radical.utils.signatures as _rus
+
+_sig_no_check = _rus.no_check
+_sig_check    = _os.environ.get('RADICAL_SAGA_SIG_CHECK', '').lower()
+
+if   _sig_check in ['false', 'no',  'off', '0']: _rus.no_check = True
+elif _sig_check in ['true',  'yes', 'on',  '1']: _rus.no_check = False
+
 
+# ------------------------------------------------------------------------------
+#
 from .version    import *
 from .constants  import *
 
@@ -38,6 +57,9 @@ from .           import resource
 
 from .           import utils
 
+# do not change signature checks for other packages
+_rus.no_check = _sig_no_check
+
 
 # ------------------------------------------------------------------------------
 
@@ -18,6 +18,7 @@ from urllib.parse import parse_qs
 from ...url           import Url
 from ...              import exceptions as rse
 from ...utils         import pty_shell  as rsups
+from ...utils         import misc       as rsumisc
 from ...              import job        as api
 from ..               import base       as a_base
 from ..cpi            import job        as cpi_job
@@ -58,36 +59,15 @@ class _job_state_monitor(threading.Thread):
         while not self._term.is_set ():
 
             try:
-                # FIXME: do bulk updates here! we don't want to pull information
-                # job by job. that would be too inefficient!
-                jobs = self.js.jobs
+                # we only need to monitor jobs that are not in a terminal
+                # state, so we can skip the ones that are either done, failed
+                # or canceled.  All others are updated in bulk.
+                jobs   = self.js.jobs
+                active = [job_id for job_id in list(jobs.keys())
+                                 if jobs[job_id]['state'] not in api.FINAL]
 
-                for job_id in list(jobs.keys()) :
-
-                    job_info = jobs[job_id]
-
-                    # we only need to monitor jobs that are not in a
-                    # terminal state, so we can skip the ones that are
-                    # either done, failed or canceled
-                    if  job_info['state'] \
-                        not in [api.DONE, api.FAILED, api.CANCELED]:
-
-                        # Store the current state since the current state
-                        # variable is updated when _job_get_info is called
-                        pre_update_state = job_info['state']
-
-                        new_job_info = self.js._job_get_info(job_id, reconnect=False)
-                        self.logger.info ("Job monitoring thread updating Job "
-                                          "%s (old state: %s, new state: %s)" %
-                                          (job_id, pre_update_state, new_job_info['state']))
-
-                        # fire job state callback if 'state' has changed
-                        if  new_job_info['state'] != pre_update_state:
-                            job_obj = job_info['obj']
-                            job_obj._attributes_i_set('state', new_job_info['state'], job_obj._UP, True)
-
-                        # update job info
-                        jobs[job_id] = new_job_info
+                if active:
+                    self.js._job_get_states(active)
 
             except Exception as e:
                 import traceback
@@ -300,7 +280,9 @@ def _cobaltscript_generator(url, logger, jd, ppn, queue=None, run_job=None):
 # ------------------------------------------------------------------------------
 # some private defs
 #
-_PTY_TIMEOUT = 2.0
+_PTY_TIMEOUT    = 2.0
+_QUERY_LINE_MAX = 2000   # max length of the job id list in one qstat command
+                         # line, to stay well below the pty line length limit
 
 # ------------------------------------------------------------------------------
 # the adaptor name
@@ -956,6 +938,75 @@ class CobaltJobService (cpi_job.Service):
         return self.jobs[job_id]['state']
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _job_get_states(self, job_ids):
+        """ Get the states of many jobs with one pipelined `qstat` call per
+            `_QUERY_LINE_MAX` characters of job ids.  Jobs which are not listed
+            by qstat anymore are updated individually (see `_job_get_info()`).
+            State callbacks are fired for changed states.
+        """
+
+        # only query jobs which can still change state
+        active = dict()  # cobalt job id : saga job id
+        for job_id in job_ids:
+            job_info = self.jobs[job_id]
+            if job_info['gone'] is not True and \
+               job_info['state'] not in api.FINAL:
+                rm, pid = self._adaptor.parse_id(job_id)
+                active[pid] = job_id
+
+        if active:
+
+            old_states = dict([(job_id, self.jobs[job_id]['state'])
+                               for job_id in active.values()])
+
+            # the output looks like this:
+            #     JobID  S
+            #     ========
+            #     32     R
+            #     35     Q
+            cmds = ["%s --header=JobID:short_state %s"
+                    % (self._commands['qstat']['path'], ' '.join(chunk))
+                    for chunk in rsumisc.split_by_length(list(active.keys()),
+                                                         _QUERY_LINE_MAX)]
+
+            new_infos = dict()
+            for _, out, _ in self.shell.run_pipelined(cmds):
+                for line in out.split('\n'):
+
+                    elems = line.split()
+                    if len(elems) != 2 or elems[0] not in active:
+                        continue
+
+                    pid, cobalt_state = elems
+                    job_id   = active.pop(pid)
+                    job_info = dict(self.jobs[job_id])
+                    job_info['state'] = _cobalt_to_saga_jobstate(cobalt_state)
+                    new_infos[job_id] = job_info
+
+            # jobs which left the queue
+            for job_id in active.values():
+                new_infos[job_id] = self._job_get_info(job_id, reconnect=False)
+
+            for job_id, job_info in new_infos.items():
+
+                self._logger.info("Updating Job %s (old state: %s, new state: "
+                                  "%s)" % (job_id, old_states[job_id],
+                                           job_info['state']))
+
+                self.jobs[job_id] = job_info
+
+                # fire job state callback if 'state' has changed
+                if job_info['state'] != old_states[job_id]:
+                    job_obj = job_info['obj']
+                    job_obj._attributes_i_set('state', job_info['state'],
+                                              job_obj._UP, True)
+
+        return dict([(job_id, self.jobs[job_id]['state'])
+                     for job_id in job_ids])
+
+
     # --------------------------------------------------------------------------
     #
     def _job_get_exit_code(self, job_id):
@@ -1158,10 +1209,18 @@ class CobaltJobService (cpi_job.Service):
     # --------------------------------------------------------------------------
     #
     def container_wait (self, jobs, mode, timeout) :
+        """ poll the states of all jobs with one `qstat` call per
+            iteration (see `_job_get_states()`)
+        """
         self._logger.debug ("container wait: %s"  %  str(jobs))
-        # TODO: this is not optimized yet
+
         for job in jobs:
-            job.wait ()
+            if job._adaptor._started is False:
+                raise rse.IncorrectState("Can't wait for job that hasn't "
+                                         "been started")
+
+        return self._container_wait_states(jobs, mode, timeout,
+                                           interval=SYNC_WAIT_UPDATE_INTERVAL)
 
 
     # --------------------------------------------------------------------------
@@ -1175,11 +1234,13 @@ class CobaltJobService (cpi_job.Service):
     # --------------------------------------------------------------------------
     #
     def container_get_states(self, jobs):
-        # TODO: this is not optimized yet
-        states = list()
-        for job in jobs:
-            states.append(job.get_state())
-        return states
+        """ get the states of all jobs with one `qstat` call
+        """
+        job_ids = [job._adaptor._id for job in jobs
+                                    if  job._adaptor._started]
+        states  = self._job_get_states(job_ids)
+
+        return [states.get(job._adaptor._id, api.NEW) for job in jobs]
 
 
 ###############################################################################
@@ -1214,6 +1275,9 @@ class CobaltJob (cpi_job.Job):
         self.jd = job_info["job_description"]
         self.js = job_info["job_service"]
 
+        # the js is responsible for job bulk operations
+        self._container = self.js
+
         if job_info['reconnect'] is True:
             self._id      = job_info['reconnect_jobid']
             self._name    = self.jd.get(api.NAME)
@@ -11,6 +11,7 @@ import re
 import os
 import time
 import datetime
+import threading
 
 from urllib.parse import parse_qs
 from tempfile import NamedTemporaryFile
@@ -26,6 +27,7 @@ from ...exceptions    import *
 from ...              import job        as api
 from ...              import filesystem as sfs
 from ...utils         import pty_shell  as sups
+from ...utils         import misc       as sumisc
 from ...utils.job     import TransferDirectives
 
 SYNC_CALL  = cpi.decorators.SYNC_CALL
@@ -59,6 +61,29 @@ def _condor_to_saga_jobstate(condorjs):
     else                   : return api.UNKNOWN
 
 
+# --------------------------------------------------------------------
+#
+def _autoformat_rows(lines, ncols, logger=None):
+    """ generator which parses `-autoformat:,` output of `condor_q` and
+        `condor_history` line by line (e.g., from a `PTYStream`), and yields
+        the columns of each row.  Rows with an unexpected number of columns are
+        skipped.
+    """
+
+    for line in lines:
+
+        if not line.strip():
+            continue
+
+        elems = [col.strip() for col in line.split(',')]
+        if len(elems) != ncols:
+            if logger:
+                logger.error('condor noise [%s]', line)
+            continue
+
+        yield elems
+
+
 # --------------------------------------------------------------------
 #
 def _condorscript_generator(url, logger, jds, option_dict=None):
@@ -240,6 +265,9 @@ def _condorscript_generator(url, logger, jds, option_dict=None):
 # some private defs
 #
 _CACHE_TIMEOUT = 5.0
+_QUERY_LINE_MAX = 2000  # max length of the id lists and constraints in one
+                        # condor_q / condor_history command line, to stay well
+                        # below the pty line length limit (4095 characters)
 
 # --------------------------------------------------------------------
 # the adaptor name
@@ -356,6 +384,61 @@ class Adaptor (base.Base):
         return (match.group(1), match.group(2))
 
 
+# ------------------------------------------------------------------------------
+#
+class _job_state_monitor(threading.Thread):
+    '''
+    Thread which periodically collects the states of all active jobs of a job
+    service -- with one `condor_q` and at most one `condor_history` call for
+    all jobs, not one call per job -- and pushes state changes to the job
+    instances (and thus to any registered state callbacks).
+    '''
+
+    def __init__(self, job_service, interval):
+
+        self.logger   = job_service._logger
+        self.js       = job_service
+        self.interval = interval
+        self._term    = threading.Event()
+
+        super(_job_state_monitor, self).__init__()
+        self.daemon = True
+
+
+    def stop(self):
+        self._term.set()
+
+
+    def run(self):
+
+        # we stop the monitoring thread when we see the same error 3 times in
+        # a row...
+        error_type_count = dict()
+
+        while not self._term.is_set():
+
+            try:
+                self.js._update_states()
+                error_type_count = dict()
+
+            except Exception as e:
+                self.logger.exception("Exception in job monitoring thread")
+
+                # check if we see the same error again and again
+                error_type = str(e)
+                if  error_type not in error_type_count:
+                    error_type_count = dict()
+                    error_type_count[error_type]  = 1
+                else:
+                    error_type_count[error_type] += 1
+                    if  error_type_count[error_type] >= 3:
+                        self.logger.error("too many monitoring errors -- stop")
+                        return
+
+            finally:
+                self._term.wait(self.interval)
+
+
 ###############################################################################
 #
 class CondorJobService (cpi.job.Service):
@@ -366,6 +449,8 @@ class CondorJobService (cpi.job.Service):
     #
     def __init__(self, api, adaptor):
 
+        self.mt = None
+
         _cpi_base = super(CondorJobService, self)
         _cpi_base.__init__(api, adaptor)
 
@@ -376,6 +461,12 @@ class CondorJobService (cpi.job.Service):
     #
     def __del__(self):
 
+        try:
+            if self.mt:
+                self.mt.stop()
+        except:
+            pass
+
         self.finalize(kill_shell=True)
 
     # ----------------------------------------------------------------
@@ -391,6 +482,15 @@ class CondorJobService (cpi.job.Service):
         self.jobs          = dict()
         self.query_options = dict()
 
+        # active jobs are watched by a monitoring thread, which is started when
+        # the first job gets registered (see `_monitor_job()`)
+        self.mt         = None
+        self._monitored = dict()  # job id : job cpi instance
+        self._mlock     = threading.Lock()
+        self._ulock     = threading.Lock()
+        self._interval  = float(self._adaptor._cfg.get('monitor_interval',
+                                                       _CACHE_TIMEOUT))
+
         rm_scheme = rm_url.scheme
         pty_url   = ru.Url (rm_url)
 
@@ -433,6 +533,12 @@ class CondorJobService (cpi.job.Service):
     # ----------------------------------------------------------------
     #
     def close (self) :
+
+        if  self.mt :
+            self.mt.stop ()
+            self.mt.join (10)  # don't block forever on join()
+            self.mt = None
+
         if  self.shell :
             self.shell.finalize (True)
 
@@ -541,6 +647,34 @@ class CondorJobService (cpi.job.Service):
         return ret, out, err
 
 
+    # --------------------------------------------------------------------------
+    #
+    # same as `_run_condor_q()`, but the output lines are yielded while they
+    # arrive (see `PTYShell.run_stream()`).  The output of failed attempts is
+    # yielded, too -- parsers are expected to skip lines they don't understand.
+    #
+    def _stream_condor_q(self, options, retries=1, timeout=10):
+
+        cmd = 'unset GREP_OPTIONS; %s %s' % (self._commands['condor_q'], options)
+
+        for n in range(retries):
+
+            # if we tried before wait for a little
+            if n and timeout:
+                time.sleep(timeout)
+
+            stream = self.shell.run_stream(cmd)
+            for line in stream:
+                yield line
+
+            if stream.ret == 0:
+                return
+
+            self._logger.debug('need retry %s', options)
+
+        raise NoSuccess("condor_q failed (%s)" % options)
+
+
     # ----------------------------------------------------------------
     #
     def _new_job_info(self):
@@ -858,305 +992,267 @@ class CondorJobService (cpi.job.Service):
         if info['gone'] is True:
             return info
 
-        # if we just queried the job info, don't query again
+        # if we just queried the job info (or the monitoring thread did), don't
+        # query again
         if time.time() - info['timestamp'] < _CACHE_TIMEOUT:
             return info
 
-        rm, pid = self._adaptor.parse_id(job_id)
-
-        # run the Condor 'condor_q' command to get some infos about our job
-        ret, out, err = self._run_condor_q(retries=3, timeout=60, pid=pid,
-                egrep=['^JobStatus', '^ExitStatus', '^CompletionDate'])
-
-        if ret == 0:
-
-            # parse the egrep result. this should look something like this:
-            # JobStatus = 5
-            # ExitStatus = 0
-            # CompletionDate = 0
-            results = list(filter(bool, out.split('\n')))
-            for result in results:
-                key, val = result.split('=', 1)
-                key = key.strip()
-                val = val.strip()
-
-                if   key == 'JobStatus'     : info['state']      = _condor_to_saga_jobstate(val)
-                elif key == 'ExitStatus'    : info['returncode'] = val
-                elif key == 'CompletionDate': info['end_time']   = val
+        self._update_jobs([job_id])
 
-        else:
+        return info
 
-            # condor_q failed -- job is gone
-            info['gone'] = True
 
-            if not self._adaptor.use_hist:
+    # ----------------------------------------------------------------
+    #
+    def _update_jobs(self, job_ids):
+        """ get job attributes for many jobs: all given jobs are queried with
+            one `condor_q` call, and all jobs which left the queue with one
+            `condor_history` call (if enabled).  State callbacks are fired for
+            changed states.
+        """
 
-                # look the other way and pray...
-                info['returncode'] = 0
-                info['state']      = api.DONE
+        # NOTE: bulk queries ignore the cache timeout,
+        #       but they do update the timestamps
 
+        # the monitoring thread and the application may update concurrently
+        with self._ulock:
 
-            elif info['state'] in [api.RUNNING, api.PENDING]:
+            # if the 'gone' flag is set, there's no need to query the job
+            # state again. it's gone forever -- but we check all others
+            to_check = dict()  # condor pid : job id
+            for job_id in job_ids:
 
-                # run the Condor 'condor_history' command to get info about
-                # finished jobs
-                self._logger.info("use condor_history on job %s", pid)
-                ret, out, err = self.shell.run_sync("unset GREP_OPTIONS; %s -long -match 1 %s | \
-                    grep -E '(ExitCode)|(CompletionDate)|(JobCurrentStartDate)|(QDate)|(Err)|(Out)'" \
-                    % (self._commands['condor_history'], pid))
+                if job_id not in self.jobs:
+                    raise NoSuccess("Unknown job ID: %s." % job_id)
 
-                if ret != 0:
-                    # no job hist either - declar job as MIA
-                    self._logger.error("Error using 'condor_history': %s : %s", out, err)
-                    info['returncode'] = 1
+                info = self.jobs[job_id]
+                if info['gone'] or info['state'] in FINAL:
+                    continue
 
-                else:
-                    # parse the egrep result. this should look something like this:
-                    # ExitStatus = 0
-                    results = out.split('\n')
-                    for result in results:
-                        if len(result.split('=')) == 2:
-                            key, val = result.split('=')
-                            key = key.strip()  # strip() removes whitespaces at the
-                            val = val.strip()  # beginning and the end of the string
+                cluster_id, proc_id = self._split_pid(job_id)
+                to_check['%s.%s' % (cluster_id, proc_id)] = job_id
 
-                            if   key == 'ExitCode'           : info['returncode']  = int(val)
-                            elif key == 'QDate'              : info['create_time'] = val
-                            elif key == 'JobCurrentStartDate': info['start_time']  = val
-                            elif key == 'CompletionDate'     : info['end_time']    = val
-                            elif key == 'Out'                : info['stdout']      = val.strip('"')
-                            elif key == 'Err'                : info['stderr']      = val.strip('"')
+            # do we have anything to do?
+            if not to_check:
+                return
 
-                if info['returncode'] == 0: info['state'] = DONE
-                else                      : info['state'] = FAILED
+            old_states = dict([(job_id, self.jobs[job_id]['state'])
+                               for job_id in to_check.values()])
 
-        if info['gone']:
-            td = info['td']
-            self._handle_file_transfers(td, mode='out')
+            # run one `condor_q` for all clusters of all jobs, and parse its
+            # output while it arrives.  Jobs which are not listed anymore have
+            # left the queue.
+            clusters = sorted(set([pid.split('.')[0] for pid in to_check]))
+            missing  = dict(to_check)
+            ts       = time.time()
+            for elems in self._condor_q_rows(clusters):
 
-        info['timestamp'] = time.time()
+                cluster_id, proc_id, jobstatus, exit_code, exit_by_signal, \
+                completiondate = elems
 
+                # other jobs in the same cluster are not of interest
+                job_id = missing.pop('%s.%s' % (cluster_id, proc_id), None)
+                if not job_id:
+                    continue
 
-    # ----------------------------------------------------------------
-    #
-    def _job_get_info_bulk(self, cluster_id, job_ids):
-        """ get job attributes via condor_q
-        """
+                # we always set exit_code to '1' if exited_by_signal
+                if not exit_code and exit_by_signal == 'true':
+                    exit_code = 1
 
-        # NOTE: bulk queries ignore the cache timeout,
-        #       but they do update the timestamps
+                info = self.jobs[job_id]
+                info['state']      = _condor_to_saga_jobstate(jobstatus)
+                info['end_time']   = completiondate
+                info['returncode'] = exit_code
+                info['timestamp']  = ts
+
+            # search condor history for the jobs which left the queue
+            if self._adaptor.use_hist and missing:
+                self._condor_history(missing)
+
+            # are still any jobs missing?
+            if missing:
+
+                # alas, condor_history is not always enabled, and does not
+                # work everywhere (like on the osg xsede bridge), so we cannot
+                # consider this an error.  We will handle all remaining jobs
+                # as disappeared, ie. as DONE.
+                self._logger.warning('could not find all jobs %s: %s',
+                                     len(missing), list(missing.values()))
+
+                ts = time.time()
+                for job_id in missing.values():
+
+                    # look the other way and pray...
+                    self._logger.warning('jobs %s disappeared', job_id)
+                    info = self.jobs[job_id]
+                    info['state']     = DONE
+                    info['gone']      = True
+                    info['timestamp'] = ts
 
-        # if the 'gone' flag is set, there's no need to query the job
-        # state again. it's gone forever -- but we check all others
-        found    = list()  # keep track of jobs for which we found new info
-        to_check = list()  # keep track of jobs for which we found new info
+                    if info['returncode'] is None:
+                        info['returncode'] = 0
 
-        # we don't need to check final jobs
-        for job_id in job_ids:
+            for job_id in to_check.values():
 
-            if job_id not in self.jobs:
-                raise ValueError('job %s: unknown')
+                info = self.jobs[job_id]
 
-            if self.jobs[job_id]['gone']:
-                self._logger.debug('dont check %s', job_id)
-                found.append(job_id)
-            else:
-                to_check.append(job_id)
+                if info['gone']:
+                    self._handle_file_transfers(info['td'], mode='out')
 
-        # do we have anything to do?
-        if not to_check:
-            return
+                if info['state'] != old_states[job_id]:
 
-        # run the Condor 'condor_q' command to get some infos about our job
-        opts = "%s -autoformat:, ProcId JobStatus ExitStatus ExitBySignal CompletionDate" % cluster_id
-        ret, out, err = self._run_condor_q(retries=3, timeout=60, options=opts)
-        self._logger.debug('got state info:%s\n%s\n%s\n%s', opts, ret, out, err)
+                    job = self._monitored.get(job_id)
+                    if job and job._api():
+                        self._logger.info("update Job %s (state: %s)",
+                                          job_id, info['state'])
+                        job._api()._attributes_i_set('state', info['state'],
+                                                     job._api()._UP, True)
 
-        if ret != 0:
-            raise Exception("condor_q failed\n[%s]\n[%s]" % (out, err))
 
-        results = list(filter(bool, out.split('\n')))
-        ts      = time.time()
-        for row in results:
+    # ----------------------------------------------------------------
+    #
+    def _condor_q_rows(self, clusters):
+        """ yield the `condor_q` rows for all jobs of the given clusters, with
+            one `condor_q` call per `_QUERY_LINE_MAX` characters of cluster ids
+        """
 
-            self._logger.debug('row: %s', row)
+        for chunk in sumisc.split_by_length(clusters, _QUERY_LINE_MAX):
 
-            # Some processes in cluster found with condor_q!
-            procid, jobstatus, exit_code, exit_by_signal, completiondate \
-                    = [col.strip() for col in row.split(',')]
+            opts  = "%s -autoformat:, ClusterId ProcId JobStatus " \
+                    "ExitStatus ExitBySignal CompletionDate" % ' '.join(chunk)
+            lines = self._stream_condor_q(opts, retries=3, timeout=60)
 
-            self._logger.debug('   : %s - %s - %s - %s - %s',
-                    procid, jobstatus, exit_code, exit_by_signal, completiondate)
+            for elems in _autoformat_rows(lines, 6, self._logger):
+                yield elems
 
-            # we always set exit_code to '1' if exited_by_signal
-            if not exit_code and exit_by_signal == 'true':
-                exit_code = 1
 
-            matched = False
-            for job_id in to_check:
+    # ----------------------------------------------------------------
+    #
+    def _condor_history(self, missing):
+        """ look up jobs which left the queue in the condor history, with one
+            `condor_history` call per `_QUERY_LINE_MAX` characters of job
+            constraints.  Jobs which are found are removed from the given
+            `missing` dict (condor pid : job id).
+        """
 
-                if job_id.endswith('.%s]' % procid):
+        terms = ['(ClusterId == %s && ProcId == %s)' % tuple(pid.split('.'))
+                 for pid in sorted(missing.keys())]
 
-                    self._logger.debug('match: %s', job_id)
+        for chunk in sumisc.split_by_length(terms, _QUERY_LINE_MAX, sep=4):
 
-                    found.append(job_id)
-                    info = self.jobs[job_id]
-                    info['state']      = _condor_to_saga_jobstate(jobstatus)
-                    info['end_time']   = completiondate
-                    info['returncode'] = exit_code
-                    info['timestamp']  = ts
-                    matched = True
-                    self._logger.debug('     : %s', info['state'])
-                    break
+            # `-match` lets condor_history stop once all jobs are found, instead
+            # of scanning the complete history
+            constraint = ' || '.join(chunk)
 
-            if not matched:
-                self._logger.warning('cannot match job info to any known job (%s)', row)
+            self._logger.info("use condor_history on %d jobs", len(chunk))
+            cmd = "%s -match %d -constraint '%s' -autoformat:, " \
+                  "ClusterId ProcId ExitCode ExitBySignal CompletionDate " \
+                  "JobCurrentStartDate QDate Err Out" \
+                  % (self._commands['condor_history'], len(chunk), constraint)
+            stream = self.shell.run_stream(cmd)
 
+            # parse the output while it arrives (an error message is skipped
+            # as noise)
+            ts = time.time()
+            for elems in _autoformat_rows(stream, 9, self._logger):
+
+                cluster_id, proc_id, exit_code, exit_by_signal, \
+                cdate, sdate, qdate, stderr, stdout = elems
+
+                job_id = missing.pop('%s.%s' % (cluster_id, proc_id), None)
+                if not job_id:
+                    self._logger.warning('cannot match job info to any '
+                                         'known job (%s)', elems)
+                    continue
+
+                # we always set exit_code to '1' if exited_by_signal
+                if not exit_code and exit_by_signal == 'true':
+                    exit_code = 1
+
+                # make sure exit code is an int:
+                try:
+                    exit_code = int(exit_code)
+                except:
+                    # no exit code looks wrong, we assume that condor
+                    # failed, and thus also fail the job
+                    self._logger.warning("condor_history w/o exit code - "
+                                         "assume error")
+                    exit_code = -1
 
-        # Now, see if any ids are missing, and search condor history for those:
-        missing = [x for x in job_ids if x not in found]
+                info = self.jobs[job_id]
+                info['returncode']  = exit_code
+                info['create_time'] = qdate
+                info['start_time']  = sdate
+                info['end_time']    = cdate
+                info['stdout']      = stdout
+                info['stderr']      = stderr
 
-        if self._adaptor.use_hist and missing:
+                if exit_code == 0: info['state'] = DONE
+                else             : info['state'] = FAILED
 
-            self._logger.debug('incomplete %s: %s', len(missing), missing)
+                self._logger.debug('move state of %s to %s',
+                                   job_id, info['state'])
 
-            self._logger.info("use condor_history on cluster %s", cluster_id)
-            cmd = "%s %s -autoformat:, " \
-                  "ProcId ExitCode ExitBySignal CompletionDate " \
-                  "JobCurrentStartDate QDate Err Out" \
-                  % (self._commands['condor_history'], cluster_id)
-            ret, out, err = self.shell.run_sync(cmd)
+                info['gone']      = True
+                info['timestamp'] = ts
 
-            if ret != 0:
+            if stream.ret != 0:
                 # we consider this non-fatal, as that sometimes failes on the
                 # XSEDE OSG bridge without any further indication of errors
-                # raise Exception("Error running 'condor_history' (%s) (%s)" % (out, err))
-                self._logger.warning("condor_history failed: (%s) (%s)", out, err)
-                out = ''
-
-            else:
-                results = list(filter(bool, out.split('\n')))
-                ts      = time.time()
-                for row in results:
-
-                    self._logger.debug('hist row: %s', row)
+                self._logger.warning("condor_history failed: %s", stream.ret)
 
-                    elems = [col.strip() for col in row.split(',')]
-                    if len(elems) != 8:
-                        self._logger.error('condor_history noise [%s]', row)
-                        continue
 
-                    procid, exit_code, exit_by_signal,  \
-                    cdate, sdate, qdate, stderr, stdout = elems
-
-                    # we always set exit_code to '1' if exited_by_signal
-                    if not exit_code and exit_by_signal == 'true':
-                        exit_code = 1
-
-                    # make sure exit code is an int:
-                    try:
-                        exit_code = int(exit_code)
-                    except:
-                        # no exit code looks wrong, we assume that condor
-                        # failed, and thus also fail the job
-                        self._logger.warning("condor_history w/o exit code - assume error")
-                        exit_code = -1
-
-                    matched = False
-                    for job_id in to_check:
-
-                        if job_id.endswith('.%s]' % procid):
+    # ----------------------------------------------------------------
+    #
+    def _split_pid(self, job_id):
+        """ returns the cluster and proc id of a job ('<cluster>.<proc>')
+        """
 
-                            matched = True
+        pid = self._adaptor.parse_id(job_id)[1]
 
-                            if job_id not in missing:
-                                self._logger.debug('not missed: %s', job_id)
-                                continue
+        if '.' in pid:
+            cluster_id, proc_id = pid.split('.', 1)
+        else:
+            cluster_id, proc_id = pid, '0'
 
-                            self._logger.debug('match hist: %s: %s', job_id, elems)
-                            found.append(job_id)
-                            info = self.jobs[job_id]
-                            info['returncode']  = int(exit_code)
-                            info['create_time'] = qdate
-                            info['start_time']  = sdate
-                            info['end_time']    = cdate
-                            info['stdout']      = stdout
-                            info['stderr']      = stderr
+        return cluster_id, proc_id
 
-                            if int(exit_code) == 0: info['state'] = DONE
-                            else                  : info['state'] = FAILED
 
-                            self._logger.debug('move state of %s to %s', job_id, info['state'])
+    # ----------------------------------------------------------------
+    #
+    def _monitor_job(self, job):
+        """ add a job to the set of jobs watched by the state monitoring thread
+        """
 
-                            info['gone']      = True
-                            info['timestamp'] = ts
-                            break
+        with self._mlock:
 
-                    if not matched:
-                        self._logger.warning('cannot match job info to any known job (%s)', row)
+            self._monitored[job._id] = job
 
+            if not self.mt:
+                self.mt = _job_state_monitor(self, self._interval)
+                self.mt.start()
 
-        # are still any jobs missing?
-        missing = [x for x in job_ids if x not in found]
-        if missing:
 
-            # alas, condor_history seems not to work on the osg xsede bridge, so
-            # we cannot consider this an error.  We will handle all remaining
-            # jobs as disappeared, ie. as DONE.
-            self._logger.warning('could not find all jobs %s: %s', len(missing), missing)
+    # ----------------------------------------------------------------
+    #
+    def _update_states(self):
+        """ update the states of all monitored jobs in bulk.  Jobs in final
+            state are dropped from monitoring.
+        """
 
-            ts = time.time()
-            for job_id in missing:
-                self._logger.warning('jobs %s disappeared', job_id)
-                info = self.jobs[job_id]
-                info['state']     = DONE
-                info['gone']      = True
-                info['timestamp'] = ts
+        with self._mlock:
+            job_ids = list(self._monitored.keys())
 
+        if job_ids:
+            self._update_jobs(job_ids)
 
-        # FIXME: Transfer stuff.  Use self._handle_transfers(out)
-        #
-        # if info['gone'] is True:
-        #     # If we are running over SSH, copy the output to our local system
-        #     if self.shell.url.scheme in ["ssh", 'gsissh']:
-        #         files = []
-        #
-        #         if info['transfers']:
-        #             t = info['transfers']
-        #             self._logger.debug("TransferOutput: %s", t)
-        #
-        #             # Remove leading and ending double quotes
-        #             if t.startswith('"') and t.endswith('"'):
-        #                 t = t[1:-1]
-        #
-        #             # Parse comma separated list
-        #             files += t.split(',')
-        #
-        #         if info['stdout']:
-        #             t = info['stdout']
-        #             self._logger.debug("StdOut: %s", t)
-        #
-        #             # Remove leading and ending double quotes
-        #             if t.startswith('"') and t.endswith('"'):
-        #                 t = t[1:-1]
-        #
-        #             files.append(t)
-        #
-        #         if info['stderr']:
-        #             t = info['stderr']
-        #             self._logger.debug("StdErr: %s", t)
-        #
-        #             # Remove leading and ending double quotes
-        #             if t.startswith('"') and t.endswith('"'):
-        #                 t = t[1:-1]
-        #
-        #             files.append(t)
-        #
-        #         # Transfer list of files
-        #         for f in files:
-        #             f = f.strip()
-        #             self._logger.info("Transferring file %s", f)
-        #             self.shell.stage_from_remote(f, f)
+        with self._mlock:
+            for job_id in job_ids:
+                job  = self._monitored.get(job_id)
+                info = self.jobs.get(job_id)
+                if not info or info['gone'] or info['state'] in FINAL or \
+                   not job or not job._api():
+                    self._monitored.pop(job_id, None)
 
 
     # ----------------------------------------------------------------
@@ -1548,6 +1644,8 @@ class CondorJobService (cpi.job.Service):
             self.jobs[job_id]['state'] = PENDING
             self.jobs[job_id]['td']    = job.description.transfer_directives
 
+            self._monitor_job(job._adaptor)
+
         # remove submit file(s)
         # XXX: maybe leave them in case of debugging?
         # ret, out, _ = self.shell.run_sync ('rm %s' % submit_file_name)
@@ -1604,45 +1702,16 @@ class CondorJobService (cpi.job.Service):
     #
     @SYNC_CALL
     def container_get_states(self, jobs):
+        """ get the states of all jobs with one `condor_q` call (and one
+            `condor_history` call for jobs which left the queue)
+        """
 
-        log = self._logger
-
-        # JobIds also include the rm, so we strip that out.  Then sort in
-        # clusters we can query
-        clusters = dict()
-        for job in jobs:
-
-            job_id     = job._adaptor._id
-            proc_id    = self._adaptor.parse_id(job_id)[1]
-            cluster_id = proc_id.split('.', 1)[0]
-
-            log.debug('get bulk state for %s %s %s', job_id, proc_id, cluster_id)
-
-            if cluster_id not in clusters:
-                clusters[cluster_id] = list()
-            clusters[cluster_id].append(job_id)
-
+        job_ids = [job._adaptor._id for job in jobs]
 
-        states = list()
-        for cluster_id in clusters:
-
-            job_ids   = clusters[cluster_id]
-            log.debug(' query job state for %s', job_ids)
-            bulk_info = self._job_get_info_bulk(cluster_id, job_ids)
-            states   += [self.jobs[job_id]['state'] for job_id in job_ids]
+        self._logger.debug('get bulk state for %s', job_ids)
+        self._update_jobs(job_ids)
 
-        return states
-
-        # TODO: check "cache" for final state jobs
-        # check if we have already reach a terminal state
-        # if self.jobs[job_id]['state'] in [CANCELED, FAILED, DONE]:
-        #     return self.jobs[job_id]['state']
-        #
-        # # check if we can / should update
-        # if (self.jobs[job_id]['gone'] is not True):
-        #     self._job_get_info(job_id=job_id)
-        #
-        # return self.jobs[job_id]['state']
+        return [self.jobs[job_id]['state'] for job_id in job_ids]
 
 
 ###############################################################################
@@ -1676,6 +1745,7 @@ class CondorJob (cpi.job.Job):
         if job_info['reconnect'] is True:
             self._id      = job_info['reconnect_jobid']
             self._started = True
+            self.js._monitor_job(self)
         else:
             self._id      = None
             self._started = False
@@ -1736,6 +1806,7 @@ class CondorJob (cpi.job.Job):
         """
         self._id = self.js._job_run(self.jd)
         self._started = True
+        self.js._monitor_job(self)
 
 
     # ----------------------------------------------------------------
@@ -22,6 +22,10 @@ from ...           import exceptions as rse
 # _async version if ttype is set and !None
 def SYNC_CALL (sync_function) :
 
+    # only some functions will provide metrics, and thus need the _from_task
+    # parameter -- check that once, not on every call
+    takes_from_task = '_from_task' in inspect.getfullargspec (sync_function).args
+
     def wrap_function (self, *args, **kwargs) :
 
         if 'ttype' in kwargs and kwargs['ttype']:
@@ -53,11 +57,9 @@ def SYNC_CALL (sync_function) :
         if 'ttype' in kwargs :
             del kwargs['ttype']
 
-        # only some functions will provide metrics, and thus need the _from_task
-        # parameter -- strip that as well if its not needed
-        if '_from_task' in kwargs:
-            if '_from_task' not in inspect.getargspec (sync_function).args:
-                del(kwargs['_from_task'])
+        # strip the _from_task parameter as well if its not needed
+        if '_from_task' in kwargs and not takes_from_task:
+            del(kwargs['_from_task'])
 
         return sync_function (self, *args, **kwargs)
 
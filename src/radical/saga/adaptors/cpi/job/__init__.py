@@ -7,6 +7,7 @@ __license__   = "MIT"
 from .job         import Job
 from .job         import Self
 from .service     import Service
+from .state_cache import StateCache
 # from .description import Description
 
 
@@ -14,6 +14,10 @@ from ..sasync     import Async
 
 class Job (CPIBase, Async) :
 
+    # adaptors which maintain a service wide job state cache point this to the
+    # `StateCache` instance of the job service (see `Service._init_state_cache`)
+    _state_cache = None
+
     # ----------------------------------------------------------------
     #
     # initialization methods
@@ -116,6 +120,19 @@ class Job (CPIBase, Async) :
     @ASYNC
     def get_state_async           (self, ttype)          : pass
 
+    # serve the job state from the state cache if possible, and fall back to
+    # the adaptor's `get_state()` if the cached state is stale
+    def _get_state_cached (self) :
+
+        if not self._state_cache :
+            return self.get_state ()
+
+        job_id = self.get_id ()
+        if not job_id :
+            return self.get_state ()
+
+        return self._state_cache.get (job_id, self.get_state)
+
     @SYNC
     def get_result                (self, ttype)          : pass
     @ASYNC
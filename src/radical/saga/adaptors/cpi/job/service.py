@@ -6,14 +6,24 @@ __license__   = "MIT"
 
 """ Provides the SAGA Job Service CPI """
 
+import time
+
 from ..decorators import CPI_SYNC_CALL  as SYNC
 from ..decorators import CPI_ASYNC_CALL as ASYNC
 from ..base       import CPIBase
 from ..sasync     import Async
 
+from .state_cache import StateCache
+
+from ....constants     import ANY
+from ....job.constants import FINAL
+
 
 class Service (CPIBase, Async) :
 
+    # service wide job state cache -- see `_init_state_cache()`
+    _state_cache = None
+
     # ----------------------------------------------------------------
     #
     # initialization methods
@@ -23,6 +33,43 @@ class Service (CPIBase, Async) :
         _cpi_base = super  (Service, self)
         _cpi_base.__init__ (api, adaptor)
 
+
+    # create the job state cache for this service.  The staleness bound is
+    # taken from the `state_ttl` option of the adaptor config (in seconds).
+    def _init_state_cache (self) :
+
+        ttl = float(self._adaptor._cfg.get ('state_ttl') or 0.0)
+        self._state_cache = StateCache (ttl)
+
+        return self._state_cache
+
+
+    # Poll the states of the given jobs via `container_get_states()` (i.e. with
+    # one bulk query per poll) until all jobs (mode `ALL`) or any job (mode
+    # `ANY`) reached a final state, or until the timeout (in seconds, negative
+    # for no timeout) expired.  Returns the first final job for mode `ANY`.
+    def _container_wait_states (self, jobs, mode, timeout, interval=1.0) :
+
+        time_start = time.time ()
+
+        while True :
+
+            states = self.container_get_states (jobs)
+            final  = [job for job, state in zip (jobs, states)
+                          if  state in FINAL]
+
+            if  mode == ANY and final :
+                return final[0]
+
+            if  mode != ANY and len(final) == len(jobs) :
+                return None
+
+            if  timeout is not None and timeout >= 0 :
+                if  time.time () - time_start + interval > timeout :
+                    return None
+
+            time.sleep (interval)
+
     @SYNC
     def init_instance              (self, rm, session)         : pass
     @ASYNC
@@ -0,0 +1,144 @@
+
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2021, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+
+""" Provides a job state cache shared by all jobs of a job service """
+
+import time
+import threading as mt
+
+from ....job.constants import FINAL
+
+
+# ------------------------------------------------------------------------------
+#
+class StateCache (object) :
+    """
+    A job service keeps one `StateCache` instance for all its jobs.  The cache
+    is filled by the adaptor whenever it learns about a job state -- from
+    a state query, from a background poller, or from a state notification.
+    Reads are served from the cache as long as the cached state is younger
+    than the staleness bound `ttl` (in seconds).  Final states never become
+    stale.
+
+    When a cached state is stale, `get()` calls the given `fetch` method to
+    query the backend.  Concurrent reads for the same job are coalesced: only
+    one thread performs the query, all others wait for its result.
+
+    A `ttl` of `0.0` disables caching of non-final states, but still coalesces
+    concurrent queries.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__ (self, ttl=0.0) :
+
+        self._ttl      = float(ttl)
+        self._states   = dict()    # job_id : [state, timestamp]
+        self._fetching = set()     # job_ids with a backend query in flight
+        self._cond     = mt.Condition ()
+
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def ttl (self) :
+        return self._ttl
+
+
+    # --------------------------------------------------------------------------
+    #
+    def update (self, job_id, state) :
+        """
+        Record a state for the given job.  This also refreshes the timestamp if
+        the state did not change, so pollers should report all states they
+        obtained, not only changed ones.
+        """
+
+        if not job_id :
+            return
+
+        with self._cond :
+
+            # final states are final
+            old = self._states.get (job_id)
+            if old and old[0] in FINAL and state not in FINAL :
+                return
+
+            self._states[job_id] = [state, time.time ()]
+            self._cond.notify_all ()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def remove (self, job_id) :
+
+        with self._cond :
+            self._states.pop (job_id, None)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _lookup (self, job_id, ttl) :
+
+        entry = self._states.get (job_id)
+
+        if not entry :
+            return None
+
+        state, stamp = entry
+        if state in FINAL or time.time () - stamp < ttl :
+            return state
+
+        return None
+
+
+    # --------------------------------------------------------------------------
+    #
+    def get (self, job_id, fetch=None, ttl=None) :
+        """
+        Return the cached state of the given job if it is not stale.
+        Otherwise, return the result of `fetch()` (which is expected to also
+        `update()` the cache), or `None` if no `fetch` method is given.
+        """
+
+        if ttl is None :
+            ttl = self._ttl
+
+        with self._cond :
+
+            state = self._lookup (job_id, ttl)
+            if state is not None or not fetch :
+                return state
+
+            # some other thread is already querying this job -- wait for the
+            # result of that query and use it
+            if job_id in self._fetching :
+                while job_id in self._fetching :
+                    self._cond.wait ()
+
+                entry = self._states.get (job_id)
+                if entry :
+                    return entry[0]
+
+            self._fetching.add (job_id)
+
+        state = None
+        try :
+            state = fetch ()
+
+        finally :
+            # record the result before releasing the waiting threads
+            with self._cond :
+                if state is not None :
+                    self.update (job_id, state)
+                self._fetching.discard (job_id)
+                self._cond.notify_all ()
+
+        return state
+
+
+# ------------------------------------------------------------------------------
+
@@ -26,11 +26,16 @@ from ...job           import constants  as c
 from ...exceptions    import *
 from ...              import job        as sj
 from ...utils         import pty_shell  as sups
+from ...utils         import misc       as sumisc
 from ..sge.sgejob     import SgeKeyValueParser
 
 SYNC_CALL  = cpi.decorators.SYNC_CALL
 ASYNC_CALL = cpi.decorators.ASYNC_CALL
 
+# max length of the job id list in one llq command line, to stay well below the
+# pty line length limit (4095 characters)
+_QUERY_LINE_MAX = 2000
+
 
 # --------------------------------------------------------------------
 #
@@ -773,6 +778,88 @@ class LOADLJobService (cpi.job.Service):
 
         return self.jobs[job_id]['state']
 
+    # ----------------------------------------------------------------
+    #
+    def _job_get_states(self, job_ids, job_objs=None):
+        """ get the states of many jobs with one pipelined `llq` call per
+            `_QUERY_LINE_MAX` characters of job ids.  Jobs which are not listed
+            by llq anymore are updated individually (from the remote job info,
+            see `_retrieve_job()`).  For jobs in `job_objs` (saga job id : api
+            job object), state callbacks are fired for changed states.
+        """
+
+        if job_objs is None:
+            job_objs = dict()
+
+        # only query jobs which can still change state
+        active = dict()  # loadl job id : saga job id
+        for job_id in job_ids:
+            info = self.jobs[job_id]
+            if info['gone'] is not True and \
+               info['state'] not in [c.CANCELED, c.FAILED, c.DONE]:
+                rm, pid = self._adaptor.parse_id(job_id)
+                active[pid] = job_id
+
+        if active:
+
+            old_states = dict([(job_id, self.jobs[job_id]['state'])
+                               for job_id in active.values()])
+
+            chunks = sumisc.split_by_length(list(active.keys()),
+                                            _QUERY_LINE_MAX)
+            cmds   = ["%s -j %s -r %%id %%st" % (self._commands['llq']['path'],
+                                                 ' '.join(chunk))
+                      for chunk in chunks]
+
+            gone = list()
+            for chunk, (ret, out, _) in zip(chunks,
+                                            self.shell.run_pipelined(cmds)):
+
+                # output is something like
+                # v4c064.8637.0!R
+                # v4c064.8638.0!I
+                # OR
+                # llq: There is currently no job status to report.
+                if ret != 0:
+                    # we don't know if these jobs are still queued: keep their
+                    # state, and look again on the next call
+                    self._logger.warning("llq failed: %s", out)
+                    continue
+
+                listed = set()
+                for line in out.split('\n'):
+
+                    if '!' not in line or line.startswith('llq:'):
+                        continue
+
+                    step, ll_state = line.strip().split('!', 1)
+                    pid    = step.rsplit('.', 1)[0]  # strip step number
+                    job_id = active.get(pid)
+
+                    if job_id:
+                        listed.add(pid)
+                        self.jobs[job_id]['state'] = \
+                                _ll_to_saga_jobstate(ll_state.strip())
+
+                # jobs which left the queue
+                gone += [active[pid] for pid in chunk if pid not in listed]
+
+            for job_id in gone:
+                self.jobs[job_id] = self._job_get_info(job_id=job_id)
+
+            # fire job state callbacks if 'state' has changed
+            for job_id, old_state in old_states.items():
+
+                state   = self.jobs[job_id]['state']
+                job_obj = job_objs.get(job_id)
+
+                if job_obj is not None and state != old_state:
+                    job_obj._attributes_i_set('state', state,
+                                              job_obj._UP, True)
+
+        return dict([(job_id, self.jobs[job_id]['state'])
+                     for job_id in job_ids])
+
     # ----------------------------------------------------------------
     #
     def _job_get_exit_code(self, job_id):
@@ -970,29 +1057,52 @@ class LOADLJobService (cpi.job.Service):
         return ids
 
 
-  # # ----------------------------------------------------------------
-  # #
-  # def container_run (self, jobs) :
-  #     self._logger.debug ("container run: %s"  %  str(jobs))
-  #     # TODO: this is not optimized yet
-  #     for job in jobs:
-  #         job.run ()
-  #
-  #
-  # # ----------------------------------------------------------------
-  # #
-  # def container_wait (self, jobs, mode, timeout) :
-  #     self._logger.debug ("container wait: %s"  %  str(jobs))
-  #     # TODO: this is not optimized yet
-  #     for job in jobs:
-  #         job.wait ()
-  #
-  #
-  # # ----------------------------------------------------------------
-  # #
-  # def container_cancel (self, jobs, timeout) :
-  #     self._logger.debug ("container cancel: %s"  %  str(jobs))
-  #     raise NoSuccess ("Not Implemented");
+    # ----------------------------------------------------------------
+    #
+    def container_run (self, jobs) :
+        self._logger.debug ("container run: %s"  %  str(jobs))
+        # TODO: this is not optimized yet
+        for job in jobs:
+            job.run ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_wait (self, jobs, mode, timeout) :
+        """ poll the states of all jobs with one `llq` call per
+            iteration (see `_job_get_states()`)
+        """
+        self._logger.debug ("container wait: %s"  %  str(jobs))
+
+        for job in jobs:
+            if job._adaptor._started is False:
+                raise IncorrectState("Can't wait for job that hasn't "
+                                     "been started")
+
+        return self._container_wait_states(jobs, mode, timeout, interval=0.5)
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_cancel (self, jobs, timeout) :
+        self._logger.debug ("container cancel: %s"  %  str(jobs))
+        # TODO: this is not optimized yet
+        for job in jobs:
+            job.cancel (timeout)
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_get_states (self, jobs) :
+        """ get the states of all jobs with one `llq` call
+        """
+        self._logger.debug ("container get_states: %s"  %  str(jobs))
+
+        job_objs = dict([(job._adaptor._id, job) for job in jobs
+                                                 if  job._adaptor._started])
+        states   = self._job_get_states(list(job_objs.keys()), job_objs)
+
+        return [states.get(job._adaptor._id, c.NEW) for job in jobs]
 
 
 ###############################################################################
@@ -1016,6 +1126,9 @@ class LOADLJob (cpi.job.Job):
         self.jd = job_info["job_description"]
         self.js = job_info["job_service"]
 
+        # the js is responsible for job bulk operations
+        self._container = self.js
+
         if job_info['reconnect'] is True:
             self._id      = job_info['reconnect_jobid']
             self._name    = self.jd.get(c.NAME)
@@ -9,7 +9,7 @@ __license__   = "MIT"
 
 import re
 import os
-import copy
+import json
 import time
 import threading
 import datetime
@@ -25,13 +25,15 @@ from ..cpi import job as cpi
 from ...              import exceptions as rse
 from ...              import job        as rsj
 from ...utils         import pty_shell  as rsups
+from ...utils         import misc       as rsumisc
 
 
 SYNC_CALL  = cpi_base.decorators.SYNC_CALL
 ASYNC_CALL = cpi_base.decorators.ASYNC_CALL
 
-SYNC_WAIT_UPDATE_INTERVAL = 1  # seconds
-MONITOR_UPDATE_INTERVAL   = 3  # seconds
+SYNC_WAIT_UPDATE_INTERVAL = 1    # seconds
+MONITOR_UPDATE_INTERVAL   = 3    # seconds
+BJOBS_LINE_MAX            = 2000 # max length of the job id list per bjobs call
 
 # Intel LSF hosts have SMT default to 4
 SMT_DEFAULT = 1
@@ -95,39 +97,16 @@ class _job_state_monitor(threading.Thread):
         
             try:
                 # do bulk updates here! we don't want to pull information
-                # job by job. that would be too inefficient!
-                jobs = self.js.jobs
-                for job in jobs:
-
-                    # if the job hasn't been started, we can't update its
-                    # state. we can tell if a job has been started if it
-                    # has a job id
-                    job_info = self.js.jobs[job]
-                    if not job_info.get('job_id'):
-                        continue
-
-                    # we only need to monitor jobs that are not in a
-                    # terminal state, so we can skip the ones that are
-                    # either done, failed or canceled
-                    state = job_info['state']
-                    if state in rsj.FINAL:
-                        continue
-
-                    # job is not final and we got new info - replace job info
-                    new_info = self.js._job_get_info(job)
-                    self.js.jobs[job] = new_info
-
-                    # we only care to state updates though when the state
-                    # actually changed from last time
-                    new_state = new_info['state']
-                    if new_state == state:
-                        continue
-
-                    # fire job state callback if 'state' has changed
-                    self.logger.info("update Job %s (state: %s)"
-                                    % (job, new_state))
-                    job._api()._attributes_i_set('state', new_state,
-                                                 job._api()._UP, True)
+                # job by job. that would be too inefficient!  We only need to
+                # monitor jobs which have been started (i.e., which have a job
+                # id) and are not in a terminal state.
+                jobs = [job for job, job_info in list(self.js.jobs.items())
+                            if job_info.get('job_id')
+                            and job_info['state'] not in rsj.FINAL]
+
+                # `_job_get_states` fires the state callbacks
+                if jobs:
+                    self.js._job_get_states(jobs)
 
                 time.sleep(MONITOR_UPDATE_INTERVAL)
 
@@ -446,6 +425,10 @@ class LSFJobService(cpi.Service):
         self.shell   = None
         self.jobs    = dict()
 
+        # use `bjobs -json` for state queries, unless LSF turns out to be too
+        # old for that (see `_bjobs()`)
+        self._bjobs_json = True
+
         # the monitoring thread - one per service instance
         self.mt = _job_state_monitor(job_service=self)
         self.mt.start()
@@ -544,8 +527,9 @@ class LSFJobService(cpi.Service):
 
     # --------------------------------------------------------------------------
     #
-    def _job_run(self, job_obj):
-        """ runs a job via qsub
+    def _job_script(self, job_obj):
+        """
+        generates an LSF job script from the job's description
         """
         # get the job description
         jd = job_obj.jd
@@ -571,30 +555,79 @@ class LSFJobService(cpi.Service):
         except Exception as e:
             raise rse.BadParameter(str(e)) from e
 
-        # try to create the working directory (if defined)
-        # WARNING: this assumes a shared filesystem between login node and
-        #          compute nodes.
-        if jd.working_directory:
-            pwd = jd.working_directory
-            self._logger.info("Creating working directory %s" % pwd)
-            ret, out, _ = self.shell.run_sync("mkdir -p %s" % pwd)
+        return script
 
-            if ret:
-                raise rse.NoSuccess("Couldn't create workdir %s" % out)
+
+    # --------------------------------------------------------------------------
+    #
+    def _make_workdirs(self, job_objs):
+        """
+        create the working directories of the given jobs (if defined)
+        WARNING: this assumes a shared filesystem between login node and
+                 compute nodes.
+        """
+
+        pwds = [job_obj.jd.working_directory for job_obj in job_objs
+                                              if job_obj.jd.working_directory]
+        if not pwds:
+            return
+
+        self._logger.info("Creating working directories %s" % pwds)
+        ret, out, _ = self.shell.run_sync("mkdir -p %s" % ' '.join(pwds))
+
+        if ret:
+            raise rse.NoSuccess("Couldn't create workdir %s" % out)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _bsub_cmd(self, script):
+        """
+        create the command which submits the given job script
+        """
 
         # (1) create a temporary file with 'mktemp' and write the contents of
-        #     the generated PBS script into it
-        # (2) call 'qsub <tmpfile>' to submit the script to the batch system
+        #     the generated LSF script into it.  The script is already escaped
+        #     for double quotes.  Note that the command spans several lines:
+        #     the pty limits the length of single lines.
+        # (2) call 'bsub <tmpfile>' to submit the script to the batch system
         #
-        cmdline = \
-            "SCRIPTFILE=`mktemp -p $HOME -t SAGA-Python-LSFJobScript.XXXXXX` \
-             && echo \"%s\" > $SCRIPTFILE \
-             && %s $SCRIPTFILE \
-             && rm -f $SCRIPTFILE" % (script, self._commands['bsub']['path'])
-        ret, out, _ = self.shell.run_sync(cmdline)
+        return "SCRIPTFILE=`mktemp -p $HOME -t SAGA-Python-LSFJobScript.XXXXXX`" \
+               " && echo \"%s\" > $SCRIPTFILE" \
+               " && %s $SCRIPTFILE" \
+               " && rm -f $SCRIPTFILE" % (script, self._commands['bsub']['path'])
 
-        if ret:
-            raise rse.NoSuccess("bsub error: %s [%s]" % (out, cmdline))
+
+    # --------------------------------------------------------------------------
+    #
+    def _write_scripts(self, scripts):
+        """
+        write the given job scripts into a new temporary directory (as files
+        `0`, `1`, ...), with one (multi-line) command, and return the
+        directory's path
+        """
+
+        cmd = "SCRIPTDIR=`mktemp -d -p $HOME -t SAGA-Python-LSFJobScripts.XXXXXX`"
+        for idx, script in enumerate(scripts):
+            cmd += " && echo \"%s\" > $SCRIPTDIR/%d" % (script, idx)
+        cmd += " && echo $SCRIPTDIR"
+
+        ret, out, _ = self.shell.run_sync(cmd)
+        lines       = out.strip().split('\n')
+
+        if ret or not lines[-1].strip():
+            raise rse.NoSuccess("Couldn't write job scripts: %s" % out)
+
+        return lines[-1].strip()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_submitted(self, job_obj, out):
+        """
+        parse the job id from the output of bsub, and register the job as
+        submitted
+        """
 
         # parse the job id. bsub's output looks like this:
         # Job <901545> is submitted to queue <regular>
@@ -630,6 +663,24 @@ class LSFJobService(cpi.Service):
         return job_id
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _job_run(self, job_obj):
+        """ runs a job via bsub
+        """
+
+        script = self._job_script(job_obj)
+        self._make_workdirs([job_obj])
+
+        cmdline     = self._bsub_cmd(script)
+        ret, out, _ = self.shell.run_sync(cmdline)
+
+        if ret:
+            raise rse.NoSuccess("bsub error: %s [%s]" % (out, cmdline))
+
+        return self._job_submitted(job_obj, out)
+
+
     # --------------------------------------------------------------------------
     #
     def _retrieve_job(self, job_id):
@@ -719,8 +770,7 @@ class LSFJobService(cpi.Service):
         # curr. info will contain the new job info collect. it starts off
         # as a copy of prev_info (don't use deepcopy because there is an API
         # object in the dict -> recursion)
-
-        curr_info = copy.deepcopy(prev_info)
+        curr_info = dict(prev_info)
 
         rm, pid = self._adaptor.parse_id(job_obj._id)
 
@@ -743,24 +793,34 @@ class LSFJobService(cpi.Service):
 
         else:
 
-            if "Illegal job ID" not in out:
+            if "Illegal job ID" not in out and "is not found" not in out:
                 raise rse.NoSuccess("bjobs error: %s" % out)
 
-            # Let's see if the previous job state was running or pending. in
-            # that case, the job is gone now, which can either mean DONE,
-            # or FAILED. the only thing we can do is set it to 'DONE'
-            curr_info['gone'] = True
-            self._logger.warning("job disappeared - set to DONE")
-
-            if prev_info['state'] in [rsj.RUNNING, rsj.PENDING]:
-                curr_info['state'] = rsj.DONE
-            else:
-                curr_info['state'] = rsj.FAILED
+            self._job_gone(curr_info)
 
         # return the new job info dict
         return curr_info
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _job_gone(self, job_info):
+        """
+        update the info of a job which LSF does not know (anymore)
+        """
+
+        # Let's see if the previous job state was running or pending. in
+        # that case, the job is gone now, which can either mean DONE,
+        # or FAILED. the only thing we can do is set it to 'DONE'
+        job_info['gone'] = True
+        self._logger.warning("job disappeared - set to DONE")
+
+        if job_info['state'] in [rsj.RUNNING, rsj.PENDING]:
+            job_info['state'] = rsj.DONE
+        else:
+            job_info['state'] = rsj.FAILED
+
+
     # --------------------------------------------------------------------------
     #
     def _job_get_state(self, job_obj):
@@ -768,6 +828,129 @@ class LSFJobService(cpi.Service):
         return self.jobs[job_obj]['state']
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _bjobs(self, pids):
+        """
+        query state, exit code and execution hosts for a list of LSF job ids.
+        All jobs are queried with one `bjobs` call (or a few pipelined ones
+        for very long lists).  Returns a dict `{pid: record}` for all jobs
+        bjobs reported, where records are dicts with the keys `JOBID`, `STAT`,
+        `EXIT_CODE` and `EXEC_HOST`.
+        """
+
+        fields = 'jobid stat exit_code exec_host'
+        bjobs  = self._commands['bjobs']['path']
+        chunks = rsumisc.split_by_length(pids, BJOBS_LINE_MAX)
+
+        if self._bjobs_json:
+            cmds = ["%s -o '%s' -json %s" % (bjobs, fields, ' '.join(chunk))
+                    for chunk in chunks]
+        else:
+            cmds = ["%s -noheader -o '%s delimiter=\",\"' %s"
+                    % (bjobs, fields, ' '.join(chunk)) for chunk in chunks]
+
+        records = dict()
+        for _, out, _ in self.shell.run_pipelined(cmds):
+
+            if self._bjobs_json:
+
+                # the result looks like this (jobs which are unknown to LSF
+                # are reported with an `ERROR` entry instead of `STAT`):
+                #
+                # {"COMMAND": "bjobs", "JOBS": 2, "RECORDS": [
+                #   {"JOBID": "90154", "STAT": "EXIT", "EXIT_CODE": "1",
+                #    "EXEC_HOST": "ys3833-ib"},
+                #   {"JOBID": "90155", "ERROR": "Job <90155> is not found"}]}
+                try:
+                    data = json.loads(out)
+
+                except ValueError:
+                    # LSF versions before 10.1.0.5 do not support `-json`
+                    self._logger.warning('bjobs -json failed, fall back to '
+                                         'delimited output (%s)' % out)
+                    self._bjobs_json = False
+                    return self._bjobs(pids)
+
+                for record in data.get('RECORDS', []):
+                    if record.get('JOBID') and record.get('STAT'):
+                        records[record['JOBID']] = record
+
+            else:
+
+                # the result looks like this (one line per job, jobs which are
+                # unknown to LSF are reported as 'Job <id> is not found'):
+                #
+                # 90154,EXIT,1,ys3833-ib
+                # 90155,PEND,-,-
+                for line in out.split('\n'):
+
+                    elems = line.strip().split(',')
+                    if len(elems) == 4:
+                        record = dict(zip(['JOBID', 'STAT', 'EXIT_CODE',
+                                           'EXEC_HOST'], elems))
+                        records[record['JOBID']] = record
+
+        return records
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_get_states(self, job_objs):
+        """
+        get the states of many jobs with a single `bjobs` call (see `_bjobs()`).
+        State callbacks are fired for changed states.
+        """
+
+        # only query jobs which can still change state
+        active = dict()  # lsf job id : job cpi instance
+        for job_obj in job_objs:
+            info = self.jobs[job_obj]
+            if info['gone'] is not True and info['state'] not in rsj.FINAL:
+                rm, pid = self._adaptor.parse_id(job_obj._id)
+                active[pid] = job_obj
+
+        if active:
+
+            records = self._bjobs(list(active.keys()))
+
+            for pid, job_obj in active.items():
+
+                old_state = self.jobs[job_obj]['state']
+                curr_info = dict(self.jobs[job_obj])
+                record    = records.get(pid)
+
+                if not record:
+                    # LSF does not know the job (anymore)
+                    self._job_gone(curr_info)
+
+                else:
+                    exit_code = str(record.get('EXIT_CODE', '')).strip()
+                    exec_host = str(record.get('EXEC_HOST', '')).strip()
+
+                    curr_info['state'] = _lsf_to_saga_jobstate(record['STAT'])
+
+                    if exit_code.isdigit():
+                        curr_info['returncode'] = int(exit_code)
+                    elif curr_info['state'] == rsj.DONE:
+                        curr_info['returncode'] = 0
+
+                    if exec_host not in ['', '-']:
+                        curr_info['exec_hosts'] = exec_host
+
+                self.jobs[job_obj] = curr_info
+
+                if curr_info['state'] != old_state:
+                    self._logger.info("update Job %s (state: %s)"
+                                     % (job_obj, curr_info['state']))
+                    job_obj._api()._attributes_i_set('state',
+                                                     curr_info['state'],
+                                                     job_obj._api()._UP, True)
+
+        return dict([(job_obj, self.jobs[job_obj]['state'])
+                     for job_obj in job_objs])
+
+
     # --------------------------------------------------------------------------
     #
     def _job_get_exit_code(self, job_obj):
@@ -960,22 +1143,51 @@ class LSFJobService(cpi.Service):
     # --------------------------------------------------------------------------
     #
     def container_run(self, jobs):
+        """
+        write all job scripts with one command, and submit them with one
+        pipelined sequence of `bsub` calls
+        """
 
-        # TODO: this is not optimized yet
-        for job in jobs:
-            job.run()
+        job_objs = [job._adaptor for job in jobs]
+        scripts  = [self._job_script(job_obj) for job_obj in job_objs]
+
+        self._make_workdirs(job_objs)
+
+        # pipelined commands are limited to single lines, so the (multi-line)
+        # scripts are written beforehand
+        tmp     = self._write_scripts(scripts)
+        bsub    = self._commands['bsub']['path']
+        cmds    = ['%s %s/%d' % (bsub, tmp, idx) for idx in range(len(scripts))]
+        results = self.shell.run_pipelined(cmds + ['rm -rf %s' % tmp])
+        errors  = list()
+
+        for job_obj, cmd, (ret, out, _) in zip(job_objs, cmds, results):
+
+            if ret:
+                errors.append("bsub error: %s [%s]" % (out, cmd))
+                continue
+
+            job_obj._id      = self._job_submitted(job_obj, out)
+            job_obj._started = True
+
+        if errors:
+            raise rse.NoSuccess('\n'.join(errors))
 
 
     # --------------------------------------------------------------------------
     #
     def container_wait(self, jobs, mode, timeout):
+        """
+        poll the states of all jobs with one `bjobs` call per iteration (see
+        `_job_get_states()`)
+        """
 
-        if timeout:
-            raise rse.NoSuccess("bulk wait timeout is not implemented")
-
-        # TODO: this is not optimized yet
         for job in jobs:
-            job.wait()
+            if not job._adaptor._started:
+                raise rse.IncorrectState("job has not been started")
+
+        return self._container_wait_states(jobs, mode, timeout,
+                                           interval=SYNC_WAIT_UPDATE_INTERVAL)
 
 
     # --------------------------------------------------------------------------
@@ -985,9 +1197,34 @@ class LSFJobService(cpi.Service):
         if timeout:
             raise rse.NoSuccess("bulk cancel timeout is not implemented")
 
-        # TODO: this is not optimized yet
         for job in jobs:
-            job.cancel()
+            if not job._adaptor._started:
+                raise rse.IncorrectState("job has not been started")
+
+        # cancel all jobs with one `bkill` call
+        pids = [self._adaptor.parse_id(job._adaptor._id)[1] for job in jobs]
+        ret, out, _ = self.shell.run_sync("%s %s\n"
+                                        % (self._commands['bkill']['path'],
+                                           ' '.join(pids)))
+        if ret:
+            raise rse.NoSuccess("bkill error: %s" % out)
+
+        # assume the jobs were succesfully canceled
+        for job in jobs:
+            self.jobs[job._adaptor]['state'] = rsj.CANCELED
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_get_states(self, jobs):
+        """
+        get the states of all jobs with one `bjobs` call
+        """
+
+        job_objs = [job._adaptor for job in jobs if job._adaptor._started]
+        states   = self._job_get_states(job_objs)
+
+        return [states.get(job._adaptor, rsj.NEW) for job in jobs]
 
 
 # ------------------------------------------------------------------------------
@@ -1023,6 +1260,9 @@ class LSFJob(cpi.Job):
         self.jd = job_info["job_description"]
         self.js = job_info["job_service"]
 
+        # the js is responsible for job bulk operations
+        self._container = self.js
+
         if job_info['reconnect'] is True:
             self._id      = job_info['reconnect_jobid']
             self._name    = self.jd.get(rsj.NAME)
@@ -20,17 +20,21 @@ import radical.utils as ru
 
 from ...              import exceptions as rse
 from ...utils         import pty_shell  as rsups
+from ...utils         import misc       as rsumisc
 from ...              import job        as api
 from ..               import base       as a_base
 from ..cpi            import job        as cpi_job
 from ..cpi            import decorators as cpi_decs
 
+from ...utils.job     import iter_qstat
+
 
 SYNC_CALL  = cpi_decs.SYNC_CALL
 ASYNC_CALL = cpi_decs.ASYNC_CALL
 
 SYNC_WAIT_UPDATE_INTERVAL =  1  # seconds
 MONITOR_UPDATE_INTERVAL   = 60  # seconds
+QSTAT_LINE_MAX            = 2000 # max length of the job id list per qstat call
 
 
 # ------------------------------------------------------------------------------
@@ -60,33 +64,36 @@ class _job_state_monitor(threading.Thread):
         while not self._term.is_set ():
 
             try:
-                # FIXME: do bulk updates here! we don't want to pull information
-                # job by job. that would be too inefficient!
-                jobs = self.js.jobs
+                # we only need to monitor jobs that are not in a terminal
+                # state, so we can skip the ones that are either done, failed
+                # or canceled.  Store the current states since the job infos
+                # are updated in place by _job_get_infos.
+                jobs   = self.js.jobs
+                active = dict()
 
                 for job_id in list(jobs.keys()) :
+                    if  jobs[job_id]['state'] \
+                        not in [api.DONE, api.FAILED, api.CANCELED] :
+                        active[job_id] = jobs[job_id]['state']
 
-                    job_info = jobs[job_id]
+                # pull information for all jobs in bulk, not job by job
+                infos = dict()
+                if  active :
+                    infos = self.js._job_get_infos(list(active.keys()))
 
-                    # we only need to monitor jobs that are not in a
-                    # terminal state, so we can skip the ones that are
-                    # either done, failed or canceled
-                    if  job_info['state'] \
-                        not in [api.DONE, api.FAILED, api.CANCELED] :
+                for job_id, new_job_info in infos.items() :
 
-                        new_job_info = self.js._job_get_info(job_id,
-                                                                reconnect=False)
-                        self.logger.info ("update Job %s (state: %s)"
-                                       % (job_id, new_job_info['state']))
+                    self.logger.info ("update Job %s (state: %s)"
+                                   % (job_id, new_job_info['state']))
 
-                        # fire job state callback if 'state' has changed
-                        if  new_job_info['state'] != job_info['state']:
-                            job_obj = job_info['obj']
-                            job_obj._attributes_i_set('state',
-                                    new_job_info['state'], job_obj._UP, True)
+                    # fire job state callback if 'state' has changed
+                    if  new_job_info['state'] != active[job_id]:
+                        job_obj = jobs[job_id]['obj']
+                        job_obj._attributes_i_set('state',
+                                new_job_info['state'], job_obj._UP, True)
 
-                        # update job info
-                        jobs[job_id] = new_job_info
+                    # update job info
+                    jobs[job_id] = new_job_info
 
             except Exception as e:
                 import traceback
@@ -808,16 +815,7 @@ class PBSJobService (cpi_job.Service):
         rm, pid = self._adaptor.parse_id(job_id)
 
         # run the PBS 'qstat' command to get some infos about our job
-        # TODO: create a PBSPRO/TORQUE flag once
-        if 'PBSPro_1' in self._commands['qstat']['version']:
-            qstat_flag = '-fx'
-        else:
-            qstat_flag = '-f1'
-
-        ret, out, _ = self.shell.run_sync("unset GREP_OPTIONS; %s %s %s | "
-                "grep -E -i '(job_state)|(exec_host)|(exit_status)|"
-                 "(ctime)|(start_time)|(stime)|(mtime)'"
-                % (self._commands['qstat']['path'], qstat_flag, pid))
+        ret, out, _ = self.shell.run_sync(self._qstat_cmd([pid]))
 
         if ret != 0:
 
@@ -847,74 +845,138 @@ class PBSJobService (cpi_job.Service):
         else:
 
             # The job seems to exist on the backend. let's process some data.
-
-            # TODO: make the parsing "contextual", in the sense that it takes
-            #       the state into account.
-
-            # parse the egrep result. this should look something like this:
-            #     job_state = C
-            #     exec_host = i72/0
-            #     exit_status = 0
-            results = out.split('\n')
-            for line in results:
-                if len(line.split('=')) == 2:
-                    key, val = line.split('=')
-                    key = key.strip()
-                    val = val.strip()
-
-                    # The ubiquitous job state
-                    if key in ['job_state']:  # PBS Pro and TORQUE
-                        job_info['state'] = _pbs_to_saga_jobstate(val)
-
-                    # Hosts where the job ran
-                    elif key in ['exec_host']:  # PBS Pro and TORQUE
-                        # format i73/7+i73/6+...
-                        job_info['exec_hosts'] = val.split('+')
-
-                    # Exit code of the job
-                    elif key in ['exit_status',  # TORQUE
-                                 'Exit_status'   # PBS Pro
-                                ]:
-                        job_info['returncode'] = int(val)
-
-                    # Time job got created in the queue
-                    elif key in ['ctime']:  # PBS Pro and TORQUE
-                        job_info['create_time'] = val
-
-                    # Time job started to run
-                    elif key in ['start_time',  # TORQUE
-                                 'stime'        # PBS Pro
-                                ]:
-                        job_info['start_time'] = val
-
-                    # Time job ended.
-                    #
-                    # PBS Pro doesn't have an "end time" field.
-                    # It has an "resources_used.walltime" though,
-                    # which could be added up to the start time.
-                    # We will not do that arithmetic now though.
-                    #
-                    # Alternatively, we can use mtime, as the latest
-                    # modification time will generally also be the end time.
-                    #
-                    # TORQUE has an "comp_time" (completion? time) field,
-                    # that is generally the same as mtime at the finish.
-                    #
-                    # For the time being we will use mtime as end time for
-                    # both TORQUE and PBS Pro.
-                    #
-                    if key in ['mtime']:  # PBS Pro and TORQUE
-                        job_info['end_time'] = val
+            self._parse_qstat(out, job_info)
 
         # return the updated job info
         return job_info
 
+
+    # --------------------------------------------------------------------------
+    #
+    def _qstat_cmd(self, pids):
+        """ create the qstat command line to query the given job ids
+        """
+
+        # TODO: create a PBSPRO/TORQUE flag once
+        if 'PBSPro_1' in self._commands['qstat']['version']:
+            qstat_flag = '-fx'
+        else:
+            qstat_flag = '-f1'
+
+        return "unset GREP_OPTIONS; %s %s %s | " \
+               "grep -E -i '(Job Id:)|(job_state)|(exec_host)|(exit_status)|" \
+               "(ctime)|(start_time)|(stime)|(mtime)'" \
+               % (self._commands['qstat']['path'], qstat_flag, ' '.join(pids))
+
+
+    # --------------------------------------------------------------------------
+    #
     def _parse_qstat(self, haystack, job_info):
+        """ parse the qstat attributes of a single job into job_info
+        """
 
+        # TODO: make the parsing "contextual", in the sense that it takes
+        #       the state into account.
+
+        # parse the egrep result. this should look something like this:
+        #     job_state = C
+        #     exec_host = i72/0
+        #     exit_status = 0
+        results = haystack.split('\n')
+        for line in results:
+            if len(line.split('=')) == 2:
+                key, val = line.split('=')
+                key = key.strip()
+                val = val.strip()
+
+                # The ubiquitous job state
+                if key in ['job_state']:  # PBS Pro and TORQUE
+                    job_info['state'] = _pbs_to_saga_jobstate(val)
+
+                # Hosts where the job ran
+                elif key in ['exec_host']:  # PBS Pro and TORQUE
+                    # format i73/7+i73/6+...
+                    job_info['exec_hosts'] = val.split('+')
+
+                # Exit code of the job
+                elif key in ['exit_status',  # TORQUE
+                             'Exit_status'   # PBS Pro
+                            ]:
+                    job_info['returncode'] = int(val)
+
+                # Time job got created in the queue
+                elif key in ['ctime']:  # PBS Pro and TORQUE
+                    job_info['create_time'] = val
+
+                # Time job started to run
+                elif key in ['start_time',  # TORQUE
+                             'stime'        # PBS Pro
+                            ]:
+                    job_info['start_time'] = val
+
+                # Time job ended.
+                #
+                # PBS Pro doesn't have an "end time" field.
+                # It has an "resources_used.walltime" though,
+                # which could be added up to the start time.
+                # We will not do that arithmetic now though.
+                #
+                # Alternatively, we can use mtime, as the latest
+                # modification time will generally also be the end time.
+                #
+                # TORQUE has an "comp_time" (completion? time) field,
+                # that is generally the same as mtime at the finish.
+                #
+                # For the time being we will use mtime as end time for
+                # both TORQUE and PBS Pro.
+                #
+                if key in ['mtime']:  # PBS Pro and TORQUE
+                    job_info['end_time'] = val
 
         # return the new job info dict
         return job_info
 
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_get_infos(self, job_ids):
+        """ Get job information attributes for a list of jobs.  All jobs are
+            queried with a single qstat call (or a few pipelined ones for very
+            long job lists).  Jobs which qstat does not report are handled
+            individually by _job_get_info.
+        """
+
+        infos = dict()
+        pids  = dict()  # pid : job_id
+
+        for job_id in job_ids:
+
+            if self.jobs[job_id]['gone'] is True:
+                infos[job_id] = self.jobs[job_id]
+            else:
+                pids[self._adaptor.parse_id(job_id)[1]] = job_id
+
+        todo = list(pids.keys())
+        # the pty limits the length of command lines, so we split long job
+        # lists into several (pipelined) qstat calls
+        cmds = [self._qstat_cmd(chunk) for chunk in
+                rsumisc.split_by_length(todo, QSTAT_LINE_MAX)]
+
+        if cmds:
+            for _, out, _ in self.shell.run_pipelined(cmds):
+                for pid, section in iter_qstat(out):
+                    job_id = pids.get(pid)
+                    if job_id and job_id not in infos:
+                        infos[job_id] = self._parse_qstat(section,
+                                                          self.jobs[job_id])
+
+        for job_id in job_ids:
+            if job_id not in infos:
+                infos[job_id] = self._job_get_info(job_id, reconnect=False)
+
+        return infos
+
+
     # --------------------------------------------------------------------------
     #
     def _job_get_state(self, job_id):
@@ -20,17 +20,26 @@ import radical.utils as ru
 
 from ...              import exceptions as rse
 from ...utils         import pty_shell  as rsups
+from ...utils         import misc       as rsumisc
 from ...              import job        as api
 from ..               import base       as a_base
 from ..cpi            import job        as cpi
 from ..cpi            import decorators as cpi_decs
 
+from ...utils.job     import iter_qstat
+
 
 SYNC_CALL  = cpi_decs.SYNC_CALL
 ASYNC_CALL = cpi_decs.ASYNC_CALL
 
 SYNC_WAIT_UPDATE_INTERVAL =  1  # seconds
 MONITOR_UPDATE_INTERVAL   = 60  # seconds
+QSTAT_LINE_MAX            = 2000 # max length of the job id list per qstat call
+ARRAY_MIN_VERSION         = (10, 0)  # first PBSPro version used with `qsub -J`
+
+# batch directives which are applied per subjob when jobs are submitted as
+# array job (see `PBSProJobService._job_array_run()`)
+TASK_DIRECTIVES = ('#PBS -N ', '#PBS -o ', '#PBS -e ')
 
 
 # --------------------------------------------------------------------
@@ -61,37 +70,38 @@ class _job_state_monitor(threading.Thread):
         while not self._term.is_set ():
 
             try:
-                # FIXME: do bulk updates here! we don't want to pull information
-                # job by job. that would be too inefficient!
-                jobs = self.js.jobs
+                # we only need to monitor jobs that are not in a terminal
+                # state, so we can skip the ones that are either done, failed
+                # or canceled.  Store the current states since the job infos
+                # are updated in place by _job_get_infos.
+                jobs   = self.js.jobs
+                active = dict()
 
                 for job_id in list(jobs.keys()) :
+                    if  jobs[job_id]['state'] not in api.FINAL:
+                        active[job_id] = jobs[job_id]['state']
 
-                    job_info = jobs[job_id]
+                # pull information for all jobs in bulk, not job by job
+                infos = dict()
+                if  active:
+                    infos = self.js._job_get_infos(list(active.keys()))
 
-                    # we only need to monitor jobs that are not in a
-                    # terminal state, so we can skip the ones that are
-                    # either done, failed or canceled
-                    if  job_info['state'] not in api.FINAL:
+                for job_id, new_job_info in infos.items():
 
-                        # Store the current state since the current state
-                        # variable is updated when _job_get_info is called
-                        pre_update_state = job_info['state']
+                    pre_update_state = active[job_id]
+                    self.logger.info ("Job monitoring thread updating Job "
+                                      "%s (old state: %s, new state: %s)" %
+                                      (job_id, pre_update_state, new_job_info['state']))
 
-                        new_job_info = self.js._job_get_info(job_id, reconnect=False)
-                        self.logger.info ("Job monitoring thread updating Job "
-                                          "%s (old state: %s, new state: %s)" %
-                                          (job_id, pre_update_state, new_job_info['state']))
+                    # fire job state callback if 'state' has changed
+                    if  new_job_info['state'] != pre_update_state:
+                        job_obj = jobs[job_id]['obj']
+                        job_obj._attributes_i_set('state',
+                                                  new_job_info['state'],
+                                                  job_obj._UP, True)
 
-                        # fire job state callback if 'state' has changed
-                        if  new_job_info['state'] != pre_update_state:
-                            job_obj = job_info['obj']
-                            job_obj._attributes_i_set('state',
-                                                      new_job_info['state'],
-                                                      job_obj._UP, True)
-
-                        # update job info
-                        jobs[job_id] = new_job_info
+                    # update job info
+                    jobs[job_id] = new_job_info
 
             except Exception as e:
                 import traceback
@@ -145,7 +155,10 @@ def _to_saga_jobstate(job_state, retcode, logger=None):
     elif job_state == 'R': ret = api.RUNNING
     elif job_state == 'E': ret = api.RUNNING
     elif job_state == 'T': ret = api.RUNNING
-    elif job_state == 'X': ret = api.CANCELED
+    elif job_state == 'X':     # PBSPro subjob: completed or deleted
+        if   retcode is None : ret = api.CANCELED
+        elif retcode ==  0   : ret = api.DONE
+        else                 : ret = api.FAILED
     else                 : ret = api.UNKNOWN
 
     if logger:
@@ -155,6 +168,24 @@ def _to_saga_jobstate(job_state, retcode, logger=None):
     return ret
 
 
+# --------------------------------------------------------------------
+#
+def _pbspro_version(version):
+    """ parse the PBSPro / OpenPBS version from the output of
+        `qstat --version` (`pbs_version = 19.1.3`, `pbs_version =
+        PBSPro_13.1.0`, ...) into a tuple of integers.  Returns `None` for
+        other PBS flavors (like TORQUE, which reports `Version: 6.1.2`).
+    """
+
+    match = re.search(r'PBSPro_(\d+)\.(\d+)', version) or \
+            re.search(r'pbs_version\s*=\s*(\d+)\.(\d+)', version)
+
+    if not match:
+        return None
+
+    return (int(match.group(1)), int(match.group(2)))
+
+
 # --------------------------------------------------------------------
 #
 def _script_generator(url, logger, jd, ppn, gres, version, is_cray=False,
@@ -536,6 +567,9 @@ class PBSProJobService (cpi.Service):
         self.jobs    = dict()
         self.gres    = None
 
+        # max number of subjobs per array job (see `container_run()`)
+        self._array_max = int(self._adaptor._cfg.get('array_max', 1000))
+
         # the monitoring thread - one per service instance
         self.mt = _job_state_monitor(job_service=self)
         self.mt.start()
@@ -665,14 +699,11 @@ class PBSProJobService (cpi.Service):
 
     # ----------------------------------------------------------------
     #
-    def _job_run(self, job_obj):
-        """ runs a job via qsub
+    def _job_script(self, jd):
+        """ generates a PBS job script from a SAGA job description, and creates
+            the job's working directory
         """
 
-        # get the job description
-        jd       = job_obj.get_description()
-        job_name = jd.name
-
         # normalize working directory path
         if  jd.working_directory :
             jd.working_directory = os.path.normpath (jd.working_directory)
@@ -703,6 +734,15 @@ class PBSProJobService (cpi.Service):
                 # something went wrong
                 raise rse.NoSuccess("Couldn't create workdir - %s" % out)
 
+        return script
+
+
+    # ----------------------------------------------------------------
+    #
+    def _qsub(self, script):
+        """ submits a job script via qsub, and returns the PBS job id
+        """
+
         # Now we want to execute the script. This process consists of two steps:
         # (1) we create a temporary file with 'mktemp' and write the contents of
         #     the generated PBS script into it
@@ -734,9 +774,19 @@ class PBSProJobService (cpi.Service):
             self._logger.warning('qsub: %s' % ''.join(lines[:-2]))
 
         # we asssume job id is in the last line
-        bs_id  = lines[-1].strip().split('.')[0]
-        job_id = "[%s]-[%s]" % (self.rm, bs_id)
-        state  = api.PENDING
+        return lines[-1].strip().split('.')[0]
+
+
+    # ----------------------------------------------------------------
+    #
+    def _job_register(self, job_obj, bs_id):
+        """ creates the job info dict entry for a submitted job, and returns
+            the job id
+        """
+
+        job_name = job_obj.get_description().name
+        job_id   = "[%s]-[%s]" % (self.rm, bs_id)
+        state    = api.PENDING
         self._logger.info("Submitted PBS job with id: %s" % job_id)
 
         # populate job info dict
@@ -761,6 +811,91 @@ class PBSProJobService (cpi.Service):
         return job_id
 
 
+    # ----------------------------------------------------------------
+    #
+    def _job_run(self, job_obj):
+        """ runs a job via qsub
+        """
+
+        script = self._job_script(job_obj.get_description())
+        bs_id  = self._qsub(script)
+
+        return self._job_register(job_obj, bs_id)
+
+
+    # ----------------------------------------------------------------
+    #
+    def _split_script(self, script):
+        """ splits a job script created by `_job_script()` into its `#PBS`
+            directives, its body, and the directives which are specific to
+            the individual job (`TASK_DIRECTIVES`, as dict)
+        """
+
+        directives = list()
+        body       = list()
+        task       = dict()
+
+        for line in script.strip().split('\n')[1:]:  # skip shebang
+
+            if line.startswith(TASK_DIRECTIVES):
+                flag, val  = line.split(None, 2)[1:]
+                task[flag] = val.strip()
+
+            elif line.startswith('#PBS '):
+                directives.append(line)
+
+            else:
+                body.append(line)
+
+        return '\n'.join(directives), '\n'.join(body), task
+
+
+    # ----------------------------------------------------------------
+    #
+    def _job_array_run(self, directives, tasks):
+        """ submits a set of jobs which share the same batch directives as
+            a single PBSPro array job.  `tasks` is a list of `[body, task]`
+            pairs as returned by `_split_script()`: subjob `i` redirects its
+            output and error as job `i` would, and runs the script body of
+            that job.
+
+            Returns the list of PBS job ids of the subjobs (`<id>[<i>]`).
+        """
+
+        script  = "\n#!/bin/bash \n"
+        script += directives + '\n'
+
+        name = tasks[0][1].get('-N')
+        if name: script += "#PBS -N %s \n" % name
+
+        # output and error are redirected by the individual subjobs
+        script += "#PBS -J 0-%d\n"     % (len(tasks) - 1)
+        script += "#PBS -o /dev/null \n"
+        script += "#PBS -e /dev/null \n"
+
+        # the script is passed to `echo "..."` (see `_qsub()`)
+        script += "case \\$PBS_ARRAY_INDEX in\n"
+
+        for idx, (body, task) in enumerate(tasks):
+
+            script += "%d)\n" % idx
+
+            if task.get('-o'): script += "exec 1>%s\n" % task['-o']
+            if task.get('-e'): script += "exec 2>%s\n" % task['-e']
+
+            script += body + '\n'
+            script += ";;\n"
+
+        script += "esac\n"
+
+        self._logger.info("Generated PBS array script: %s" % script)
+
+        # the array job id has the form `<id>[]`
+        bs_id = self._qsub(script).split('[')[0]
+
+        return ['%s[%d]' % (bs_id, idx) for idx in range(len(tasks))]
+
+
     # ----------------------------------------------------------------
     #
     def _job_get_info(self, job_id, reconnect):
@@ -798,16 +933,7 @@ class PBSProJobService (cpi.Service):
         rm, pid = self._adaptor.parse_id(job_id)
 
         # run the PBS 'qstat' command to get some infos about our job
-        # TODO: create a PBSPRO/TORQUE flag once
-        pbs_version = self._commands['qstat']['version']
-        if   '18.2'     in pbs_version: qstat_flag = '-fx'  # Cheyenne
-        elif 'PBSPro_1' in pbs_version: qstat_flag = '-f'
-        else                          : qstat_flag = '-f1'
-
-        ret, out, _ = self.shell.run_sync("unset GREP_OPTIONS; %s %s %s | "
-                "grep -E -i '(job_state)|(Job_Name)|(exec_host)|(exit_status)|"
-                 "(ctime)|(start_time)|(stime)|(mtime)'"
-                % (self._commands['qstat']['path'], qstat_flag, pid))
+        ret, out, _ = self.shell.run_sync(self._qstat_cmd([pid]))
 
         if ret:
 
@@ -844,76 +970,145 @@ class PBSProJobService (cpi.Service):
         else:
 
             # The job seems to exist on the backend. let's process some data.
+            self._parse_qstat(out, job_info)
 
-            # TODO: make the parsing "contextual", in the sense that it takes
-            #       the state into account.
-
-            # parse the egrep result. this should look something like this:
-            #     job_state = C
-            #     exec_host = i72/0
-            #     exit_status = 0
-            results = out.split('\n')
-            for line in results:
-
-                if '=' in line:
-                    k, v = line.split('=', 1)
-                    k    = k.strip()
-                    v    = v.strip()
-
-                    if   k in ['job_state'  ]: job_state               = v
-                    elif k in ['job_name'   ]: job_info['name']        = v
-                    elif k in ['exit_status',  # TORQUE / PBS Pro
-                               'Exit_status']: job_info['returncode' ] = int(v)
-                    elif k in ['exec_host'  ]: job_info['exec_hosts' ] = v
-                    elif k in ['start_time',   # TORQUE / PBS Pro
-                               'stime'      ]: job_info['start_time' ] = v
-                    elif k in ['ctime'      ]: job_info['create_time'] = v
-                    elif k in ['mtime'      ]: job_info['end_time'   ] = v
-
-                  # FIXME: qstat will not tell us time zones, so we cannot
-                  #        convert to EPOCH (which is UTC).  We thus take times
-                  #        ourself.  A proper solution would be to either do the
-                  #        time conversion on the target host, or to inspect
-                  #        time zone settings on the host.
-                  #
-                  # NOTE:  PBS Pro doesn't provide "end time", but
-                  #        "resources_used.walltime" could be added up to the
-                  #        start time.  Alternatively, we can use mtime, (latest
-                  #        modification time) which is generally also end time.
-                  #        TORQUE has an "comp_time" (completion? time), that is
-                  #        generally the same as mtime.
-                  #
-                  #        For now we use mtime for both TORQUE and PBS Pro.
-
-            # split exec hosts list if set
-            if job_info['exec_host']:
-                job_info['exec_hosts'] = job_info['exec_hosts'].split('+')
-
-            # TORQUE doesn't allow us to distinguish DONE/FAILED on final state
-            # alone, we need to consider the exit_status.
-            retcode = job_info.get('returncode', -1)
-            job_info['state'] = _to_saga_jobstate(job_state, retcode)
-
-            # FIXME: workaround for time zone problem described above
-            if job_info['state'] in [api.RUNNING] + api.FINAL \
-                and not job_info['start_time']:
-                job_info['start_time'] = time.time()
-
-            if job_info['state'] in api.FINAL \
-                and not job_info['end_time']:
-                job_info['end_time'] = time.time()
+        # PBSPRO state does not indicate error or success -- we derive that from
+        # the exit code
+        if job_info['returncode'] not in [None, 0]:
+            job_info['state'] = api.FAILED
+
+
+        # return the updated job info
+        return job_info
+
+
+    # ----------------------------------------------------------------
+    #
+    def _qstat_cmd(self, pids):
+        """ create the qstat command line to query the given job ids
+        """
+
+        # TODO: create a PBSPRO/TORQUE flag once
+        pbs_version = self._commands['qstat']['version']
+        if   '18.2'     in pbs_version: qstat_flag = '-fx'  # Cheyenne
+        elif 'PBSPro_1' in pbs_version: qstat_flag = '-f'
+        else                          : qstat_flag = '-f1'
+
+        return "unset GREP_OPTIONS; %s %s %s | " \
+               "grep -E -i '(Job Id:)|(job_state)|(Job_Name)|(exec_host)|" \
+               "(exit_status)|(ctime)|(start_time)|(stime)|(mtime)'" \
+               % (self._commands['qstat']['path'], qstat_flag,
+                  ' '.join(["'%s'" % pid for pid in pids]))
+
+
+    # ----------------------------------------------------------------
+    #
+    def _parse_qstat(self, haystack, job_info):
+        """ parse the qstat attributes of a single job into job_info
+        """
 
+        job_state = None
+
+        results = haystack.split('\n')
+        for line in results:
+
+            if '=' in line:
+                k, v = line.split('=', 1)
+                k    = k.strip()
+                v    = v.strip()
+
+                if   k in ['job_state'  ]: job_state               = v
+                elif k in ['job_name'   ]: job_info['name']        = v
+                elif k in ['exit_status',  # TORQUE / PBS Pro
+                           'Exit_status']: job_info['returncode' ] = int(v)
+                elif k in ['exec_host'  ]: job_info['exec_hosts' ] = v
+                elif k in ['start_time',   # TORQUE / PBS Pro
+                           'stime'      ]: job_info['start_time' ] = v
+                elif k in ['ctime'      ]: job_info['create_time'] = v
+                elif k in ['mtime'      ]: job_info['end_time'   ] = v
+
+              # FIXME: qstat will not tell us time zones, so we cannot
+              #        convert to EPOCH (which is UTC).  We thus take times
+              #        ourself.  A proper solution would be to either do the
+              #        time conversion on the target host, or to inspect
+              #        time zone settings on the host.
+              #
+              # NOTE:  PBS Pro doesn't provide "end time", but
+              #        "resources_used.walltime" could be added up to the
+              #        start time.  Alternatively, we can use mtime, (latest
+              #        modification time) which is generally also end time.
+              #        TORQUE has an "comp_time" (completion? time), that is
+              #        generally the same as mtime.
+              #
+              #        For now we use mtime for both TORQUE and PBS Pro.
+
+        # split exec hosts list if set
+        if isinstance(job_info['exec_hosts'], str):
+            job_info['exec_hosts'] = job_info['exec_hosts'].split('+')
+
+        # TORQUE doesn't allow us to distinguish DONE/FAILED on final state
+        # alone, we need to consider the exit_status.
+        retcode = job_info.get('returncode', -1)
+        job_info['state'] = _to_saga_jobstate(job_state, retcode)
+
+        # FIXME: workaround for time zone problem described above
+        if job_info['state'] in [api.RUNNING] + api.FINAL \
+            and not job_info['start_time']:
+            job_info['start_time'] = time.time()
+
+        if job_info['state'] in api.FINAL \
+            and not job_info['end_time']:
+            job_info['end_time'] = time.time()
 
         # PBSPRO state does not indicate error or success -- we derive that from
         # the exit code
         if job_info['returncode'] not in [None, 0]:
             job_info['state'] = api.FAILED
 
-
         # return the updated job info
         return job_info
 
 
+    # ----------------------------------------------------------------
+    #
+    def _job_get_infos(self, job_ids):
+        """ Get job information attributes for a list of jobs.  All jobs are
+            queried with a single qstat call (or a few pipelined ones for very
+            long job lists).  Jobs which qstat does not report are handled
+            individually by _job_get_info.
+        """
+
+        infos = dict()
+        pids  = dict()  # pid : job_id
+
+        for job_id in job_ids:
+
+            if self.jobs[job_id]['gone'] is True:
+                infos[job_id] = self.jobs[job_id]
+            else:
+                pids[self._adaptor.parse_id(job_id)[1]] = job_id
+
+        todo = list(pids.keys())
+        # the pty limits the length of command lines, so we split long job
+        # lists into several (pipelined) qstat calls
+        cmds = [self._qstat_cmd(chunk) for chunk in
+                rsumisc.split_by_length(todo, QSTAT_LINE_MAX, sep=3)]
+
+        if cmds:
+            for _, out, _ in self.shell.run_pipelined(cmds):
+                for pid, section in iter_qstat(out):
+                    job_id = pids.get(pid)
+                    if job_id and job_id not in infos:
+                        infos[job_id] = self._parse_qstat(section,
+                                                          self.jobs[job_id])
+
+        for job_id in job_ids:
+            if job_id not in infos:
+                infos[job_id] = self._job_get_info(job_id, reconnect=False)
+
+        return infos
+
+
     # ----------------------------------------------------------------
     #
     def _job_get_state(self, job_id):
@@ -966,7 +1161,7 @@ class PBSProJobService (cpi.Service):
         """
         rm, pid = self._adaptor.parse_id(job_id)
 
-        ret, out, _ = self.shell.run_sync("%s %s\n"
+        ret, out, _ = self.shell.run_sync("%s '%s'\n"
                     % (self._commands['qdel']['path'], pid))
 
         if ret:
@@ -1100,12 +1295,49 @@ class PBSProJobService (cpi.Service):
     # ----------------------------------------------------------------
     #
     def container_run (self, jobs) :
+        """ Jobs whose job scripts share the same `#PBS` directives (apart from
+            job name, output and error) are submitted as one array job, with
+            at most `array_max` (adaptor config) subjobs per array.  All other
+            jobs are submitted individually.
+        """
 
         self._logger.debug ("container run: %s"  %  str(jobs))
 
-        # TODO: this is not optimized yet
+        # array jobs (`qsub -J`) are only supported by PBSPro, not by TORQUE
+        version = _pbspro_version(self._commands['qstat']['version'])
+        if not version or version < ARRAY_MIN_VERSION or self._array_max < 2:
+            for job in jobs:
+                job.run ()
+            return
+
+        groups = dict()  # directives : [[job, script, body, task], ...]
+
         for job in jobs:
-            job.run ()
+
+            script = self._job_script(job.get_description())
+            directives, body, task = self._split_script(script)
+
+            groups.setdefault(directives, list()).append([job, script,
+                                                          body, task])
+
+        for directives, tasks in groups.items():
+
+            for i in range(0, len(tasks), self._array_max):
+
+                chunk = tasks[i:i + self._array_max]
+
+                if len(chunk) == 1:
+                    # no need for an array job
+                    bs_ids = [self._qsub(chunk[0][1])]
+
+                else:
+                    bs_ids = self._job_array_run(directives,
+                                    [[body, task] for _, _, body, task in chunk])
+
+                for (job, _, _, _), bs_id in zip(chunk, bs_ids):
+
+                    job._adaptor._id      = self._job_register(job, bs_id)
+                    job._adaptor._started = True
 
 
     # ----------------------------------------------------------------
@@ -12,6 +12,9 @@ __license__   = "MIT"
 import re
 import os
 import time
+import threading
+
+from xml.etree import ElementTree
 
 from datetime import datetime
 from io import StringIO
@@ -34,8 +37,68 @@ SYNC_CALL  = cpi_decs.SYNC_CALL
 ASYNC_CALL = cpi_decs.ASYNC_CALL
 
 
-_QSTAT_JOB_STATE_RE = re.compile(
-    r"^([^ ]+) ([0-9]{2}/[0-9]{2}/[0-9]{4} [0-9]{2}:[0-9]{2}:[0-9]{2}) (.+)$")
+# how long to wait for a job which left the queue to show up in the accounting
+_ACCOUNTING_DELAY = 10.0
+
+# max length of the job id and path lists in a single command line, to stay
+# well below the pty line length limit (4095 characters)
+_QUERY_LINE_MAX = 2000
+
+
+class _LineReader(object):
+    """
+    Provides `readline()` for an iterable over lines without newlines.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+
+    def readline(self):
+        line = next(self._lines, None)
+        if line is None:
+            return ''
+        return line + '\n'
+
+
+def _iter_qstat_xml(lines):
+    """
+    Generator over the jobs in `qstat -xml` output, which is consumed line by
+    line (e.g., from a `PTYStream`).  Each job is returned as a dictionary of
+    the job element's children (tag: text).  Job elements are removed from the
+    parse tree once they have been returned, so that memory consumption does
+    not grow with the number of jobs in the queue.
+    """
+
+    parser = ElementTree.XMLPullParser(['start', 'end'])
+    stack  = list()
+    fed    = False
+
+    for line in lines:
+
+        # skip anything before the XML document
+        if not fed:
+            if '<' not in line:
+                continue
+            line = line[line.index('<'):]
+            fed  = True
+
+        parser.feed(line + '\n')
+
+        for event, elem in parser.read_events():
+
+            if event == 'start':
+                stack.append(elem)
+                continue
+
+            stack.pop()
+
+            if elem.tag == 'job_list':
+                yield dict([(child.tag, child.text) for child in elem])
+                if stack:
+                    stack[-1].remove(elem)
+
+    if fed:
+        parser.close()
 
 
 class SgeKeyValueParser(object):
@@ -50,7 +113,9 @@ class SgeKeyValueParser(object):
 
     def __init__(self, stream, filter_keys=None, key_suffix=None):
         """
-        :param stream: an string or a file-like object implementing readline()
+        :param stream: an string, a file-like object implementing readline(),
+                       or an iterable over lines (like a `PTYStream`) which
+                       is consumed line by line.
         :param filter_keys: an iterable with the list of keys of interest.
         :param key_suffix: a key suffix to remove when parsing
         """
@@ -58,8 +123,10 @@ class SgeKeyValueParser(object):
         # check whether it is an string or a file-like object
         if isinstance(stream, str):
             self.stream = StringIO(stream)
-        else:
+        elif hasattr(stream, 'readline'):
             self.stream = stream
+        else:
+            self.stream = _LineReader(stream)
 
         self.filter_keys = set(filter_keys) if filter_keys is not None else None
         self.key_suffix = key_suffix
@@ -218,6 +285,7 @@ class Adaptor (a_base.Base):
         self.purge_on_start   = self._cfg['purge_on_start']
         self.purge_older_than = self._cfg['purge_older_than']
         self.base_workdir     = self._cfg['base_workdir']
+        self.qstat_interval   = self._cfg['qstat_interval']
 
 
     # ----------------------------------------------------------------
@@ -279,6 +347,14 @@ class SGEJobService (cpi.Service):
         self.accounting = False
         self.temp_path = self._adaptor.base_workdir
 
+        # `qstat -xml` results shared by all jobs (see `_qstat_jobs()`), and
+        # jobs which left the queue but are not yet in the accounting
+        self._qstat_lock  = threading.Lock()
+        self._qstat_cache = None
+        self._qstat_pids  = set()
+        self._qstat_time  = 0.0
+        self._missing     = dict()
+
 
         rm_scheme = rm_url.scheme
         pty_url   = ru.Url (rm_url)
@@ -561,30 +637,43 @@ class SGEJobService (cpi.Service):
         while retries > 0:
             retries -= 1
 
-            qres = self.__kvcmd_results('qacct', "-j %s | grep -E '%s'"
-                                       % (sge_job_id,
-           "jobname|hostname|qsub_time|start_time|end_time|exit_status|failed"))
+            job_info = self._jobs_info_from_accounting([sge_job_id]) \
+                           .get(sge_job_id)
 
-            if not qres and retries > 0:
+            if not job_info and retries > 0:
                 # sometimes there is a lapse between the job exits from the
                 # queue and its information enters in the accounting database
                 # let's run qacct again after a delay
                 time.sleep(1)
                 continue
 
+            break
 
-            # ok, extract job info from qres
-            # jobname      test
-            # hostname     sge
-            # qsub_time    Mon Jun 24 17:24:43 2013  # FIXME: convert to EPOCH
-            # start_time   Mon Jun 24 17:24:50 2013  # FIXME: convert to EPOCH
-            # end_time     Mon Jun 24 17:44:50 2013  # FIXME: convert to EPOCH
-            # failed       0
-            # exit_status  0
+        return job_info
+
+
+    def _jobs_info_from_accounting(self, sge_job_ids):
+        """
+        Returns job information for many jobs from the SGE accounting, with
+        a single remote command which runs qacct for all given jobs.  Jobs
+        which are not (yet) listed in the accounting are not retried.
+
+        :param sge_job_ids: list of SGE job ids
+        :return: dictionary {SGE job id: job information dictionary}
+        """
+
+        records = dict()
+        for chunk in rsumisc.split_by_length(sge_job_ids, _QUERY_LINE_MAX):
+            records.update(self._jobs_records_from_accounting(chunk))
+
+        job_infos = dict()
+        for sge_job_id, qres in records.items():
 
             if qres.get("failed") == "0": state = c.DONE
             else                        : state = c.FAILED
-            job_info = {'state'       : state,
+
+            job_infos[sge_job_id] = {
+                        'state'       : state,
                         'name'        : qres.get("jobname"),
                         'exec_hosts'  : qres.get("hostname"),
                         'create_time' : qres.get("qsub_time"),
@@ -593,9 +682,50 @@ class SGEJobService (cpi.Service):
                         'returncode'  : int(qres.get("exit_status", -1)),
                         'gone'        : False
                        }
-            break
 
-        return job_info
+        return job_infos
+
+
+    def _jobs_records_from_accounting(self, sge_job_ids):
+        """
+        Runs qacct for the given jobs (which must fit on one command line), and
+        returns the raw accounting records.
+
+        :param sge_job_ids: list of SGE job ids
+        :return: dictionary {SGE job id: accounting record dictionary}
+        """
+
+        # qacct does not accept a list of job ids, so loop on the remote side
+        stream = self.shell.run_stream(
+                "for id in %s; do %s -j $id; done 2>/dev/null | grep -E '^(%s) '"
+                % (' '.join(sge_job_ids), self._commands['qacct']['path'],
+                   "jobnumber|jobname|hostname|qsub_time|start_time|end_time|"
+                   "exit_status|failed"))
+
+        # output is a sequence of records like
+        # jobnumber    42
+        # jobname      test
+        # hostname     sge
+        # qsub_time    Mon Jun 24 17:24:43 2013  # FIXME: convert to EPOCH
+        # start_time   Mon Jun 24 17:24:50 2013  # FIXME: convert to EPOCH
+        # end_time     Mon Jun 24 17:44:50 2013  # FIXME: convert to EPOCH
+        # failed       0
+        # exit_status  0
+        #
+        # grep fails if no job is found, so we don't check `ret`
+
+        records = dict()
+        qres    = None
+        for key, value in SgeKeyValueParser(stream):
+
+            if key == 'jobnumber':
+                # a job may be listed repeatedly (reruns): use the last one
+                qres = records[value.strip()] = dict()
+
+            elif qres is not None:
+                qres[key] = value
+
+        return records
 
 
     def __remote_job_info_path(self, sge_job_id="$JOB_ID"):
@@ -609,6 +739,18 @@ class SGEJobService (cpi.Service):
         return "%s/%s" % (self.temp_path, sge_job_id)
 
 
+    def __clean_remote_job_infos(self, sge_job_ids):
+        """
+        Removes the temporary remote files containing job info for many jobs,
+        with as few `rm` calls as the command line length allows.
+        :param sge_job_ids: list of SGE job ids
+        """
+
+        paths = [self.__remote_job_info_path(pid) for pid in sge_job_ids]
+        for chunk in rsumisc.split_by_length(paths, _QUERY_LINE_MAX):
+            self.shell.run_sync("rm -f %s" % ' '.join(chunk))
+
+
     def __clean_remote_job_info(self, sge_job_id):
         """
         Removes the temporary remote file containing job info.
@@ -621,33 +763,52 @@ class SGEJobService (cpi.Service):
             self._logger.debug("Remote job info couldn't be removed: %s" % path)
 
 
-    def __get_remote_job_info(self, sge_job_id):
+    def _get_remote_job_infos(self, sge_job_ids):
         """
-        Obtains job info from temporary remote file created by the qsub script.
-        :param sge_job_id: the SGE job id
-        :return: a dictionary with the job info
+        Obtains job info for many jobs from the temporary remote files created
+        by the qsub script, with a single remote command.
+        :param sge_job_ids: list of SGE job ids
+        :return: dictionary {SGE job id: job info} for all jobs with info file
         """
 
-        ret, out, _ = self.shell.run_sync("cat %s" % self.__remote_job_info_path(sge_job_id))
-        if ret != 0:
-            return None
+        records = dict()
+        for chunk in rsumisc.split_by_length(sge_job_ids, _QUERY_LINE_MAX):
 
-        qres = SgeKeyValueParser(out, key_suffix=":").as_dict()
+            stream = self.shell.run_stream(
+                'for id in %s; do echo "sge_job_id: $id"; cat %s 2>/dev/null; '
+                'done' % (' '.join(chunk), self.__remote_job_info_path('$id')))
 
-        if   "signal"      in qres: state = c.CANCELED
-        elif "exit_status" in qres: state = c.DONE
-        else                      : state = c.RUNNING
+            qres = None
+            for key, value in SgeKeyValueParser(stream, key_suffix=":"):
 
-        job_info = {'state'       : state,
-                    'name'        : qres.get("jobname"),
-                    'exec_hosts'  : qres.get("hostname"),
-                    'create_time' : qres.get("qsub_time"),
-                    'start_time'  : qres.get("start_time"),
-                    'end_time'    : qres.get("end_time"),
-                    'returncode'  : int(qres.get("exit_status", -1)),
-                    'gone'        : False}
+                if key == 'sge_job_id':
+                    qres = records[value.strip()] = dict()
 
-        return job_info
+                elif qres is not None:
+                    qres[key] = value
+
+        job_infos = dict()
+        for sge_job_id, qres in records.items():
+
+            # no info file for this job
+            if not qres:
+                continue
+
+            if   "signal"      in qres: state = c.CANCELED
+            elif "exit_status" in qres: state = c.DONE
+            else                      : state = c.RUNNING
+
+            job_infos[sge_job_id] = {
+                        'state'       : state,
+                        'name'        : qres.get("jobname"),
+                        'exec_hosts'  : qres.get("hostname"),
+                        'create_time' : qres.get("qsub_time"),
+                        'start_time'  : qres.get("start_time"),
+                        'end_time'    : qres.get("end_time"),
+                        'returncode'  : int(qres.get("exit_status", -1)),
+                        'gone'        : False}
+
+        return job_infos
 
     def __generate_qsub_script(self, jd):
         """
@@ -880,6 +1041,9 @@ as a separator.
         job_id = "[%s]-[%s]" % (self.rm, sge_job_id)
         self._logger.info("Submitted SGE job with id: %s" % job_id)
 
+        # the new job is not in the cached qstat results
+        self._qstat_reset()
+
         # add job to internal list of known jobs.
         self.jobs[job_id] = {
             'state':        c.PENDING,
@@ -904,92 +1068,214 @@ as a separator.
 
         rm, pid = self._adaptor.parse_id(job_id)
 
-        # check the state of the job
-        ret, out, _ = self.shell.run_sync(
-                    "%s | tail -n+3 | awk '($1==%s) {{print $5,$6,$7,$8}}'" % (
-                    self._commands['qstat']['path'], pid))
+        job_info = self._retrieve_jobs([pid])[pid]
 
-        out = out.strip()
+        # the job is neither queued nor did it leave any info behind -- the
+        # accounting information may just be delayed, so give it some time
+        if self.accounting and job_info is None:
+            job_info = self.__job_info_from_accounting(pid)
 
-        job_info = None
+        if job_info is None: # Oooops, we couldn't retrieve information from SGE
+            raise rse.NoSuccess("Couldn't reconnect to job '%s'" % job_id)
+
+        elems = ["name", "state", "returncode", "exec_hosts", "create_time",
+                 "start_time", "end_time", "gone"]
+        self._logger.debug("job_info(%s)=[%s]"
+                % (pid, ", ".join(["%s=%s" % (k, str(job_info[k]))
+                                           for k in elems])))
+        return job_info
 
-        if ret == 0 and len(out) > 0:
 
-            # job is still in the queue
-            # output is something like
-            # r 06/24/2013 17:24:50
+    # ----------------------------------------------------------------
+    #
+    def _retrieve_jobs(self, pids):
+        """ retrieve job information for many jobs at once: all queued jobs
+        are covered by a single `qstat -xml` call (see `_qstat_jobs()`), all
+        jobs which left the queue by one pass over their remote job info
+        files and, if accounting is enabled, one `qacct` pass.
+
+        :param pids: list of SGE job ids
+        :return: dictionary {SGE job id: job information dictionary or None}
+        """
 
-            m = _QSTAT_JOB_STATE_RE.match(out)
-            if not m:
-                # something wrong with the result of qstat
-                raise rse.NoSuccess("Unexpected qstat results:\n%s" % out.rstrip())
+        infos  = dict()
+        failed = list()   # jobs in error state ('Eqw')
+        queued = self._qstat_jobs(pids)
 
-            state, start_time, queue = m.groups()
+        if queued is None:
+            # qstat failed -- look for all jobs in the remote job info and
+            # accounting
+            queued = dict()
 
-            # Convert start time into EPOCH
-            start_time = None
-            if state in ["r", "t", "s", "S", "T", "d", "E", "Eqw"]:
-                try:
-                    dt = datetime.strptime(start_time, "%m/%d/%Y %H:%M:%S")
-                    start_time = (dt - self._adaptor.epoch).total_seconds()
-                except:
-                    # keep 'None'
-                    pass
+        for pid in pids:
 
-            exec_host = None
-            if "@" in queue:
-                queue, exec_host = queue.split("@")
-                exec_host = exec_host.rstrip()
+            qinfo = queued.get(pid)
+            if not qinfo:
+                continue
+
+            infos[pid] = {'state'       : self.__sge_to_saga_jobstate(
+                                                            qinfo['sge_state']),
+                          'name'        : qinfo['name'],
+                          'exec_hosts'  : qinfo['exec_hosts'],
+                          'returncode'  : None,
+                          'create_time' : qinfo['create_time'],
+                          'start_time'  : qinfo['start_time'],
+                          'end_time'    : None,
+                          'gone'        : False
+                         }
 
             # if it is an Eqw job it is better to retrieve the information
             # from qacct
-            if self.accounting and state == "Eqw":
-                job_info = self.__job_info_from_accounting(pid)
-                # TODO remove the job from the queue ?
-
-            if job_info is None: # use qstat -j pid
-                qres = self.__kvcmd_results(
-                'qstat', "-j %s | grep -E 'job_name|submission_time|sge_o_host'"
-                % pid, key_suffix=":")
-
-                if qres is not None:
-
-                    # when qstat fails it will fall back to qacct
-                    # output is something like
-                    # submission_time:            Mon Jun 24 17:24:43 2013
-                    # sge_o_host:                 sge
-
-                    state = self.__sge_to_saga_jobstate(state)
-                    host  = exec_host or qres.get("sge_o_host")
-                    job_info = {'state'       : state,
-                                'name'        : qres.get("job_name"),
-                                'exec_hosts'  : host,
-                                'returncode'  : None,
-                                'create_time' : qres.get("submission_time"),
-                                'start_time'  : start_time,
-                                'end_time'    : None,
-                                'gone'        : False
-                                }
-
-        # if job already finished or there was an error with qstat
+            # TODO remove the job from the queue ?
+            if qinfo['sge_state'] == 'Eqw':
+                failed.append(pid)
+
+        # if jobs already finished or there was an error with qstat
         # try to read the remote job info
-        if job_info is None:
-            job_info = self.__get_remote_job_info(pid)
+        done = [pid for pid in pids if pid not in infos]
+        if done:
+            infos.update(self._get_remote_job_infos(done))
 
         # none of the previous methods gave us job info
         # if accounting is activated use qacct
-        if self.accounting and job_info is None:
-            job_info = self.__job_info_from_accounting(pid)
+        if self.accounting:
+            acct = failed + [pid for pid in done if pid not in infos]
+            if acct:
+                infos.update(self._jobs_info_from_accounting(acct))
 
-        if job_info is None: # Oooops, we couldn't retrieve information from SGE
-            raise rse.NoSuccess("Couldn't reconnect to job '%s'" % job_id)
+        return dict([(pid, infos.get(pid)) for pid in pids])
 
-        elems = ["name", "state", "returncode", "exec_hosts", "create_time",
-                 "start_time", "end_time", "gone"]
-        self._logger.debug("job_info(%s)=[%s]"
-                % (pid, ", ".join(["%s=%s" % (k, str(job_info[k]))
-                                           for k in elems])))
-        return job_info
+
+    # ----------------------------------------------------------------
+    #
+    def _qstat_jobs(self, pids):
+        """ returns the queued jobs of the current user, as reported by
+        a single `qstat -xml` call.  The result is reused for
+        `qstat_interval` seconds, so that the states of many jobs are
+        obtained by one `qstat` call per interval, independent of the number
+        of jobs and of the number of threads asking for them.  Only the jobs
+        known to this service (and the given ones) are kept.
+
+        :param pids: list of SGE job ids which must be covered
+        :return: dictionary {SGE job id: qstat info}, or None on failure
+        """
+
+        with self._qstat_lock:
+
+            if  self._qstat_cache is not None                              and \
+                self._qstat_pids.issuperset(pids)                          and \
+                time.time() - self._qstat_time < self._adaptor.qstat_interval:
+                return self._qstat_cache
+
+            known = set(pids)
+            for job_id in self.jobs:
+                known.add(self._adaptor.parse_id(job_id)[1])
+
+            # the output is parsed while it arrives
+            with self.shell.run_stream('%s -xml -u `whoami`'
+                                       % self._commands['qstat']['path']) \
+                 as stream:
+
+                try:
+                    queued = self._parse_qstat_xml(stream, known)
+
+                except Exception:
+                    self._logger.exception("Unexpected qstat results")
+                    return None
+
+            if stream.ret != 0:
+                self._logger.warning("qstat failed: %s", stream.ret)
+                return None
+
+            self._qstat_cache = queued
+            self._qstat_pids  = known
+            self._qstat_time  = time.time()
+
+            return queued
+
+
+    # ----------------------------------------------------------------
+    #
+    def _qstat_reset(self):
+        """ invalidate the cached `qstat` results, e.g., after a submission
+        """
+
+        with self._qstat_lock:
+            self._qstat_cache = None
+
+
+    # ----------------------------------------------------------------
+    #
+    def _parse_qstat_xml(self, lines, pids):
+        """ parses the output of `qstat -xml` line by line (see
+        `_iter_qstat_xml()`).  The output is something like
+
+            <job_info>
+              <queue_info>
+                <job_list state="running">
+                  <JB_job_number>42</JB_job_number>
+                  <JB_name>test</JB_name>
+                  <state>r</state>
+                  <JAT_start_time>2013-06-24T17:24:50</JAT_start_time>
+                  <queue_name>all.q@sge</queue_name>
+                  ...
+                </job_list>
+              </queue_info>
+              <job_info>
+                <job_list state="pending">
+                  <JB_job_number>43</JB_job_number>
+                  <JB_name>test</JB_name>
+                  <state>qw</state>
+                  <JB_submission_time>2013-06-24T17:24:43</JB_submission_time>
+                  <queue_name></queue_name>
+                  ...
+
+        :param lines: iterable over the qstat output lines
+        :param pids:  set of SGE job ids of interest
+        :return: dictionary {SGE job id: qstat info}
+        """
+
+        queued = dict()
+
+        for job in _iter_qstat_xml(lines):
+
+            pid = (job.get('JB_job_number') or '').strip()
+
+            # array jobs are listed once per task, use the first entry
+            if pid not in pids or pid in queued:
+                continue
+
+            exec_host = None
+            queue     = job.get('queue_name') or ''
+            if "@" in queue:
+                exec_host = queue.split("@", 1)[1].strip()
+
+            queued[pid] = {
+                'sge_state'   : (job.get('state') or '').strip(),
+                'name'        : job.get('JB_name'),
+                'exec_hosts'  : exec_host,
+                'create_time' : self.__xml_time(job.get('JB_submission_time')),
+                'start_time'  : self.__xml_time(job.get('JAT_start_time'))
+            }
+
+        return queued
+
+
+    # ----------------------------------------------------------------
+    #
+    def __xml_time(self, val):
+        """ converts a `qstat -xml` time stamp into EPOCH
+        """
+
+        if not val:
+            return None
+
+        try:
+            dt = datetime.strptime(val.strip()[:19], "%Y-%m-%dT%H:%M:%S")
+            return (dt - self._adaptor.epoch).total_seconds()
+        except:
+            # keep 'None'
+            return None
 
 
     # ----------------------------------------------------------------
@@ -1002,29 +1288,69 @@ as a separator.
         if job_id not in self.jobs:
             raise rse.NoSuccess("Unknown job ID: %s" % job_id)
 
-        # prev. info contains the info collect when _job_get_info
-        # was called the last time
-        prev_info = self.jobs[job_id]
-
         # if the 'gone' flag is set, there's no need to query the job
         # state again. it's gone forever
-        if prev_info['gone'] is True:
+        if self.jobs[job_id]['gone'] is True:
             self._logger.warning("Job information is not available anymore.")
-            return prev_info
-
-        # if the job is in a terminal state don't expect it to change anymore
-        if prev_info["state"] in c.FINAL:
-            return prev_info
+            return self.jobs[job_id]
 
         # retrieve updated job information
-        curr_info = self._retrieve_job(job_id)
-        if curr_info is None:
-            prev_info["gone"] = True
-            return prev_info
+        self._update_jobs([job_id])
 
-        # update the job info cache and return it
-        self.jobs[job_id] = curr_info
-        return curr_info
+        return self.jobs[job_id]
+
+
+    # ----------------------------------------------------------------
+    #
+    def _update_jobs(self, job_ids):
+        """ update the job info cache for all given jobs which can still
+        change state, with one bulk query (see `_retrieve_jobs()`)
+        """
+
+        # only query jobs which can still change state
+        active = dict()  # sge job id : saga job id
+        for job_id in job_ids:
+            info = self.jobs[job_id]
+            if info['gone'] is not True and info['state'] not in c.FINAL:
+                rm, pid = self._adaptor.parse_id(job_id)
+                active[pid] = job_id
+
+        if not active:
+            return
+
+        infos = self._retrieve_jobs(list(active.keys()))
+        now   = time.time()
+
+        for pid, job_id in active.items():
+
+            prev_info = self.jobs[job_id]
+            curr_info = infos[pid]
+
+            if curr_info is None:
+
+                # sometimes there is a lapse between the job exits from the
+                # queue and its information enters in the accounting database:
+                # keep the previous info and look again on the next call
+                first = self._missing.setdefault(pid, now)
+                if now - first > _ACCOUNTING_DELAY:
+                    # give up on this job, but keep updating the others
+                    del self._missing[pid]
+                    self._logger.warning("Couldn't retrieve information for "
+                                         "job '%s' - marking it failed", job_id)
+                    prev_info['state'] = c.FAILED
+                    prev_info['gone']  = True
+                continue
+
+            self._missing.pop(pid, None)
+
+            # qstat does not report everything in all job states: keep what
+            # we learned before
+            for key in ['name', 'exec_hosts', 'create_time', 'start_time']:
+                if curr_info[key] is None:
+                    curr_info[key] = prev_info[key]
+
+            # update the job info cache
+            self.jobs[job_id] = curr_info
 
 
     # ----------------------------------------------------------------
@@ -1043,6 +1369,20 @@ as a separator.
         return self.jobs[job_id]['state']
 
 
+    # ----------------------------------------------------------------
+    #
+    def _job_get_states(self, job_ids):
+        """ get the states of many jobs with a single `qstat` call.  Jobs
+            which are not listed by qstat anymore are looked up in bulk in
+            the remote job info and accounting (see `_retrieve_jobs()`)
+        """
+
+        self._update_jobs(job_ids)
+
+        return dict([(job_id, self.jobs[job_id]['state'])
+                     for job_id in job_ids])
+
+
     # ----------------------------------------------------------------
     #
     def _job_get_exit_code(self, job_id):
@@ -1243,29 +1583,88 @@ as a separator.
         return ids
 
 
-  # # ----------------------------------------------------------------
-  # #
-  # def container_run (self, jobs) :
-  #     self._logger.debug ("container run: %s"  %  str(jobs))
-  #     # TODO: this is not optimized yet
-  #     for job in jobs:
-  #         job.run ()
-  #
-  #
-  # # ----------------------------------------------------------------
-  # #
-  # def container_wait (self, jobs, mode, timeout) :
-  #     self._logger.debug ("container wait: %s"  %  str(jobs))
-  #     # TODO: this is not optimized yet
-  #     for job in jobs:
-  #         job.wait ()
-  #
-  #
-  # # ----------------------------------------------------------------
-  # #
-  # def container_cancel (self, jobs, timeout) :
-  #     self._logger.debug ("container cancel: %s"  %  str(jobs))
-  #     raise rse.NoSuccess ("Not Implemented");
+    # ----------------------------------------------------------------
+    #
+    def container_run (self, jobs) :
+        self._logger.debug ("container run: %s"  %  str(jobs))
+        # TODO: this is not optimized yet
+        for job in jobs:
+            job.run ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_wait (self, jobs, mode, timeout) :
+        """ poll the states of all jobs with one `qstat` call per
+            iteration (see `_job_get_states()`)
+        """
+        self._logger.debug ("container wait: %s"  %  str(jobs))
+
+        for job in jobs:
+            if job._adaptor._started is False:
+                raise rse.IncorrectState("Can't wait for job that hasn't "
+                                         "been started")
+
+        ret = self._container_wait_states(jobs, mode, timeout, interval=0.5)
+
+        # clean the remote job info of all final jobs at once
+        pids = list()
+        for job in jobs:
+            job_id = job._adaptor._id
+            if self.jobs[job_id]['state'] in c.FINAL:
+                rm, pid = self._adaptor.parse_id(job_id)
+                pids.append(pid)
+
+        self.__clean_remote_job_infos(pids)
+
+        return ret
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_cancel (self, jobs, timeout) :
+        """ cancel all jobs with one `qdel` call
+        """
+        self._logger.debug ("container cancel: %s"  %  str(jobs))
+
+        for job in jobs:
+            if job._adaptor._started is False:
+                raise rse.IncorrectState("Can't cancel job that hasn't "
+                                         "been started")
+
+        job_ids = [job._adaptor._id for job in jobs]
+        pids    = [self._adaptor.parse_id(job_id)[1] for job_id in job_ids]
+
+        if not pids:
+            return
+
+        for chunk in rsumisc.split_by_length(pids, _QUERY_LINE_MAX):
+
+            ret, out, _ = self.shell.run_sync("%s %s\n" \
+                % (self._commands['qdel']['path'], ' '.join(chunk)))
+
+            if ret != 0:
+                raise rse.NoSuccess("Error canceling jobs via 'qdel': %s" % out)
+
+        self.__clean_remote_job_infos(pids)
+
+        # assume the jobs were succesfully canceld
+        for job_id in job_ids:
+            self.jobs[job_id]['state'] = c.CANCELED
+
+
+    # ----------------------------------------------------------------
+    #
+    def container_get_states (self, jobs) :
+        """ get the states of all jobs with one `qstat` call
+        """
+        self._logger.debug ("container get_states: %s"  %  str(jobs))
+
+        job_ids = [job._adaptor._id for job in jobs
+                                    if  job._adaptor._started]
+        states  = self._job_get_states(job_ids)
+
+        return [states.get(job._adaptor._id, c.NEW) for job in jobs]
 
 
 ###############################################################################
@@ -1289,6 +1688,9 @@ class SGEJob (cpi.Job):
         self.jd = job_info["job_description"]
         self.js = job_info["job_service"]
 
+        # the js is responsible for job bulk operations
+        self._container = self.js
+
         if job_info['reconnect'] is True:
             self._id      = job_info['reconnect_jobid']
             self._name    = self.jd.name
@@ -0,0 +1,1316 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+'''
+Python version of the remote job management script of the shell job adaptor.
+
+This script is an alternative to `shell_wrapper.sh` for target hosts which
+provide `python3`.  It implements the same command protocol on stdin / stdout,
+and uses the same on-disk layout for job state (`$BASE/<id>/state`, `stats`,
+`exit`, ...), so that both scripts can serve the same job directories.  Other
+than the shell script, it does not fork a monitor shell per job: all jobs are
+children of this process and are reaped by a single thread, job states are kept
+in memory, and state queries are answered without forking any tools.
+
+Jobs started by this agent are only tracked while this process lives.  On
+`QUIT`, idle timeout or a dropped connection, the agent thus closes its I/O
+channels and lingers until all of its jobs are final.
+
+The script is staged to the target host, and must only depend on the Python
+standard library.
+
+    python3 shell_agent.py [base_workdir]
+'''
+
+import os
+import re
+import sys
+import time
+import shutil
+import signal
+import binascii
+import threading
+import subprocess
+
+
+# this process will terminate when idle for longer than TIMEOUT seconds
+TIMEOUT        = 300
+PURGE_ON_START = '%(PURGE_ON_START)s'
+FINAL          = ['DONE', 'FAILED', 'CANCELED']
+
+# the notification journal is compacted on startup once it grows beyond
+# NOTIFICATIONS_MAX lines (see `Agent._rotate_notifications()`)
+NOTIFICATIONS_MAX = 10000
+
+HELP = '''
+        HELP               - print this message
+        LIST               - list all job IDs
+        MONITOR [<gen> <n>]- monitor for events (after event n of gen)
+        PURGE              - purge completed jobs
+        NOOP               - do nothing
+        PING               - update keepalive timer
+        QUIT               - quit
+        RUN     <cmd>      - run a job, prints job ID
+        LRUN               - multiline run
+        RESULT  <id>       - show job return value
+        RESUME  <id>       - resume job after suspend
+        STATE   <id>       - print state of job
+        STATES  <id> ...   - print states of jobs
+        STATS   <id>       - print stats of job
+        STDERR  <id>       - print stderr of job
+        STDOUT  <id>       - print stdout of job
+        STDIN   <id> <txt> - send txt to stdin of job
+        CANCEL  <id>       - cancel job
+        SUSPEND <id>       - suspend job
+        WAIT    <id>       - wait for job completion
+        <cmd>              - run as synchronous shell command
+'''
+
+
+# ------------------------------------------------------------------------------
+#
+class _Error(Exception):
+    '''
+    A command failed: `msg` is reported as error, `retval` as result.  The
+    exit value is reported in the prompt.  Like in `shell_wrapper.sh`, invalid
+    job IDs result in a non-zero exit value, while invalid job states don't.
+    '''
+
+    def __init__(self, msg, retval='', exitval=1):
+
+        Exception.__init__(self, msg)
+
+        self.msg     = msg
+        self.retval  = retval
+        self.exitval = exitval
+
+
+# ------------------------------------------------------------------------------
+#
+class _Quit(Exception):
+    '''
+    raised by the signal handlers and on EOF to leave the main loop
+    '''
+
+    def __init__(self, reason=None):
+
+        Exception.__init__(self, reason)
+
+        self.reason = reason
+
+
+# ------------------------------------------------------------------------------
+#
+_ESCAPE_RE = re.compile(r'\\(0[0-7]{0,3}|.)', re.DOTALL)
+_ESCAPES   = {'\\': '\\', 'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n',
+              'r' : '\r', 't': '\t', 'v': '\v'}
+
+
+def _unescape(txt):
+    '''
+    Interpret backslash escapes like `printf %b` does.  `shell_wrapper.sh`
+    passes command lines through `printf %b`, and the adaptor escapes them
+    accordingly -- we need to do the same to stay compatible.
+    '''
+
+    def _sub(match):
+        seq = match.group(1)
+        if seq[0] == '0':
+            return chr(int(seq, 8))
+        return _ESCAPES.get(seq, match.group(0))
+
+    if '\\' not in txt:
+        return txt
+
+    return _ESCAPE_RE.sub(_sub, txt)
+
+
+# ------------------------------------------------------------------------------
+#
+def _now():
+
+    return int(time.time())
+
+
+# ------------------------------------------------------------------------------
+#
+def _append(path, data):
+
+    # single write on an O_APPEND descriptor, so that concurrent writers (other
+    # agents or shell wrappers on the same base dir) do not interleave lines
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, data.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+# ------------------------------------------------------------------------------
+#
+def _read(path, default=None):
+
+    try:
+        with open(path, 'rb') as fin:
+            return fin.read().decode('utf-8', 'replace')
+    except (IOError, OSError):
+        return default
+
+
+# ------------------------------------------------------------------------------
+#
+def _tail(path, n):
+
+    data = _read(path)
+    if data is None:
+        return ''
+    return '\n'.join(data.rstrip('\n').split('\n')[-n:])
+
+
+# ------------------------------------------------------------------------------
+#
+def _alive(pid):
+
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except OSError:
+        # exists, but is not ours
+        pass
+
+    return True
+
+
+# ------------------------------------------------------------------------------
+#
+class Agent(object):
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, base):
+
+        self._gid           = os.getpid()
+        self._base          = base
+        self._notifications = '%s/notifications' % base
+        self._follow        = '%s/follow.%d' % (base, self._gid)
+
+        # jobs started by this agent: upid -> job dict, and pid -> upid
+        self._jobs  = dict()
+        self._procs = dict()
+        self._posts = 0
+        self._syncs = 0
+
+        # `_lock` protects the job dicts, `_cond` signals state changes
+        self._lock  = threading.RLock()
+        self._cond  = threading.Condition(self._lock)
+        self._last  = time.time()
+        self._queue = list()
+
+        self._out        = None
+        self._bulk_error = 'OK'
+        self._monitoring = False
+        self._echo_state = None
+
+        self._cmds  = {'MONITOR'  : self.cmd_monitor,
+                       'RUN'      : self.cmd_run,
+                       'LRUN'     : self.cmd_lrun,
+                       'SUSPEND'  : self.cmd_suspend,
+                       'RESUME'   : self.cmd_resume,
+                       'CANCEL'   : self.cmd_cancel,
+                       'RESULT'   : self.cmd_result,
+                       'STATE'    : self.cmd_state,
+                       'STATES'   : self.cmd_states,
+                       'STATS'    : self.cmd_stats,
+                       'WAIT'     : self.cmd_wait,
+                       'STDIN'    : self.cmd_stdin,
+                       'STDOUT'   : self.cmd_stdout,
+                       'STDERR'   : self.cmd_stderr,
+                       'LOG'      : self.cmd_log,
+                       'LIST'     : self.cmd_list,
+                       'PURGE'    : self.cmd_purge,
+                       'PING'     : self.cmd_ping,
+                       'QUIT'     : self.cmd_quit,
+                       'HELP'     : self.cmd_help,
+                       'NOOP'     : self.cmd_noop,
+                       'BULK_EVAL': self.cmd_bulk_eval}
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _write(self, data):
+
+        if self._out is None:
+            return
+
+        try:
+            self._out.write(data.encode('utf-8'))
+            self._out.flush()
+
+        except (IOError, OSError):
+            # connection is gone
+            raise _Quit()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _readline(self):
+
+        data = sys.stdin.buffer.readline()
+
+        if not data:
+            raise _Quit()
+
+        self._last = time.time()
+
+        # `shell_wrapper.sh` passes all input lines through `printf %b`
+        return _unescape(data.decode('utf-8', 'replace').rstrip('\n'))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _echo(self, enable):
+        '''
+        disable tty echo to simplify output parsing (unless explicitly
+        requested), and restore it on exit
+        '''
+
+        try:
+            import termios
+
+            if not os.isatty(0):
+                return
+
+            if not enable:
+                if os.environ.get('ENABLE_STTY_ECHO'):
+                    return
+                self._echo_state = termios.tcgetattr(0)
+                attrs     = termios.tcgetattr(0)
+                attrs[3] &= ~(termios.ECHO | termios.ECHONL)
+                termios.tcsetattr(0, termios.TCSANOW, attrs)
+
+            elif self._echo_state:
+                termios.tcsetattr(0, termios.TCSANOW, self._echo_state)
+
+        except Exception:
+            pass
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _quit_handler(self, signum, frame):
+
+        if signum == signal.SIGALRM:
+            raise _Quit('TIMEOUT')
+
+        raise _Quit()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _idle_checker(self):
+
+        while True:
+
+            time.sleep(min(10, TIMEOUT))
+
+            if self._monitoring:
+                continue
+
+            if time.time() - self._last > TIMEOUT:
+                os.kill(self._gid, signal.SIGALRM)
+                return
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _reaper(self):
+        '''
+        This thread is the only place where children of this process are
+        waited for.
+        '''
+
+        while True:
+
+            with self._lock:
+                while not self._procs:
+                    self._cond.wait()
+
+            try:
+                pid, status = os.waitpid(-1, 0)
+
+            except ChildProcessError:
+                time.sleep(0.1)
+                continue
+
+            except InterruptedError:
+                continue
+
+            if os.WIFSIGNALED(status):
+                retv = 128 + os.WTERMSIG(status)
+            else:
+                retv = os.WEXITSTATUS(status)
+
+            with self._lock:
+
+                upid = self._procs.pop(pid, None)
+                job  = self._jobs.get(upid)
+
+                if job is None:
+                    continue
+
+                if job['proc']:
+                    # the job process is reaped by us, not by `subprocess`
+                    job['proc'].returncode = retv
+
+                if job['sync']:
+                    # synchronous shell command
+                    job['retv'] = retv
+                    del(self._jobs[upid])
+                    self._cond.notify_all()
+                    continue
+
+                self._job_finished(job, retv)
+                self._cond.notify_all()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_finished(self, job, retv):
+
+        jdir = job['dir']
+        upid = job['upid']
+
+        _append('%s/stats' % jdir, 'STOP   : %s\n' % _now())
+
+        # the job may have been canceled by us or by another agent / wrapper
+        if job['state'] == 'CANCELED' or self._file_state(jdir) == 'CANCELED':
+            job['state'] = 'CANCELED'
+            return
+
+        with open('%s/exit' % jdir, 'w') as fout:
+            fout.write('%d\n' % retv)
+
+        if retv == 0: state = 'DONE'
+        else        : state = 'FAILED'
+
+        self._set_state(job, state, retv)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _set_state(self, job, state, retv=''):
+
+        job['state'] = state
+
+        _append('%s/state' % job['dir'], '%s \n' % state)
+        _append(self._notifications, '%s:%s:%s \n' % (job['upid'], state, retv))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _file_state(self, jdir):
+        '''
+        last complete state entry in the job's state file
+        '''
+
+        data = _read('%s/state' % jdir)
+        if data is None:
+            return None
+
+        for line in reversed(data.split('\n')):
+            if line.endswith(' '):
+                return line.strip() or 'UNKNOWN'
+
+        return 'UNKNOWN'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _verify(self, args, fname='state'):
+        '''
+        ensure that the given job ID points to a viable job directory with the
+        given file.  Returns the job id and directory.
+        '''
+
+        if not args:
+            raise _Error('no pid given')
+
+        upid = args.split()[0]
+        jdir = '%s/%s' % (self._base, upid)
+
+        if not os.path.isdir(jdir):
+            raise _Error('pid %s not known' % upid)
+
+        if not os.access('%s/%s' % (jdir, fname), os.R_OK):
+            raise _Error('pid %s has no %s' % (upid, fname))
+
+        return upid, jdir
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_state(self, upid, jdir):
+
+        with self._lock:
+            job = self._jobs.get(upid)
+            if job:
+                return job['state']
+
+        return self._file_state(jdir) or 'UNKNOWN'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _spawn(self, cmd, upid, env=None, stdin=None, stdout=None, stderr=None,
+               sync=False):
+        '''
+        Start a child process and register it with the reaper.  The lock is
+        held while spawning, so that the reaper cannot see the child before it
+        is registered.
+        '''
+
+        with self._lock:
+
+            proc = subprocess.Popen(cmd, stdin=stdin, stdout=stdout,
+                                    stderr=stderr, env=env, close_fds=True,
+                                    start_new_session=not sync)
+            job  = self._jobs.get(upid)
+            if job is None:
+                job = {'upid': upid, 'sync': sync}
+                self._jobs[upid] = job
+
+            job['pid']  = proc.pid
+            job['proc'] = proc
+            self._procs[proc.pid] = upid
+            self._cond.notify_all()
+
+        return proc
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_run(self, args):
+        '''
+        run a job in the background.  Other than `shell_wrapper.sh`, the job is
+        a direct child of this process, and the job ID is derived from the
+        agent's pid.
+        '''
+
+        cmd = _unescape(args)
+
+        with self._lock:
+
+            upid = '%d.%d' % (self._gid, self._posts)
+            jdir = '%s/%s' % (self._base, upid)
+            while os.path.exists(jdir):
+                self._posts += 1
+                upid = '%d.%d' % (self._gid, self._posts)
+                jdir = '%s/%s' % (self._base, upid)
+            self._posts += 1
+
+            os.makedirs(jdir)
+
+            job = {'upid' : upid,
+                   'dir'  : jdir,
+                   'state': 'NEW',
+                   'sync' : False,
+                   'proc' : None}
+            self._jobs[upid] = job
+
+        with open('%s/stats' % jdir, 'w') as fout:
+            fout.write('START  : %s\n' % _now())
+        with open('%s/state' % jdir, 'w') as fout:
+            fout.write('NEW \n')
+        with open('%s/cmd'   % jdir, 'w') as fout:
+            fout.write('#!/bin/sh\n%s\n' % cmd)
+        os.chmod('%s/cmd' % jdir, 0o700)
+        open('%s/in' % jdir, 'a').close()
+
+        env = dict(os.environ)
+        env['SAGA_PWD']  = jdir
+        env['SAGA_UPID'] = upid
+
+        fin  = open('%s/in'  % jdir, 'rb')
+        fout = open('%s/out' % jdir, 'wb')
+        ferr = open('%s/err' % jdir, 'wb')
+
+        try:
+            with self._lock:
+                proc = self._spawn(['%s/cmd' % jdir], upid, env=env,
+                                   stdin=fin, stdout=fout, stderr=ferr)
+                _append('%s/log' % jdir, '%s : RUNNING \n' % time.ctime())
+                self._set_state(job, 'RUNNING')
+
+        except OSError as e:
+            with self._lock:
+                self._set_state(job, 'FAILED')
+            raise _Error('failed to run job: %s' % e)
+
+        finally:
+            fin.close()
+            fout.close()
+            ferr.close()
+
+        # `mpid` is the process to kill on cancel -- there is no monitor
+        # process, so that is the job itself
+        with open('%s/rpid' % jdir, 'w') as fout: fout.write('%d\n' % proc.pid)
+        with open('%s/mpid' % jdir, 'w') as fout: fout.write('%d\n' % proc.pid)
+        with open('%s/upid' % jdir, 'w') as fout: fout.write('%s\n' % upid)
+
+        # report the current state, then the job id
+        self._write('%s \n' % self._get_state(upid, jdir))
+
+        return upid
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_lrun(self, args):
+        '''
+        LRUN allows to run shell commands which span more than one line.
+        '''
+
+        cmd = ''
+        while True:
+
+            if self._queue: line = self._queue.pop(0)
+            else          : line = self._readline()
+
+            if line == 'LRUN_EOT':
+                break
+
+            cmd += '%s\\n' % line
+
+        return self.cmd_run(cmd)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_state(self, args):
+
+        upid, jdir = self._verify(args)
+
+        return self._get_state(upid, jdir)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_states(self, args):
+        '''
+        report one line '<id> <state>' per given job id, 'NOK' for unknown jobs
+        '''
+
+        ret = list()
+
+        for upid in args.split():
+
+            jdir = '%s/%s' % (self._base, upid)
+
+            if upid in self._jobs or os.access('%s/state' % jdir, os.R_OK):
+                ret.append('%s %s' % (upid, self._get_state(upid, jdir)))
+            else:
+                ret.append('%s NOK' % upid)
+
+        return '\n'.join(ret)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_stats(self, args):
+
+        upid, jdir = self._verify(args)
+
+        state = self._get_state(upid, jdir)
+        ret   = 'STATE : %s\n\n' % state
+
+        ecode = _read('%s/exit' % jdir)
+        if ecode is not None:
+            ret += 'ECODE=%s\n' % ecode.strip()
+
+        ret += '%s\n\n' % _read('%s/stats' % jdir, '')
+
+        # if state is FAILED, we also deliver more lines from stderr
+        n = 10
+        if state == 'FAILED':
+            n = 100
+
+        ret += 'START_STDERR\n%s\nEND_STDERR\n\n' % _tail('%s/err' % jdir, n)
+        ret += 'START_STDOUT\n%s\nEND_STDOUT\n'   % _tail('%s/out' % jdir, n)
+
+        return ret
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_wait(self, args):
+        '''
+        wait for job to finish.  Own jobs are waited for via the reaper, other
+        jobs are polled.
+        '''
+
+        upid, jdir = self._verify(args)
+
+        while True:
+
+            state = self._get_state(upid, jdir)
+
+            if state in FINAL:
+                return state
+
+            # waiting is not idling
+            self._last = time.time()
+
+            with self._lock:
+                if upid in self._jobs:
+                    self._cond.wait(1.0)
+                    continue
+
+            time.sleep(1)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_result(self, args):
+
+        upid, jdir = self._verify(args)
+
+        state = self._get_state(upid, jdir)
+
+        if state not in FINAL:
+            raise _Error('job %s in incorrect state (%s != DONE|FAILED|CANCELED)'
+                         % (upid, state), exitval=0)
+
+        ecode = _read('%s/exit' % jdir)
+        if ecode is None:
+            raise _Error('job %s in incorrect state -- no exit code available'
+                         % upid, exitval=0)
+
+        return ecode.strip()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _signal(self, upid, jdir, sig):
+
+        rpid = int(_read('%s/rpid' % jdir, '0').strip() or 0)
+
+        if not rpid:
+            raise _Error('pid %s has no process id' % upid)
+
+        os.kill(rpid, sig)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_suspend(self, args):
+
+        upid, jdir = self._verify(args)
+        self._verify(args, 'rpid')
+
+        with self._lock:
+
+            state = self._get_state(upid, jdir)
+            if state != 'RUNNING':
+                raise _Error('job %s in incorrect state (%s != RUNNING)'
+                             % (upid, state), exitval=0)
+            try:
+                self._signal(upid, jdir, signal.SIGSTOP)
+            except OSError as e:
+                raise _Error('suspend failed (%s)' % e, exitval=0)
+
+            _append('%s/stats' % jdir, 'SUSPEND: %s\n' % _now())
+            self._set_state(self._job(upid, jdir), 'SUSPENDED')
+
+        return '%s suspended' % upid
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_resume(self, args):
+
+        upid, jdir = self._verify(args)
+        self._verify(args, 'rpid')
+
+        with self._lock:
+
+            state = self._get_state(upid, jdir)
+            if state != 'SUSPENDED':
+                raise _Error('job %s in incorrect state (%s != SUSPENDED)'
+                             % (upid, state), exitval=0)
+            try:
+                self._signal(upid, jdir, signal.SIGCONT)
+            except OSError as e:
+                raise _Error('resume failed (%s)' % e, exitval=0)
+
+            _append('%s/stats' % jdir, 'RESUME : %s\n' % _now())
+            self._set_state(self._job(upid, jdir), 'RUNNING')
+
+        return '%s resumed' % upid
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_cancel(self, args):
+
+        upid, jdir = self._verify(args)
+        self._verify(args, 'rpid')
+
+        with self._lock:
+
+            state = self._get_state(upid, jdir)
+            if state in FINAL:
+                raise _Error('state: %s\n job %s is in final state'
+                             % (state, upid), '%s %s' % (upid, state),
+                             exitval=0)
+
+            # mark the job as canceled before killing it, so that the reaper
+            # does not report it as failed
+            self._set_state(self._job(upid, jdir), 'CANCELED')
+
+        rpid = int(_read('%s/rpid' % jdir, '0').strip() or 0)
+        mpid = int(_read('%s/mpid' % jdir, '0').strip() or 0)
+
+        # jobs started by `shell_wrapper.sh` have a monitor process which needs
+        # to go first
+        if mpid and mpid != rpid:
+            for sig in [signal.SIGTERM, signal.SIGKILL]:
+                try   : os.kill(mpid, sig)
+                except OSError: pass
+
+        # kill the job's process group, and to be sure also the job itself
+        for sig in [signal.SIGTERM, signal.SIGKILL]:
+            for kill, pid in [[os.killpg, rpid], [os.kill, rpid]]:
+                try   : kill(pid, sig)
+                except OSError: pass
+
+        return '%s CANCELED' % upid
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job(self, upid, jdir):
+        '''
+        get the job dict for own jobs, or a transient one for other jobs
+        '''
+
+        job = self._jobs.get(upid)
+        if job:
+            return job
+
+        return {'upid': upid, 'dir': jdir, 'state': None}
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_stdin(self, args):
+
+        upid, jdir = self._verify(args, 'in')
+
+        data = ''
+        if ' ' in args:
+            data = _unescape(args.split(' ', 1)[1])
+
+        _append('%s/in' % jdir, data)
+
+        return 'stdin refreshed'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _encode(self, args, fname):
+
+        upid, jdir = self._verify(args, fname)
+
+        with open('%s/%s' % (jdir, fname), 'rb') as fin:
+            return binascii.hexlify(fin.read()).decode('ascii')
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_stdout(self, args):
+
+        return self._encode(args, 'out')
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_stderr(self, args):
+
+        return self._encode(args, 'err')
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_log(self, args):
+
+        return self._encode(args, 'log')
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_list(self, args):
+
+        return '\n'.join(sorted([d for d in os.listdir(self._base)
+                            if os.path.isdir('%s/%s' % (self._base, d))]))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_purge(self, args):
+        '''
+        purge working directories of given jobs.  Default (no job id given):
+        purge all final jobs older than 1 day
+        '''
+
+        if args:
+            shutil.rmtree('%s/%s' % (self._base, args.split()[0]),
+                          ignore_errors=True)
+            return 'purged %s' % args
+
+        limit = time.time() - 24 * 60 * 60
+
+        for upid in os.listdir(self._base):
+
+            jdir  = '%s/%s' % (self._base, upid)
+            state = _read('%s/state' % jdir)
+
+            if not state:
+                continue
+
+            if not [s for s in FINAL if s in state]:
+                continue
+
+            for path, _, fnames in os.walk(jdir):
+                for fname in fnames:
+                    fpath = '%s/%s' % (path, fname)
+                    try:
+                        if os.path.getmtime(fpath) < limit:
+                            os.unlink(fpath)
+                    except OSError:
+                        pass
+
+            try   : os.rmdir(jdir)
+            except OSError: pass
+
+        return 'purged finished jobs'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_purge_tmps(self, args):
+
+        limit = time.time() - 30 * 24 * 60 * 60
+
+        for name in os.listdir(self._base):
+
+            path = '%s/%s' % (self._base, name)
+
+            if name.split('.')[0] in ['bulk', 'idle', 'quit']:
+                try   : os.unlink(path)
+                except OSError: pass
+                continue
+
+            try:
+                if os.path.getmtime(path) < limit:
+                    if os.path.isdir(path): shutil.rmtree(path, True)
+                    else                  : os.unlink(path)
+            except OSError:
+                pass
+
+        return 'purged tmp files'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _lock_notifications(self):
+        '''
+        Serialize monitor registration and journal rotation with other agents
+        and shell wrappers on the same base dir.  The lock is considered stale
+        after 10 seconds.
+        '''
+
+        for _ in range(10):
+            try:
+                os.mkdir('%s.lock' % self._notifications)
+                return
+            except OSError:
+                time.sleep(1)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _unlock_notifications(self):
+
+        try   : os.rmdir('%s.lock' % self._notifications)
+        except OSError: pass
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _rotate_notifications(self):
+        '''
+        Compact the notification journal, like `rotate_notifications` in
+        `shell_wrapper.sh`: the live journal is moved away and merged into the
+        journal history, which keeps the last event of all jobs which still
+        exist, and the journal generation is increased.  The journal is not
+        rotated while any monitor follows it.
+        '''
+
+        with open(self._notifications, 'rb') as fin:
+            if sum(1 for _ in fin) <= NOTIFICATIONS_MAX:
+                return
+
+        try:
+            os.mkdir('%s.lock' % self._notifications)
+        except OSError:
+            # someone else is rotating right now
+            return
+
+        try:
+            for name in os.listdir(self._base):
+
+                if not name.startswith('follow.'):
+                    continue
+
+                if _alive(name.split('.', 1)[1]):
+                    return
+
+                try   : os.unlink('%s/%s' % (self._base, name))
+                except OSError: pass
+
+            # new events go to a new live journal once it is moved away
+            rot  = '%s.rot'  % self._notifications
+            hist = '%s.hist' % self._notifications
+            os.rename(self._notifications, rot)
+            _append(self._notifications, '')
+
+            last = dict()
+            for path in [hist, rot]:
+                for line in (_read(path) or '').split('\n'):
+                    upid = line.split(':', 1)[0]
+                    if line and os.path.isdir('%s/%s' % (self._base, upid)):
+                        last[upid] = line
+
+            with open('%s.tmp' % self._notifications, 'wb') as fout:
+                fout.write(''.join('%s\n' % line
+                                   for line in last.values()).encode('utf-8'))
+
+            os.rename('%s.tmp' % self._notifications, hist)
+            os.unlink(rot)
+
+            gen = _read('%s.gen' % self._notifications, '0').strip() or '0'
+            with open('%s.gen' % self._notifications, 'wb') as fout:
+                fout.write(('%d\n' % (int(gen) + 1)).encode('utf-8'))
+
+        finally:
+            self._unlock_notifications()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_monitor(self, args):
+        '''
+        Report all notifications: replay the compacted journal history and all
+        events of the live journal (to cater for startup races), then follow
+        the live journal.  `MONITOR <gen> <offset>` skips the history and the
+        first `offset` events of the live journal if `gen` is the current
+        journal generation.  The line `JOURNAL <gen> <offset>` marks where
+        events of the live journal start.  This never returns.
+        '''
+
+        self._monitoring = True
+
+        self._lock_notifications()
+        try:
+            _append(self._follow, '')
+            _append(self._notifications, '')
+            gen = _read('%s.gen' % self._notifications, '0').strip() or '0'
+        finally:
+            self._unlock_notifications()
+
+        elems = args.split()
+        if len(elems) == 2 and elems[0] == gen and elems[1].isdigit():
+            offset = int(elems[1])
+        else:
+            offset = 0
+            self._write(_read('%s.hist' % self._notifications, ''))
+
+        self._write('JOURNAL %s %d\n' % (gen, offset))
+
+        with open(self._notifications, 'rb') as fin:
+
+            buf = b''
+            while True:
+
+                data = fin.readline()
+
+                if not data:
+                    time.sleep(0.1)
+                    continue
+
+                buf += data
+                if buf.endswith(b'\n'):
+                    if offset: offset -= 1
+                    else     : self._write(buf.decode('utf-8', 'replace'))
+                    buf = b''
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_ping(self, args):
+
+        return 'PONG'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_quit(self, args):
+
+        raise _Quit()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_help(self, args):
+
+        return HELP
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_noop(self, args):
+
+        raise _Error('NOOP', exitval=0)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_bulk_eval(self, args):
+
+        if self._bulk_error != 'OK':
+            raise _Error(self._bulk_error, 'BULK COMPLETED')
+
+        return 'BULK COMPLETED'
+
+
+    # --------------------------------------------------------------------------
+    #
+    def cmd_shell(self, cmd):
+        '''
+        run as synchronous shell command
+        '''
+
+        self._syncs += 1
+        upid = 'sync.%d' % self._syncs
+        proc = self._spawn(['/bin/sh', '-c', cmd], upid,
+                           stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                           sync=True)
+        out  = proc.stdout.read().decode('utf-8', 'replace')
+        proc.stdout.close()
+
+        with self._lock:
+            while upid in self._jobs:
+                self._cond.wait()
+
+        if proc.returncode:
+            raise _Error("NOK - command '%s' failed" % cmd.split()[0],
+                         out.rstrip('\n'))
+
+        return out.rstrip('\n')
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _execute(self, line):
+
+        parts = line.split(None, 1)
+        if not parts:
+            return
+
+        cmd   = parts[0]
+        args  = ''
+        if len(parts) > 1:
+            args = parts[1].strip()
+
+        error   = 'OK'
+        retval  = ''
+        exitval = 0
+
+        try:
+            if cmd in self._cmds: retval = self._cmds[cmd](args)
+            else                : retval = self.cmd_shell(line)
+
+        except _Error as e:
+            error   = e.msg
+            retval  = e.retval
+            exitval = e.exitval
+
+        except _Quit:
+            raise
+
+        except Exception as e:
+            error   = "NOK - command '%s' failed: %s" % (cmd, e)
+            exitval = 1
+
+        if error == 'OK':
+            self._write('OK\n%s\n' % retval)
+
+        elif error == 'NOOP':
+            pass
+
+        else:
+            self._write('ERROR\n%s\n%s\n' % (error, retval))
+            self._bulk_error = "NOK - bulk error '%s'" % error
+
+        # well done - prompt for next command (even in bulk mode, for easier
+        # parsing and EXITVAL communication)
+        self._last = time.time()
+        self._write('PROMPT-%d->\n' % exitval)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def listen(self):
+        '''
+        main even loop -- wait for incoming command lines, and react on them
+        '''
+
+        bulk = None
+
+        # prompt for commands...
+        self._write('PROMPT-0->\n')
+
+        while True:
+
+            line = self._readline()
+
+            # check if we start or finish a bulk
+            if line == 'BULK':
+                bulk = list()
+                self._bulk_error = 'OK'
+                continue
+
+            if bulk is not None:
+                if line == 'BULK_RUN':
+                    self._queue = bulk + ['BULK_EVAL']
+                    bulk = None
+                else:
+                    bulk.append(line)
+                    continue
+            else:
+                self._queue = [line]
+
+            # execute the collected command lines
+            while self._queue:
+                self._execute(self._queue.pop(0))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def run(self):
+
+        self._out = sys.stdout.buffer
+
+        if not os.path.isdir(self._base):
+            os.makedirs(self._base)
+
+        _append(self._notifications, '')
+        self._rotate_notifications()
+
+        # we always start in the user's home dir
+        os.chdir(os.path.expanduser('~'))
+
+        for sig in [signal.SIGHUP,  signal.SIGINT, signal.SIGTERM,
+                    signal.SIGQUIT, signal.SIGALRM]:
+            signal.signal(sig, self._quit_handler)
+
+        for target in [self._reaper, self._idle_checker]:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+        # confirm existence
+        self._write('PID: %d\n' % self._gid)
+
+        if PURGE_ON_START == 'True':
+            self.cmd_purge('')
+            self.cmd_purge_tmps('')
+
+        self._echo(False)
+
+        exitval = 0
+        try:
+            self.listen()
+
+        except _Quit as e:
+            if e.reason == 'TIMEOUT':
+                exitval = 2
+                self._quiet_write('IDLE TIMEOUT\n')
+
+        try   : os.unlink(self._follow)
+        except OSError: pass
+
+        self._echo(True)
+        self._quiet_write('cmd_quit called (%d)' % exitval)
+        self._linger()
+
+        return exitval
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _quiet_write(self, data):
+
+        try:
+            self._write(data)
+        except _Quit:
+            pass
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _linger(self):
+        '''
+        The connection is gone (or will be soon) -- but our jobs need a parent
+        which keeps track of them.  Detach from the terminal and wait until all
+        jobs are final.
+        '''
+
+        with self._lock:
+            if not self._procs:
+                return
+
+        for sig in [signal.SIGHUP,  signal.SIGINT, signal.SIGQUIT,
+                    signal.SIGALRM]:
+            signal.signal(sig, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        self._out = None
+        devnull   = os.open(os.devnull, os.O_RDWR)
+        for fd in [0, 1, 2]:
+            os.dup2(devnull, fd)
+
+        with self._lock:
+            while self._procs:
+                self._cond.wait()
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    base = None
+    if len(sys.argv) > 1:
+        base = sys.argv[1]
+
+    if not base:
+        base = os.path.expanduser('~/.radical/saga/adaptors/shell_job/')
+
+    sys.exit(Agent(base.rstrip('/')).run())
+
+
+# ------------------------------------------------------------------------------
+
@@ -8,7 +8,10 @@ __license__   = "MIT"
 
 import re
 import time
-import threading as mt
+import functools
+import contextlib
+import threading          as mt
+import concurrent.futures as cf
 
 import radical.utils as ru
 
@@ -17,6 +20,7 @@ from ..                import base
 from ..cpi             import SYNC_CALL
 from ..cpi             import job as cpi
 from ...               import job as api
+from ...constants      import ANY
 from ...utils.job      import TransferDirectives
 from ...utils          import pty_shell
 
@@ -27,6 +31,16 @@ from . import shell_wrapper
 #
 _PING_DELAY  = 60.0
 
+# `STATES` requests are split into several command lines if needed, as the pty
+# line discipline limits the length of input lines (to 4096 bytes on Linux)
+_STATES_LINE_MAX = 2048
+
+# delay between state queries in `container_wait()` (seconds)
+_WAIT_DELAY  = 1.0
+
+# staging sources which need shell expansion
+_WILDCARD    = re.compile(r'[*?\[]')
+
 
 # ------------------------------------------------------------------------------
 #
@@ -62,9 +76,20 @@ class _job_state_monitor(mt.Thread):
 
         MONITOR_READ_TIMEOUT = 1.0   # check for stop signal now and then
 
+        # the position in the notification journal up to which events have
+        # been seen by any monitor for this host and base dir: `[gen, offset]`.
+        # We resume from there, and only track the position once the wrapper
+        # told us where the live journal starts.
+        key      = '%s:%s' % (self.rm, self.js.base_workdir)
+        journals = self.js._adaptor._journals
+        journal  = None
+
         try:
 
-            self.channel.run_async("MONITOR")
+            if key in journals:
+                self.channel.run_async("MONITOR %s %d" % tuple(journals[key]))
+            else:
+                self.channel.run_async("MONITOR")
 
             while self.channel.alive():
 
@@ -85,11 +110,21 @@ class _job_state_monitor(mt.Thread):
                     return
 
 
+                elif line.startswith('JOURNAL '):
+                    _, gen, offset = line.split()
+                    journal        = [gen, int(offset)]
+                    journals[key]  = list(journal)
+
+
                 elif ':' not in line:
                     self.logger.warn("monitoring channel noise: %s" % line)
 
 
                 else:
+                    if journal:
+                        journal[1]   += 1
+                        journals[key] = list(journal)
+
                     job_pid, state, data = line.split(':', 2)
                     job_id = "[%s]-[%s]" % (self.rm, job_pid)
 
@@ -123,6 +158,212 @@ class _job_state_monitor(mt.Thread):
             self.logger.error("Cancel job monitoring for %s" % self.rm)
 
 
+# ------------------------------------------------------------------------------
+#
+class _staging_manager(object):
+    '''
+    Transfers the files named in the `file_transfer` directives of job
+    descriptions.  Transfers run concurrently on a pool of copy channels (one
+    `PTYShell` each, created on demand and kept until the job service is
+    closed), so that staging neither blocks the wrapper shells nor other
+    transfers.  The transfers of a job are performed as one batch on one
+    channel (see `PTYShell.stage_to_remote_batch()`).  Identical transfers
+    which are requested while one of them is still pending (such as input
+    files shared by the jobs of a container) are performed only once.
+
+    `stage_input()` and `stage_output()` return a list of futures for the
+    job's transfers, which can be checked via `done()` and `wait()`.
+    '''
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, rm, session, logger, cfg, size):
+
+        self._rm       = rm
+        self._session  = session
+        self._logger   = logger
+        self._cfg      = cfg
+        self._lock     = mt.RLock()
+        self._shells   = list()   # idle copy channels
+        self._pending  = dict()   # (direction, src, tgt): future
+        self._closed   = False
+        self._executor = cf.ThreadPoolExecutor(max_workers=size)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def close(self):
+
+        self._executor.shutdown(wait=False)
+
+        with self._lock:
+            self._closed = True
+            for shell in self._shells:
+                shell.finalize(kill_pty=True)
+            self._shells = list()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stage_input(self, jd):
+
+        td = self._directives(jd)
+
+        if not td:
+            return list()
+
+        if td.in_append or td.out_append:
+            raise rse.BadParameter('FT append(<</>>) not supported')
+
+        return self._submit('in', td.in_overwrite)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stage_output(self, jd):
+
+        td = self._directives(jd)
+
+        if not td:
+            return list()
+
+        if td.out_append:
+            raise rse.BadParameter('FileTransfer append not supported')
+
+        return self._submit('out', [(remote, local)
+                                    for local, remote in td.out_overwrite])
+
+
+    # --------------------------------------------------------------------------
+    #
+    def done(self, futures):
+
+        return all([future.done() for future in futures])
+
+
+    # --------------------------------------------------------------------------
+    #
+    def wait(self, futures):
+        '''
+        Wait for the given transfers to complete, and raise the error of the
+        first failed transfer, if any.
+        '''
+
+        for future in futures:
+            future.result()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _directives(self, jd):
+
+        if not jd or jd.file_transfer is None:
+            return None
+
+        return TransferDirectives(jd.file_transfer)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _submit(self, direction, transfers):
+
+        futures = list()
+        batch   = list()
+
+        with self._lock:
+
+            for src, tgt in transfers:
+
+                key = (direction, src, tgt)
+
+                if key not in self._pending:
+                    future = cf.Future()
+                    self._pending[key] = future
+                    future.add_done_callback(functools.partial(self._done, key))
+                    batch.append(key)
+
+                futures.append(self._pending[key])
+
+            # the new transfers are performed as one batch
+            if batch:
+                self._executor.submit(self._transfer, batch,
+                                      [self._pending[key] for key in batch])
+
+        return futures
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _done(self, key, future):
+
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _transfer(self, keys, futures):
+
+        # the executor limits the number of concurrent transfers, and thus the
+        # number of copy channels
+        with self._lock:
+            shell = self._shells.pop() if self._shells else None
+
+        try:
+            if not shell:
+                shell = pty_shell.PTYShell(self._rm, self._session,
+                                           self._logger, cfg=self._cfg)
+
+            # batched transfers do not expand wildcards, so those are staged
+            # one by one
+            batch  = [key for key in keys if not _WILDCARD.search(key[1])]
+            single = [key for key in keys if     _WILDCARD.search(key[1])]
+            errors = dict()
+
+            for direction in ['in', 'out']:
+
+                pairs = [(src, tgt) for d, src, tgt in batch if d == direction]
+                if not pairs:
+                    continue
+
+                self._logger.info("stage %s %d files" % (direction, len(pairs)))
+
+                if direction == 'in':
+                    ret = shell.stage_to_remote_batch  (pairs)
+                else:
+                    ret = shell.stage_from_remote_batch(pairs)
+
+                for (src, tgt), err in zip(pairs, ret):
+                    errors[(direction, src, tgt)] = err
+
+            for direction, src, tgt in single:
+
+                self._logger.info("stage %s to %s" % (src, tgt))
+
+                try:
+                    if direction == 'in': shell.stage_to_remote  (src, tgt)
+                    else                : shell.stage_from_remote(src, tgt)
+                    errors[(direction, src, tgt)] = None
+
+                except Exception as e:
+                    errors[(direction, src, tgt)] = e
+
+        except Exception as e:
+            self._logger.exception('staging failed')
+            errors = {key: e for key in keys}
+
+        finally:
+            if shell:
+                with self._lock:
+                    if self._closed: shell.finalize(kill_pty=True)
+                    else           : self._shells.append(shell)
+
+        for key, future in zip(keys, futures):
+            if errors.get(key): future.set_exception(errors[key])
+            else              : future.set_result(None)
+
+
 # ------------------------------------------------------------------------------
 #
 # strip white space from a string, and hex-decode the remaining characters.
@@ -246,7 +487,10 @@ _ADAPTOR_DOC           = {
             instance).  Each remote job will create three additional processes:
             two for the job instance itself (double fork), and an additional
             process which monitors the job for state changes etc.  Additional
-            temporary processes may be needed as well.
+            temporary processes may be needed as well.  If the adaptor's
+            `wrapper` option is set to `python` (and the target host provides
+            `python3`), jobs are managed by a single agent process instead,
+            and no monitor process is created per job.
 
             While marked as 'obsolete' by POSIX, the `ulimit` command is
             available on many systems, and reports the number of processes
@@ -336,6 +580,10 @@ class Adaptor(base.Base):
 
         self.id_re = re.compile('^\[(.*)\]-\[(.*?)\]$')
 
+        # position in the notification journals of all target hosts and base
+        # dirs (see `_job_state_monitor`)
+        self._journals = dict()
+
 
     # --------------------------------------------------------------------------
     #
@@ -378,53 +626,6 @@ class Adaptor(base.Base):
                }.get(state_str, api.UNKNOWN)
 
 
-    # --------------------------------------------------------------------------
-    #
-    def stage_input(self, shell, lock, jd):
-
-        if not jd:
-            return
-
-        if jd.file_transfer is not None:
-
-            td = TransferDirectives(jd.file_transfer)
-
-            if td.in_append or td.out_append:
-                raise rse.BadParameter('FT append(<</>>) not supported')
-
-            if td.in_overwrite:
-                for(local, remote) in td.in_overwrite:
-                    source = local
-                    target = remote
-                    self._logger.info("stage %s to %s" % (source, target))
-
-                    with lock:
-                        shell.stage_to_remote(source, target)
-
-
-    # --------------------------------------------------------------------------
-    #
-    def stage_output(self, shell, lock, jd):
-
-        if not jd:
-            return
-
-        if jd.file_transfer is not None:
-            td = TransferDirectives(jd.file_transfer)
-
-            if td.out_append:
-                raise rse.BadParameter('FileTransfer append not supported')
-
-            if td.out_overwrite:
-                for(local, remote) in td.out_overwrite:
-                    source = remote
-                    target = local
-                    self._logger.info("stage %s to %s" % (source, target))
-
-                    with lock:
-                        shell.stage_from_remote(source, target)
-
-
 # ------------------------------------------------------------------------------
 #
 class ShellJobService(cpi.Service):
@@ -439,6 +640,8 @@ class ShellJobService(cpi.Service):
         self.opts = {}
         self.opts['shell'] = None  # default to login shell
 
+        self._staging = None
+
 
     # --------------------------------------------------------------------------
     #
@@ -461,6 +664,10 @@ class ShellJobService(cpi.Service):
         self.jobs    = dict()
         self.njobs   = 0
 
+        # job states from queries and notifications are kept in a service wide
+        # cache (staleness bound: `state_ttl` in the adaptor config)
+        self._init_state_cache()
+
         # Use `_set_session` method of the base class to set the session object.
         # `_set_session` and `get_session` methods are provided by `CPIBase`.
         self._set_session(session)
@@ -510,10 +717,21 @@ class ShellJobService(cpi.Service):
                 self.shell.finalize(kill_pty=True)
                 self.shell = None
 
+            # the other shells of the shell pool
+            for shell, lock in self._shells[1:]:
+                with lock:
+                    shell.run_async("QUIT")
+                    shell.finalize(kill_pty=True)
+            self._shells = list()
+
         if self.monitor:
             self.monitor.finalize()
             # we don't care about join, really
 
+        if self._staging:
+            self._staging.close()
+            self._staging = None
+
 
     # --------------------------------------------------------------------------
     #
@@ -528,6 +746,24 @@ class ShellJobService(cpi.Service):
         # interaction with the shell
         self._shell_lock = mt.RLock()
 
+        # Requests for individual jobs (run, state, cancel, ...) are spread over
+        # a pool of wrapper shells, so that concurrent requests do not serialize
+        # on a single shell.  `self.shell` is part of that pool, and is also
+        # used for bulk operations and for `list()`.  The pool is filled at the
+        # end of this method.
+        self._pool_size = max(1, int(self._adaptor._cfg.get('shell_pool_size',
+                                                            1)))
+        self._shells    = [[self.shell, self._shell_lock]]
+        self._idle      = list(self._shells)  # shells not leased right now
+        self._pool_cond = mt.Condition()
+
+        # File staging runs concurrently on separate copy channels, so that it
+        # does not block the wrapper shells.
+        staging_size  = max(1, int(self._adaptor._cfg.get('staging_pool_size',
+                                                          2)))
+        self._staging = _staging_manager(self.rm, self.get_session(),
+                                         self._logger, self.opts, staging_size)
+
         # at regular intervals, run a ping toward the shell wrapper to avoid
         # timeouts kicking in
         # FIXME: configurable frequency
@@ -558,6 +794,17 @@ class ShellJobService(cpi.Service):
         self.notifications  = cfg.enable_notifications
         self.purge_on_start = cfg.purge_on_star
         self.base_workdir   = ru.expand_env(cfg.base_workdir, env)
+        self.wrapper        = cfg.get('wrapper', 'sh')
+
+        # the python agent needs python3 on the target host
+        if self.wrapper == 'python':
+            with self._shell_lock:
+                ret, out, _ = self.shell.run_sync(" command -v python3")
+
+            if ret != 0:
+                self._logger.warning("no python3 on %s - use sh wrapper"
+                                    % self.rm)
+                self.wrapper = 'sh'
 
 
         # start the shell, find its prompt.  If that is up and running, we can
@@ -577,7 +824,12 @@ class ShellJobService(cpi.Service):
 
         # TODO: replace some constants in the script with values from config
         # files, such as 'timeout' or 'purge_on_quit' ...
-        tgt = "%s/wrapper.sh" % base
+        if self.wrapper == 'python':
+            tgt = "%s/wrapper.py" % base
+            src = shell_wrapper._AGENT_SCRIPT
+        else:
+            tgt = "%s/wrapper.sh" % base
+            src = shell_wrapper._WRAPPER_SCRIPT
 
         # lets check if we actually need to stage the wrapper script.  We need
         # an adaptor lock on this one.
@@ -588,7 +840,6 @@ class ShellJobService(cpi.Service):
 
             if ret != 0:
                 # yep, need to stage...
-                src = shell_wrapper._WRAPPER_SCRIPT
                 src = src.replace('% (PURGE_ON_START)s',
                                   str(self.purge_on_start))
 
@@ -619,49 +870,90 @@ class ShellJobService(cpi.Service):
         # feedback on failures(the shell just quits) -- so we replace it with
         # this poor-man's version...
         with self._shell_lock:
-            ret, out, _ = self.shell.run_sync(" /bin/sh %s/wrapper.sh %s"
-                                             % (base, base))
+            self._run_wrapper(self.shell, 'cmd')
+
+        # now do the same for the monitoring shell
+        self._run_wrapper(self.channel, 'mon')
+
+        # ----------------------------------------------------------------------
+        # Additional wrapper shells for the shell pool.  They run the same
+        # wrapper against the same `base_workdir`, so that all of them can
+        # serve requests for all jobs (see `_pooled_shell()`).
+        for _ in range(1, self._pool_size):
+
+            shell = pty_shell.PTYShell(self.rm, self.get_session(),
+                                       self._logger, cfg=self.opts)
+            self._run_wrapper(shell, 'pool')
+
+            with self._pool_cond:
+                self._shells.append([shell, mt.RLock()])
+                self._idle.append(self._shells[-1])
+                self._pool_cond.notify()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _run_wrapper(self, shell, name):
+        '''
+        run the shell wrapper script (staged by `initialize()`) in the given
+        shell
+        '''
+
+        base = self.base_workdir
+
+        if self.wrapper == 'python':
+            cmd = " python3 %s/wrapper.py %s" % (base, base)
+        else:
+            cmd = " /bin/sh %s/wrapper.sh %s" % (base, base)
 
-        # shell_wrapper.sh will report its own PID -- we use that to sync prompt
+        ret, out, _ = shell.run_sync(cmd)
+
+        # the wrapper will report its own PID -- we use that to sync prompt
         # detection, too.
         if ret != 0:
             raise rse.NoSuccess("failed to run bootstrap:(%s)(%s)" % (ret, out))
 
-        id_pattern = re.compile("\s*PID:\s+(\d+)\s*$")
+        id_pattern = re.compile(r"\s*PID:\s+(\d+)\s*$")
         id_match   = id_pattern.search(out)
 
         if not id_match:
-            self.shell.run_async(" exit")
+            shell.run_async(" exit")
             self._logger.error("host bootstrap failed - no pid(%s)" % out)
             raise rse.NoSuccess  ("host bootstrap failed - no pid(%s)" % out)
 
         # we actually don't care much about the PID:-P
 
-        self._logger.debug("got cmd prompt(%s)(%s)" % (ret, out.strip()))
+        self._logger.debug("got %s prompt(%s)(%s)" % (name, ret, out.strip()))
 
 
-        # ----------------------------------------------------------------------
-        # now do the same for the monitoring shell
-        ret, out, _ = self.channel.run_sync(" /bin/sh %s/wrapper.sh %s"
-                                           % (base, base))
+    # --------------------------------------------------------------------------
+    #
+    @contextlib.contextmanager
+    def _pooled_shell(self):
+        '''
+        Lease an idle wrapper shell from the shell pool for the duration of
+        a `with` block, which receives the shell and its lock:
 
-        # shell_wrapper.sh will report its own PID -- we use that to sync prompt
-        # detection, too.
-        if ret != 0:
-            raise rse.NoSuccess("failed to run bootstrap:(%s)(%s)"
-                               % (ret, out))
+            with self._pooled_shell() as (shell, lock):
+                shell.run_sync(...)
 
-        id_pattern = re.compile("\s*PID:\s+(\d+)\s*$")
-        id_match   = id_pattern.search(out)
+        The lock is held while the shell is leased.  If all shells are busy, we
+        wait for one to be returned.
+        '''
 
-        if not id_match:
-            self.channel.run_async(" exit")
-            self._logger.error("host bootstrap failed - no pid(%s)" % out)
-            raise rse.NoSuccess  ("host bootstrap failed - no pid(%s)" % out)
+        with self._pool_cond:
+            while not self._idle:
+                self._pool_cond.wait()
+            shell, lock = self._idle.pop()
 
-        # we actually don't care much about the PID:-P
+        try:
+            with lock:
+                yield shell, lock
 
-        self._logger.debug("got mon prompt(%s)(%s)" % (ret, out.strip()))
+        finally:
+            with self._pool_cond:
+                self._idle.append([shell, lock])
+                self._pool_cond.notify()
 
 
     # ----------------------------------------------------------------
@@ -670,8 +962,10 @@ class ShellJobService(cpi.Service):
 
         with self._shell_lock:
 
-            _, out, _ = self.shell.run_sync('PING')
-            assert('PONG' in out), out
+            for shell, lock in list(self._shells):
+                with lock:
+                    _, out, _ = shell.run_sync('PING')
+                    assert('PONG' in out), out
 
             self._ping = mt.Timer(_PING_DELAY, self._ping_cb)
             self._ping.daemon = True
@@ -729,8 +1023,21 @@ class ShellJobService(cpi.Service):
         runs a job on the wrapper via pty, and returns the job id
         '''
 
-        # stage data, then run job
-        self._adaptor.stage_input(self.shell, self._shell_lock, jd)
+        # stage data before leasing a shell, then run job
+        self._staging.wait(self._staging.stage_input(jd))
+
+        with self._pooled_shell() as (shell, lock):
+            return self._job_run_on(shell, lock, jd)
+
+
+    # --------------------------------------------------------------------------
+    #
+    #
+    def _job_run_on(self, shell, lock, jd):
+        '''
+        runs a job on the given (leased) wrapper shell, and returns the job id.
+        Input data must have been staged already.
+        '''
 
         # create command to run
         cmd = self._jd2cmd(jd)
@@ -749,8 +1056,7 @@ class ShellJobService(cpi.Service):
 
         run_cmd = run_cmd.replace("\\", "\\\\\\\\")  # hello MacOS
 
-        with self._shell_lock:
-            ret, out, _ = self.shell.run_sync(run_cmd)
+        ret, out, _ = shell.run_sync(run_cmd)
 
         if ret != 0:
             raise rse.NoSuccess("failed to run Job '%s':(%s)(%s)"
@@ -778,8 +1084,7 @@ class ShellJobService(cpi.Service):
 
         # clean 'BULK COMPLETED message from lrun
         if use_lrun:
-            with self._shell_lock:
-                ret, out = self.shell.find_prompt()
+            ret, out = shell.find_prompt()
 
             if ret != 0:
                 raise rse.NoSuccess("failed to run multiline job '%s':(%s)(%s)"
@@ -797,8 +1102,8 @@ class ShellJobService(cpi.Service):
 
         rm, pid = self._adaptor.parse_id(id)
 
-        with self._shell_lock:
-            ret, out, _ = self.shell.run_sync("STATS %s\n" % pid)
+        with self._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("STATS %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess("failed to get job stats for '%s':(%s)(%s)"
@@ -866,8 +1171,8 @@ class ShellJobService(cpi.Service):
 
         rm, pid = self._adaptor.parse_id(id)
 
-        with self._shell_lock:
-            ret, out, _ = self.shell.run_sync("RESULT %s\n" % pid)
+        with self._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("RESULT %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess ("failed to get exit code for '%s':(%s)(%s)"
@@ -907,8 +1212,8 @@ class ShellJobService(cpi.Service):
 
         rm, pid = self._adaptor.parse_id(id)
 
-        with self._shell_lock:
-            ret, out, _ = self.shell.run_sync("SUSPEND %s\n" % pid)
+        with self._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("SUSPEND %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess("failed to suspend job '%s':(%s)(%s)"
@@ -923,8 +1228,8 @@ class ShellJobService(cpi.Service):
 
         rm, pid = self._adaptor.parse_id(id)
 
-        with self._shell_lock:
-            ret, out, _ = self.shell.run_sync("RESUME %s\n" % pid)
+        with self._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("RESUME %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess("failed to resume job '%s':(%s)(%s)"
@@ -939,8 +1244,8 @@ class ShellJobService(cpi.Service):
 
         rm, pid = self._adaptor.parse_id(id)
 
-        with self._shell_lock:
-            ret, out, err = self.shell.run_sync("CANCEL %s\n" % pid)
+        with self._pooled_shell() as (shell, _):
+            ret, out, err = shell.run_sync("CANCEL %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess("failed to cancel job '%s':(%s)(%s)(%s)"
@@ -1097,21 +1402,57 @@ class ShellJobService(cpi.Service):
 
         self._logger.debug("container run: %s"  %  str(jobs))
 
+        # Start input staging for all jobs.  Jobs are then submitted in order,
+        # in bulks of those jobs whose input data are staged by the time the
+        # previous bulk is submitted -- so that staging for later jobs overlaps
+        # with the submission of earlier ones.
+        staged = list()
+        for job in jobs:
+            try:
+                staged.append([job, self._staging.stage_input(job.description)])
+            except Exception as e:
+                job._adaptor._set_state(api.FAILED)
+                job._adaptor._exception = e
+
+        while staged:
+
+            bulk = list()
+
+            while staged:
+
+                job, futures = staged[0]
+
+                # only the first job of a bulk waits for its staging
+                if bulk and not self._staging.done(futures):
+                    break
+
+                staged.pop(0)
+
+                try:
+                    self._staging.wait(futures)
+                    bulk.append(job)
+
+                except Exception as e:
+                    job._adaptor._set_state(api.FAILED)
+                    job._adaptor._exception = e
+
+            if bulk:
+                self._container_run_bulk(bulk)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _container_run_bulk(self, jobs):
+        '''
+        submit the given jobs (with input data staged) in a single bulk
+        '''
+
         bulk = "BULK\n"
 
         for job in jobs:
             cmd   = self._jd2cmd(job.description)
             bulk += "RUN %s\n" % cmd
 
-        # ------------------------------------------------------------
-        # stage input data
-        # FIXME: this is now blocking the run() method.  Ideally, this activity
-        # should be passed to a data manager thread/process/service.
-        for job in jobs:
-            self._adaptor.stage_input(self.shell, self._shell_lock,
-                                      job.description)
-        # ------------------------------------------------------------
-
         bulk += "BULK_RUN\n"
         with self._shell_lock:
 
@@ -1180,19 +1521,19 @@ class ShellJobService(cpi.Service):
     #
     @SYNC_CALL
     def container_wait(self, jobs, mode, timeout):
+        '''
+        Poll the states of all jobs (via `container_get_states()`) until all
+        jobs (mode ALL) or any job (mode ANY) reached a final state, or the
+        timeout expired.
+        '''
 
         # FIXME: this just assumes that all tasks are job wait tasks --
         #        which is not necessarily true...
-        # FIXME: we ignore the job wait mode(ALL/ANY), and always wait for all
-        #        jobs...
 
         self._logger.debug("container wait: %s"  %  str(jobs))
 
-        bulk = "BULK\n"
-
+        own = list()
         for job in jobs:
-          # print(type(job))
-          # print(type(job._adaptor))
 
             if not isinstance(job._adaptor, ShellJob):
                 # this is not a job created by this adaptor.  Its probably
@@ -1201,57 +1542,30 @@ class ShellJobService(cpi.Service):
                 # FIXME: timeout handling is wrong
                 job.wait(timeout)
             else:
-                rm, pid = self._adaptor.parse_id(job.id)
-                bulk   += "WAIT %s\n" % pid
+                own.append(job)
 
-        bulk += "BULK_RUN\n"
+        time_start = time.time()
 
-        with self._shell_lock:
-            self.shell.run_async(bulk)
+        while own:
 
-            for job in jobs:
+            self.container_get_states(own)
 
-                ret, out = self.shell.find_prompt()
+            final = [job for job in own if job._adaptor._state in api.FINAL]
 
-                if ret != 0:
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to wait for job:(%s)(%s)" % (ret, out))
-                    continue
+            if mode == ANY and final:
+                return final[0]
 
-                lines = [_f for _f in out.split("\n") if _f]
+            if len(final) == len(own):
+                return None
 
-                if len(lines) < 2:
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to wait for job:(%s)(%s)" % (ret, out))
-                    continue
+            if timeout is not None and timeout >= 0:
+                remaining = timeout - (time.time() - time_start)
+                if remaining <= 0:
+                    return None
+                time.sleep(min(_WAIT_DELAY, remaining))
 
-                if lines[-2] != "OK":
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to wait for job:(%s)(%s)" % (ret, out))
-                    continue
-
-            # we also need to find the output of the bulk op itself
-            ret, out = self.shell.find_prompt()
-
-            if ret != 0:
-                self._logger.error("failed to wait for(part of) bulk job:(%s)(%s)"
-                                  % (ret, out))
-                return
-
-            lines = [_f for _f in out.split("\n") if _f]
-
-            if len(lines) < 2:
-                self._logger.error("no status of bulk job wait:(%s)(%s)"
-                                  % (ret, out))
-                return
-
-            if lines[-2] != "OK":
-                self._logger.error("failed to wait for part of bulk job:(%s)(%s)"
-                                  % (ret, out))
-                return
+            else:
+                time.sleep(_WAIT_DELAY)
 
 
     # --------------------------------------------------------------------------
@@ -1324,71 +1638,93 @@ class ShellJobService(cpi.Service):
 
         self._logger.debug("container get_state: %s"  %  str(jobs))
 
-        bulk   = "BULK\n"
-        states = []
+        # jobs which failed to start (e.g., on input staging) have no ID, and
+        # keep their state
+        pids   = [self._adaptor.parse_id(job.id)[1] if job.id else None
+                  for job in jobs]
+        found  = self._job_get_states([pid for pid in pids if pid])
+        states = list()
 
-        for job in jobs:
+        for job, pid in zip(jobs, pids):
 
-          # print(job)
-          # job._attributes_dump()
+            if not pid:
+                states.append(job._adaptor._state)
+                continue
 
-            rm, pid = self._adaptor.parse_id(job.id)
-            bulk   += "STATE %s\n" % pid
+            if found.get(pid) is None:
+                job._adaptor._set_state(api.FAILED)
+                job._adaptor._exception = rse.NoSuccess \
+                       ("failed to get job state for %s" % pid)
+                continue
 
-        bulk += "BULK_RUN\n"
+            state = self._adaptor.string_to_state(found[pid])
 
-        with self._shell_lock:
-            self.shell.run_async(bulk)
+            job._adaptor._update_state(state)
+            states.append(state)
 
-            for job in jobs:
+        return states
 
-                ret, out = self.shell.find_prompt()
 
-                if ret != 0:
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to get job state:(%s)(%s)" % (ret, out))
-                    continue
+    # --------------------------------------------------------------------------
+    #
+    def _job_get_states(self, pids):
+        '''
+        Get the states of many jobs from the wrapper shell.  A `STATES` command
+        reports the states of all given jobs in a single response, so that we
+        need to find one prompt per command, not one per job.  Long lists of
+        job ids are split over multiple `STATES` commands in a single bulk.
 
-                lines = [_f for _f in out.split("\n") if _f]
+        Returns a dict of pid: state strings, with `None` for jobs which are
+        unknown to the wrapper or for which the state query failed.
+        '''
 
-                if len(lines) < 2:
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to get job state:(%s)(%s)" % (ret, out))
-                    continue
+        chunks = [[]]
+        size   = len("STATES")
 
-                if lines[-2] != "OK":
-                    job._adaptor._set_state(api.FAILED)
-                    job._adaptor._exception = rse.NoSuccess \
-                           ("failed to get job state:(%s)(%s)" % (ret, out))
-                    continue
+        for pid in pids:
+            if size + len(pid) >= _STATES_LINE_MAX:
+                chunks.append(list())
+                size = len("STATES")
+            chunks[-1].append(pid)
+            size += len(pid) + 1
 
-                state = self._adaptor.string_to_state(lines[-1])
+        cmds   = ["STATES %s" % " ".join(chunk) for chunk in chunks]
+        bulk   = "BULK\n%s\nBULK_RUN\n" % "\n".join(cmds)
+        states = {pid: 'UNKNOWN' for pid in pids}
 
-                job._adaptor._update_state(state)
-                states.append(state)
+        with self._pooled_shell() as (shell, _):
 
+            shell.run_async(bulk)
 
-            # we also need to find the output of the bulk op itself
-            ret, out = self.shell.find_prompt()
+            # we need to find all prompts, also after errors, to keep the
+            # shell in sync
+            for chunk in chunks:
 
-            if ret != 0:
-                self._logger.error("no state for part of bulk job:(%s)(%s)"
-                                  % (ret, out))
-                return
+                ret, out = shell.find_prompt()
+                lines    = [_f for _f in out.split("\n") if _f]
 
-            lines = [_f for _f in out.split("\n") if _f]
+                if ret != 0 or "OK" not in lines:
+                    self._logger.error("failed to get job states:(%s)(%s)"
+                                      % (ret, out))
+                    for pid in chunk:
+                        states[pid] = None
+                    continue
 
-            if len(lines) < 2:
-                self._logger.error("Cannot eval status of bulk job:(%s)(%s)"
-                                  % (ret, out))
-                return
+                for line in lines[lines.index("OK") + 1:]:
 
-            if lines[-2] != "OK":
-                self._logger.error("no state for part of bulk job:(%s)(%s)"
+                    elems = line.split()
+                    if len(elems) != 2:
+                        continue
+
+                    if elems[1] == "NOK": states[elems[0]] = None
+                    else                : states[elems[0]] = elems[1]
+
+            # we also need to find the output of the bulk op itself
+            ret, out = shell.find_prompt()
+
+            if ret != 0:
+                self._logger.error("failed to run bulk state query:(%s)(%s)"
                                   % (ret, out))
-                return
 
         return states
 
@@ -1418,6 +1754,7 @@ class ShellJob(cpi.Job):
             # the js is responsible for job bulk operations -- which
             # for jobs only work for run()
             self._container       = self.js
+            self._state_cache     = self.js._state_cache
 
             # initialize job attribute values
             self._id              = None
@@ -1436,6 +1773,7 @@ class ShellJob(cpi.Job):
         elif 'job_id' in job_info:
             # initialize job attribute values
             self.js               = job_info["job_service"]
+            self._state_cache     = self.js._state_cache
             self.jd               = None
             self._id              = job_info['job_id']
             self._name            = job_info.get('job_name')
@@ -1477,11 +1815,12 @@ class ShellJob(cpi.Job):
             # stage output data
             # FIXME: _update_state blocks until data are staged.
             #        That should not happen.
-            self._adaptor.stage_output(self.js.shell, self.js._shell_lock,
-                                       self.jd)
+            staging = self.js._staging
+            staging.wait(staging.stage_output(self.jd))
 
         # files are staged -- update state, and report to application
         self._state = state
+        self._cache_state()
         if self._state != old_state:
             self._api()._attributes_i_set('state', self._state, self._api()._UP)
 
@@ -1535,9 +1874,19 @@ class ShellJob(cpi.Job):
             self._state  = state
             self._api()._attributes_i_set('state', self._state, self._api()._UP)
 
+        self._cache_state()
+
         return self._state
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _cache_state(self):
+
+        if self._state_cache and self._id:
+            self._state_cache.update(self._id, self._state)
+
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
@@ -1581,8 +1930,10 @@ class ShellJob(cpi.Job):
             raise rse.IncorrectState \
                    ("Job output is only available after the job started")
 
-        rm, pid     = self._adaptor.parse_id(self._id)
-        ret, out, _ = self.js.shell.run_sync("STDOUT %s\n" % pid)
+        rm, pid = self._adaptor.parse_id(self._id)
+
+        with self.js._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("STDOUT %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess \
@@ -1615,8 +1966,10 @@ class ShellJob(cpi.Job):
             raise rse.IncorrectState \
                    ("Job output is only available after the job started")
 
-        rm, pid     = self._adaptor.parse_id(self._id)
-        ret, out, _ = self.js.shell.run_sync("STDERR %s\n" % pid)
+        rm, pid = self._adaptor.parse_id(self._id)
+
+        with self.js._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("STDERR %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess \
@@ -1648,8 +2001,10 @@ class ShellJob(cpi.Job):
             raise rse.IncorrectState \
                    ("Job output is only available after the job started")
 
-        rm, pid     = self._adaptor.parse_id(self._id)
-        ret, out, _ = self.js.shell.run_sync("LOG %s\n" % pid)
+        rm, pid = self._adaptor.parse_id(self._id)
+
+        with self.js._pooled_shell() as (shell, _):
+            ret, out, _ = shell.run_sync("LOG %s\n" % pid)
 
         if ret != 0:
             raise rse.NoSuccess \
@@ -1780,6 +2135,7 @@ class ShellJob(cpi.Job):
             raise rse.IncorrectState("Cannot suspend, job is not RUNNING")
 
         self.js._job_suspend(self._id)
+        self._state_cache.remove(self._id)
 
 
     # --------------------------------------------------------------------------
@@ -1791,6 +2147,7 @@ class ShellJob(cpi.Job):
             raise rse.IncorrectState("Cannot resume, job is not SUSPENDED")
 
         self.js._job_resume(self._id)
+        self._state_cache.remove(self._id)
 
 
     # --------------------------------------------------------------------------
@@ -10,3 +10,8 @@ import os
 # server side job management script
 _WRAPPER_SCRIPT = open (os.path.dirname(__file__) + '/shell_wrapper.sh').read ()
 
+# --------------------------------------------------------------------
+# server side job management agent, alternative to the script above for
+# hosts which provide python3
+_AGENT_SCRIPT   = open (os.path.dirname(__file__) + '/shell_agent.py').read ()
+
@@ -74,6 +74,10 @@ fi
 NOTIFICATIONS="$BASE/notifications"
 LOG="$BASE/log"
 
+# the notification journal is compacted on startup once it grows beyond
+# NOTIFICATIONS_MAX lines (see `rotate_notifications`)
+NOTIFICATIONS_MAX=10000
+
 # this process will terminate when idle for longer than TIMEOUT seconds
 TIMEOUT=300
 
@@ -418,20 +422,106 @@ EOT
 
 # --------------------------------------------------------------------
 #
-# list all job IDs
+# The notification journal consists of the live journal "$NOTIFICATIONS",
+# which all job monitors append to, and the compacted history of earlier
+# journal generations in "$NOTIFICATIONS.hist", which holds the last event of
+# each job which still exists.  The generation counter in "$NOTIFICATIONS.gen"
+# is increased on each rotation.
+#
+# The journal is only rotated if no monitor is following it: monitors register
+# themselves with a "$BASE/follow.<pid>" file, and registration and rotation
+# are serialized via the "$NOTIFICATIONS.lock" directory.
+#
+lock_notifications () {
+  n=0
+  until \mkdir "$NOTIFICATIONS.lock" 2>/dev/null
+  do
+    # consider the lock stale after 10 seconds -- we unlock it when done
+    n=$((n+1))
+    test "$n" -gt 10 && return
+    \sleep 1
+  done
+}
+
+unlock_notifications () {
+  \rmdir "$NOTIFICATIONS.lock" 2>/dev/null
+}
+
+rotate_notifications () {
+
+  test $(\wc -l < "$NOTIFICATIONS") -gt "$NOTIFICATIONS_MAX" || return
+
+  # someone else is rotating right now
+  \mkdir "$NOTIFICATIONS.lock" 2>/dev/null || return
+
+  for f in "$BASE"/follow.*
+  do
+    test -f "$f" || continue
+    if /bin/kill -0 "${f##*.}" >/dev/null 2>&1
+    then
+      unlock_notifications
+      return
+    fi
+    \rm -f "$f"
+  done
+
+  # new events go to a new live journal once it is moved away
+  \mv    "$NOTIFICATIONS" "$NOTIFICATIONS.rot"
+  \touch "$NOTIFICATIONS" "$NOTIFICATIONS.hist"
+
+  (\cd "$BASE" ; \ls -C1 -d */ 2>/dev/null) | \cut -f 1 -d '/' \
+    | \awk -F: 'FNR == NR { known[$1] = 1; next }
+                known[$1] { last[$1] = $0 }
+                END       { for (id in last) print last[id] }' \
+           - "$NOTIFICATIONS.hist" "$NOTIFICATIONS.rot" > "$NOTIFICATIONS.tmp"
+
+  \mv "$NOTIFICATIONS.tmp" "$NOTIFICATIONS.hist"
+  \rm -f "$NOTIFICATIONS.rot"
+
+  GEN=`\cat "$NOTIFICATIONS.gen" 2>/dev/null`
+  \printf "$((${GEN:-0}+1))\n" > "$NOTIFICATIONS.gen"
+
+  unlock_notifications
+}
+
+
+# --------------------------------------------------------------------
+#
+# follow the notification journal
+#
+# Without arguments, or for an outdated journal generation, we replay the
+# compacted history and the complete live journal (to cater for startup
+# races).  `MONITOR <gen> <offset>` resumes after the first <offset> events of
+# the live journal of generation <gen>, i.e. after the events the client has
+# already seen.  The line `JOURNAL <gen> <offset>` marks where events of the
+# live journal start.
 #
 cmd_monitor () {
 
 # echo "start monitoring mode ($GID)" >> $LOG
 
-  # 'touch' to make sure the file exists, and use '-n +1' so that we
-  # replay old notifications (to cater for startup races).  Note this
-  # can create a large number of monitor events for re-used workdirs!
+  set -- $1
+
+  lock_notifications
+  \touch "$BASE/follow.$GID"
+  \touch "$NOTIFICATIONS"
+  GEN=`\cat "$NOTIFICATIONS.gen" 2>/dev/null`
+  GEN=${GEN:-0}
+  unlock_notifications
+
+  if test "$1" = "$GEN" && test -n "$2"
+  then
+    OFFSET=$2
+  else
+    OFFSET=0
+    \cat "$NOTIFICATIONS.hist" 2>/dev/null
+  fi
+
   # NOTE: tail complains on inotify handle shortage, and then continues
   #       by using pulling.  We redirect stderr to /dev/null -- lets pray
   #       that we don't miss any other notifications... :/
-  \touch         "$NOTIFICATIONS"
-  \tail -f -n +1 "$NOTIFICATIONS" 2>/dev/null
+  \printf "JOURNAL $GEN $OFFSET\n"
+  \tail -f -n +$((OFFSET+1)) "$NOTIFICATIONS" 2>/dev/null
 
 # echo "end monitoring mode ($GID)" >> $LOG
 
@@ -541,6 +631,35 @@ cmd_state () {
 }
 
 
+# --------------------------------------------------------------------
+#
+# inspect the states of many jobs at once.  For each given job id, one line
+# '<id> <state>' is reported, 'NOK' for unknown jobs.  All state files are
+# evaluated by a single awk instance.
+#
+cmd_states () {
+  FILES=""
+  RETVAL=""
+
+  for id in $*
+  do
+    if test -r "$BASE/$id/state"
+    then
+      FILES="$FILES $BASE/$id/state"
+    else
+      RETVAL="$RETVAL$id NOK\n"
+    fi
+  done
+
+  test -z "$FILES" && return
+
+  RETVAL="$RETVAL`\awk '
+    FNR == 1 { n = split(FILENAME, p, "/"); id = p[n-1]; s[id] = "UNKNOWN" }
+    / $/     { s[id] = $1 }
+    END      { for (id in s) print id, s[id] }' $FILES`"
+}
+
+
 # --------------------------------------------------------------------
 #
 # retrieve job stats
@@ -873,6 +992,7 @@ cmd_quit () {
   # clean bulk file and other temp files
   \rm -f $BASE/bulk.$GID
   \rm -f $BASE/fifo.$GID
+  \rm -f $BASE/follow.$GID
 
   # restore shell echo
   \stty echo    >/dev/null 2>&1
@@ -897,7 +1017,7 @@ cmd_help() {
 
         HELP               - print this message
         LIST               - list all job IDs
-        MONITOR            - monitor for events
+        MONITOR [<gen> <n>]- monitor for events (after event n of gen)
         PURGE              - purge completed jobs
         NOOP               - do nothing
         PING               - update keepalive timer
@@ -907,6 +1027,7 @@ cmd_help() {
         RESULT  <id>       - show job return value
         RESUME  <id>       - resume job after suspend
         STATE   <id>       - print state of job
+        STATES  <id> ...   - print states of jobs
         STATS   <id>       - print stats of job
         STDERR  <id>       - print stderr of job
         STDOUT  <id>       - print stdout of job
@@ -935,11 +1056,12 @@ listen() {
   # make sure the base has a monitor script....
   create_monitor
 
-  # set up monitoring file
+  # set up monitoring file, and compact it if needed
   if ! test -f "$NOTIFICATIONS"
   then
     \touch "$NOTIFICATIONS"
   fi
+  rotate_notifications
 
   # make sure we get killed when idle
   ( idle_checker $GID 1>/dev/null 2>/dev/null 3</dev/null & ) &
@@ -998,6 +1120,7 @@ listen() {
         CANCEL    ) cmd_cancel  "$ARGS"  ;;
         RESULT    ) cmd_result  "$ARGS"  ;;
         STATE     ) cmd_state   "$ARGS"  ;;
+        STATES    ) cmd_states  "$ARGS"  ;;
         STATS     ) cmd_stats   "$ARGS"  ;;
         WAIT      ) cmd_wait    "$ARGS"  ;;
         STDIN     ) cmd_stdin   "$ARGS"  ;;
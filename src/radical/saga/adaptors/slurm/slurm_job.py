@@ -14,11 +14,14 @@ import math
 import time
 import datetime
 import tempfile
+import threading
 
 import radical.utils as ru
 
+from ...constants     import ANY
 from ...job           import constants   as c
 from ...utils         import pty_shell   as rsups
+from ...utils         import misc        as rsumisc
 from ...              import job         as api_job
 from ...              import exceptions  as rse
 from ...              import filesystem  as sfs
@@ -37,6 +40,20 @@ ASYNC_CALL = cpi_decs.ASYNC_CALL
 #
 _PTY_TIMEOUT = 2.0
 
+# squeue / sacct calls are split so that their job ID lists do not exceed this
+# many characters -- the pty line discipline limits the length of input lines
+# (to 4096 bytes on Linux)
+_QUERY_LINE_MAX = 2000
+
+# jobs which neither squeue nor sacct report in this many consecutive state
+# updates are not monitored anymore, and their state becomes UNKNOWN
+_MISSING_MAX = 3
+
+# batch directives which are applied per task when jobs are submitted as array
+# job (see `SLURMJobService._job_array_run()`)
+_TASK_DIRECTIVES = ('#SBATCH -J ', '#SBATCH -D ',
+                    '#SBATCH --output ', '#SBATCH --error ')
+
 # ------------------------------------------------------------------------------
 # the adaptor name
 #
@@ -175,6 +192,11 @@ _ADAPTOR_DOC           = {
            not gone over theis extensively...
          - Relating to the above, _job_get_info is written, but unused/untested
            (mostly from PBS adaptor)
+         - Job states are collected by one monitoring thread per job service,
+           which queries all active jobs with a single `squeue` (and `sacct`
+           for jobs which already left the queue) call every
+           `monitor_interval` seconds, or every `wait_interval` seconds while
+           any thread waits for jobs.  `wait()` blocks on those updates.
 
         ''',
     "example": "examples/jobs/slurmjob.py",
@@ -243,6 +265,82 @@ class Adaptor(a_base.Base):
         return(match.group(1), match.group(2))
 
 
+# ------------------------------------------------------------------------------
+#
+class _job_state_monitor(threading.Thread):
+    '''
+    Thread which periodically collects the states of all active jobs of a job
+    service -- with one `squeue` and one `sacct` call for all jobs, not one
+    call per job -- and pushes state changes to the job instances (and thus to
+    any registered state callbacks).
+    '''
+
+    def __init__(self, job_service):
+
+        self.logger   = job_service._logger
+        self.js       = job_service
+        self._term    = threading.Event()
+        self._wake    = threading.Event()
+
+        super(_job_state_monitor, self).__init__()
+        self.daemon = True
+
+
+    def stop(self):
+        self._term.set()
+        self._wake.set()
+
+
+    def trigger(self):
+        # do not wait for the interval to pass for the next update
+        self._wake.set()
+
+
+    def run(self):
+
+        try:
+            self._run()
+
+        finally:
+            # let the job service start a new monitor when needed, and let
+            # waiting threads know that they need to poll for themselves
+            with self.js._mcond:
+                if self.js.mt is self:
+                    self.js.mt = None
+                self.js._mcond.notify_all()
+
+
+    def _run(self):
+
+        # we stop the monitoring thread when we see the same error 3 times in
+        # a row...
+        error_type_count = dict()
+
+        while not self._term.is_set():
+
+            try:
+                self.js._update_states()
+                error_type_count = dict()
+
+            except Exception as e:
+                self.logger.exception("Exception in job monitoring thread")
+
+                # check if we see the same error again and again
+                error_type = str(e)
+                if  error_type not in error_type_count:
+                    error_type_count = dict()
+                    error_type_count[error_type]  = 1
+                else:
+                    error_type_count[error_type] += 1
+                    if  error_type_count[error_type] >= 3:
+                        self.logger.error("too many monitoring errors -- stop")
+                        return
+
+            finally:
+                self._wake.wait(self.js._monitor_delay())
+                self._wake.clear()
+
+
 ###############################################################################
 #
 class SLURMJobService(cpi_job.Service):
@@ -278,6 +376,12 @@ class SLURMJobService(cpi_job.Service):
     #
     def __del__(self):
 
+        try:
+            if self.mt:
+                self.mt.stop()
+        except:
+            pass
+
         try:
             if self.shell:
                 del(self.shell)
@@ -297,6 +401,24 @@ class SLURMJobService(cpi_job.Service):
         self.session = session
 
         self.jobs = {}
+
+        # active jobs are watched by a monitoring thread, which is started when
+        # the first job gets registered (see `_monitor_job()`)
+        self.mt         = None
+        self._monitored = dict()  # slurm job id : job cpi instance
+        self._missing   = dict()  # slurm job id : number of updates w/o state
+        self._waiters   = 0       # number of threads waiting for jobs
+        self._mcond     = threading.Condition()
+        self._interval  = float(self._adaptor._cfg.get('monitor_interval', 10))
+        self._wait_int  = float(self._adaptor._cfg.get('wait_interval',     1))
+
+        # max number of jobs submitted as one array job by `container_run()`
+        self._array_max = int(self._adaptor._cfg.get('array_max', 0))
+
+        # the monitor also fills the service wide job state cache, which serves
+        # `job.state` reads (staleness bound: `state_ttl` in the adaptor config)
+        self._init_state_cache()
+
         self._open()
 
         return self.get_api()
@@ -306,6 +428,11 @@ class SLURMJobService(cpi_job.Service):
     #
     def close(self):
 
+        if self.mt:
+            self.mt.stop()
+            self.mt.join(10)  # don't block forever on join()
+            self.mt = None
+
         if self.shell:
             self.shell.finalize(True)
 
@@ -474,9 +601,11 @@ class SLURMJobService(cpi_job.Service):
     # --------------------------------------------------------------------------
     #
     #
-    def _job_run(self, jd):
+    def _job_script(self, jd):
         '''
-        runs a job on the wrapper via pty, and returns the job id
+        creates the working directory, stages the input files, and generates
+        the batch script for the given job description.  Returns the script and
+        the job info dict entry for the job.
         '''
 
         # define a bunch of default args
@@ -690,9 +819,36 @@ class SLURMJobService(cpi_job.Service):
             script += "\n## POST_EXEC\n" + '\n'.join(post)
             script += '\n'
 
-        # write script into a tmp file for staging
         self._logger.info("SLURM script generated:\n%s" % script)
 
+        info = {'state'      : c.PENDING,
+                'job_name'   : job_name,
+                'cwd'        : cwd,
+                'create_time': None,
+                'start_time' : None,
+                'end_time'   : None,
+                'comp_time'  : None,
+                'exec_hosts' : None,
+                'gone'       : False,
+                'output'     : output,
+                'error'      : error,
+                'stdout'     : None,
+                'stderr'     : None,
+                'ft'         : file_transfer,
+                }
+
+        return script, info
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _sbatch(self, script):
+        '''
+        stages the given batch script and submits it via `sbatch`.  Returns the
+        SLURM job ID.
+        '''
+
+        # write script into a tmp file for staging
         tgt = os.path.basename(tempfile.mktemp(suffix='.slurm', prefix='tmp_'))
         self.shell.write_to_remote(src=script, tgt=tgt)
 
@@ -702,39 +858,134 @@ class SLURMJobService(cpi_job.Service):
         self._logger.debug("submit SLURM script (%s) (%s)" % (tgt, ret))
 
         # find out what our job ID is
-        # TODO: Could make this more efficient
-        job_id = None
+        pid = None
         for line in out.split("\n"):
             if "Submitted batch job" in line:
-                job_id = "[%s]-[%s]" % (self.rm, int(line.split()[-1:][0]))
+                pid = str(int(line.split()[-1:][0]))
                 break
 
         # if we have no job ID, there's a failure...
-        if not job_id:
+        if not pid:
             raise rse.NoSuccess._log(self._logger,
                              "Couldn't get job id from submitted job!"
                               " sbatch output:\n%s" % out)
 
-        self._logger.debug("started job %s" % job_id)
         self._logger.debug("Batch system output:\n%s" % out)
 
+        return pid
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_run(self, jd):
+        '''
+        runs a job via sbatch, and returns the job id
+        '''
+
+        script, info = self._job_script(jd)
+
+        return self._job_submit(script, info)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_submit(self, script, info):
+        '''
+        submits a batch script generated by `_job_script()`, and returns the job
+        id
+        '''
+
+        pid    = self._sbatch(script)
+        job_id = "[%s]-[%s]" % (self.rm, pid)
+
+        self._logger.debug("started job %s" % job_id)
+
         # create local jobs dictionary entry
-        self.jobs[job_id] = {'state'      : c.PENDING,
-                             'create_time': None,
-                             'start_time' : None,
-                             'end_time'   : None,
-                             'comp_time'  : None,
-                             'exec_hosts' : None,
-                             'gone'       : False,
-                             'output'     : output,
-                             'error'      : error,
-                             'stdout'     : None,
-                             'stderr'     : None,
-                             'ft'         : file_transfer,
-                             }
+        self.jobs[job_id] = info
+
         return job_id
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _split_script(self, script):
+        '''
+        splits a batch script generated by `_job_script()` into its `#SBATCH`
+        directives and its body.  The directives which are specific to the
+        individual job (see `_TASK_DIRECTIVES`) are dropped: the tasks of an
+        array job apply those themselves (see `_job_array_run()`).
+        '''
+
+        directives = list()
+        body       = list()
+
+        for line in script.split('\n')[1:]:  # skip shebang
+
+            if line.startswith('#SBATCH '):
+                if not line.startswith(_TASK_DIRECTIVES):
+                    directives.append(line)
+            else:
+                body.append(line)
+
+        return '\n'.join(directives), '\n'.join(body).strip()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _job_array_run(self, directives, tasks):
+        '''
+        submits a set of jobs which share the same batch directives as a single
+        SLURM array job.  `tasks` is a list of `[body, info]` pairs: array task
+        `i` changes into the working directory of job `i`, redirects its output
+        and error, and runs the script body of that job.
+
+        Returns the list of job ids, which have the form `[rm]-[<pid>_<i>]`.
+        '''
+
+        script  = "#!/bin/sh\n\n"
+        script += directives + '\n'
+
+        job_name = tasks[0][1]['job_name']
+        if job_name: script += '#SBATCH -J "%s"\n' % job_name
+
+        # output and error are redirected by the individual tasks
+        script += '#SBATCH --array=0-%d\n'    % (len(tasks) - 1)
+        script += '#SBATCH --output "/dev/null"\n'
+        script += '#SBATCH --error "/dev/null"\n'
+
+        script += '\ncase "$SLURM_ARRAY_TASK_ID" in\n'
+
+        for idx, (body, info) in enumerate(tasks):
+
+            script += '\n%d)\n' % idx
+
+            if info['cwd']   : script += 'cd "%s" || exit 1\n' % info['cwd']
+            if info['output']: script += 'exec 1>"%s"\n'       % info['output']
+            if info['error'] : script += 'exec 2>"%s"\n'       % info['error']
+
+            script += body + '\n'
+            script += ';;\n'
+
+        script += 'esac\n'
+
+        self._logger.info("SLURM array script generated:\n%s" % script)
+
+        pid     = self._sbatch(script)
+        job_ids = list()
+
+        for idx, (_, info) in enumerate(tasks):
+
+            job_id = "[%s]-[%s_%d]" % (self.rm, pid, idx)
+            job_ids.append(job_id)
+
+            # create local jobs dictionary entry
+            self.jobs[job_id] = info
+
+        self._logger.debug("started array job %s (%d tasks)" % (pid, len(tasks)))
+
+        return job_ids
+
+
     # --------------------------------------------------------------------------
     #
     # FROM STAMPEDE'S SQUEUE MAN PAGE
@@ -784,6 +1035,207 @@ class SLURMJobService(cpi_job.Service):
         else                                    : return c.UNKNOWN
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _get_states(self, pids):
+        '''
+        Get the slurm states for a list of slurm job IDs.  `squeue` is queried
+        for all jobs at once, and `sacct` is queried for all jobs `squeue` does
+        not know (anymore).  Long ID lists are split into chunks, and the
+        resulting commands are pipelined over the shell.
+
+        Returns a dict {pid: slurm_state}.  Jobs which are not known to either
+        command are not included.
+        '''
+
+        states = dict()
+        pids   = [str(pid) for pid in pids]
+        known  = set(pids)
+        chunks = rsumisc.split_by_length(pids, _QUERY_LINE_MAX)
+
+        if not chunks:
+            return states
+
+        # output will look like:
+        # 500723|RUNNING
+        # 500724|PENDING
+        #
+        # squeue will complain about job IDs it does not know, but will still
+        # report all others.  `-r` reports array tasks individually (as
+        # `<pid>_<idx>`) even while they are pending.
+        cmds = ['squeue -h -r -t all -o "%%i|%%T" --jobs=%s' % ','.join(chunk)
+                for chunk in chunks]
+        for _, out, _ in self.shell.run_pipelined(cmds):
+            self._parse_states(out, known, states)
+
+        missing = [pid for pid in pids if pid not in states]
+        chunks  = rsumisc.split_by_length(missing, _QUERY_LINE_MAX)
+
+        if not chunks:
+            return states
+
+        # output will look like:
+        # 500723|COMPLETED
+        # 500723.batch|COMPLETED
+        # or:
+        # 500682|CANCELLED by 900369
+        # 500682.batch|CANCELLED
+        cmds = ['sacct --format=JobID,State --parsable2 --noheader --jobs=%s'
+                % ','.join(chunk) for chunk in chunks]
+        for _, out, _ in self.shell.run_pipelined(cmds):
+            self._parse_states(out, set(missing), states)
+
+        return states
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _parse_states(self, out, pids, states):
+        '''
+        parse `<pid>|<state>` lines, and store the states of the given set of
+        pids
+        '''
+
+        for line in out.strip().split('\n'):
+
+            if '|' not in line:
+                if line.strip():
+                    self._logger.warning('cannot parse state: %s' % line)
+                continue
+
+            pid, slurm_state = line.split('|', 1)
+            pid = pid.strip()
+
+            if pid in pids and pid not in states and slurm_state.strip():
+                states[pid] = slurm_state.split()[0].strip()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _monitor_job(self, job):
+        '''
+        add a job to the set of jobs watched by the state monitoring thread
+        '''
+
+        _, pid = self._adaptor.parse_id(job._id)
+
+        with self._mcond:
+
+            self._monitored[pid] = job
+
+            if not self.mt:
+                self.mt = _job_state_monitor(self)
+                self.mt.start()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _monitor_delay(self):
+        '''
+        time between two state updates: shorter while anybody waits for jobs
+        '''
+
+        with self._mcond:
+            if self._waiters:
+                return self._wait_int
+
+        return self._interval
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _wait_states(self, done, poll, timeout):
+        '''
+        Block until `done()` returns True (checked whenever the state monitor
+        updated the job states), or until the timeout passed -- returns `False`
+        on timeout.  Should the state monitor have stopped, we fall back to
+        calling `poll()` to update the job states.
+        '''
+
+        time_start = time.time()
+
+        with self._mcond:
+
+            self._waiters += 1
+
+            # the monitor may be sleeping for the (longer) idle interval
+            if self.mt:
+                self.mt.trigger()
+
+            try:
+                while not done():
+
+                    delay = None
+                    if timeout >= 0:
+                        delay = timeout - (time.time() - time_start)
+                        if delay <= 0:
+                            return False
+
+                    if self.mt:
+                        self._mcond.wait(delay)
+                        continue
+
+                    # no state monitor (anymore): poll, but avoid busy poll
+                    self._mcond.release()
+                    try:
+                        poll()
+                    finally:
+                        self._mcond.acquire()
+
+                    if not done():
+                        if delay is None: self._mcond.wait(0.5)
+                        else            : self._mcond.wait(min(delay, 0.5))
+
+                return True
+
+            finally:
+                self._waiters -= 1
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _update_states(self):
+        '''
+        Query the states of all monitored jobs in bulk, and hand them to the
+        job instances.  Jobs in final state are dropped from monitoring.
+        '''
+
+        with self._mcond:
+            jobs = dict(self._monitored)
+
+        if jobs:
+
+            states = self._get_states(list(jobs.keys()))
+
+            for pid, job in jobs.items():
+
+                if pid in states:
+                    job._set_state(self._slurm_to_saga_state(states[pid]))
+                    self._missing.pop(pid, None)
+
+                else:
+                    # neither squeue nor sacct know the job (anymore)
+                    self._missing[pid] = self._missing.get(pid, 0) + 1
+
+        with self._mcond:
+
+            for pid, job in jobs.items():
+
+                if self._missing.get(pid, 0) >= _MISSING_MAX:
+                    self._logger.warning('job %s vanished -- stop monitoring'
+                                         % pid)
+                    job._set_state(c.UNKNOWN)
+                    self._monitored.pop(pid, None)
+                    self._missing.pop(pid, None)
+
+                elif job._state in c.FINAL or not job._api():
+                    self._monitored.pop(pid, None)
+                    self._missing.pop(pid, None)
+
+            # wake up any waiting jobs
+            self._mcond.notify_all()
+
+
     # --------------------------------------------------------------------------
     #
     def _job_cancel(self, job):
@@ -812,7 +1264,7 @@ class SLURMJobService(cpi_job.Service):
             raise rse.NoSuccess._log(self._logger,
                     "Could not cancel job %s because: %s" % (pid, out))
 
-        job._state = c.CANCELED
+        job._set_state(c.CANCELED)
 
 
     # --------------------------------------------------------------------------
@@ -946,18 +1398,96 @@ class SLURMJobService(cpi_job.Service):
     # --------------------------------------------------------------------------
     #
     def container_run(self, jobs):
+        '''
+        Jobs whose batch scripts share the same `#SBATCH` directives (apart from
+        job name, working directory, output and error) are submitted as one
+        array job, with at most `array_max` tasks per array (see adaptor
+        config).  All other jobs are submitted individually.
+        '''
+
+        if not self._array_max:
+            for job in jobs:
+                job.run()
+            return
+
+        groups = dict()  # directives : [[job cpi, script, body, info], ...]
 
         for job in jobs:
-            job.run()
+
+            job              = job._adaptor
+            script, info     = self._job_script(job.jd)
+            directives, body = self._split_script(script)
+
+            groups.setdefault(directives, list()).append([job, script,
+                                                          body, info])
+
+        for directives, tasks in groups.items():
+
+            for i in range(0, len(tasks), self._array_max):
+
+                chunk = tasks[i:i + self._array_max]
+
+                if len(chunk) == 1:
+                    # no need for an array job
+                    _, script, _, info = chunk[0]
+                    job_ids = [self._job_submit(script, info)]
+
+                else:
+                    job_ids = self._job_array_run(directives,
+                                    [[body, info] for _, _, body, info in chunk])
+
+                for (job, _, _, _), job_id in zip(chunk, job_ids):
+
+                    job._id      = job_id
+                    job._started = True
+
+                    job._set_state(c.PENDING)
+                    self._monitor_job(job)
 
 
     # --------------------------------------------------------------------------
     #
     def container_wait(self, jobs, mode, timeout):
+        '''
+        Query the states of all jobs once, then leave it to the state monitor
+        to update them in bulk (see `_update_states()`)
+        '''
+
+        time_start = time.time()
 
-        # TODO: this is not optimized yet
         for job in jobs:
-            job.wait()
+            if not job._adaptor._started:
+                raise rse.IncorrectState("cannot wait for job which has not "
+                                         "been started")
+
+        self.container_get_states(jobs)
+
+        for job in jobs:
+            if job._adaptor._state not in c.FINAL:
+                self._monitor_job(job._adaptor)
+
+        def final():
+            return [job for job in jobs if job._adaptor._state in c.FINAL]
+
+        def done():
+            # the state monitor lost track of a job
+            for job in jobs:
+                if job._adaptor._state == c.UNKNOWN:
+                    raise rse.IncorrectState("cannot get job state for %s"
+                                             % job._adaptor._id)
+            if mode == ANY: return bool(final())
+            else          : return len(final()) == len(jobs)
+
+        def poll():
+            self.container_get_states(jobs)
+
+        if timeout >= 0:
+            timeout = max(0.0, timeout - (time.time() - time_start))
+
+        if self._wait_states(done, poll, timeout) and mode == ANY:
+            return final()[0]
+
+        return None
 
 
     # --------------------------------------------------------------------------
@@ -972,12 +1502,35 @@ class SLURMJobService(cpi_job.Service):
     # --------------------------------------------------------------------------
     #
     def container_get_states(self, jobs):
+        '''
+        Get the states of all jobs with one bulk query (see `_get_states()`).
+        Like `job.get_state()`, this raises `IncorrectState` if the state of
+        any job cannot be determined.
+        '''
 
-        # TODO: this is not optimized yet
-        states = list()
+        active = dict()  # slurm job id : job cpi instance
         for job in jobs:
-            states.append(job.get_state())
-        return states
+            job = job._adaptor
+            if job._started and job._state not in c.FINAL:
+                _, pid = self._adaptor.parse_id(job._id)
+                active[pid] = job
+
+        if active:
+
+            states  = self._get_states(list(active.keys()))
+            missing = list()
+
+            for pid, job in active.items():
+                if pid in states:
+                    job._set_state(self._slurm_to_saga_state(states[pid]))
+                else:
+                    missing.append(pid)
+
+            if missing:
+                raise rse.IncorrectState("cannot get job state for %s"
+                                         % ', '.join(missing))
+
+        return [job._adaptor._state for job in jobs]
 
 
 # ------------------------------------------------------------------------------
@@ -1003,6 +1556,7 @@ class SLURMJob(cpi_job.Job):
         # the js is responsible for job bulk operations -- which
         # for jobs only work for run()
         self._container       = self.js
+        self._state_cache     = self.js._state_cache
         self._method_type     = "run"
 
         # initialize job attribute values
@@ -1021,6 +1575,9 @@ class SLURMJob(cpi_job.Job):
             other_info = self._job_get_info()
             self._name = other_info.get('job_name')
             self._started = True
+
+            if other_info.get('state') not in c.FINAL:
+                self.js._monitor_job(self)
         else:
             self._started = False
 
@@ -1212,19 +1769,12 @@ class SLURMJob(cpi_job.Job):
         rm, pid = self._adaptor.parse_id(job_id)
 
         try:
-            ret, out, _ = self.js.shell.run_sync('scontrol show job %s' % pid)
-            match       = self.js.scontrol_jobstate_re.search(out)
+            # squeue, and sacct for jobs which finished a while back
+            slurm_state = self.js._get_states([pid]).get(pid)
 
-            if match:
-                slurm_state = match.group(1)
-            else:
-                # no jobstate found from scontrol
-                # the job may have finished a while back, use sacct to
-                # look at the full slurm history
-                slurm_state = self._sacct_jobstate_match(pid)
-                if not slurm_state:
-                    # no jobstate found in slurm
-                    return c.UNKNOWN
+            if not slurm_state:
+                # no jobstate found in slurm
+                return c.UNKNOWN
 
             return self.js._slurm_to_saga_state(slurm_state)
 
@@ -1239,33 +1789,27 @@ class SLURMJob(cpi_job.Job):
 
     # --------------------------------------------------------------------------
     #
-    def _sacct_jobstate_match(self, pid):
+    def _set_state(self, state):
         '''
-        get the job state from the slurm accounting data
+        set a new job state (as reported by the service's state monitor), and
+        trigger state callbacks
         '''
 
-        ret, sacct_out, _ = self.js.shell.run_sync(
-            "sacct --format=JobID,State --parsable2 --noheader --jobs=%s" % pid)
+        if self._state_cache:
+            self._state_cache.update(self._id, state)
 
-        # output will look like:
-        # 500723|COMPLETED
-        # 500723.batch|COMPLETED
-        # or:
-        # 500682|CANCELLED by 900369
-        # 500682.batch|CANCELLED
-
-        try:
-            for line in sacct_out.strip().split('\n'):
-
-                slurm_id, slurm_state = line.split('|', 1)
+        if state == self._state:
+            return
 
-                if slurm_id == pid and slurm_state:
-                    return slurm_state.split()[0].strip()
+        if self._state in c.FINAL:
+            # final states are final
+            return
 
-        except Exception:
-            self._logger.warning('cannot parse sacct output:\n%s' % sacct_out)
+        self._state = state
 
-        return None
+        api = self._api()
+        if api:
+            api._attributes_i_set('state', state, api._UP, True)
 
 
     # --------------------------------------------------------------------------
@@ -1273,7 +1817,7 @@ class SLURMJob(cpi_job.Job):
     @SYNC_CALL
     def get_state(self):
 
-        self._state = self._job_get_state(self._id)
+        self._set_state(self._job_get_state(self._id))
         return self._state
 
 
@@ -1323,27 +1867,37 @@ class SLURMJob(cpi_job.Job):
     def wait(self, timeout):
 
         time_start = time.time()
-        rm, pid    = self._adaptor.parse_id(self._id)
 
-        while True:
+        # get the current state once, then leave it to the job service's
+        # state monitor to update it
+        state = self._job_get_state(self._id)
+        self._logger.debug("wait() for job id %s:%s" % (self._id, state))
+
+        if state == c.UNKNOWN:
+            raise rse.IncorrectState("cannot get job state")
+
+        self._set_state(state)
 
-            state = self._job_get_state(self._id)
-            self._logger.debug("wait() for job id %s:%s" % (self._id, state))
+        if state not in c.FINAL:
+            self.js._monitor_job(self)
 
-            if state == c.UNKNOWN:
+        def done():
+            # the state monitor lost track of the job
+            if self._state == c.UNKNOWN:
                 raise rse.IncorrectState("cannot get job state")
+            return self._state in c.FINAL
 
-            if state in c.FINAL:
-                self._job_get_info()
-                return True
+        def poll():
+            self._set_state(self._job_get_state(self._id))
+
+        if timeout >= 0:
+            timeout = max(0.0, timeout - (time.time() - time_start))
 
-            # check if we hit timeout
-            if timeout >= 0:
-                if time.time() - time_start > timeout:
-                    return False
+        if not self.js._wait_states(done, poll, timeout):
+            return False
 
-            # avoid busy poll
-            time.sleep(0.5)
+        self._job_get_info()
+        return True
 
 
     # --------------------------------------------------------------------------
@@ -1453,6 +2007,9 @@ class SLURMJob(cpi_job.Job):
         self._id      = self.js._job_run(self.jd)
         self._started = True
 
+        self._set_state(c.PENDING)
+        self.js._monitor_job(self)
+
 
 # ------------------------------------------------------------------------------
 
@@ -19,11 +19,14 @@ import radical.utils as ru
 
 from ...              import exceptions as rse
 from ...utils         import pty_shell  as rsups
+from ...utils         import misc       as rsumisc
 from ...              import job        as api
 from ...adaptors      import base       as a_base
 from ...adaptors.cpi  import job        as cpi
 from ...adaptors.cpi  import decorators as cpi_decs
 
+from ...utils.job     import iter_qstat
+
 
 SYNC_CALL  = cpi_decs.SYNC_CALL
 ASYNC_CALL = cpi_decs.ASYNC_CALL
@@ -31,6 +34,7 @@ ASYNC_CALL = cpi_decs.ASYNC_CALL
 
 SYNC_WAIT_UPDATE_INTERVAL =  1  # seconds
 MONITOR_UPDATE_INTERVAL   = 60  # seconds
+QSTAT_LINE_MAX            = 2000 # max length of the job id list per qstat call
 
 
 # --------------------------------------------------------------------
@@ -61,39 +65,39 @@ class _job_state_monitor(threading.Thread):
         while not self._term.is_set ():
 
             try:
-                # FIXME: do bulk updates here! we don't want to pull information
-                # job by job. that would be too inefficient!
-                jobs = self.js.jobs
+                # we only need to monitor jobs that are not in a terminal
+                # state, so we can skip the ones that are either done, failed
+                # or canceled.  Store the current states since the job infos
+                # are updated in place by _job_get_infos.
+                jobs   = self.js.jobs
+                active = dict()
 
                 for job_id in list(jobs.keys()) :
+                    if  jobs[job_id]['state'] not in api.FINAL:
+                        active[job_id] = jobs[job_id]['state']
 
-                    job_info = jobs[job_id]
-
-                    # we only need to monitor jobs that are not in a
-                    # terminal state, so we can skip the ones that are
-                    # either done, failed or canceled
-                    if  job_info['state'] not in api.FINAL:
+                # pull information for all jobs in bulk, not job by job
+                infos = dict()
+                if  active:
+                    infos = self.js._job_get_infos(list(active.keys()))
 
-                        # Store the current state since the current state
-                        # variable is updated when _job_get_info is called
-                        pre_update_state = job_info['state']
+                for job_id, new_job_info in infos.items():
 
-                        new_job_info = self.js._job_get_info(job_id,
-                                                             reconnect=False)
-                        self.logger.info ("Job monitoring thread updating Job "
-                                          "%s (old state: %s, new state: %s)" %
-                                          (job_id, pre_update_state,
-                                           new_job_info['state']))
+                    pre_update_state = active[job_id]
+                    self.logger.info ("Job monitoring thread updating Job "
+                                      "%s (old state: %s, new state: %s)" %
+                                      (job_id, pre_update_state,
+                                       new_job_info['state']))
 
-                        # fire job state callback if 'state' has changed
-                        if  new_job_info['state'] != pre_update_state:
-                            job_obj = job_info['obj']
-                            job_obj._attributes_i_set('state',
-                                                      new_job_info['state'],
-                                                      job_obj._UP, True)
+                    # fire job state callback if 'state' has changed
+                    if  new_job_info['state'] != pre_update_state:
+                        job_obj = jobs[job_id]['obj']
+                        job_obj._attributes_i_set('state',
+                                                  new_job_info['state'],
+                                                  job_obj._UP, True)
 
-                        # update job info
-                        jobs[job_id] = new_job_info
+                    # update job info
+                    jobs[job_id] = new_job_info
 
             except Exception as e:
                 import traceback
@@ -864,14 +868,7 @@ class TORQUEJobService (cpi.Service):
         # try `qstat`.  If that doesn't work, fall back to `checkjob`
         ok = False
 
-        # TODO: move to config file
-        #       if 'PBSPro_1' in self._pbs_version:
-        qstat_flag = '-f1'
-
-        ret, out1, err1 = self.shell.run_sync("unset GREP_OPTIONS; %s %s %s | "
-                "grep -E -i '(job_state)|(exec_host)|(exit_status)|"
-                 "(ctime)|(start_time)|(stime)|(mtime)'"
-                % (self._commands['qstat'], qstat_flag, pid))
+        ret, out1, err1 = self.shell.run_sync(self._qstat_cmd([pid]))
 
         if ret != 0:
             self._logger.warn('qstat failed with: %s', err1)
@@ -880,45 +877,7 @@ class TORQUEJobService (cpi.Service):
 
             # qstat worked - parse output
             ok = True
-
-            # the result should look something like this:
-            #     job_state = C
-            #     exec_host = i72/0
-            #     exit_status = 0
-            for line in out1.split('\n'):
-
-                if '=' not in line:
-                    continue
-
-                key, val = line.split('=', 1)
-                key = key.strip().lower
-                val = val.strip()
-
-                if   key in ['job_state'  ]: job_state = val
-                elif key in ['job_name'   ]: job_info['name'] = val
-                elif key in ['exit_status']: job_info['returncode' ] = int(val)
-                elif key in ['exec_host'  ]: job_info['exec_hosts' ] = val.split('+')
-                                             # format i73/7+i73/6+...
-
-              # FIXME: qstat will not tell us time zones, so we cannot
-              #        convert to EPOCH (which is UTC).  We thus take
-              #        times ourself.  A proper solution would be to
-              #        either do the time conversion on the target host,
-              #        or to inspect time zone settings on the host.
-              #
-              # # PBS Pro doesn't provide "end time", but
-              # # "resources_used.walltime" could be added up to the
-              # # start time.  Alternatively, we can use mtime, (latest
-              # # modification time) which is generally also end time.
-              # # TORQUE has an "comp_time" (completion? time), that is
-              # # generally the same as mtime.  # # For now we  use
-              # mtime for both TORQUE and PBS Pro.
-
-                elif key in ['start_time',  # TORQUE / PBS Pro
-                             'stime'      ]: job_info['start_time' ] = val
-                elif key in ['ctime'      ]: job_info['create_time'] = val
-                elif key in ['mtime'      ]: job_info['end_time'   ] = val
-
+            self._parse_qstat(out1, job_info)
 
         if not ok:
 
@@ -965,26 +924,9 @@ class TORQUEJobService (cpi.Service):
                         job_info['end_time'  ] = str(val.split(':', 1)[1])
                         job_info['returncode'] = int(val.split(      )[0])
 
-        if ok:
-
-            # we did get some information - see if we need a state update
-            # TORQUE doesn't allow us to distinguish DONE/FAILED on
-            # final state alone,  we need to consider the exit_status.
-            retcode = job_info.get('returncode', -1)
-            job_info['state'] = _to_saga_jobstate(job_state, retcode,
-                                                  logger=self._logger)
-
-            # FIXME: workaround for time zone problem described above
-            if job_info['state'] in [api.RUNNING] + api.FINAL \
-                and not job_info['start_time']:
-                job_info['start_time'] = time.time()
+                self._update_state(job_info, job_state)
 
-            if job_info['state'] in api.FINAL \
-                and not job_info['end_time']:
-                job_info['end_time'] = time.time()
-
-
-        else:
+        if not ok:
 
             # both failed - search all output for 'unknown job' or 'invalid job'
             all_out = '\n'.join([out1, out2, err1, err2])
@@ -1027,14 +969,137 @@ class TORQUEJobService (cpi.Service):
         return job_info
 
 
+    # ----------------------------------------------------------------
+    #
+    def _qstat_cmd(self, pids):
+        """ create the qstat command line to query the given job ids
+        """
+
+        # TODO: move to config file
+        #       if 'PBSPro_1' in self._pbs_version:
+        qstat_flag = '-f1'
+
+        return "unset GREP_OPTIONS; %s %s %s | " \
+               "grep -E -i '(Job Id:)|(job_state)|(exec_host)|(exit_status)|" \
+               "(ctime)|(start_time)|(stime)|(mtime)'" \
+               % (self._commands['qstat'], qstat_flag, ' '.join(pids))
+
+
     # ----------------------------------------------------------------
     #
     def _parse_qstat(self, haystack, job_info):
+        """ parse the qstat attributes of a single job into job_info
+        """
+
+        job_state = None
 
+        # the result should look something like this:
+        #     job_state = C
+        #     exec_host = i72/0
+        #     exit_status = 0
+        for line in haystack.split('\n'):
+
+            if '=' not in line:
+                continue
+
+            key, val = line.split('=', 1)
+            key = key.strip().lower()
+            val = val.strip()
+
+            if   key in ['job_state'  ]: job_state = val
+            elif key in ['job_name'   ]: job_info['name'] = val
+            elif key in ['exit_status']: job_info['returncode' ] = int(val)
+            elif key in ['exec_host'  ]: job_info['exec_hosts' ] = val.split('+')
+                                         # format i73/7+i73/6+...
+
+          # FIXME: qstat will not tell us time zones, so we cannot
+          #        convert to EPOCH (which is UTC).  We thus take
+          #        times ourself.  A proper solution would be to
+          #        either do the time conversion on the target host,
+          #        or to inspect time zone settings on the host.
+          #
+          # # PBS Pro doesn't provide "end time", but
+          # # "resources_used.walltime" could be added up to the
+          # # start time.  Alternatively, we can use mtime, (latest
+          # # modification time) which is generally also end time.
+          # # TORQUE has an "comp_time" (completion? time), that is
+          # # generally the same as mtime.  # # For now we  use
+          # mtime for both TORQUE and PBS Pro.
+
+            elif key in ['start_time',  # TORQUE / PBS Pro
+                         'stime'      ]: job_info['start_time' ] = val
+            elif key in ['ctime'      ]: job_info['create_time'] = val
+            elif key in ['mtime'      ]: job_info['end_time'   ] = val
+
+        self._update_state(job_info, job_state)
 
         # return the new job info dict
         return job_info
 
+
+    # ----------------------------------------------------------------
+    #
+    def _update_state(self, job_info, job_state):
+        """ derive the saga job state from the backend state and exit code
+        """
+
+        # we did get some information - see if we need a state update
+        # TORQUE doesn't allow us to distinguish DONE/FAILED on
+        # final state alone,  we need to consider the exit_status.
+        retcode = job_info.get('returncode', -1)
+        job_info['state'] = _to_saga_jobstate(job_state, retcode,
+                                              logger=self._logger)
+
+        # FIXME: workaround for time zone problem described above
+        if job_info['state'] in [api.RUNNING] + api.FINAL \
+            and not job_info['start_time']:
+            job_info['start_time'] = time.time()
+
+        if job_info['state'] in api.FINAL \
+            and not job_info['end_time']:
+            job_info['end_time'] = time.time()
+
+
+    # ----------------------------------------------------------------
+    #
+    def _job_get_infos(self, job_ids):
+        """ Get job information attributes for a list of jobs.  All jobs are
+            queried with a single qstat call (or a few pipelined ones for very
+            long job lists).  Jobs which qstat does not report are handled
+            individually by _job_get_info.
+        """
+
+        infos = dict()
+        pids  = dict()  # pid : job_id
+
+        for job_id in job_ids:
+
+            if self.jobs[job_id]['gone'] is True:
+                infos[job_id] = self.jobs[job_id]
+            else:
+                pids[self._adaptor.parse_id(job_id)[1]] = job_id
+
+        todo = list(pids.keys())
+        # the pty limits the length of command lines, so we split long job
+        # lists into several (pipelined) qstat calls
+        cmds = [self._qstat_cmd(chunk) for chunk in
+                rsumisc.split_by_length(todo, QSTAT_LINE_MAX)]
+
+        if cmds:
+            for _, out, _ in self.shell.run_pipelined(cmds):
+                for pid, section in iter_qstat(out):
+                    job_id = pids.get(pid)
+                    if job_id and job_id not in infos:
+                        infos[job_id] = self._parse_qstat(section,
+                                                          self.jobs[job_id])
+
+        for job_id in job_ids:
+            if job_id not in infos:
+                infos[job_id] = self._job_get_info(job_id, reconnect=False)
+
+        return infos
+
+
     # ----------------------------------------------------------------
     #
     def _job_get_state(self, job_id):
@@ -148,6 +148,120 @@ class Callback () :
 
 
 
+# ------------------------------------------------------------------------------
+#
+# attribute defaults of these types can safely be shared between instances
+_SHAREABLE = (type(None), str, int, float, bool, tuple, frozenset)
+
+
+# ------------------------------------------------------------------------------
+#
+class _AttributeSchema (object) :
+    """
+    Registration metadata of an attribute which do not change over the lifetime
+    of an attribute instance.  Schemas are shared between all instances of an
+    `Attributes` class which register the same attribute in the same way.  This
+    class is not part of the public attribute API.
+    """
+
+    __slots__ = ('default', 'type', 'flavor', 'extended', 'private',
+                 'camelcase', 'underscore')
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__ (self, default, typ, flavor, ext, priv, camelcase, underscore) :
+
+        self.default    = default     # default value
+        self.type       = typ         # int, float, enum, ...
+        self.flavor     = flavor      # scalar / vector
+        self.extended   = ext         # is an extended attribute
+        self.private    = priv        # is a  private attribute
+        self.camelcase  = camelcase   # keep original key name
+        self.underscore = underscore  # keep under_scored name
+
+
+# ------------------------------------------------------------------------------
+#
+class _Attribute (object) :
+    """
+    Per-instance state of a single attribute, stored in slots instead of
+    a dict.  The shared `_AttributeSchema` fields are exposed as read-only
+    properties, and the dict protocol (`attr['value']`, `'value' in attr`) is
+    supported for all fields.  This class is not part of the public attribute
+    API.
+    """
+
+    __slots__ = ('schema', 'value', 'exists', 'mode', 'alias', 'enums',
+                 'checks', 'callbacks', 'recursion', 'setter', 'getter',
+                 'last', 'ttl')
+
+    default    = property (lambda self: self.schema.default)
+    type       = property (lambda self: self.schema.type)
+    flavor     = property (lambda self: self.schema.flavor)
+    extended   = property (lambda self: self.schema.extended)
+    private    = property (lambda self: self.schema.private)
+    camelcase  = property (lambda self: self.schema.camelcase)
+    underscore = property (lambda self: self.schema.underscore)
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__ (self, schema, value=None, exists=False, mode=WRITEABLE) :
+
+        self.schema    = schema
+        self.value     = value     # current value
+        self.exists    = exists    # no value set, yet?
+        self.mode      = mode      # readonly / writeable / final
+        self.enums     = ()        # list of valid enum values
+        self.checks    = ()        # list of custom value checks
+        self.callbacks = ()        # list of callbacks
+        self.recursion = False     # recursion check for callbacks
+        self.setter    = None      # custom attribute setter
+        self.getter    = None      # custom attribute getter
+        self.last      = never     # time of last refresh (never)
+        self.ttl       = 0.0       # refresh delay (none)
+
+    # --------------------------------------------------------------------------
+    #
+    def __getitem__ (self, key) :
+        try :
+            return getattr (self, key)
+        except AttributeError as e :
+            raise KeyError (key) from e
+
+    # --------------------------------------------------------------------------
+    #
+    def __setitem__ (self, key, val) :
+        setattr (self, key, val)
+
+    # --------------------------------------------------------------------------
+    #
+    def __contains__ (self, key) :
+        return hasattr (self, key)
+
+    # --------------------------------------------------------------------------
+    #
+    def copy (self) :
+        """
+        Create a copy which shares the schema, but not the lists of checks,
+        enums and callbacks.  The value is *not* copied.
+        """
+
+        other           = _Attribute (self.schema, None, self.exists, self.mode)
+        other.enums     = list (self.enums)     if self.enums     else ()
+        other.checks    = list (self.checks)    if self.checks    else ()
+        other.callbacks = list (self.callbacks) if self.callbacks else ()
+        other.recursion = self.recursion
+        other.setter    = self.setter
+        other.getter    = self.getter
+        other.last      = self.last
+        other.ttl       = self.ttl
+
+        if  self.mode == ALIAS :
+            other.alias = self.alias
+
+        return other
+
+
 # ------------------------------------------------------------------------------
 #
 class _AttributesBase (object) :
@@ -441,8 +555,8 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # if key is known, check for aliasing
         else:
             # check if we know about the given attribute
-            if  d['attributes'][key]['mode'] == ALIAS :
-                alias = d['attributes'][key]['alias']
+            if  d['attributes'][key].mode == ALIAS :
+                alias = d['attributes'][key].alias
                 print("attribute '%s' is deprecated - use '%s'"  %  (key, alias))
                 key   = alias
 
@@ -468,10 +582,10 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # avoid recursion
-        if  d['attributes'][key]['recursion'] :
+        if  d['attributes'][key].recursion :
             return
 
-        callbacks = d['attributes'][key]['callbacks']
+        callbacks = d['attributes'][key].callbacks
 
         # iterate over a copy of the callback list, so that remove does not
         # screw up the iteration
@@ -483,10 +597,10 @@ class Attributes (_AttributesBase, ru.DictMixin) :
             # raise and lower recursion shield as needed
             ret = False
             try :
-                d['attributes'][key]['recursion'] = True
+                d['attributes'][key].recursion = True
                 ret = call (self, key, val)
             finally :
-                d['attributes'][key]['recursion'] = False
+                d['attributes'][key].recursion = False
 
             # remove callbacks which return 'False', or raised and exception
             if  not ret :
@@ -512,7 +626,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # avoid recursion
-        if  d['attributes'][key]['recursion'] :
+        if  d['attributes'][key].recursion :
             return
 
         # no callbacks for private keys
@@ -521,7 +635,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         # key_setter overwrites results from all_setter
         all_setter = d['setter']
-        key_setter = d['attributes'][key]['setter']
+        key_setter = d['attributes'][key].setter
 
         # Get the value via the attribute setter.  The setter will not call
         # attrib setters or callbacks, due to the recursion guard.
@@ -537,7 +651,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         if  all_setter :
             try :
-                d['attributes'][key]['recursion'] = True
+                d['attributes'][key].recursion = True
                 all_setter (key, val)
             except Exception as e :
                 # ignoring failures from setter
@@ -546,17 +660,17 @@ class Attributes (_AttributesBase, ru.DictMixin) :
                 can_ignore -= 1
                 if not can_ignore : raise e
             finally :
-                d['attributes'][key]['recursion'] = False
+                d['attributes'][key].recursion = False
 
         if  key_setter :
             try :
-                d['attributes'][key]['recursion'] = True
+                d['attributes'][key].recursion = True
                 key_setter (val)
             except:
                 can_ignore -= 1
                 if not can_ignore : raise
             finally :
-                d['attributes'][key]['recursion'] = False
+                d['attributes'][key].recursion = False
 
 
 
@@ -577,7 +691,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # avoid recursion
-        if  d['attributes'][key]['recursion'] :
+        if  d['attributes'][key].recursion :
             return
 
         # no callbacks for private keys
@@ -586,24 +700,24 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         # key getter overwrites results from all_getter
         all_getter = d['getter']
-        key_getter = d['attributes'][key]['getter']
+        key_getter = d['attributes'][key].getter
 
 
-        # # Note that attributes have a time-to-live (ttl).  If a _attributes_i_get
-        # # operation is attempted within 'time-of-last-update + ttl', the operation
-        # # is not triggering backend getter hooks, to avoid trashing (hooks are
-        # # expected to be costly).  The force flag set to True will request to call
-        # # registered getter hooks even if ttl is not yet expired.
-        #
-        # # For example, job.wait() will update the plugin level state to 'Done',
-        # # but the cached job.state attribute will remain 'New' as the plugin does
-        # # not push the state change upward
+        # Note that attributes have a time-to-live (ttl).  If a _attributes_i_get
+        # operation is attempted within 'time-of-last-update + ttl', the operation
+        # is not triggering backend getter hooks, to avoid trashing (hooks are
+        # expected to be costly).  The default ttl is 0.0, i.e. getter hooks are
+        # always called.
         #
-        # age = self._attributes_t_get_age (key)
-        # ttl = d['attributes'][key]['ttl']
-        #
-        # if age < ttl :
-        #     return
+        # A ttl should only be set for attributes which the plugin updates by
+        # pushing values upward (`_attributes_i_set (..., flow=_UP)`), as any
+        # upward push also refreshes the time of last update.  Otherwise, for
+        # example, job.wait() would update the plugin level state to 'Done',
+        # but the cached job.state attribute would remain 'New'.
+        ttl = d['attributes'][key].ttl
+
+        if  ttl and self._attributes_t_get_age (key) < ttl :
+            return
 
 
         # get the value from the native getter (from the backend), and
@@ -619,25 +733,25 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         if  all_getter :
             try :
-                d['attributes'][key]['recursion'] = True
+                d['attributes'][key].recursion = True
                 val=all_getter (key)
-                d['attributes'][key]['value'] = val
+                d['attributes'][key].value = val
             except Exception:
                 retries -= 1
                 if not retries : raise
             finally :
-              d['attributes'][key]['recursion'] = False
+              d['attributes'][key].recursion = False
 
         if  key_getter :
             try :
-                d['attributes'][key]['recursion'] = True
+                d['attributes'][key].recursion = True
                 val=key_getter ()
-                d['attributes'][key]['value'] = val
+                d['attributes'][key].value = val
             except Exception:
                 retries -= 1
                 if not retries : raise
             finally :
-                d['attributes'][key]['recursion'] = False
+                d['attributes'][key].recursion = False
 
 
 
@@ -721,6 +835,43 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _attributes_t_schema (self, key, us_key, default, typ, flavor, ext,
+                              priv) :
+        """
+        This internal function is not to be used by the consumer of this API.
+
+        Return the `_AttributeSchema` for the given registration metadata.
+        Schemas are cached on the class, so that all instances of a class
+        share the same schema objects.  Mutable defaults are never shared, as
+        they would otherwise leak value changes between instances.
+        """
+
+        if not isinstance (default, _SHAREABLE) :
+            return _AttributeSchema (default, typ, flavor, ext, priv, key,
+                                     us_key)
+
+        cls   = type (self)
+        cache = cls.__dict__.get ('_attributes_schemas')
+
+        if  cache is None :
+            cache = dict()
+            cls._attributes_schemas = cache
+
+        skey   = (key, typ, flavor, ext, priv)
+        schema = cache.get (skey)
+
+        if  schema is None                          or \
+            type (schema.default) is not type (default) or \
+            schema.default != default :
+            schema = _AttributeSchema (default, typ, flavor, ext, priv, key,
+                                       us_key)
+            cache[skey] = schema
+
+        return schema
+
+
     # --------------------------------------------------------------------------
     #
     @rus.takes   ('Attributes',
@@ -779,15 +930,14 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # check if a value is given.  If not, revert to the default value
         # (if available)
         if  val == None :
-            if 'default' in d['attributes'][key] :
-                val = d['attributes'][key]['default']
+            val = d['attributes'][key].default
 
 
         # perform flavor and type conversion
         val = self._attributes_t_conversion_flavor (key, val)
 
         # apply all value checks on the conversion result
-        for check in d['attributes'][key]['checks'] :
+        for check in d['attributes'][key].checks :
             ret = check (key, val)
             if  ret != True :
                 raise se.BadParameter ("attribute value %s is not valid: %s"  %  (key, ret))
@@ -818,8 +968,8 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # check if we need to serialize a list into a scalar
-        f = d['attributes'][key]['flavor']
-        t = d['attributes'][key]['type']
+        f = d['attributes'][key].flavor
+        t = d['attributes'][key].type
         if  f == ANY :
             # leave it alone
             return val
@@ -934,7 +1084,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # oh python, how about a decent switch statement???
-        t   = d['attributes'][key]['type']
+        t   = d['attributes'][key].type
         ret = None
         try :
             # FIXME: add time/date conversion to/from string
@@ -1012,7 +1162,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         # make sure interface is ready to use.
         d    = self._attributes_t_init (key)
-        last = d['attributes'][key]['last']
+        last = d['attributes'][key].last
         age  = now() - last
 
         return (age.microseconds + (age.seconds + age.days * 24 * 3600) * 1e6) / 1e6
@@ -1076,16 +1226,14 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
             # check if we are allowed to change the attribute - complain if not.
             # Also, simply ignore write attempts to finalized keys.
-            if 'mode' in  d['attributes'][key] :
-
-                mode = d['attributes'][key]['mode']
+            mode = d['attributes'][key].mode
 
-                if FINAL == mode :
-                    return
+            if FINAL == mode :
+                return
 
-                elif READONLY == mode :
-                    if not force :
-                        raise se.BadParameter ("attribute %s is not writeable" %  key)
+            elif READONLY == mode :
+                if not force :
+                    raise se.BadParameter ("attribute %s is not writeable" %  key)
 
 
         # permissions are confirmed, set the attribute with conversion etc.
@@ -1096,27 +1244,23 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # apply any attribute conversion
         val = self._attributes_t_conversion (key, val)
 
-        # make sure the key's value entry exists
-        if not 'value' in d['attributes'][key] :
-            d['attributes'][key]['value'] = None
-
         # only once an attribute is explicitly set, it 'exists' for the purpose
         # of the 'attribute_exists' call, and the key iteration
-        d['attributes'][key]['exists'] = True
+        d['attributes'][key].exists = True
 
         # # only actually change the attribute when the new value differs --
         # # and only then invoke any callbacks and hooked setters
-        # if val != d['attributes'][key]['value'] :
+        # if val != d['attributes'][key].value :
         #
         # NOTE: this check is disabled now: we certainly want to update 'last',
         # and IMHO that should also imply a notification call, etc.  FWIW, the
         # spec is inconclusive here.
         #
-        # if val != d['attributes'][key]['value'] :
+        # if val != d['attributes'][key].value :
 
 
-        d['attributes'][key]['value'] = val
-        d['attributes'][key]['last']  = now ()
+        d['attributes'][key].value = val
+        d['attributes'][key].last  = now ()
 
         if flow==self._DOWN :
             # NOTE: we use the orig_val here, to make the environment hooks
@@ -1149,13 +1293,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         if flow == self._DOWN :
             self._attributes_t_call_getter (key)
 
-        if 'value' in d['attributes'][key] :
-            return d['attributes'][key]['value']
-
-        if 'default' in d['attributes'][key] :
-            return d['attributes'][key]['default']
-
-        return None
+        return d['attributes'][key].value
 
 
 
@@ -1180,15 +1318,15 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         ret    = []
         for key in sorted(d['attributes'].keys()) :
-            if d['attributes'][key]['mode'] != ALIAS :
-                if d['attributes'][key]['exists'] :
+            if d['attributes'][key].mode != ALIAS :
+                if d['attributes'][key].exists :
 
-                    e = d['attributes'][key]['extended']
-                    p = d['attributes'][key]['private']
+                    e = d['attributes'][key].extended
+                    p = d['attributes'][key].private
                     k = key
 
                     if CamelCase :
-                        k = d['attributes'][key]['camelcase']
+                        k = d['attributes'][key].camelcase
 
                     if e and ext :
                         if p and priv :
@@ -1281,9 +1419,8 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         # check if we know about that attribute
         if key in d['attributes'] :
-            if 'exists' in d['attributes'][key] :
-                if  d['attributes'][key]['exists'] :
-                    return True
+            if  d['attributes'][key].exists :
+                return True
 
         return False
 
@@ -1308,7 +1445,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # make sure interface is ready to use
         d = self._attributes_t_init (key)
 
-        return d['attributes'][key]['extended']
+        return d['attributes'][key].extended
 
 
     # --------------------------------------------------------------------------
@@ -1331,7 +1468,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # make sure interface is ready to use
         d = self._attributes_t_init (key)
 
-        return d['attributes'][key]['private']
+        return d['attributes'][key].private
 
 
     # --------------------------------------------------------------------------
@@ -1355,8 +1492,8 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # check if we know about that attribute
-        if  d['attributes'][key]['mode'] == FINAL or \
-            d['attributes'][key]['mode'] == READONLY :
+        if  d['attributes'][key].mode == FINAL or \
+            d['attributes'][key].mode == READONLY :
             return True
 
         return False
@@ -1421,7 +1558,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d = self._attributes_t_init (key)
 
         # check if we know about that attribute
-        if  d['attributes'][key]['flavor'] == VECTOR :
+        if  d['attributes'][key].flavor == VECTOR :
             return True
 
         return False
@@ -1447,7 +1584,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # make sure interface is ready to use
         d = self._attributes_t_init (key)
 
-        if FINAL == d['attributes'][key]['mode'] :
+        if FINAL == d['attributes'][key].mode :
              return True
 
         # no final flag found -- assume non-finality!
@@ -1472,9 +1609,13 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         # make sure interface is ready to use
         d = self._attributes_t_init (key)
 
-        d['attributes'][key]['callbacks'].append (cb)
+        # callback lists are created on demand
+        if not d['attributes'][key].callbacks :
+            d['attributes'][key].callbacks = []
 
-        id = len (d['attributes'][key]['callbacks']) - 1
+        d['attributes'][key].callbacks.append (cb)
+
+        id = len (d['attributes'][key].callbacks) - 1
 
         if flow==self._DOWN :
             self._attributes_t_call_caller (key, id, cb)
@@ -1505,13 +1646,13 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         # id == None: remove all callbacks
         if not id :
-            d['attributes'][key]['callbacks'] = []
+            d['attributes'][key].callbacks = []
         else :
-            if len (d['attributes'][key]['callbacks']) < id :
+            if len (d['attributes'][key].callbacks) < id :
                 raise se.BadParameter ("invalid callback cookie for attribute %s"  %  key)
             else :
                 # do not pop from list, that would invalidate the id's!
-                d['attributes'][key]['callbacks'][id] = None
+                d['attributes'][key].callbacks[id] = None
 
 
 
@@ -1569,29 +1710,15 @@ class Attributes (_AttributesBase, ru.DictMixin) :
             exists = True
 
         if us_key in d['attributes'] :
-            val    = d['attributes'][us_key]['value']
+            val    = d['attributes'][us_key].value
             exists = True
 
-        # register the attribute and properties
-        d['attributes'][us_key]                 = {}
-        d['attributes'][us_key]['value']        = val     # initial value
-        d['attributes'][us_key]['default']      = default # default value
-        d['attributes'][us_key]['type']         = typ     # int, float, enum, ...
-        d['attributes'][us_key]['exists']       = exists  # no value set, yet?
-        d['attributes'][us_key]['flavor']       = flavor  # scalar / vector
-        d['attributes'][us_key]['mode']         = mode    # readonly / writeable / final
-        d['attributes'][us_key]['extended']     = ext     # is an extended attribute
-        d['attributes'][us_key]['private']      = priv    # is a  private attribute
-        d['attributes'][us_key]['camelcase']    = key     # keep original key name
-        d['attributes'][us_key]['underscore']   = us_key  # keep under_scored name
-        d['attributes'][us_key]['enums']        = []      # list of valid enum values
-        d['attributes'][us_key]['checks']       = []      # list of custom value checks
-        d['attributes'][us_key]['callbacks']    = []      # list of callbacks
-        d['attributes'][us_key]['recursion']    = False   # recursion check for callbacks
-        d['attributes'][us_key]['setter']       = None    # custom attribute setter
-        d['attributes'][us_key]['getter']       = None    # custom attribute getter
-        d['attributes'][us_key]['last']         = never   # time of last refresh (never)
-        d['attributes'][us_key]['ttl']          = 0.0     # refresh delay (none)
+        # register the attribute and properties.  The static registration
+        # metadata are kept in a schema which is shared by all instances of
+        # this class, only the attribute state is kept per instance.
+        schema = self._attributes_t_schema (key, us_key, default, typ, flavor,
+                                            ext, priv)
+        d['attributes'][us_key] = _Attribute (schema, val, exists, mode)
 
         # for enum types, we add a value checker
         if typ == ENUM :
@@ -1604,7 +1731,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
                 us_key = self._attributes_t_underscore (key)
                 d      = self._attributes_t_init       (us_key)
 
-                vals   = d['attributes'][us_key]['enums']
+                vals   = d['attributes'][us_key].enums
 
                 # check if there is anything to check
                 if not vals :
@@ -1683,11 +1810,9 @@ class Attributes (_AttributesBase, ru.DictMixin) :
             self._attributes_unregister (us_key, flow=flow)
 
         # register the attribute and properties
-        d['attributes'][us_key]               = {}
-        d['attributes'][us_key]['mode']       = ALIAS      # alias
-        d['attributes'][us_key]['alias']      = us_alias   # aliased var
-        d['attributes'][us_key]['camelcase']  = key        # keep original key name
-        d['attributes'][us_key]['underscore'] = us_key     # keep under_scored name
+        schema = _AttributeSchema (None, ANY, ANY, False, False, key, us_key)
+        d['attributes'][us_key]       = _Attribute (schema, mode=ALIAS)
+        d['attributes'][us_key].alias = us_alias   # aliased var
 
 
 
@@ -1768,7 +1893,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         us_key = self._attributes_t_underscore (key)
         d      = self._attributes_t_init       (us_key)
 
-        d['attributes'][us_key]['enums'] = enums
+        d['attributes'][us_key].enums = enums
 
 
     # --------------------------------------------------------------------------
@@ -1891,31 +2016,14 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         other_d['attributes'] = {}
 
         for key in d['attributes'] :
-            other_d['attributes'][key] = {}
-            other_d['attributes'][key]['default']      =       d['attributes'][key]['default']
-            other_d['attributes'][key]['exists']       =       d['attributes'][key]['exists']
-            other_d['attributes'][key]['type']         =       d['attributes'][key]['type']
-            other_d['attributes'][key]['flavor']       =       d['attributes'][key]['flavor']
-            other_d['attributes'][key]['mode']         =       d['attributes'][key]['mode']
-            other_d['attributes'][key]['extended']     =       d['attributes'][key]['extended']
-            other_d['attributes'][key]['private']      =       d['attributes'][key]['private']
-            other_d['attributes'][key]['camelcase']    =       d['attributes'][key]['camelcase']
-            other_d['attributes'][key]['underscore']   =       d['attributes'][key]['underscore']
-            other_d['attributes'][key]['enums']        = list (d['attributes'][key]['enums'])
-            other_d['attributes'][key]['checks']       = list (d['attributes'][key]['checks'])
-            other_d['attributes'][key]['callbacks']    = list (d['attributes'][key]['callbacks'])
-            other_d['attributes'][key]['recursion']    =       d['attributes'][key]['recursion']
-            other_d['attributes'][key]['setter']       =       d['attributes'][key]['setter']
-            other_d['attributes'][key]['getter']       =       d['attributes'][key]['getter']
-            other_d['attributes'][key]['last']         =       d['attributes'][key]['last']
-            other_d['attributes'][key]['ttl']          =       d['attributes'][key]['ttl']
-
-            if d['attributes'][key]['private' ] and key in orig_d['attributes'] :
+            other_d['attributes'][key] = d['attributes'][key].copy ()
+
+            if d['attributes'][key].private and key in orig_d['attributes'] :
                 # don't copy private keys
                 other_d['attributes'][key] = orig_d['attributes'][key]
 
             else :
-                other_d['attributes'][key]['value']  = copy.deepcopy (d['attributes'][key]['value'])
+                other_d['attributes'][key].value  = copy.deepcopy (d['attributes'][key].value)
 
         # set the new dictionary as state for copied class
         _AttributesBase.__setattr__ (other, '_d', other_d)
@@ -1968,22 +2076,21 @@ class Attributes (_AttributesBase, ru.DictMixin) :
 
         keys_exist = []
         for key in keys_all :
-            if  'exists' in d['attributes'][key] and \
-                d['attributes'][key]['exists']   :
+            if  d['attributes'][key].exists :
                 keys_exist.append (key)
 
         print("'Registered' attributes")
         for key in keys_all :
             if key not in keys_exist :
-                if not  d['attributes'][key]['mode'] == ALIAS and \
-                   not  d['attributes'][key]['extended'] :
+                if not  d['attributes'][key].mode == ALIAS and \
+                   not  d['attributes'][key].extended :
                     print(" %-30s [%6s, %6s, %9s, %3d]: %s"  % \
-                             (d['attributes'][key]['camelcase'],
-                              d['attributes'][key]['type'],
-                              d['attributes'][key]['flavor'],
-                              d['attributes'][key]['mode'],
-                          len(d['attributes'][key]['callbacks']),
-                              d['attributes'][key]['value']
+                             (d['attributes'][key].camelcase,
+                              d['attributes'][key].type,
+                              d['attributes'][key].flavor,
+                              d['attributes'][key].mode,
+                          len(d['attributes'][key].callbacks),
+                              d['attributes'][key].value
                               ))
 
         print("---------------------------------------")
@@ -1991,14 +2098,14 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         print("'Existing' attributes")
         keys_exist.sort ()
         for key in keys_exist :
-            if not  d['attributes'][key]['mode'] == ALIAS :
+            if not  d['attributes'][key].mode == ALIAS :
                 print(" %-30s [%6s, %6s, %9s, %3d]: %s"  % \
-                         (d['attributes'][key]['camelcase'],
-                          d['attributes'][key]['type'],
-                          d['attributes'][key]['flavor'],
-                          d['attributes'][key]['mode'],
-                      len(d['attributes'][key]['callbacks']),
-                          d['attributes'][key]['value']
+                         (d['attributes'][key].camelcase,
+                          d['attributes'][key].type,
+                          d['attributes'][key].flavor,
+                          d['attributes'][key].mode,
+                      len(d['attributes'][key].callbacks),
+                          d['attributes'][key].value
                           ))
 
         print("---------------------------------------")
@@ -2006,15 +2113,15 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         print("'Extended' attributes")
         for key in keys_all :
             if key not in keys_exist :
-                if not  d['attributes'][key]['mode'] == ALIAS and \
-                        d['attributes'][key]['extended'] :
+                if not  d['attributes'][key].mode == ALIAS and \
+                        d['attributes'][key].extended :
                     print(" %-30s [%6s, %6s, %9s, %3d]: %s"  % \
-                             (d['attributes'][key]['camelcase'],
-                              d['attributes'][key]['type'],
-                              d['attributes'][key]['flavor'],
-                              d['attributes'][key]['mode'],
-                          len(d['attributes'][key]['callbacks']),
-                              d['attributes'][key]['value']
+                             (d['attributes'][key].camelcase,
+                              d['attributes'][key].type,
+                              d['attributes'][key].flavor,
+                              d['attributes'][key].mode,
+                          len(d['attributes'][key].callbacks),
+                              d['attributes'][key].value
                               ))
 
         print("---------------------------------------")
@@ -2022,11 +2129,11 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         print("'Deprecated' attributes (aliases)")
         for key in keys_all :
             if key not in keys_exist :
-                if d['attributes'][key]['mode'] == ALIAS :
+                if d['attributes'][key].mode == ALIAS :
                     print(" %-30s [%24s]:  %s"  % \
-                             (d['attributes'][key]['camelcase'],
+                             (d['attributes'][key].camelcase,
                               ' ',
-                              d['attributes'][key]['alias']
+                              d['attributes'][key].alias
                               ))
 
         print("---------------------------------------")
@@ -2058,14 +2165,14 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d      = self._attributes_t_init       (us_key)
 
         newval = val
-        oldval = d['attributes'][us_key]['value']
+        oldval = d['attributes'][us_key].value
         if None == newval :
             # freeze at current value unless indicated otherwise
             val = oldval
 
         # flag as final, and set the final value (this order to avoid races in
         # callbacks)
-        d['attributes'][us_key]['mode'] = FINAL
+        d['attributes'][us_key].mode = FINAL
         self._attributes_i_set (us_key, val, flow=flow)
 
         # callbacks are not invoked if the value did not change -- we take care
@@ -2090,7 +2197,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         us_key = self._attributes_t_underscore (key)
         d      = self._attributes_t_init       (us_key)
 
-        d['attributes'][us_key]['ttl'] = ttl
+        d['attributes'][us_key].ttl = ttl
 
 
 
@@ -2121,8 +2228,12 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         us_key = self._attributes_t_underscore (key)
         d = self._attributes_t_init (us_key)
 
-        # register the attribute and properties
-        d['attributes'][us_key]['checks'].append (check)
+        # register the attribute and properties.  Check lists are created on
+        # demand.
+        if not d['attributes'][us_key].checks :
+            d['attributes'][us_key].checks = []
+
+        d['attributes'][us_key].checks.append (check)
 
 
     # --------------------------------------------------------------------------
@@ -2184,7 +2295,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d      = self._attributes_t_init       (us_key)
 
         # register the attribute and properties
-        d['attributes'][us_key]['getter'] = getter
+        d['attributes'][us_key].getter = getter
 
 
     # --------------------------------------------------------------------------
@@ -2207,7 +2318,7 @@ class Attributes (_AttributesBase, ru.DictMixin) :
         d      = self._attributes_t_init       (us_key)
 
         # register the attribute and properties
-        d['attributes'][us_key]['setter'] = setter
+        d['attributes'][us_key].setter = setter
 
 
     # --------------------------------------------------------------------------
@@ -2628,6 +2739,19 @@ class Attributes (_AttributesBase, ru.DictMixin) :
     def __getattr__ (self, key) :
         """ see L{get_attribute} (key) for details. """
 
+        # fast path for plain reads: registered attributes which are not
+        # aliased and have no getter hooks are served directly from the
+        # attribute store, without key checks and getter invocation.
+        try :
+            d    = _AttributesBase.__getattribute__ (self, '_d')
+            attr = d['attributes'][key]
+
+            if  attr.mode != ALIAS and not attr.getter and not d['getter'] :
+                return attr.value
+
+        except (AttributeError, KeyError) :
+            pass
+
         key  = self._attributes_t_keycheck (key)
         return self._attributes_i_get      (key, flow=self._DOWN)
 
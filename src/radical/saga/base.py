@@ -14,6 +14,13 @@ from .adaptors import base        as sab
 from .         import engine
 
 
+# ------------------------------------------------------------------------------
+#
+# the apitype only depends on the class of an API object, so we determine it
+# once per class
+_apitypes = dict()
+
+
 # ------------------------------------------------------------------------------
 #
 class SimpleBase (object) :
@@ -55,6 +62,18 @@ class SimpleBase (object) :
     @rus.returns (str)
     def _get_apitype (self) :
 
+        apitype = _apitypes.get (self.__class__)
+        if not apitype :
+            apitype = self._find_apitype ()
+            _apitypes[self.__class__] = apitype
+
+        return apitype
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _find_apitype (self) :
+
         # apitype for saga.job.service.Service should be saga.job.Service --
         # but we need to make sure that this actually exists and is equivalent.
 
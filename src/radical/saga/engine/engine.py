@@ -6,35 +6,28 @@ __license__   = "MIT"
 
 """ Provides the SAGA runtime. """
 
+import os
+import sys
+import json
+import time
+import hashlib
+
+import threading as mt
+
 import radical.utils as ru
 
 from ..        import exceptions as rse
 from ..version import *
 
 
-# ------------------------------------------------------------------------------
-#
-# we set the default of the pty share mode to 'no' on CentOS, as that seems to
-# consistently come with old ssh versions which can't handle sharing for sftp
-# channels.
-#
-_share_mode_default = 'auto'
-try:
-    import subprocess as sp
-    _p = sp.Popen ('lsb_release -a | grep "Distributor ID" | cut -f 2 -d ":"',
-                   stdout=sp.PIPE, stderr=sp.STDOUT, shell=True)
-    _os_flavor = _p.communicate()[0].strip().lower()
-
-    if 'centos'  in _os_flavor or \
-       'cent_os' in _os_flavor or \
-       'cent-os' in _os_flavor or \
-       'cent os' in _os_flavor :
-        _share_mode_default = 'no'
+# adaptors whose cpi class failed to instantiate are only tried as last resort
+# for that many seconds (see `Engine.bind_adaptor()`)
+_BIND_FAIL_TTL = 60.0
 
-except Exception:
-    # we ignore this then -- we are relatively sure that the above should work
-    # on CentOS...
-    pass
+# adaptors which failed to load are skipped by later processes for that many
+# seconds, unless the registry config sets 'registry_fail_ttl' (see
+# `Engine._open_cache()`)
+_LOAD_FAIL_TTL = 600.0
 
 
 # ------------------------------------------------------------------------------
@@ -47,7 +40,7 @@ class Engine(object, metaclass=ru.Singleton):
     loading and management, and which binds adaptor instances to
     API object instances.   The Engine singleton is implicitly
     instantiated as soon as SAGA is imported into Python.  It
-    will, on creation, load all available adaptors.  Adaptors
+    will, on creation, register all available adaptors.  Adaptors
     modules MUST provide an 'Adaptor' class, which will register
     the adaptor in the engine with information like these
     (simplified)::
@@ -119,6 +112,16 @@ class Engine(object, metaclass=ru.Singleton):
               else :
                   # successfully bound to adaptor
                   return
+
+    Adaptors for which the registry config provides static adaptor
+    information (name, schemas and cpi types, see 'adaptor_info' in
+    'registry_default.json') are registered without importing the
+    adaptor module: their registry entries are placeholders with
+    'cpi_class' and 'adaptor_instance' set to 'None'.  The adaptor
+    module is imported, instantiated and sanity-checked the first
+    time an API object is bound to one of its placeholders, which
+    are then replaced by the actual adaptor classes (or removed if
+    the adaptor fails to load).
     """
 
     # --------------------------------------------------------------------------
@@ -127,6 +130,18 @@ class Engine(object, metaclass=ru.Singleton):
 
         # Engine manages cpis from adaptors
         self._adaptor_registry = dict()
+        self._adaptor_stubs    = dict()  # module_name : [placeholder infos]
+        self._lock             = mt.RLock()
+
+        # adaptor last bound per cpi type and schema, and time of the last
+        # failed binding per cpi type, schema and adaptor (see `bind_adaptor`)
+        self._bind_cache       = dict()  # (ctype, schema) : cpi info
+        self._bind_fails       = dict()  # ((ctype, schema), adaptor, cpi) : time
+
+        # on-disk cache of adaptor load results (see `_open_cache()`)
+        self._cache            = dict()  # module_name : static info
+        self._cache_fails      = dict()  # module_name : time of failed load
+        self._cache_file       = None
 
         # get angine, adaptor and pty configs
         self._cfg      = ru.Config('radical.saga.engine')
@@ -145,12 +160,20 @@ class Engine(object, metaclass=ru.Singleton):
     #
     def _load_adaptors (self, inject_registry=None):
         """
-        Try to load all adaptors that are registered in saga.engine.registry.py.
-        This method is called from the constructor.  As Engine is a singleton,
-        this method is called once after the module is first loaded in any
-        python application.
-
-        :param inject_registry: Inject a fake registry. *For unit tests only*.
+        Register all adaptors that are listed in the adaptor registry config
+        (see `registry_default.json`).  This method is called from the
+        constructor.  As Engine is a singleton, this method is called once
+        after the module is first loaded in any python application.
+
+        Adaptors with static adaptor information in the registry config are
+        only registered here, and are loaded on first use (see
+        `_load_stubs()`).  All other adaptors are loaded right away.  The
+        results of earlier adaptor loads are taken from the registry cache
+        (see `_open_cache()`).
+
+        :param inject_registry: Inject a fake registry (a list of adaptor
+                                module names, or a dict like the registry
+                                config).  *For unit tests only*.
         """
 
 
@@ -160,280 +183,619 @@ class Engine(object, metaclass=ru.Singleton):
         # so, we reset cpi infos from the earlier singleton creation.
         if inject_registry is not None:
             self._adaptor_registry = dict()
-            self._registry = {'adaptor_registry' : inject_registry}
+            self._adaptor_stubs    = dict()
+            self._bind_cache       = dict()
+            self._bind_fails       = dict()
+            if isinstance(inject_registry, dict):
+                self._registry = inject_registry
+            else:
+                self._registry = {'adaptor_registry' : inject_registry}
 
-        # attempt to load all registered modules
+        adaptor_infos = self._registry.get('adaptor_info') or dict()
+
+        self._open_cache ()
+
+        # attempt to register all listed modules
         for module_name in self._registry.get('adaptor_registry', []):
 
+            # adaptors which were found unusable before are skipped, adaptors
+            # which were loaded before are registered from the cached info
+            adaptor_info = adaptor_infos.get(module_name)
+            if module_name in self._cache_fails:
+                self._logger.info("skip adaptor %s: failed before (see %s)",
+                                  module_name, self._cache_file)
+                continue
+
+            if module_name in self._cache:
+                adaptor_info = self._cache[module_name]
+
+            if adaptor_info:
+                if self._register_stubs (module_name, adaptor_info):
+                    continue
+
             self._logger.info ("loading  adaptor %s" % module_name)
 
+            cpis = self._load_adaptor (module_name)
+            if cpis:
+                self._register_cpis (module_name, cpis)
 
-            # first, import the module
-            adaptor_module = None
-            try :
-                adaptor_module = ru.import_module(module_name)
 
-            except Exception as e:
-                self._logger.warning("skip adaptor %s: import failed (%s)",
-                                     module_name, e, exc_info=True)
-                continue
+    # --------------------------------------------------------------------------
+    #
+    def _open_cache (self):
+        """
+        The registry cache records, for each adaptor module which has been
+        loaded before, whether the adaptor is usable and, if so, its static
+        adaptor info (like the 'adaptor_info' section of the registry config).
+        Cached adaptors are registered without importing them, and adaptors
+        which failed to load are not considered at all -- the latter only for
+        'registry_fail_ttl' seconds (default: `_LOAD_FAIL_TTL`), so that
+        adaptors become usable once their dependencies got installed.
+
+        The cache is stored in the directory given by the 'registry_cache'
+        setting of the registry config, in a file keyed on the package version,
+        the Python interpreter, `PATH`, and the registry config itself -- a
+        change of any of those starts a new cache.
+        """
 
-            # we expect the module to have an 'Adaptor' class
-            # implemented, which, on calling 'register()', returns
-            # a info dict for all implemented adaptor classes.
-            adaptor_instance = None
-            adaptor_info     = None
+        self._cache       = dict()
+        self._cache_fails = dict()
+        self._cache_file  = None
 
-            try:
-                adaptor_instance = adaptor_module.Adaptor ()
-                adaptor_info     = adaptor_instance.register ()
+        cache_dir = self._registry.get('registry_cache')
+        if not cache_dir:
+            return
 
-            except rse.SagaException:
-                self._logger.warning("skip adaptor %s: failed to load",
-                                     module_name, exc_info=True)
-                continue
+        key = {'version'  : version_detail,
+               'python'   : sys.version,
+               'exe'      : sys.executable,
+               'path'     : os.environ.get('PATH', ''),
+               'registry' : self._registry.get('adaptor_registry'),
+               'info'     : self._registry.get('adaptor_info')}
+        key = json.dumps(key, sort_keys=True, default=str)
 
-            except Exception:
-                self._logger.warning("skip adaptor %s: init failed",
-                                     module_name, exc_info=True)
-                continue
+        self._cache_file = os.path.join(os.path.expanduser(cache_dir),
+                        '%s.json' % hashlib.sha1(key.encode('utf-8')).hexdigest())
 
+        try:
+            with open(self._cache_file, 'r') as fin:
+                data = json.load(fin)
 
-            # the adaptor must also provide a sanity_check() method, which sould
-            # be used to confirm that the adaptor can function properly in the
-            # current runtime environment (e.g., that all pre-requisites and
-            # system dependencies are met).
-            try:
-                adaptor_instance.sanity_check ()
+            ttl = float(self._registry.get('registry_fail_ttl', _LOAD_FAIL_TTL))
+            now = time.time()
+
+            self._cache       = dict([(k, v) for k, v in data['adaptors'].items()
+                                             if v])
+            self._cache_fails = dict([(k, v) for k, v
+                                             in  data.get('failed', {}).items()
+                                             if  now - v < ttl])
+
+        except FileNotFoundError:
+            pass
+
+        except Exception:
+            self._logger.warning("ignore registry cache %s", self._cache_file,
+                                 exc_info=True)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _cache_adaptor (self, module_name, adaptor_info):
+        """
+        Record the static info of a loaded adaptor (or `None` if the adaptor
+        is not usable) in the registry cache.  Failed loads are recorded with
+        their time, and expire (see `_open_cache()`).  Entries written by
+        other processes in the meantime are preserved.
+        """
 
+        if not self._cache_file:
+            return
+
+        if adaptor_info:
+            if self._cache.get(module_name) == adaptor_info:
+                return
+            self._cache[module_name] = adaptor_info
+            self._cache_fails.pop(module_name, None)
+
+        else:
+            self._cache.pop(module_name, None)
+            self._cache_fails[module_name] = time.time()
+
+        try:
+            try:
+                with open(self._cache_file, 'r') as fin:
+                    data = json.load(fin)
+                adaptors = data['adaptors']
+                failed   = data.get('failed', dict())
             except Exception:
-                self._logger.warning("skip adaptor %s: test failed",
-                                     module_name, exc_info=True)
-                continue
+                adaptors = dict()
+                failed   = dict()
 
+            adaptors.update(self._cache)
+            failed.update(self._cache_fails)
 
-            # check if we have a valid adaptor_info
-            if adaptor_info is None :
-                self._logger.warning("skip adaptor %s: invalid adaptor data",
-                                     module_name)
-                continue
+            # the results of this process win over earlier ones
+            for name in self._cache:
+                failed.pop(name, None)
+            for name in self._cache_fails:
+                adaptors.pop(name, None)
 
+            # write atomically, concurrent readers may be around
+            tmp = '%s.%d' % (self._cache_file, os.getpid())
+            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
+            with open(tmp, 'w') as fout:
+                json.dump({'version'  : version_detail,
+                           'adaptors' : adaptors,
+                           'failed'   : failed}, fout, indent=4,
+                                                  sort_keys=True)
+            os.replace(tmp, self._cache_file)
 
-            if  'name'    not in adaptor_info or \
-                'cpis'    not in adaptor_info or \
-                'version' not in adaptor_info or \
-                'schemas' not in adaptor_info    :
-                self._logger.warning("skip adaptor %s: incomplete data",
-                                     module_name)
-                continue
+        except Exception:
+            self._logger.warning("cannot write registry cache %s",
+                                 self._cache_file, exc_info=True)
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _register_stubs (self, module_name, adaptor_info):
+        """
+        Register placeholders for the adaptor classes of the given module,
+        based on the static adaptor information from the registry config.
+        Returns `False` if that information is not usable.
+        """
+
+        if module_name in self._adaptor_stubs:
+            self._logger.warning("skip adaptor %s: exists", module_name)
+            return True
+
+        try:
             adaptor_name    = adaptor_info['name']
-            adaptor_version = adaptor_info['version']
-            adaptor_schemas = adaptor_info['schemas']
-            adaptor_enabled = True  # default
+            adaptor_schemas = list(adaptor_info['schemas'])
+            cpi_types       = list(adaptor_info['cpis'])
 
-            # disable adaptors in 'alpha' or 'beta' versions -- unless
-            # the 'load_beta_adaptors' config option is set to True
-            if not self._cfg.load_beta_adaptors:
+        except Exception:
+            self._logger.warning("adaptor %s: invalid static adaptor info",
+                                 module_name, exc_info=True)
+            return False
 
-                if 'alpha' in adaptor_version.lower() or \
-                   'beta'  in adaptor_version.lower()    :
+        stubs = list()
+        for cpi_type in cpi_types:
 
-                    self._logger.warning("skip beta adaptor %s (version %s)",
-                                         module_name, adaptor_version)
-                    continue
+            if cpi_type not in self._adaptor_registry:
+                self._adaptor_registry[cpi_type] = dict()
 
+            for adaptor_schema in adaptor_schemas:
 
-            # get the 'enabled' option in the adaptor's config
-            # section (radical.saga.cpi.base) ensures that the option exists,
-            # if it is initialized correctly in the adaptor class.
-            adaptor_config  = None
-            adaptor_enabled = False
+                adaptor_schema = adaptor_schema.lower ()
 
-            try :
-                adaptor_config  = ru.Config('radical.saga.adaptors',
-                                            name=adaptor_name)
-                adaptor_enabled = adaptor_config.get('enabled', True)
+                if adaptor_schema not in self._adaptor_registry[cpi_type]:
+                    self._adaptor_registry[cpi_type][adaptor_schema] = []
 
-            except rse.SagaException:
-                self._logger.warning("skip adaptor %s: init failed",
-                                     module_name, exc_info=True)
-                continue
+                stub = {'cpi_cname'        : None,
+                        'cpi_class'        : None,
+                        'adaptor_name'     : adaptor_name,
+                        'adaptor_instance' : None,
+                        'adaptor_module'   : module_name}
 
-            except Exception as e:
-                self._logger.warning("skip adaptor %s: init error",
-                                     module_name, exc_info=True)
-                continue
+                self._adaptor_registry[cpi_type][adaptor_schema].append(stub)
+                stubs.append(stub)
 
+        self._adaptor_stubs[module_name] = stubs
+        self._logger.info("register adaptor %s for %s (not loaded)",
+                          module_name, cpi_types)
 
-            # only load adaptor if it is not disabled via config files
-            if not adaptor_enabled:
-                self._logger.warning("skip adaptor %s: disabled", module_name)
-                continue
+        return True
 
 
-            # check if the adaptor has anything to register
-            if 0 == len (adaptor_info['cpis']) :
-                self._logger.warning("skip adaptor %s: adaptor has no cpis",
+    # --------------------------------------------------------------------------
+    #
+    def _load_adaptor (self, module_name):
+        """
+        Import the given adaptor module, instantiate and sanity-check its
+        adaptor, and return its cpi infos, sorted by cpi type and schema (see
+        `_adaptor_registry`).  Returns `None` if the adaptor cannot be used.
+        """
+
+        cpis = dict()
+
+        # first, import the module
+        adaptor_module = None
+        try :
+            adaptor_module = ru.import_module(module_name)
+
+        except Exception as e:
+            self._logger.warning("skip adaptor %s: import failed (%s)",
+                                 module_name, e, exc_info=True)
+            self._cache_adaptor (module_name, None)
+            return None
+
+        # we expect the module to have an 'Adaptor' class
+        # implemented, which, on calling 'register()', returns
+        # a info dict for all implemented adaptor classes.
+        adaptor_instance = None
+        adaptor_info     = None
+
+        try:
+            adaptor_instance = adaptor_module.Adaptor ()
+            adaptor_info     = adaptor_instance.register ()
+
+        except rse.SagaException:
+            self._logger.warning("skip adaptor %s: failed to load",
+                                 module_name, exc_info=True)
+            self._cache_adaptor (module_name, None)
+            return None
+
+        except Exception:
+            self._logger.warning("skip adaptor %s: init failed",
+                                 module_name, exc_info=True)
+            self._cache_adaptor (module_name, None)
+            return None
+
+
+        # the adaptor must also provide a sanity_check() method, which sould
+        # be used to confirm that the adaptor can function properly in the
+        # current runtime environment (e.g., that all pre-requisites and
+        # system dependencies are met).
+        try:
+            adaptor_instance.sanity_check ()
+
+        except Exception:
+            self._logger.warning("skip adaptor %s: test failed",
+                                 module_name, exc_info=True)
+            self._cache_adaptor (module_name, None)
+            return None
+
+
+        # check if we have a valid adaptor_info
+        if adaptor_info is None :
+            self._logger.warning("skip adaptor %s: invalid adaptor data",
+                                 module_name)
+            self._cache_adaptor (module_name, None)
+            return None
+
+
+        if  'name'    not in adaptor_info or \
+            'cpis'    not in adaptor_info or \
+            'version' not in adaptor_info or \
+            'schemas' not in adaptor_info    :
+            self._logger.warning("skip adaptor %s: incomplete data",
+                                 module_name)
+            self._cache_adaptor (module_name, None)
+            return None
+
+
+        adaptor_name    = adaptor_info['name']
+        adaptor_version = adaptor_info['version']
+        adaptor_schemas = adaptor_info['schemas']
+        adaptor_enabled = True  # default
+
+        # the adaptor is usable in this environment: remember its static info,
+        # so that later processes can register it without loading it
+        self._cache_adaptor (module_name,
+                             {'name'    : adaptor_name,
+                              'schemas' : list(adaptor_schemas),
+                              'cpis'    : [cpi_info['type']
+                                           for cpi_info in adaptor_info['cpis']
+                                           if 'type' in cpi_info]})
+
+        # disable adaptors in 'alpha' or 'beta' versions -- unless
+        # the 'load_beta_adaptors' config option is set to True
+        if not self._cfg.load_beta_adaptors:
+
+            if 'alpha' in adaptor_version.lower() or \
+               'beta'  in adaptor_version.lower()    :
+
+                self._logger.warning("skip beta adaptor %s (version %s)",
+                                     module_name, adaptor_version)
+                return None
+
+
+        # get the 'enabled' option in the adaptor's config
+        # section (radical.saga.cpi.base) ensures that the option exists,
+        # if it is initialized correctly in the adaptor class.
+        adaptor_config  = None
+        adaptor_enabled = False
+
+        try :
+            adaptor_config  = ru.Config('radical.saga.adaptors',
+                                        name=adaptor_name)
+            adaptor_enabled = adaptor_config.get('enabled', True)
+
+        except rse.SagaException:
+            self._logger.warning("skip adaptor %s: init failed",
+                                 module_name, exc_info=True)
+            return None
+
+        except Exception as e:
+            self._logger.warning("skip adaptor %s: init error",
+                                 module_name, exc_info=True)
+            return None
+
+
+        # only load adaptor if it is not disabled via config files
+        if not adaptor_enabled:
+            self._logger.warning("skip adaptor %s: disabled", module_name)
+            return None
+
+
+        # check if the adaptor has anything to register
+        if 0 == len (adaptor_info['cpis']) :
+            self._logger.warning("skip adaptor %s: adaptor has no cpis",
+                                 module_name)
+            return None
+
+
+        # we got an enabled adaptor with valid info - yay!  We can
+        # now register all adaptor classes (cpi implementations).
+        for cpi_info in adaptor_info['cpis'] :
+
+            # check cpi information details for completeness
+            if  'type'  not in cpi_info or \
+                'class' not in cpi_info    :
+                self._logger.warning("skip %s cpi: incomplete info detail",
                                      module_name)
                 continue
 
 
-            # we got an enabled adaptor with valid info - yay!  We can
-            # now register all adaptor classes (cpi implementations).
-            for cpi_info in adaptor_info['cpis'] :
+            # adaptor classes are registered for specific API types.
+            cpi_type  = cpi_info['type']
+            cpi_cname = cpi_info['class']
+            cpi_class = None
 
-                # check cpi information details for completeness
-                if  'type'  not in cpi_info or \
-                    'class' not in cpi_info    :
-                    self._logger.warning("skip %s cpi: incomplete info detail",
-                                         module_name)
-                    continue
+            try :
+                cpi_class = getattr (adaptor_module, cpi_cname)
 
+            except Exception:
+                # this exception likely means that the adaptor does not call
+                # the radical.saga.adaptors.Base initializer (correctly)
+                self._logger.warning("skip adaptor %s: invalid %s",
+                                     module_name, cpi_info['class'],
+                                     exc_info=True)
+                continue
 
-                # adaptor classes are registered for specific API types.
-                cpi_type  = cpi_info['type']
-                cpi_cname = cpi_info['class']
-                cpi_class = None
+            # make sure the cpi class is a valid cpi for the given type.
+            # We walk through the list of known modules, and try to find
+            # a modules which could have that class.  We do the following
+            # tests:
+            #
+            #   cpi_class: ShellJobService
+            #   cpi_type:  radical.saga.job.Service
+            #   modules:   radical.saga.adaptors.cpi.job
+            #   modules:   radical.saga.adaptors.cpi.job.service
+            #   classes:   radical.saga.adaptors.cpi.job.Service
+            #   classes:   radical.saga.adaptors.cpi.job.service.Service
+            #
+            #   cpi_class: X509Context
+            #   cpi_type:  radical.saga.Context
+            #   modules:   radical.saga.adaptors.cpi.context
+            #   classes:   radical.saga.adaptors.cpi.context.Context
+            #
+            # So, we add a 'adaptors.cpi' after the 'saga' namespace
+            # element, then append the rest of the given namespace.  If that
+            # gives a module which has the requested class, fine -- if not,
+            # we add a lower cased version of the class name as last
+            # namespace element, and check again.
+
+            # ->   radical .  saga .  job .  Service
+            # <- ['radical', 'saga', 'job', 'Service']
+            cpi_type_nselems = cpi_type.split ('.')
+
+            if  len(cpi_type_nselems) < 3 or \
+                len(cpi_type_nselems) > 4    :
+                self._logger.warning("skip adaptor %s invalid cpi %s",
+                                     module_name, cpi_type)
+                continue
 
-                try :
-                    cpi_class = getattr (adaptor_module, cpi_cname)
+            if  cpi_type_nselems[0] != 'radical' and \
+                cpi_type_nselems[1] != 'saga'    :
+                self._logger.warning("skip adaptor %s: invalid cpi ns %s",
+                                     module_name, cpi_type, exc_info=True)
+                continue
 
-                except Exception:
-                    # this exception likely means that the adaptor does not call
-                    # the radical.saga.adaptors.Base initializer (correctly)
-                    self._logger.warning("skip adaptor %s: invalid %s",
-                                         module_name, cpi_info['class'],
-                                         exc_info=True)
-                    continue
+            # -> ['radical', 'saga',                    'job', 'Service']
+            # <- ['radical', 'saga', 'adaptors', 'cpi', 'job', 'Service']
+            cpi_type_nselems.insert (2, 'adaptors')
+            cpi_type_nselems.insert (3, 'cpi')
+
+         #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job',  'Service']
+         #  # <- ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
+         #  cpi_type_cname = cpi_type_nselems.pop ()
+         #
+         #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
+         #  # <-  'radical.saga.adaptors.cpi.job
+         #  # <-  'radical.saga.adaptors.cpi.job.service
+         #  cpi_type_modname_1 = '.'.join (cpi_type_nselems)
+         #  cpi_type_modname_2 = '.'.join (cpi_type_nselems + \
+         #                                 [cpi_type_cname.lower()])
+         #
+         #  # does either module exist?
+         #  cpi_type_modname = None
+         #
+         #  if  cpi_type_modname_1 in sys.modules :
+         #      cpi_type_modname = cpi_type_modname_1
+         #
+         #  if  cpi_type_modname_2 in sys.modules :
+         #      cpi_type_modname = cpi_type_modname_2
+         #
+         #  if  not cpi_type_modname :
+         #      self._logger.warning("skip adaptor %s: unknown cpi %s",
+         #                           module_name, cpi_type, exc_info=True)
+         #      sys.exit()
+         #      continue
+         #
+         #  # so, make sure the given cpi is actually
+         #  # implemented by the adaptor class
+         #  cpi_ok = False
+         #  for name, cpi_obj \
+         #      in inspect.getmembers (sys.modules[cpi_type_modname]):
+         #      if  name == cpi_type_cname      and \
+         #          inspect.isclass (cpi_obj)       :
+         #          if  issubclass (cpi_class, cpi_obj) :
+         #              cpi_ok = True
+         #
+         #  if not cpi_ok :
+         #      self._logger.warning("skip adaptor %s: no cpi %s (%s)",
+         #                           module_name, cpi_class, cpi_type,
+         #                            exc_info=True)
+         #      continue
+
+
+            # finally, collect the cpi for all its schemas!
+            for adaptor_schema in adaptor_schemas:
+
+                adaptor_schema = adaptor_schema.lower ()
+
+                if cpi_type not in cpis:
+                    cpis[cpi_type] = dict()
+
+                if adaptor_schema not in cpis[cpi_type]:
+                    cpis[cpi_type][adaptor_schema] = []
+
+                # we register the cpi class, so that we can create
+                # instances as needed, and the adaptor instance,
+                # as that is passed to the cpi class c'tor later
+                # on (the adaptor instance is used to share state
+                # between cpi instances, amongst others)
+                info = {'cpi_cname'        : cpi_cname,
+                        'cpi_class'        : cpi_class,
+                        'adaptor_name'     : adaptor_name,
+                        'adaptor_instance' : adaptor_instance}
+
+                cpis[cpi_type][adaptor_schema].append(info)
+
+        return cpis
 
-                # make sure the cpi class is a valid cpi for the given type.
-                # We walk through the list of known modules, and try to find
-                # a modules which could have that class.  We do the following
-                # tests:
-                #
-                #   cpi_class: ShellJobService
-                #   cpi_type:  radical.saga.job.Service
-                #   modules:   radical.saga.adaptors.cpi.job
-                #   modules:   radical.saga.adaptors.cpi.job.service
-                #   classes:   radical.saga.adaptors.cpi.job.Service
-                #   classes:   radical.saga.adaptors.cpi.job.service.Service
-                #
-                #   cpi_class: X509Context
-                #   cpi_type:  radical.saga.Context
-                #   modules:   radical.saga.adaptors.cpi.context
-                #   classes:   radical.saga.adaptors.cpi.context.Context
-                #
-                # So, we add a 'adaptors.cpi' after the 'saga' namespace
-                # element, then append the rest of the given namespace.  If that
-                # gives a module which has the requested class, fine -- if not,
-                # we add a lower cased version of the class name as last
-                # namespace element, and check again.
-
-                # ->   radical .  saga .  job .  Service
-                # <- ['radical', 'saga', 'job', 'Service']
-                cpi_type_nselems = cpi_type.split ('.')
-
-                if  len(cpi_type_nselems) < 3 or \
-                    len(cpi_type_nselems) > 4    :
-                    self._logger.warning("skip adaptor %s invalid cpi %s",
-                                         module_name, cpi_type)
-                    continue
 
-                if  cpi_type_nselems[0] != 'radical' and \
-                    cpi_type_nselems[1] != 'saga'    :
-                    self._logger.warning("skip adaptor %s: invalid cpi ns %s",
-                                         module_name, cpi_type, exc_info=True)
-                    continue
+    # --------------------------------------------------------------------------
+    #
+    def _register_cpis (self, module_name, cpis):
+        """
+        Add the given cpi infos (as returned by `_load_adaptor()`) to the
+        adaptor registry.
+        """
+
+        for cpi_type in cpis:
+
+            registered_schemas = list()
+            for adaptor_schema in cpis[cpi_type]:
+
+                # make sure we can register that cpi type
+                if cpi_type not in self._adaptor_registry:
+                    self._adaptor_registry[cpi_type] = dict()
 
-                # -> ['radical', 'saga',                    'job', 'Service']
-                # <- ['radical', 'saga', 'adaptors', 'cpi', 'job', 'Service']
-                cpi_type_nselems.insert (2, 'adaptors')
-                cpi_type_nselems.insert (3, 'cpi')
-
-             #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job',  'Service']
-             #  # <- ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
-             #  cpi_type_cname = cpi_type_nselems.pop ()
-             #
-             #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
-             #  # <-  'radical.saga.adaptors.cpi.job
-             #  # <-  'radical.saga.adaptors.cpi.job.service
-             #  cpi_type_modname_1 = '.'.join (cpi_type_nselems)
-             #  cpi_type_modname_2 = '.'.join (cpi_type_nselems + \
-             #                                 [cpi_type_cname.lower()])
-             #
-             #  # does either module exist?
-             #  cpi_type_modname = None
-             #
-             #  if  cpi_type_modname_1 in sys.modules :
-             #      cpi_type_modname = cpi_type_modname_1
-             #
-             #  if  cpi_type_modname_2 in sys.modules :
-             #      cpi_type_modname = cpi_type_modname_2
-             #
-             #  if  not cpi_type_modname :
-             #      self._logger.warning("skip adaptor %s: unknown cpi %s",
-             #                           module_name, cpi_type, exc_info=True)
-             #      sys.exit()
-             #      continue
-             #
-             #  # so, make sure the given cpi is actually
-             #  # implemented by the adaptor class
-             #  cpi_ok = False
-             #  for name, cpi_obj \
-             #      in inspect.getmembers (sys.modules[cpi_type_modname]):
-             #      if  name == cpi_type_cname      and \
-             #          inspect.isclass (cpi_obj)       :
-             #          if  issubclass (cpi_class, cpi_obj) :
-             #              cpi_ok = True
-             #
-             #  if not cpi_ok :
-             #      self._logger.warning("skip adaptor %s: no cpi %s (%s)",
-             #                           module_name, cpi_class, cpi_type,
-             #                            exc_info=True)
-             #      continue
-
-
-                # finally, register the cpi for all its schemas!
-                registered_schemas = list()
-                for adaptor_schema in adaptor_schemas:
-
-                    adaptor_schema = adaptor_schema.lower ()
-
-                    # make sure we can register that cpi type
-                    if cpi_type not in self._adaptor_registry:
-                        self._adaptor_registry[cpi_type] = dict()
-
-                    # make sure we can register that schema
-                    if adaptor_schema not in self._adaptor_registry[cpi_type]:
-                        self._adaptor_registry[cpi_type][adaptor_schema] = []
-
-                    # we register the cpi class, so that we can create
-                    # instances as needed, and the adaptor instance,
-                    # as that is passed to the cpi class c'tor later
-                    # on (the adaptor instance is used to share state
-                    # between cpi instances, amongst others)
-                    info = {'cpi_cname'        : cpi_cname,
-                            'cpi_class'        : cpi_class,
-                            'adaptor_name'     : adaptor_name,
-                            'adaptor_instance' : adaptor_instance}
+                # make sure we can register that schema
+                if adaptor_schema not in self._adaptor_registry[cpi_type]:
+                    self._adaptor_registry[cpi_type][adaptor_schema] = []
+
+                for info in cpis[cpi_type][adaptor_schema]:
 
                     # make sure this tuple was not registered, yet
                     if info in self._adaptor_registry[cpi_type][adaptor_schema]:
                         self._logger.warning("skip adaptor %s: exists %s: %s",
-                                             module_name, cpi_class,
-                                             adaptor_instance, exc_info=True)
+                                             module_name, info['cpi_class'],
+                                             info['adaptor_instance'],
+                                             exc_info=True)
                         continue
 
                     self._adaptor_registry[cpi_type] \
                                           [adaptor_schema].append(info)
                     registered_schemas.append(str("%s://" % adaptor_schema))
 
-                self._logger.info("Register adaptor %s for %s API: %s" %
-                                 (module_name, cpi_type, registered_schemas))
+            self._logger.info("Register adaptor %s for %s API: %s" %
+                             (module_name, cpi_type, registered_schemas))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _load_stubs (self, module_name):
+        """
+        Load an adaptor which has been registered via `_register_stubs()`, and
+        replace its placeholders in the adaptor registry with the actual cpi
+        infos.  The adaptor keeps its rank for all schemas.  If the adaptor
+        cannot be loaded, its placeholders are removed.
+        """
+
+        with self._lock:
+
+            # some other thread may have loaded it already
+            stubs = self._adaptor_stubs.pop(module_name, None)
+            if stubs is None:
+                return
+
+            self._logger.info ("loading  adaptor %s" % module_name)
+
+            cpis = self._load_adaptor (module_name) or dict()
+
+            # the adaptor ranking changes
+            self._bind_cache = dict()
+
+            for cpi_type in list(self._adaptor_registry.keys()):
+
+                schemas = self._adaptor_registry[cpi_type]
+                for adaptor_schema in list(schemas.keys()):
+
+                    infos = list()
+                    for info in schemas[adaptor_schema]:
+
+                        if not any(info is stub for stub in stubs):
+                            infos.append(info)
+
+                        elif cpi_type in cpis:
+                            infos += cpis[cpi_type].pop(adaptor_schema, [])
+
+                    # replace the list, as it may be iterated concurrently
+                    if infos: schemas[adaptor_schema] = infos
+                    else    : del schemas[adaptor_schema]
+
+                if not schemas:
+                    del self._adaptor_registry[cpi_type]
+
+            # the adaptor may implement more than the static info announced
+            for cpi_type in list(cpis.keys()):
+                for adaptor_schema in list(cpis[cpi_type].keys()):
+                    if not cpis[cpi_type][adaptor_schema]:
+                        del cpis[cpi_type][adaptor_schema]
+                if not cpis[cpi_type]:
+                    del cpis[cpi_type]
+
+            if cpis:
+                self._logger.warning("adaptor %s: static info incomplete",
+                                     module_name)
+                self._register_cpis (module_name, cpis)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _iter_cpi_infos (self, ctype, schema, load=True):
+        """
+        Iterate over the cpi infos registered for the given cpi type and schema,
+        in order of registration.  Adaptors which are not loaded yet are loaded
+        when reached -- or skipped if `load` is `False`.
+        """
+
+        schema = schema.lower ()
+        seen   = list()
+
+        while True:
 
+            with self._lock:
+                infos = self._adaptor_registry.get(ctype, {}).get(schema, [])
+                todo  = [info for info in infos
+                              if not any(info is s for s in seen)]
 
+            if not todo:
+                return
+
+            info = todo[0]
+            seen.append(info)
+
+            if info['cpi_class'] is None:
+                # placeholder: load the adaptor, and look again
+                if load:
+                    self._load_stubs (info['adaptor_module'])
+                continue
+
+            yield info
 
     # --------------------------------------------------------------------------
     #
@@ -453,7 +815,7 @@ class Engine(object, metaclass=ru.Singleton):
             return []
 
         adaptor_names = []
-        for info in self._adaptor_registry[ctype][schema.lower ()] :
+        for info in self._iter_cpi_infos (ctype, schema) :
             adaptor_names.append (info['adaptor_name'])
 
         return adaptor_names
@@ -470,6 +832,12 @@ class Engine(object, metaclass=ru.Singleton):
             interact with other adaptors.
         '''
 
+        # make sure the adaptor is loaded
+        with self._lock :
+            for module_name, stubs in list(self._adaptor_stubs.items ()) :
+                if stubs and stubs[0]['adaptor_name'] == adaptor_name :
+                    self._load_stubs (module_name)
+
         for ctype in list(self._adaptor_registry.keys ()) :
             for schema in list(self._adaptor_registry[ctype].keys ()) :
                 for info in self._adaptor_registry[ctype][schema] :
@@ -509,8 +877,12 @@ class Engine(object, metaclass=ru.Singleton):
 
         # cycle through all applicable adaptors, and try to instantiate
         # a matching one.
-        exception = rse.NoSuccess ("binding adaptor failed", api_instance)
-        for info in self._adaptor_registry[ctype][schema] :
+        exception  = rse.NoSuccess ("binding adaptor failed", api_instance)
+        candidates = 0
+        for info in self._iter_bind_candidates (ctype, schema,
+                                                preferred_adaptor) :
+
+            candidates += 1
 
             cpi_cname        = info['cpi_cname']
             cpi_class        = info['cpi_class']
@@ -534,6 +906,7 @@ class Engine(object, metaclass=ru.Singleton):
 
               # self._logger.debug("Successfully bound %s.%s to %s" \
               #                  % (adaptor_name, cpi_cname, api_instance))
+                self._bind_done (ctype, schema, preferred_adaptor, info)
                 return cpi_instance
 
 
@@ -542,20 +915,93 @@ class Engine(object, metaclass=ru.Singleton):
                 exception._add_exception (e)
                 self._logger.info("adaptor ctor failed : %s.%s: %s"
                                  % (adaptor_name, cpi_class, str(e)))
+                self._bind_done (ctype, schema, preferred_adaptor, info, e)
                 continue
             except Exception as e :
                 exception._add_exception (rse.NoSuccess (str(e), api_instance))
                 self._logger.info("adaptor ctor failed : %s.%s: %s"
                                  % (adaptor_name, cpi_class, str(e)))
+                self._bind_done (ctype, schema, preferred_adaptor, info, e)
                 continue
 
 
+        # all registered adaptors failed to load
+        if not candidates :
+            error_msg = "No adaptor found for '%s' and URL scheme %s://" \
+                                  % (ctype, schema)
+            self._logger.error(error_msg)
+            raise rse.NotImplemented(error_msg)
+
         self._logger.error("No adaptor found for '%s' and URL scheme '%s'"
                           % (ctype, schema))
         self._logger.info  ("%s" %  (str(exception)))
         raise exception._get_exception_stack ()
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _iter_bind_candidates (self, ctype, schema, preferred_adaptor) :
+        '''
+        Iterate over the cpi infos `bind_adaptor` should try for the given cpi
+        type and schema.  The adaptor which was last bound successfully comes
+        first, followed by the registered adaptors in order -- except for those
+        whose cpi class failed to instantiate within the last
+        `_BIND_FAIL_TTL` seconds, which are only tried as a last resort.
+        Adaptors which are not loaded, yet, cannot be the preferred adaptor and
+        are skipped if one is given.
+        '''
+
+        key      = (ctype, schema)
+        cached   = None
+        deferred = list()
+
+        if preferred_adaptor is None :
+            cached = self._bind_cache.get (key)
+
+        if cached :
+            yield cached
+
+        now = time.time ()
+        for info in self._iter_cpi_infos (ctype, schema,
+                                          load=(preferred_adaptor is None)) :
+
+            if info is cached :
+                continue
+
+            failed = self._bind_fails.get ((key, info['adaptor_name'],
+                                                 info['cpi_cname']))
+            if failed and now - failed < _BIND_FAIL_TTL :
+                deferred.append (info)
+                continue
+
+            yield info
+
+        for info in deferred :
+            yield info
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _bind_done (self, ctype, schema, preferred_adaptor, info, error=None) :
+        '''
+        Record the outcome of a `bind_adaptor` attempt.  Bindings to a preferred
+        adaptor are not cached, as they do not reflect the adaptor ranking.
+        '''
+
+        key  = (ctype, schema)
+        fkey = (key, info['adaptor_name'], info['cpi_cname'])
+
+        if error is None :
+            self._bind_fails.pop (fkey, None)
+            if preferred_adaptor is None :
+                self._bind_cache[key] = info
+
+        else :
+            self._bind_fails[fkey] = time.time ()
+            if self._bind_cache.get (key) is info :
+                del self._bind_cache[key]
+
+
     # -----------------------------------------------------------------
     #
     def loaded_adaptors (self):
@@ -621,7 +621,15 @@ class Job (sb.Base, st.Task, sasync.Async) :
               print("running")
           else :
               print("oops!")
+
+        Adaptors may serve the state from a job state cache shared by all jobs
+        of the job service, which is kept up to date by state notifications or
+        by background pollers.  The returned state is then at most as old as
+        the adaptor's `state_ttl` setting.
         """
+        if not ttype :
+            return self._adaptor._get_state_cached ()
+
         return self._adaptor.get_state (ttype=ttype)
 
 
@@ -279,8 +279,8 @@ class DefaultSession(Session, metaclass=ru.Singleton):
             self._logger.warning ("no context adaptors found")
             return
 
-        for schema   in _engine._adaptor_registry['radical.saga.Context'] :
-            for info in _engine._adaptor_registry['radical.saga.Context'][schema] :
+        for schema   in list(_engine._adaptor_registry['radical.saga.Context']) :
+            for info in _engine._iter_cpi_infos ('radical.saga.Context', schema) :
 
                 default_ctxs = []
 
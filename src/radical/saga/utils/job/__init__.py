@@ -5,6 +5,7 @@ __license__   = "MIT"
 
 
 from .transfer_directives import TransferDirectives
+from .parsers             import iter_qstat
 
 
 
@@ -0,0 +1,56 @@
+
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2021, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+
+''' Provides parsers for the output of batch system query commands, to support
+    bulk state queries in the job adaptors.
+'''
+
+
+# ------------------------------------------------------------------------------
+#
+def iter_qstat (out) :
+    '''
+    Split the output of `qstat -f <id> <id> ...` (PBS, PBSPro, TORQUE) into
+    per-job sections.  The output is expected to look like::
+
+        Job Id: 1234.server
+            Job_Name = test
+            job_state = R
+            ...
+        Job Id: 1235.server
+            ...
+
+    `out` can be a string or an iterable of lines.  The generator yields
+    tuples `(pid, section)` where `pid` is the job id up to the first '.'
+    (i.e. without the server name), and `section` is the text of the job's
+    attribute lines.
+    '''
+
+    if isinstance (out, str) :
+        out = out.split ('\n')
+
+    pid   = None
+    lines = list()
+
+    for line in out :
+
+        if line.strip().lower().startswith ('job id:') :
+
+            if pid :
+                yield pid, '\n'.join (lines)
+
+            pid   = line.split (':', 1)[1].strip().split ('.')[0]
+            lines = list()
+
+        elif pid :
+            lines.append (line)
+
+    if pid :
+        yield pid, '\n'.join (lines)
+
+
+# ------------------------------------------------------------------------------
+
@@ -329,6 +329,38 @@ def normalize_version (v) :
 
 
 # --------------------------------------------------------------------
+#
+def split_by_length (items, limit, sep=1) :
+    """
+    Split a list of strings into sublists whose total length (counting `sep`
+    characters per item for separators) does not exceed `limit`.  This is used
+    to keep command lines like `squeue --jobs=<id>,<id>,...` below the pty line
+    length limit: the pty silently drops input beyond 4095 characters per
+    line, and the shell then waits for the remainder of the command forever.
+    Items which are longer than `limit` are put into sublists of their own.
+    """
+
+    chunks = list()
+    chunk  = list()
+    size   = 0
+
+    for item in items :
+
+        if  chunk and size + len(item) + sep > limit :
+            chunks.append (chunk)
+            chunk = list()
+            size  = 0
+
+        chunk.append (item)
+        size += len(item) + sep
+
+    if  chunk :
+        chunks.append (chunk)
+
+    return chunks
+
+
+# --------------------------------------------------------------------
 
 
 
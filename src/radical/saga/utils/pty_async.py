@@ -0,0 +1,838 @@
+
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2020, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+
+import re
+import os
+import pty
+import fcntl
+import shlex
+import signal
+import codecs
+import asyncio
+import termios
+import functools
+import threading as mt
+
+import radical.utils              as ru
+
+from  .  import pty_shell         as sups
+from  .  import pty_shell_factory as supsf
+from  .  import pty_exceptions    as ptye
+from  .. import session           as ss
+from  .. import exceptions        as rse
+
+
+# ------------------------------------------------------------------------------
+#
+_CHUNKSIZE = 1024 * 1024  # default size of each read
+_TAILSIZE  = 256          # data kept for error messages
+_OVERLAP   = 1024         # chars re-scanned by find() when new data arrive
+_ESCAPE    = re.compile(r'\x1b[^m]*m')            # ansi escape sequences
+_ESCTAIL   = re.compile(r'\x1b(\[[0-9;]*)?\Z')   # incomplete color sequence
+
+
+# ------------------------------------------------------------------------------
+#
+# All async pty channels share one event loop, which runs in a single daemon
+# thread -- so one process can drive many channels without a thread (and
+# without a poll delay) per channel.
+#
+_loop      = None
+_loop_lock = mt.Lock()
+
+
+def get_loop () :
+    """
+    Return the event loop shared by all async pty channels in this process.
+    The loop runs in its own daemon thread, which is started on first use.
+    """
+
+    global _loop
+
+    with _loop_lock :
+
+        if  _loop is None :
+            _loop  = asyncio.new_event_loop ()
+            thread = mt.Thread (target=_loop.run_forever, name='rs.pty.loop')
+            thread.daemon = True
+            thread.start ()
+
+    return _loop
+
+
+def run_coroutine (coro, timeout=None) :
+    """
+    Run a coroutine on the shared event loop, and block until it completes.
+    This is the bridge for synchronous code (such as the job adaptors) -- it
+    must not be called from within the loop thread itself.
+    """
+
+    loop = get_loop ()
+
+    if  asyncio._get_running_loop () is loop :
+        raise rse.IncorrectState ("cannot block on the pty event loop "
+                                  "from within that loop")
+
+    return asyncio.run_coroutine_threadsafe (coro, loop).result (timeout)
+
+
+# ------------------------------------------------------------------------------
+#
+class AsyncPTYProcess (object) :
+    """
+    This class is the asyncio equivalent of :class:`PTYProcess`: it spawns
+    a process with pty I/O channels, but instead of polling the pty, it
+    registers the pty file descriptor with an event loop.  Incoming data are
+    collected by a loop callback, and coroutines waiting in :func:`find` or
+    :func:`read` are woken up as soon as new data arrive.
+
+    The process is spawned on construction.  All coroutine methods must be
+    run on the given loop (which defaults to the loop returned by
+    :func:`get_loop`).
+
+    Example::
+
+        async def date () :
+            pty = AsyncPTYProcess ("/bin/sh -i")
+            await pty.write ("date ; echo DONE\\n")
+            n, out = await pty.find (['DONE\\n'], timeout=10.0)
+            pty.finalize ()
+            return out
+
+        out = run_coroutine (date ())
+
+    Other than :class:`PTYProcess`, this class does not attempt to recover
+    dead child processes.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__ (self, command, cfg=None, logger=None, loop=None) :
+
+        self.logger = logger
+        if  not  self.logger : self.logger = ru.Logger('radical.saga.pty')
+
+        self.loop = loop
+        if  not  self.loop   : self.loop   = get_loop ()
+
+        name = None
+        if isinstance(cfg, str):
+            name = cfg
+            cfg  = None
+
+        self.cfg = ru.Config('radical.saga.session', name=name, cfg=cfg)
+        self.cfg = self.cfg.pty
+
+        if isinstance (command, str) :
+            command = shlex.split (command)
+
+        if not isinstance (command, list) :
+            raise rse.BadParameter ("AsyncPTYProcess expects string or list "
+                                    "command")
+
+        if len(command) < 1 :
+            raise rse.BadParameter ("AsyncPTYProcess expects non-empty command")
+
+        self.command     = command  # list of strings too run()
+        self.cache       = ""       # data cache
+        self.tail        = ""       # tail of data cache for error messages
+        self.child       = None     # pid of the child process
+        self.child_fd    = None     # the process' io channel, from pty.fork()
+        self.exit_code   = None     # child died with code
+        self.exit_signal = None     # child kill by signal
+        self.eof         = False    # no more data will arrive
+
+        self._listener   = None     # called on new data or EOF
+        self._waiters    = list()   # futures woken on new data or EOF
+        self._decoder    = codecs.getincrementaldecoder('utf-8')('replace')
+
+        try :
+            self._spawn ()
+
+        except Exception as e :
+            raise ptye.translate_exception(e, "pty or process creation failed")\
+                  from e
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _spawn (self) :
+
+        self.logger.info ("running: %s" % ' '.join (self.command))
+
+        try :
+            self.child, self.child_fd = pty.fork ()
+
+        except Exception as e:
+            raise rse.NoSuccess ("Could not run (%s): %s"
+                                % (' '.join (self.command), e)) from e
+
+        if  not self.child :
+            # this is the child
+            try :
+                os.execvpe (self.command[0], self.command, os.environ)
+
+            except OSError as e:
+                self.logger.error ("Could not execute (%s): %s"
+                                  % (' '.join (self.command), e))
+                os._exit (-1)
+
+        # this is the parent: no echo, and non-blocking I/O, as we rely on the
+        # event loop to tell us when to read and write
+        new = termios.tcgetattr (self.child_fd)
+        new[3] = new[3] & ~termios.ECHO
+        termios.tcsetattr (self.child_fd, termios.TCSANOW, new)
+
+        flags = fcntl.fcntl (self.child_fd, fcntl.F_GETFL)
+        fcntl.fcntl (self.child_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+        # `add_reader` is not thread safe, so we let the loop register the fd
+        self.loop.call_soon_threadsafe (self.loop.add_reader, self.child_fd,
+                                        self._on_readable)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _on_readable (self) :
+        """
+        loop callback: data (or EOF) are available on the pty
+        """
+
+        if  self.child_fd is None :
+            return
+
+        try :
+            buf = os.read (self.child_fd, _CHUNKSIZE)
+
+        except BlockingIOError :
+            return
+
+        except OSError :
+            # EIO: the child closed the pty
+            buf = b''
+
+        if  not buf :
+            self.logger.debug ("read : [%5d] EOF" % self.child_fd)
+            self.eof = True
+            self.loop.remove_reader (self.child_fd)
+
+        else :
+            data        = self._decoder.decode (buf).replace ('\r', '')
+            self.cache += data
+            self.tail   = (self.tail + data)[-_TAILSIZE:]
+
+        if  self._listener :
+            self._listener (self)
+
+        self._wakeup ()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _wakeup (self) :
+
+        for waiter in self._waiters :
+            if not waiter.done () :
+                waiter.set_result (None)
+
+        self._waiters = list()
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def _wait (self, timeout=None) :
+        """
+        wait until new data arrive, EOF is found, or the timeout passes
+        """
+
+        waiter = self.loop.create_future ()
+        self._waiters.append (waiter)
+
+        try :
+            await asyncio.wait_for (waiter, timeout)
+
+        except asyncio.TimeoutError :
+            pass
+
+
+    # --------------------------------------------------------------------------
+    #
+    def set_listener (self, listener) :
+        """
+        Register a callable which is invoked (on the loop) whenever new data
+        arrive, or EOF is found.  It gets this instance as only argument, and
+        is expected to consume the data it is interested in from `self.cache`.
+        """
+
+        self._listener = listener
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def read (self, size=0, timeout=0) :
+        """
+        Return whatever data are available, up to `size` (0: all).  If no
+        data are available, wait for up to `timeout` seconds (negative: wait
+        forever) for data to arrive.  If no data are found, the method returns
+        an empty string (not None).
+        """
+
+        if  not self.cache and not self.eof and timeout :
+            await self._wait (None if timeout < 0 else timeout)
+
+        if  not self.cache and self.eof :
+            raise rse.NoSuccess ("unexpected EOF: %s" % self.tail)
+
+        if  size :
+            ret        = self.cache[:size]
+            self.cache = self.cache[size:]
+        else :
+            ret        = self.cache
+            self.cache = ""
+
+        return ret
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def find (self, patterns, timeout=0) :
+        """
+        Wait until a string matching any of the given patterns is found in the
+        pty output, and return a tuple of the index of the matching pattern and
+        the data up to (and including) the match -- same as
+        :func:`PTYProcess.find`.  If no pattern is found before timeout, the
+        call returns `(None, data)`.  Negative timeouts block until a match is
+        found.
+
+        The patterns are interpreted with the re.M (multi-line) and re.S (dot
+        matches all) regex flags.  ANSI escape sequences are stripped.
+
+        Like :func:`PTYProcess.find`, the patterns are only applied to newly
+        arrived data on each wakeup, plus an overlap of `_OVERLAP` characters
+        (or the longest pattern, if that is longer) to catch matches which span
+        chunk boundaries.
+        """
+
+        if  timeout is None :
+            timeout = 0
+
+        patts   = [re.compile (pattern, re.MULTILINE | re.DOTALL)
+                   for pattern in patterns]
+        start   = self.loop.time ()
+        overlap = max([_OVERLAP] + [len(p) for p in patterns])
+        clean   = 0   # length of the cache prefix which is free of escapes
+        pos     = 0   # offset to start the next scan at
+
+        while True :
+
+            # the cache was consumed by someone else: start over
+            if  len(self.cache) < clean :
+                clean = pos = 0
+
+            # strip ansi escapes from the new data.  An escape sequence which
+            # is cut at the end of the data is held back until more data
+            # arrive.
+            new  = self.cache[clean:]
+            tail = _ESCTAIL.search (new)
+            end  = tail.start () if tail else len(new)
+
+            if  '\x1b' in new[:end] :
+                new        = _ESCAPE.sub ('', new[:end]) + new[end:]
+                end        = len(new) - (len(self.cache) - clean - end)
+                self.cache = self.cache[:clean] + new
+
+            clean += end
+
+            # check new data (plus overlap) for any matching pattern.  Note
+            # that searching from `pos` (instead of slicing) keeps '^' and
+            # lookbehind assertions intact.
+            for n, patt in enumerate (patts) :
+
+                match = patt.search (self.cache, pos, clean)
+
+                if  match :
+                    ret        = self.cache[:match.end()]
+                    self.cache = self.cache[match.end():]
+                    return (n, ret)
+
+            pos = max(0, clean - overlap)
+
+            if  self.eof :
+                raise ptye.translate_exception (
+                        rse.NoSuccess ("unexpected EOF: %s" % self.tail))
+
+            if  timeout == 0 :
+                return (None, self.cache[:clean])
+
+            wait = None
+            if  timeout > 0 :
+                wait = timeout - (self.loop.time () - start)
+                if  wait <= 0 :
+                    return (None, self.cache[:clean])
+
+            await self._wait (wait)
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def write (self, data, nolog=False) :
+        """
+        Push the given data into the child's stdin, waiting for the pty to
+        become writable as needed (without blocking the loop).
+        """
+
+        if  not self.alive () :
+            raise ptye.translate_exception (
+                    rse.NoSuccess ("cannot write to dead process (%s)"
+                                  % self.tail))
+
+        if  not nolog :
+            self.logger.debug ("write: [%5d] [%5d] (%s)"
+                              % (self.child_fd, len(data),
+                                 data.replace ('\n', '\\n')[:80]))
+
+        buf = data.encode ('utf-8')
+
+        while buf :
+
+            try :
+                size = os.write (self.child_fd, buf)
+                buf  = buf[size:]
+
+            except BlockingIOError :
+                # pty input buffer is full -- wait 'til the child drains it
+                waiter = self.loop.create_future ()
+                self.loop.add_writer (self.child_fd,
+                                      lambda : waiter.done () or
+                                               waiter.set_result (None))
+                try :
+                    await waiter
+                finally :
+                    self.loop.remove_writer (self.child_fd)
+
+            except OSError as e :
+                raise ptye.translate_exception (
+                        rse.NoSuccess ("write failed (%s)" % e)) from e
+
+
+    # --------------------------------------------------------------------------
+    #
+    def alive (self) :
+        """
+        check if the child process is still active.  If not, the child is
+        reaped and its exit code or signal is recorded.
+        """
+
+        if  not self.child :
+            return False
+
+        try :
+            wpid, wstat = os.waitpid (self.child, os.WNOHANG)
+
+        except OSError :
+            # child disappeared
+            self.child = None
+            return False
+
+        if  not wpid :
+            return True
+
+        if  os.WIFSTOPPED (wstat) or os.WIFCONTINUED (wstat) :
+            return True
+
+        self._autopsy (wstat)
+        return False
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _autopsy (self, wstat) :
+
+        self.child = None
+
+        if  os.WIFEXITED (wstat) :
+            self.exit_code   = os.WEXITSTATUS (wstat)
+            self.exit_signal = None
+
+        elif os.WIFSIGNALED (wstat) :
+            self.exit_code   = None
+            self.exit_signal = os.WTERMSIG (wstat)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def finalize (self) :
+        """ kill the child, close the pty """
+
+        if  self.child :
+
+            try :
+                os.kill (self.child, signal.SIGKILL)
+                _, wstat = os.waitpid (self.child, 0)
+                self._autopsy (wstat)
+
+            except OSError :
+                self.child = None
+
+        if  self.child_fd is not None :
+
+            # deregister and close on the loop, so that the fd number cannot be
+            # reused by another channel before it is deregistered
+            fd            = self.child_fd
+            self.child_fd = None
+
+            def _close () :
+                self.loop.remove_reader (fd)
+                try :
+                    os.close (fd)
+                except OSError :
+                    pass
+
+            if  self.loop.is_closed () :
+                os.close (fd)
+            else :
+                self.loop.call_soon_threadsafe (_close)
+
+
+# ------------------------------------------------------------------------------
+#
+class AsyncPTYShell (object) :
+    """
+    This class is the asyncio equivalent of :class:`PTYShell`: it runs
+    a (local or remote) POSIX shell over an :class:`AsyncPTYProcess`, and
+    runs commands on it via the coroutine :func:`run`.
+
+    All commands are sent as tagged frames (see *Pipelined Commands* in
+    :class:`PTYShell`), and results are demultiplexed by the loop callback
+    as soon as the respective frame arrives.  Any number of coroutines can
+    thus run commands on the same shell concurrently, and those commands are
+    pipelined on the channel::
+
+        async def states (pids) :
+            shell = AsyncPTYShell ("ssh://user@rem.host.net/")
+            await shell.initialize ()
+            results = await asyncio.gather (*[shell.run ('qstat -f %s' % pid)
+                                              for pid in pids])
+            shell.finalize ()
+            return results
+
+        results = run_coroutine (states (pids))
+
+    Connection setup reuses the :class:`PTYShellFactory`, so that ssh master
+    connections are shared with the synchronous :class:`PTYShell` instances.
+    File staging is not supported on this class -- use :class:`PTYShell` for
+    that.
+    """
+
+    # unique ID per connection, for frame tags
+    _pty_id = 0
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__ (self, url, session=None, logger=None, cfg=None, posix=True,
+                  interactive=True, loop=None) :
+
+        if logger : self.logger  = logger
+        else      : self.logger  = ru.Logger('radical.saga.pty')
+
+        if session: self.session = session
+        else      : self.session = ss.Session(default=True)
+
+        self.loop = loop
+        if  not  self.loop : self.loop = get_loop ()
+
+        self.url         = url
+        self.posix       = posix
+        self.interactive = interactive
+        self.pty_shell   = None
+        self.pty_info    = None
+        self.initialized = False
+
+        self.pty_id            = AsyncPTYShell._pty_id
+        AsyncPTYShell._pty_id += 1
+
+        name = None
+        if isinstance(cfg, str):
+            name = cfg
+            cfg  = None
+        self.cfg = ru.Config('radical.saga.session', name=name, cfg=cfg)
+        self.cfg = self.cfg.pty
+
+        self.prompt    = self.cfg.get('prompt_pattern', sups.DEFAULT_PROMPT)
+        self.factory   = supsf.PTYShellFactory ()
+
+        self._pending  = dict()   # tag: [future, iomode]
+        self._cnt      = 0        # frame counter
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def initialize (self) :
+        """
+        Connect the shell, and set it up for running commands.
+        """
+
+        if  self.initialized :
+            return
+
+        # creating a master connection can involve user interaction and
+        # blocking I/O -- we do that in an executor thread.  This only happens
+        # once per host, the shell channel itself is fully async.
+        init = functools.partial (self.factory.initialize, self.url,
+                                  self.session, self.prompt, self.logger,
+                                  self.cfg, self.posix,
+                                  interactive=self.interactive)
+        self.pty_info  = await self.loop.run_in_executor (None, init)
+
+        info  = self.pty_info
+        s_cmd = info['scripts'][info['shell_type']]['shell'] % info
+
+        self.pty_shell = AsyncPTYProcess (s_cmd, self.cfg, self.logger,
+                                          loop=self.loop)
+
+        try :
+            await self._login ()
+
+            if  self.posix :
+
+                command_shell = "exec /bin/sh -i"
+                if  self.cfg.get('shell'):
+                    command_shell = "exec %s" % self.cfg['shell']
+
+                await self.pty_shell.write (" stty -echo ; %s\n"
+                                            % command_shell)
+                await self.pty_shell.find ([self.prompt], -1)
+
+                await self.pty_shell.write (
+                        " set HISTFILE=$HOME/.saga_history;"
+                        " PS1='PROMPT-$?->';"
+                        " PS2='';"
+                        " PROMPT_COMMAND='';"
+                        " export PS1 PS2 PROMPT_COMMAND 2>&1 >/dev/null;"
+                        " cd $HOME 2>&1 >/dev/null\n")
+
+                self.prompt = "PROMPT-(\\d+)->$"
+                await self.find_prompt (timeout=float(info['ssh_timeout']))
+
+        except Exception as e :
+            self.finalize ()
+            raise ptye.translate_exception (e, "Shell on target host failed")\
+                  from e
+
+        # from now on, all output is consumed by the frame demultiplexer
+        self.pty_shell.set_listener (self._demux)
+        self.initialized = True
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def _login (self) :
+        """
+        Handle login dialogs and find the initial prompt -- this is the async
+        version of `PTYShellFactory._initialize_pty()`, and shares its prompt
+        patterns and replies.  Only non-interactive credentials are supported:
+        token prompts will fail.
+        """
+
+        info     = self.pty_info
+        delay    = min (1.0, max (0.1, 10 * info['latency']))
+        start    = self.loop.time ()
+        retries  = 0
+        patterns = supsf._login_patterns (info['prompt'])
+
+        if  self.posix :
+            await self.pty_shell.write (" export PROMPT_COMMAND='' PS1='$';"
+                                        " set prompt='$'\n")
+
+        trigger = None
+
+        while True :
+
+            n, match = await self.pty_shell.find (patterns, delay)
+
+            if  n is None :
+
+                if  self.loop.time () - start > float(info['ssh_timeout']) :
+                    raise rse.NoSuccess ("Could not detect shell prompt "
+                                         "(timeout)")
+
+                if  self.posix and not trigger :
+                    retries += 1
+                    trigger  = "HELLO_%d_SAGA" % retries
+                    await self.pty_shell.write (
+                            " printf 'HELLO_%%d_SAGA\\n' %d\n" % retries)
+
+            elif n in [0, 1, 4] :
+                # password, passphrase or hostkey prompt
+                reply = supsf._login_reply (n, match, info)
+                await self.pty_shell.write ("%s\n" % reply, nolog=True)
+
+            elif n in [2, 3] :
+                raise rse.AuthenticationFailed ("interactive token prompts are "
+                                                "not supported for async shells")
+
+            elif n == 5 :
+                # our trigger got through -- the prompt should follow it
+                if  trigger and trigger in match :
+                    trigger = None
+
+            elif n == 6 :
+                if  not trigger :
+                    break
+                # this prompt precedes our trigger -- keep looking
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _demux (self, pty_process) :
+        """
+        loop callback: complete the futures for all frames received so far
+        """
+
+        cache = pty_process.cache
+
+        while True :
+
+            match = sups._PIPE_RE.search (cache)
+            if  not match :
+                break
+
+            tag, body, ret = match.groups ()
+            cache = cache[match.end():]
+
+            if  tag not in self._pending :
+                self.logger.warning ("ignore unknown frame %s" % tag)
+                continue
+
+            future, iomode = self._pending.pop (tag)
+            if  not future.done () :
+                future.set_result (sups._unframe (tag, body, ret, iomode))
+
+        # anything outside of frames (prompts) is discarded
+        idx = cache.find ('RS-PIPE-BEG-')
+        if    idx >= 0  : cache = cache[idx:]
+        elif  len(cache): cache = cache[-_TAILSIZE:]
+
+        pty_process.cache = cache
+
+        if  pty_process.eof :
+            self._fail (rse.NoSuccess ("shell died: %s" % pty_process.tail))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _fail (self, e) :
+
+        for future, _ in self._pending.values () :
+            if  not future.done () :
+                future.set_exception (ptye.translate_exception (e))
+
+        self._pending = dict()
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def run (self, command, iomode=None) :
+        """
+        Run a shell command, and report exit code, stdout and stderr as
+        a tuple -- same as :func:`PTYShell.run_sync`.  The coroutine does not
+        block the shell: other coroutines can run commands on the same shell
+        concurrently.
+
+        The command must be a single line, must not change the shell prompt,
+        and must not be run in the background.
+        """
+
+        if  not self.initialized :
+            raise rse.IncorrectState ("shell is not initialized")
+
+        command = command.strip ()
+
+        if '\n' in command :
+            raise rse.BadParameter ("async shell commands must be single lines "
+                                    "('%s')" % command)
+
+        if command.endswith ('&') :
+            raise rse.BadParameter ("can only run foreground jobs ('%s')"
+                                    % command)
+
+        self._cnt += 1
+        tag    = '%d.%d'  % (self.pty_id, self._cnt)
+        future = self.loop.create_future ()
+
+        self._pending[tag] = [future, iomode]
+
+        try :
+            await self.pty_shell.write ("%s\n" % sups._frame (tag, command,
+                                                               iomode))
+        except Exception :
+            self._pending.pop (tag, None)
+            raise
+
+        return await future
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def find (self, patterns, timeout=-1) :
+        """
+        Find a pattern in the shell I/O -- only useful while no commands are
+        run via :func:`run`, as those consume all shell output.
+        """
+
+        return await self.pty_shell.find (patterns, timeout)
+
+
+    # --------------------------------------------------------------------------
+    #
+    async def find_prompt (self, timeout=sups._PTY_TIMEOUT) :
+        """
+        Find the shell prompt, and return the exit code it reports along with
+        all output before the prompt.
+        """
+
+        n, match = await self.pty_shell.find ([self.prompt], timeout)
+
+        if  n is None :
+            raise rse.NoSuccess ("could not find prompt (%s)" % self.prompt)
+
+        result = re.match ("^(.*?)%s\\s*$" % self.prompt, match, re.DOTALL)
+        if  not result :
+            raise rse.NoSuccess ("could not parse prompt (%s) (%s)"
+                                % (self.prompt, match))
+
+        ret = 0
+        if  len(result.groups ()) == 2 :
+            ret = int(result.group (2))
+
+        return (ret, result.group (1))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def alive (self) :
+        """
+        The shell is assumed to be alive if the shell process lives.
+        """
+
+        return bool(self.pty_shell and self.pty_shell.alive ())
+
+
+    # --------------------------------------------------------------------------
+    #
+    def finalize (self) :
+
+        if  self.pty_shell :
+            self.pty_shell.finalize ()
+
+            # pending futures must be failed on the loop
+            if  not self.loop.is_closed () :
+                self.loop.call_soon_threadsafe (self._fail,
+                        rse.IncorrectState ("shell has been closed"))
+
+
+# ------------------------------------------------------------------------------
+
@@ -13,7 +13,10 @@ import errno
 import shlex
 import select
 import signal
+import struct
+import logging
 import termios
+import itertools
 import threading as mt
 
 import radical.utils            as ru
@@ -27,6 +30,64 @@ from   .. import exceptions     as se
 _CHUNKSIZE = 1024 * 1024  # default size of each read
 _POLLDELAY = 0.01         # seconds in between read attempts
 _DEBUG_MAX = 600
+_TAILSIZE  = 256          # size of data tail kept for error messages
+_OVERLAP   = 1024         # bytes re-scanned by find() when new data arrive
+_ESCAPE    = re.compile (rb'\x1b[^m]*m')           # ansi escape sequences
+_ESCTAIL   = re.compile (rb'\x1b(\[[0-9;]*)?\Z')  # incomplete color sequence
+
+
+_CAPTURE   = struct.Struct ('!dcI')  # capture record header: time, dir, size
+_CAPCOUNT  = itertools.count ()     # unique capture file names
+
+
+# --------------------------------------------------------------------
+#
+def read_capture (fname) :
+    """
+    Generator over the records of a PTY I/O capture file (see the `pty`
+    config option `capture_dir`).  Each record is returned as a tuple
+    `(timestamp, direction, data)`, where direction is 'r' for data read from
+    the child, and 'w' for data written to it, and data are the raw bytes.
+    """
+
+    with open (fname, 'rb') as fin :
+
+        while True :
+
+            head = fin.read (_CAPTURE.size)
+            if len(head) < _CAPTURE.size :
+                return
+
+            stamp, direction, size = _CAPTURE.unpack (head)
+            yield (stamp, direction.decode (), fin.read (size))
+
+
+# --------------------------------------------------------------------
+#
+def _utf8_cut (data) :
+    """
+    Return the length of `data` without a trailing incomplete utf-8 sequence,
+    so that data can be decoded in pieces without splitting any characters.
+    """
+
+    size = len(data)
+
+    for i in range (1, min(4, size) + 1) :
+
+        c = data[size - i]
+
+        if c < 0x80 :        # ascii: complete
+            return size
+
+        if c >= 0xC0 :       # lead byte: check if sequence is complete
+            if   c < 0xE0 : need = 2
+            elif c < 0xF0 : need = 3
+            else          : need = 4
+
+            if i >= need : return size
+            else         : return size - i
+
+    return size
 
 
 # --------------------------------------------------------------------
@@ -127,7 +188,7 @@ class PTYProcess (object) :
         self.command = command  # list of strings too run()
 
 
-        self.cache   = ""      # data cache
+        self._cache  = bytearray()  # read data cache (raw bytes)
         self.tail    = ""      # tail of data data cache for error messages
         self.child   = None    # the process as created by subprocess.Popen
         self.ptyio   = None    # the process' io channel, from pty.fork()
@@ -138,6 +199,15 @@ class PTYProcess (object) :
         self.recover_max      = 3  # TODO: make configure option.  This does not
         self.recover_attempts = 0  # apply for recovers triggered by gc_timeout!
 
+        # optional binary capture of all pty I/O, see `read_capture()`
+        self._capture = None
+        capture_dir   = self.cfg.get ('capture_dir') if self.cfg else None
+        if capture_dir :
+            fname = '%s/radical.saga.pty.%d.%04d.cap' \
+                  % (capture_dir, os.getpid(), next(_CAPCOUNT))
+            self._capture = open (fname, 'ab')
+            self.logger.info ("capture pty I/O to %s" % fname)
+
         try :
             self.initialize ()
 
@@ -161,6 +231,30 @@ class PTYProcess (object) :
             except :
                 pass
 
+            if self._capture :
+                self._capture.close ()
+                self._capture = None
+
+
+    # ----------------------------------------------------------------------
+    #
+    @property
+    def cache (self) :
+        """
+        The read data cache, decoded as string.
+        """
+
+        return self._cache.decode ('utf-8', 'replace')
+
+
+    @cache.setter
+    def cache (self, data) :
+
+        if isinstance (data, str) :
+            data = data.encode ('utf-8')
+
+        self._cache = bytearray(data)
+
 
     # ----------------------------------------------------------------------
     #
@@ -188,10 +282,10 @@ class PTYProcess (object) :
                 self.logger.warn('read error on flush')
             break
 
-        if len(self.cache):
+        if len(self._cache):
             self.logger.warn("flush: [%5d] [%5d] (discard cache: '%s')",
-                             self.parent_out, len(self.cache), self.cache)
-        self.cache = ""
+                             self.parent_out, len(self._cache), self.cache)
+        self._cache = bytearray()
 
 
     # ----------------------------------------------------------------------
@@ -199,14 +293,18 @@ class PTYProcess (object) :
     def _hide_data (self, data, nolog=False) :
 
         if  nolog :
-            import re
             return re.sub (r'([^\n])', 'X', data)
 
         else :
             return data
 
 
+    # ----------------------------------------------------------------------
+    #
+    def _capture_data (self, direction, data) :
 
+        self._capture.write (_CAPTURE.pack (time.time(), direction, len(data)))
+        self._capture.write (data)
 
     # ----------------------------------------------------------------------
     #
@@ -302,6 +400,9 @@ class PTYProcess (object) :
             # at this point, we declare the process to be gone for good
             self.child = None
 
+            if self._capture :
+                self._capture.flush ()
+
             # lets see if we can perform some post-mortem analysis
             if  wstat is not None :
 
@@ -558,135 +659,140 @@ class PTYProcess (object) :
         This method will not fill the cache, but will just read whatever data it
         needs (FIXME).
 
+        Note: 'size' is counted in bytes.  A multibyte character which is not
+        yet completely read is kept in the cache until its remainder arrives.
+
         Note: the returned lines do *not* get '\\\\r' stripped.
         """
 
         with self.rlock :
 
-            found_eof = False
+            data = self._read (size, timeout)
+            cut  = _utf8_cut (data)
 
-            try:
-                # start the timeout timer right now.  Note that even if timeout
-                # is short, and child.poll is slow, we will nevertheless attempt
-                # at least one read...
-                start = time.time ()
-                ret   = ""
+            if cut < len(data) :
+                self._cache[0:0] = data[cut:]
+                data             = data[:cut]
 
-                # read until we have enough data, or hit timeout ceiling...
-                while True :
+            return data.decode ('utf-8', 'replace')
 
-                    # first, lets see if we still have data in the cache we
-                    # can return
-                    if len (self.cache) :
-
-                        if  not size :
-                            ret        = self.cache
-                            self.cache = ""
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
-
-                        # we don't even need all of the cache
-                        elif size <= len (self.cache) :
-                            ret        = self.cache[:size]
-                            self.cache = self.cache[size:]
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
-
-                    # otherwise we need to read some more data, right?  idle
-                    # wait 'til the next data chunk arrives, or 'til _POLLDELAY
-                    rlist, _, _ = select.select ([self.parent_out], [], [],
-                                                 _POLLDELAY)
-                    # got some data?
-                    for f in rlist:
-                        # read whatever we still need
-
-                        readsize = _CHUNKSIZE
-                        if  size:
-                            readsize = size - len(ret)
-
-                        buf = os.read (f, readsize)
-
-                        if  len(buf) == 0 and sys.platform == 'darwin' :
-                            self.logger.debug ("read : MacOS EOF")
-                            self.finalize ()
-                            found_eof = True
-                            raise se.NoSuccess("unexpected EOF: %s" % self.tail)
-
-                        tmp = buf.decode('utf-8')
-                        self.cache += tmp.replace ('\r', '')
-                        log         = tmp.replace ('\r', '')
-                        log         = log.replace ('\n', '\\n')
-                      # print("buf: --%s--" % buf)
-                      # print("log: --%s--" % log)
+
+    # --------------------------------------------------------------------
+    #
+    def _pop (self, size=0) :
+        """
+        Remove up to 'size' bytes (all if 'size' is 0) from the head of the read
+        cache, and return them.  `del` on the head of a bytearray only moves the
+        buffer start, so this does not copy the remaining cache.
+        """
+
+        if size : ret = bytes(self._cache[:size])
+        else    : ret = bytes(self._cache)
+
+        del self._cache[:len(ret)]
+
+        if ret :
+            tail      = ret[-_TAILSIZE:].decode ('utf-8', 'replace')
+            self.tail = (self.tail + tail)[-_TAILSIZE:]
+
+        return ret
+
+
+    # --------------------------------------------------------------------
+    #
+    def _read (self, size=0, timeout=0) :
+        """
+        Same semantics as `read()`, but returns raw bytes.
+        """
+
+        found_eof = False
+
+        # check the log level once, not for each chunk
+        trace = self.logger.isEnabledFor (logging.DEBUG)
+
+        try:
+            # start the timeout timer right now.  Note that even if timeout
+            # is short, and child.poll is slow, we will nevertheless attempt
+            # at least one read...
+            start = time.time ()
+
+            # read until we have enough data, or hit timeout ceiling...
+            while True :
+
+                # first, lets see if we still have data in the cache we
+                # can return -- either all of it, or as much as we need
+                if self._cache :
+                    if not size or size <= len (self._cache) :
+                        return self._pop (size)
+
+                # otherwise we need to read some more data, right?  idle
+                # wait 'til the next data chunk arrives, or 'til _POLLDELAY
+                rlist, _, _ = select.select ([self.parent_out], [], [],
+                                             _POLLDELAY)
+                # got some data?
+                for f in rlist:
+                    # read whatever we still need
+
+                    readsize = _CHUNKSIZE
+                    if  size:
+                        readsize = size - len (self._cache)
+
+                    buf = os.read (f, readsize)
+
+                    if  len(buf) == 0 and sys.platform == 'darwin' :
+                        self.logger.debug ("read : MacOS EOF")
+                        self.finalize ()
+                        found_eof = True
+                        raise se.NoSuccess("unexpected EOF: %s" % self.tail)
+
+                    if  self._capture :
+                        self._capture_data (b'r', buf)
+
+                    buf          = buf.replace (b'\r', b'')
+                    self._cache += buf
+
+                    if  trace :
+                        log = buf.decode ('utf-8', 'replace')
+                        log = log.replace ('\n', '\\n')
                         if  len(log) > _DEBUG_MAX :
-                            self.logger.debug("read : [%5d] [%5d] (%s ... %s)"
-                                           % (f, len(log), log[:30], log[-30:]))
+                            self.logger.debug ("read : [%5d] [%5d] (%s ... %s)"
+                                         % (f, len(log), log[:30], log[-30:]))
                         else :
                             self.logger.debug ("read : [%5d] [%5d] (%s)"
                                             % (f, len(log), log))
-                          # for c in log :
-                          #     print('%s' % c)
-
-
-                    # lets see if we still got any data in the cache we
-                    # can return
-                    if len (self.cache) :
-
-                        if  not size :
-                            ret        = self.cache
-                            self.cache = ""
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
-
-                        # we don't even need all of the cache
-                        elif size <= len (self.cache) :
-                            ret        = self.cache[:size]
-                            self.cache = self.cache[size:]
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
-
-                    # at this point, we do not have sufficient data -- only
-                    # return on timeout
-
-                    if  timeout == 0 :
-                        # only return if we have data
-                        if len (self.cache) :
-                            ret        = self.cache
-                            self.cache = ""
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
-
-                    elif timeout < 0 :
-                        # return of we have data or not
-                        ret        = self.cache
-                        self.cache = ""
-                        self.tail += ret
-                        self.tail  = self.tail[-256:]
-                        return ret
-
-                    else :  # timeout > 0
-                        # return if timeout is reached
-                        now = time.time ()
-                        if (now - start) > timeout :
-                            ret        = self.cache
-                            self.cache = ""
-                            self.tail += ret
-                            self.tail  = self.tail[-256:]
-                            return ret
 
+                # lets see if we still got any data in the cache we
+                # can return
+                if self._cache :
+                    if not size or size <= len (self._cache) :
+                        return self._pop (size)
+
+                # at this point, we do not have sufficient data -- only
+                # return on timeout
+
+                if  timeout == 0 :
+                    # only return if we have data
+                    if self._cache :
+                        return self._pop ()
 
-            except Exception as e :
+                elif timeout < 0 :
+                    # return of we have data or not
+                    return self._pop ()
 
-                if  found_eof :
-                    raise e
+                else :  # timeout > 0
+                    # return if timeout is reached
+                    now = time.time ()
+                    if (now - start) > timeout :
+                        return self._pop ()
+
+
+        except Exception as e :
 
-                raise se.NoSuccess ("read from process failed '%s' : (%s)"
-                                 % (e, self.tail)) from e
+            if  found_eof :
+                raise e
+
+            raise se.NoSuccess ("read from process failed '%s' : (%s)"
+                             % (e, self.tail)) from e
 
 
     # ----------------------------------------------------------------
@@ -708,16 +814,20 @@ class PTYProcess (object) :
         Negative timeouts will block until a match is found
 
         Note that the pattern are interpreted with the re.M (multi-line) and
-        re.S (dot matches all) regex flags.
+        re.S (dot matches all) regex flags.  Patterns are matched against the
+        raw (utf-8 encoded) byte stream, so character classes like '\\w' only
+        cover ASCII.
 
-        Performance: the call is doing repeated string regex searches over
-        whatever data it finds.  On complex regexes, and large data, and small
-        read buffers, this method can be expensive.
+        Performance: data are accumulated in a byte buffer, and on each new
+        chunk the patterns are only applied to the newly arrived data, plus an
+        overlap of `_OVERLAP` bytes (or the longest pattern, if that is longer)
+        to catch matches which span chunk boundaries.  Only the returned data
+        get decoded.
 
         Note: the returned data get '\\\\r' stripped.
 
-        Note: ansi-escape sequences are also stripped before matching, but are
-        kept in the returned data.
+        Note: ansi-escape sequences are also stripped before matching, and are
+        not contained in the returned data.
         """
 
         if timeout is None:
@@ -725,87 +835,76 @@ class PTYProcess (object) :
 
         timeout = int(timeout)
 
-        def escape (txt) :
-            pat = re.compile(r'\x1b[^m]*m')
-            return pat.sub ('', txt)
-
-        _debug = False
-
         with self.rlock :
 
-            try :
-                start = time.time ()   # startup timestamp
-                ret   = []             # array of read lines
-                patts = []             # compiled patterns
-                data  = self.cache     # initial data to check
-                self.cache = ""
+            data = bytearray()   # escaped data checked so far
 
-                if  not data :  # empty cache?
-                    data = self.read (timeout=_POLLDELAY)
+            try :
+                start   = time.time ()  # startup timestamp
+                patts   = []            # compiled patterns
+                pend    = b''           # incomplete escape sequence
+                pos     = 0             # offset to start the next scan at
+                overlap = max([_OVERLAP] + [len(p) for p in patterns])
 
                 # pre-compile the given pattern, to speed up matching
                 for pattern in patterns :
+                    if isinstance (pattern, str) :
+                        pattern = pattern.encode ('utf-8')
                     patts.append(re.compile (pattern, re.MULTILINE | re.DOTALL))
 
+                # initial data to check (the cache, if not empty)
+                chunk = self._read (timeout=_POLLDELAY)
+
                 # we wait forever -- there are two ways out though: data matches
                 # a pattern, or timeout passes
                 while True :
 
-                    # skip non-lines
-                    if  not data :
-                        data += self.read (timeout=_POLLDELAY)
-
-                    if  _debug : print((">>%s<<" % data))
-
-                    escaped = escape (data)
-                    if _debug : print(('data    ==%s==' % ascii(data)))
-                    if _debug : print(('escaped ==%s==' % ascii(escaped)))
-
-                    # check current data for any matching pattern
+                    if chunk :
+                        # strip ansi escapes from the new data.  An escape
+                        # sequence which is cut at the chunk boundary is held
+                        # back until the next chunk arrives.
+                        chunk = pend + chunk
+                        pend  = b''
+                        tail  = _ESCTAIL.search (chunk)
+                        if  tail :
+                            pend  = chunk[tail.start():]
+                            chunk = chunk[:tail.start()]
+                        data += _ESCAPE.sub (b'', chunk)
+
+                    # check new data (plus overlap) for any matching pattern.
+                    # Note that searching from `pos` (instead of slicing)
+                    # keeps '^' and lookbehind assertions intact.
                     for n in range (0, len(patts)) :
 
-                      # escaped = data
-                      # escaped = escape (data)
-                      # print('-- 1 --%s--' % data)
-                      # print('-- 2 --%s--' % escaped)
-
-                        match = patts[n].search (escaped)
-                        if _debug : print(("==%s==" % patterns[n]))
-                        if _debug : print(match)
+                        match = patts[n].search (data, pos)
 
                         if match :
                             # a pattern matched the current data: return a tuple
                             # of pattern index and matching data.  The remainder
                             # of the data is cached.
-                            ret  = escaped[0:match.end()]
-                            self.cache = escaped[match.end():]
-
-                            if _debug:
-                                m = match
-                                e = escaped
-                                print(("~~match!~~ %s" % e[m.start():m.end()]))
-                                print(("~~match!~~ %s" % (len(e))))
-                                print(("~~match!~~ %s" % (str(m.span()))))
-                                print(("~~match!~~ %s" % (ret)))
+                            end = match.end ()
+                            self._cache[0:0] = data[end:] + pend
+                            return (n, data[:end].decode ('utf-8', 'replace'))
 
-                            return (n, ret.replace('\r', ''))
+                    pos = max(0, len(data) - overlap)
 
                     # if a timeout is given, and actually passed, return
                     # a non-match and a copy of the data we looked at
                     if timeout == 0 :
-                        return (None, str(escaped))
+                        return (None, data.decode ('utf-8', 'replace'))
 
                     if timeout > 0 :
                         now = time.time ()
                         if (now - start) > timeout :
-                            self.cache = escaped
-                            return (None, str(escaped))
+                            self._cache[0:0] = data + pend
+                            return (None, data.decode ('utf-8', 'replace'))
 
                     # no match yet, still time -- read more data
-                    data += self.read (timeout=_POLLDELAY)
+                    chunk = self._read (timeout=_POLLDELAY)
 
             except se.NoSuccess as e :
-                raise ptye.translate_exception (e, "(%s)" % data) from e
+                raise ptye.translate_exception (e, "(%s)"
+                                 % data.decode ('utf-8', 'replace')) from e
 
 
     # ----------------------------------------------------------------
@@ -821,19 +920,27 @@ class PTYProcess (object) :
             if not self.alive (recover=False) :
                 raise ptye.translate_exception(
                         se.NoSuccess("cannot write to dead process (%s) [%5d]"
-                                     % (self.cache[-256:], self.parent_in)))
+                                     % (self.tail, self.parent_in)))
 
             try :
-                log = self._hide_data (data, nolog)
-                log =  log.replace ('\n', '\\n')
-                log =  log.replace ('\r', '')
-                if  len(log) > _DEBUG_MAX :
-                    self.logger.debug ("write: [%5d] [%5d] (%s ... %s)"
-                                    % (self.parent_in, len(data),
-                                       log[:30], log[-30:]))
-                else :
-                    self.logger.debug ("write: [%5d] [%5d] (%s)"
-                                    % (self.parent_in, len(data), log))
+                if  self.logger.isEnabledFor (logging.DEBUG) :
+                    log = self._hide_data (data, nolog)
+                    log =  log.replace ('\n', '\\n')
+                    log =  log.replace ('\r', '')
+                    if  len(log) > _DEBUG_MAX :
+                        self.logger.debug ("write: [%5d] [%5d] (%s ... %s)"
+                                        % (self.parent_in, len(data),
+                                           log[:30], log[-30:]))
+                    else :
+                        self.logger.debug ("write: [%5d] [%5d] (%s)"
+                                        % (self.parent_in, len(data), log))
+
+                if  self._capture :
+                    self._capture_data (b'w', str.encode (
+                                                self._hide_data (data, nolog)))
+
+                # encode once, so that partial writes are counted in bytes
+                data = str.encode (data)
 
                 # attempt to write forever -- until we succeeed
                 while data :
@@ -845,7 +952,7 @@ class PTYProcess (object) :
                     for f in wlist :
 
                         # write will report the number of written bytes
-                        size = os.write(f, str.encode(data))
+                        size = os.write(f, data)
 
                         # otherwise, truncate by written data, and try again
                         data = data[size:]
@@ -7,9 +7,14 @@ __license__   = "MIT"
 import re
 import os
 import sys
+import time
 import errno
+import shutil
 import tempfile
 
+import threading          as mt
+import concurrent.futures as cf
+
 import radical.utils              as ru
 
 from  .  import misc              as sumisc
@@ -44,6 +49,217 @@ STDERR   = 4    # fetch stderr only, discard stdout
 DEFAULT_PROMPT = "[\$#%>\]]\s*$"
 
 
+# ------------------------------------------------------------------------------
+#
+# pipelined command frames: each pipelined command is wrapped into a begin and
+# an end marker, both tagged with a unique ID.  The end marker also carries the
+# command's exit code, so that we don't depend on the prompt for demultiplexing.
+#
+_PIPE_BEG    = 'RS-PIPE-BEG-%s'
+_PIPE_ERR    = 'RS-PIPE-ERR-%s'
+_PIPE_END    = 'RS-PIPE-END-%s'
+_PIPE_RE     = re.compile(r'RS-PIPE-BEG-([\d.]+)\n(.*?)\n'
+                          r'RS-PIPE-END-\1-(\d+)\n', re.DOTALL)
+_PIPE_ESC    = re.compile(r'\x1b[^m]*m')
+_PIPE_POLL   = 0.01   # seconds between checks on frames read by other threads
+_PIPE_WINDOW = 2048   # max bytes of unanswered pipelined commands on the pty
+_PIPE_TIMEOUT = 300.0 # default timeout for pipelined commands (seconds)
+
+# the pty line discipline silently drops input beyond 4095 characters per line
+# (Linux), and the shell then waits for the remainder of the command forever --
+# we refuse to send longer lines.
+_PTY_LINE_MAX = 4095
+
+
+# ------------------------------------------------------------------------------
+#
+# batched file transfers: the output of each transfer is terminated by a marker
+# line which carries the transfer's index and (where available) exit code.
+# Output before the start marker belongs to preparatory commands.
+#
+_COPY_START  = 'RS-COPY-START'
+_COPY_MARK   = 'RS-COPY-%d'
+_COPY_RE     = re.compile(r'^RS-COPY-(\d+)(?:-(\d+))?$')
+_COPY_ERRORS = ['No such file or directory', 'is not a directory',
+                'not found', 'Permission denied', "Couldn't", 'Cannot']
+
+
+# ------------------------------------------------------------------------------
+#
+def _frame (tag, command, iomode) :
+    """
+    wrap a command into begin and end markers, which also transport the
+    command's exit code (and possibly its stderr).
+    """
+
+    beg   = _PIPE_BEG % tag
+    end   = _PIPE_END % tag
+    redir = ""
+    err   = None
+
+    if iomode == IGNORE  : redir = " 1>>/dev/null 2>>/dev/null"
+    if iomode == MERGED  : redir = " 2>&1"
+    if iomode == STDOUT  : redir = " 2>/dev/null"
+
+    if iomode in [SEPARATE, STDERR] :
+        err   = "/tmp/radical.saga.pipe.stderr.$$.%s" % tag
+        redir = " 2>%s" % err
+
+        if iomode == STDERR :
+            redir += " 1>/dev/null"
+
+    if not err :
+        return " printf '%s\\n'; %s%s; printf '\\n%s-%%d\\n' $?" \
+               % (beg, command, redir, end)
+
+    return " printf '%s\\n'; %s%s; __rs_pipe_ret=$?; " \
+           "printf '\\n%s\\n'; cat %s; rm -f %s; " \
+           "printf '\\n%s-%%d\\n' $__rs_pipe_ret" \
+           % (beg, command, redir, _PIPE_ERR % tag, err, err, end)
+
+
+# ------------------------------------------------------------------------------
+#
+def _unframe (tag, body, ret, iomode) :
+    """
+    convert the body and exit code of a received frame into the
+    `(ret, stdout, stderr)` tuple `PTYShell.run_sync()` would return.
+    """
+
+    out = body
+    err = None
+
+    if  iomode in [SEPARATE, STDERR] :
+        out, _, err = body.partition ('\n%s\n' % (_PIPE_ERR % tag))
+
+    if  iomode in [STDERR, IGNORE] :
+        out = None
+
+    if  iomode == IGNORE :
+        err = None
+
+    return (int(ret), out, err)
+
+
+# ------------------------------------------------------------------------------
+#
+class PTYStream (object) :
+    """
+    Iterator over the output lines of a shell command, as returned by
+    :func:`PTYShell.run_stream`.  The output is read from the pty chunk by
+    chunk, and every complete line is handed out as soon as it arrives -- the
+    output is never held in memory as a whole.  Lines are returned without the
+    trailing newline.
+
+    The command's exit code is available as `ret` once the iteration ended
+    (it is `None` before).  The shell is locked while the stream is active: the
+    stream must be consumed (or closed) by the thread which created it.
+    Closing a stream before it is exhausted discards the remaining output.
+    """
+
+    # ----------------------------------------------------------------
+    #
+    def __init__ (self, shell, command, iomode=None) :
+
+        self.ret   = None
+        self._gen  = self._lines (shell, command, iomode)
+
+
+    # ----------------------------------------------------------------
+    #
+    def __iter__ (self) :
+        return self
+
+
+    def __next__ (self) :
+        return next (self._gen)
+
+
+    def __enter__ (self) :
+        return self
+
+
+    def __exit__ (self, *args) :
+        self.close ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def close (self) :
+        self._gen.close ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def _lines (self, shell, command, iomode) :
+
+        pty = shell.pty_shell
+
+        with pty.rlock :
+
+            # pipelined commands need to complete before we can expect the
+            # shell to be in ground state
+            shell._pipe_drain ()
+
+            shell._trace ("run stream: %s" % command)
+            pty.flush ()
+
+            if not pty.alive (recover=True) :
+                raise rse.IncorrectState ("Can't run command -- shell died:\n%s"
+                                      % pty.autopsy ())
+
+            command = command.strip ()
+            if command.endswith ('&') :
+                raise rse.BadParameter("run_stream can only run foreground "
+                                       "jobs ('%s')" % command)
+
+            if iomode in [SEPARATE, STDERR] :
+                raise rse.BadParameter("run_stream cannot capture stderr "
+                                       "separately ('%s')" % command)
+
+            shell._check_lines (command)
+
+            redir = ""
+            if iomode == IGNORE  : redir = " 1>>/dev/null 2>>/dev/null"
+            if iomode == MERGED  : redir = " 2>&1"
+            if iomode == STDOUT  : redir = " 2>/dev/null"
+
+            shell.logger.debug ('run_stream: %s%s' % (command, redir))
+
+            buf = ''
+            try :
+                pty.write ("%s%s\n" % (command, redir))
+
+                while True :
+
+                    buf  += pty.read (timeout=supp._POLLDELAY)
+                    lines = buf.split ('\n')
+                    buf   = lines.pop ()   # incomplete line (or prompt)
+
+                    for line in lines :
+                        yield _PIPE_ESC.sub ('', line)
+
+                    # the prompt is not followed by a newline, so it can only
+                    # show up in the last, incomplete line
+                    match = shell.prompt_re.match (_PIPE_ESC.sub ('', buf))
+                    if match :
+                        buf = ''
+                        ret, txt = shell._eval_prompt (match.group (0))
+                        if txt :
+                            yield txt
+                        self.ret = ret
+                        return
+
+            except GeneratorExit :
+                # closed early -- skip the remaining output
+                pty.cache = buf + pty.cache
+                shell.find_prompt ()
+                raise
+
+            except Exception as e :
+                raise ptye.translate_exception (e) from e
+
+
 # --------------------------------------------------------------------
 #
 class PTYShell (object) :
@@ -173,6 +389,48 @@ class PTYShell (object) :
     usually 4096), or to lock the pipe on larger writes.
 
 
+    **Pipelined Commands:**
+
+    :func:`run_sync` holds the shell for a full roundtrip per command.  For
+    many short, independent commands (state polls and the like), commands can
+    instead be pipelined: :func:`run_pipelined_async` writes a command to the
+    shell right away and returns a `concurrent.futures.Future`, without waiting
+    for the previous command to finish.  Each command is framed by markers
+    which carry a unique tag and the command's exit code, and the output is
+    demultiplexed into the respective futures by :func:`wait_pipelined`::
+
+      futures = [shell.run_pipelined_async('qstat -f %s' % pid)
+                 for pid in pids]
+      shell.wait_pipelined(futures)
+
+      for f in futures:
+          ret, out, _ = f.result()
+
+    :func:`run_pipelined` is a shortcut for the above, and returns the list of
+    `(ret, stdout, stderr)` tuples.  That way, N commands cost about one
+    roundtrip instead of N.  Pipelined commands must be single lines, and must
+    not change the shell prompt.  Several threads can pipeline commands
+    concurrently: whichever thread waits demultiplexes results for all of them.
+
+
+    **Batched File Transfers:**
+
+    :func:`stage_to_remote` and :func:`stage_from_remote` cost (at least) one
+    roundtrip per file.  :func:`stage_to_remote_batch` and
+    :func:`stage_from_remote_batch` transfer a list of `(src, tgt)` pairs in
+    one go, and report the outcome per file::
+
+      errors = shell.stage_to_remote_batch([('in.dat', 'run/in.dat'),
+                                            ('cfg.json', 'run/cfg.json')])
+      for (src, tgt), err in zip(transfers, errors):
+          if err:
+              print('%s failed: %s' % (src, err))
+
+    Depending on the copy mode, the batch is run as one local `cp` script
+    (local shells), one sftp batch script (`sftp`), or one `tar | ssh tar`
+    stream (`scp`).
+
+
     **Automated Restart, Timeouts:**
 
     For timeout and restart semantics, please see the documentation to the
@@ -210,6 +468,13 @@ class PTYShell (object) :
 
         self.initialized = False
 
+        # state for pipelined commands (see `run_pipelined_async()`)
+        self._pipe_lock     = mt.RLock()  # protects the pipeline state below
+        self._pipe_pending  = dict()      # tag: [future, iomode, size]
+        self._pipe_cache    = ''          # output not yet demultiplexed
+        self._pipe_inflight = 0           # bytes of unanswered commands
+        self._pipe_cnt      = 0           # frame counter
+
         self.pty_id       = PTYShell._pty_id
         PTYShell._pty_id += 1
 
@@ -276,7 +541,7 @@ class PTYShell (object) :
         with self.pty_shell.rlock :
 
             if  self.initialized :
-                self.logger.warn ("initialization race")
+                self.logger.warning ("initialization race")
                 return
 
 
@@ -565,7 +830,7 @@ class PTYShell (object) :
 
                 if  len (result.groups ()) != 2 :
                     if  new_prompt :
-                        self.logger.warn("prompt captures no exit code (%s)"
+                        self.logger.warning("prompt captures no exit code (%s)"
                                          % prompt)
                       # raise NoSuccess ("prompt captures no exit code (%s)"
                       #                 % prompt)
@@ -578,7 +843,7 @@ class PTYShell (object) :
                         # and assume success -- the calling entity needs to
                         # evaluate the remainder...
                         ret = 0
-                        self.logger.warn("prompt unusable for error checks (%s)"
+                        self.logger.warning("prompt unusable for error checks (%s)"
                                          % prompt)
                         txt += "\n%s" % result.group (2)
 
@@ -647,6 +912,10 @@ class PTYShell (object) :
 
         with self.pty_shell.rlock :
 
+            # pipelined commands need to complete before we can expect the
+            # shell to be in ground state
+            self._pipe_drain ()
+
             self._trace ("run sync  : %s" % command)
             self.pty_shell.flush ()
 
@@ -664,6 +933,8 @@ class PTYShell (object) :
                     raise rse.BadParameter("run_sync can only run foreground jobs"
                                        "('%s')" % command)
 
+                self._check_lines (command)
+
                 redir = ""
                 _err  = "/tmp/radical.saga.ssh-job.stderr.$$"
 
@@ -732,6 +1003,32 @@ class PTYShell (object) :
                 raise ptye.translate_exception (e) from e
 
 
+    # ----------------------------------------------------------------
+    #
+    def run_stream (self, command, iomode=None) :
+        """
+        Run a shell command like :func:`run_sync`, but return its output line
+        by line, while it arrives: the call returns a :class:`PTYStream`, which
+        iterates over the output lines.  The exit code is available as the
+        stream's `ret` attribute once the stream is exhausted.  This keeps
+        memory consumption bounded for commands with large output (like
+        queue listings), as long as the lines are consumed as they come::
+
+            stream = shell.run_stream ('squeue -h -o "%i %T"')
+            for line in stream :
+                handle (line)
+
+            if stream.ret != 0 :
+                ...
+
+        The `iomode` values `IGNORE`, `MERGED`, `STDOUT` and `None` are
+        supported (see :func:`run_sync`).  The shell is locked until the stream
+        is exhausted or closed.
+        """
+
+        return PTYStream (self, command, iomode)
+
+
     # ----------------------------------------------------------------
     #
     def run_async (self, command) :
@@ -750,6 +1047,8 @@ class PTYShell (object) :
 
         with self.pty_shell.rlock :
 
+            self._pipe_drain ()
+
             self._trace ("run async : %s" % command)
             self.pty_shell.flush ()
 
@@ -762,6 +1061,7 @@ class PTYShell (object) :
 
             try :
                 command = command.strip ()
+                self._check_lines (command)
                 self.send ("%s\n" % command)
 
             except Exception as e :
@@ -788,6 +1088,297 @@ class PTYShell (object) :
                 raise ptye.translate_exception (e) from e
 
 
+    # ----------------------------------------------------------------
+    #
+    def run_pipelined (self, commands, iomode=None) :
+        """
+        Run a list of shell commands back-to-back, and report exit code, stdout
+        and stderr for each of them (returned as a list of tuples, in the
+        order of the given commands).  The call blocks until all commands
+        finished.
+
+        :type  commands: list of strings
+        :param commands: shell commands to run.
+
+        :type  iomode:  enum
+        :param iomode:  Defines how stdout and stderr are captured (see
+                        :func:`run_sync`).
+
+        In contrast to calling :func:`run_sync` for each command, the commands
+        are not serialized on the command's roundtrip -- see
+        :func:`run_pipelined_async` for details.
+        """
+
+        futures = [self.run_pipelined_async (cmd, iomode) for cmd in commands]
+        _, todo = self.wait_pipelined (futures)
+
+        if  todo :
+            self._pipe_abort ("pipelined commands timed out")
+
+        return [f.result () for f in futures]
+
+
+    # ----------------------------------------------------------------
+    #
+    def run_pipelined_async (self, command, iomode=None) :
+        """
+        Write a shell command to the shell, but don't wait for its prompt --
+        return a `concurrent.futures.Future` instead which will eventually hold
+        the `(ret, stdout, stderr)` tuple :func:`run_sync` would return for
+        that command.  The future is completed by :func:`wait_pipelined`
+        (called by this or any other thread).
+
+        :type  command: string
+        :param command: shell command to run -- a single line, which must not
+                        change the shell prompt and must not be run in the
+                        background.
+
+        :type  iomode:  enum
+        :param iomode:  Defines how stdout and stderr are captured (see
+                        :func:`run_sync`).  For `SEPARATE` and `STDERR`, stderr
+                        is fetched within the same frame, and thus does not
+                        cost an extra roundtrip.
+
+        The number of unanswered commands on the shell is limited (see
+        `_PIPE_WINDOW`), so that the pty's input buffer cannot overflow -- if
+        the limit is reached, this call will demultiplex results until
+        sufficient commands completed.  Commands which (including the framing)
+        exceed the pty's line length limit are rejected with `BadParameter`.
+        """
+
+        command = command.strip ()
+
+        if '\n' in command :
+            raise rse.BadParameter ("pipelined commands must be single lines "
+                                    "('%s')" % command)
+
+        if command.endswith ('&') :
+            raise rse.BadParameter ("can only pipeline foreground jobs ('%s')"
+                                    % command)
+
+        while True :
+
+            # lock order: pty lock first, then pipeline state
+            with self.pty_shell.rlock :
+
+                with self._pipe_lock :
+
+                    self._pipe_cnt += 1
+                    tag   = '%d.%d' % (self.pty_id, self._pipe_cnt)
+                    frame = _frame (tag, command, iomode)
+                    size  = len(frame) + 1
+
+                    if  size > _PTY_LINE_MAX :
+                        raise rse.BadParameter ("pipelined command too long "
+                                                "(%d chars)" % len(command))
+
+                    if  not self._pipe_pending :
+                        # ground state: same conditions as for `run_sync`
+                        self.pty_shell.flush ()
+                        if not self.pty_shell.alive (recover=True) :
+                            raise rse.IncorrectState (
+                                    "Cannot pipeline command -- shell died:\n%s"
+                                    % self.pty_shell.autopsy ())
+
+                    elif self._pipe_inflight + size > _PIPE_WINDOW :
+                        # don't overflow the pty -- wait for some commands to
+                        # complete (below) before writing more
+                        frame = None
+
+                    elif not self.pty_shell.alive (recover=False) :
+                        raise rse.IncorrectState (
+                                "Cannot pipeline command -- shell died:\n%s"
+                                % self.pty_shell.autopsy ())
+
+                    if  frame :
+
+                        future = cf.Future ()
+
+                        self._pipe_pending[tag] = [future, iomode, size]
+                        self._pipe_inflight    += size
+
+                        self.logger.debug ('run_pipelined [%s]: %s'
+                                          % (tag, command))
+                        try :
+                            self.pty_shell.write ("%s\n" % frame)
+
+                        except Exception as e :
+                            self._pipe_fail (e)
+                            raise ptye.translate_exception (e) from e
+
+                        return future
+
+            # window is full -- drain some of the pipeline and try again
+            self._pipe_demux ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def wait_pipelined (self, futures=None, timeout=_PIPE_TIMEOUT) :
+        """
+        Demultiplex the output of pipelined commands until all given futures
+        (by default: all currently pending pipelined commands) are completed,
+        or until `timeout` seconds passed (a negative timeout waits forever).
+        The call returns a `concurrent.futures.DoneAndNotDoneFutures` tuple --
+        the `not_done` set is non-empty if the timeout passed.
+
+        If the shell dies while commands are pending, the futures of those
+        commands will raise the respective exception on `result()`.
+        """
+
+        if  futures is None :
+            with self._pipe_lock :
+                futures = [entry[0] for entry in self._pipe_pending.values ()]
+
+        start = time.time ()
+
+        while True :
+
+            todo = [f for f in futures if not f.done ()]
+
+            if  not todo :
+                break
+
+            if  timeout >= 0 and time.time () - start > timeout :
+                break
+
+            self._pipe_demux (todo)
+
+        return cf.wait (futures, timeout=0)
+
+
+    # ----------------------------------------------------------------
+    #
+    def _pipe_demux (self, futures=None) :
+        """
+        Read whatever output is available on the shell, and complete the
+        futures for all pipelined commands whose frames have been received.
+        Only the thread holding the pty lock reads -- others wait for the given
+        futures to be completed by that thread.  Any thread which holds the pty
+        lock for other reasons (like `run_sync()`) drains the pipeline first,
+        so the frames cannot be consumed elsewhere.
+        """
+
+        if not self.pty_shell.rlock.acquire (timeout=_PIPE_POLL) :
+            # someone else is using the shell -- wait for that thread to do our
+            # work
+            if futures:
+                cf.wait (futures, timeout=_PIPE_POLL)
+            return
+
+        try :
+            with self._pipe_lock :
+                if not self._pipe_pending :
+                    return
+
+            try :
+                data = self.pty_shell.read (timeout=supp._POLLDELAY)
+
+            except Exception as e :
+                self._pipe_fail (e)
+                raise ptye.translate_exception (e) from e
+
+            with self._pipe_lock :
+
+                self._pipe_cache += _PIPE_ESC.sub ('', data)
+
+                while True :
+
+                    match = _PIPE_RE.search (self._pipe_cache)
+                    if not match :
+                        break
+
+                    # anything before the frame (prompts) is discarded
+                    tag, body, ret = match.groups ()
+                    self._pipe_cache = self._pipe_cache[match.end ():]
+
+                    if tag not in self._pipe_pending :
+                        self.logger.warning ("ignore unknown frame %s" % tag)
+                        continue
+
+                    future, iomode, size = self._pipe_pending.pop (tag)
+                    self._pipe_inflight -= size
+
+                    future.set_result (_unframe (tag, body, ret, iomode))
+
+                if not self._pipe_pending :
+                    # all frames have been received -- the shell will still
+                    # print its prompt though, so we hand the remaining data
+                    # back to the pty and find the prompt, to get the shell
+                    # back into ground state
+                    self.pty_shell.cache = self._pipe_cache \
+                                         + self.pty_shell.cache
+                    self._pipe_cache     = ''
+                    self.find_prompt ()
+
+        finally :
+            self.pty_shell.rlock.release ()
+
+
+    # ----------------------------------------------------------------
+    #
+    def _pipe_drain (self) :
+        """
+        wait for all pending pipelined commands to complete.  This must be
+        called while holding the pty lock, so that no new commands get
+        pipelined meanwhile.
+        """
+
+        with self._pipe_lock :
+            futures = [entry[0] for entry in self._pipe_pending.values ()]
+
+        if  futures :
+            _, todo = self.wait_pipelined (futures)
+
+            if  todo :
+                self._pipe_abort ("pipelined commands timed out")
+
+
+    # ----------------------------------------------------------------
+    #
+    def _pipe_abort (self, msg) :
+        """
+        pipelined commands did not complete in time: fail them, and kill the
+        shell, as it is not in a known state anymore.  It will be restarted
+        on the next command.
+        """
+
+        with self.pty_shell.rlock :
+            self._pipe_fail (rse.Timeout (msg))
+            self.finalize (kill_pty=True)
+
+
+    # ----------------------------------------------------------------
+    #
+    def _check_lines (self, command) :
+        """
+        make sure that no line of the command exceeds the pty's line length
+        limit -- the pty would silently truncate it.
+        """
+
+        for line in command.split ('\n') :
+            if len(line) >= _PTY_LINE_MAX :
+                raise rse.BadParameter ("command line too long (%d chars)"
+                                        % len(line))
+
+
+    # ----------------------------------------------------------------
+    #
+    def _pipe_fail (self, e) :
+        """
+        the shell failed -- all pending pipelined commands fail with it
+        """
+
+        with self._pipe_lock :
+
+            for future, _, _ in self._pipe_pending.values () :
+                future.set_exception (ptye.translate_exception (e))
+
+            self._pipe_pending  = dict()
+            self._pipe_cache    = ''
+            self._pipe_inflight = 0
+
+
     # ----------------------------------------------------------------
     #
     def write_to_remote (self, src, tgt) :
@@ -1178,5 +1769,330 @@ class PTYShell (object) :
             return files
 
 
+    # ----------------------------------------------------------------
+    #
+    def stage_to_remote_batch (self, transfers, cp_flags=None) :
+        """
+        :type  transfers: list of (string, string) tuples
+        :param transfers: pairs of local source path and remote target path,
+                          as for :func:`stage_to_remote`.  Wildcards are not
+                          expanded.
+
+        :rtype:  list
+        :return: one entry per transfer, in order: `None` if the transfer
+                 succeeded, or an exception describing why it failed.
+        """
+
+        self._trace ("stage to  : %d files" % len(transfers))
+
+        try :
+            return self.run_copy_batch (transfers, 'to', cp_flags)
+
+        except Exception as e :
+            raise ptye.translate_exception (e) from e
+
+
+    # ----------------------------------------------------------------
+    #
+    def stage_from_remote_batch (self, transfers, cp_flags=None) :
+        """
+        :type  transfers: list of (string, string) tuples
+        :param transfers: pairs of remote source path and local target path,
+                          as for :func:`stage_from_remote`.  Wildcards are not
+                          expanded.
+
+        :rtype:  list
+        :return: one entry per transfer, in order: `None` if the transfer
+                 succeeded, or an exception describing why it failed.
+        """
+
+        self._trace ("stage from: %d files" % len(transfers))
+
+        try :
+            return self.run_copy_batch (transfers, 'from', cp_flags)
+
+        except Exception as e :
+            raise ptye.translate_exception (e) from e
+
+
+    # --------------------------------------------------------------------------
+    #
+    def run_copy_batch (self, transfers, direction, cp_flags=None) :
+        """
+        Transfer many files with a single copy process: a local shell script
+        (`sh` copy mode), an sftp batch script (`sftp` copy mode), or a `tar`
+        stream over ssh (`scp` copy mode, which ignores `cp_flags`).  The copy
+        process prints a marker line after each transfer, which we use to
+        attribute the output (and exit code, if available) to the individual
+        transfers.
+
+        `direction` is `to` (local to remote) or `from` (remote to local).
+        """
+
+        if cp_flags is None:
+            cp_flags = ''
+
+        transfers = list(transfers)
+        errors    = [None] * len(transfers)
+
+        if not transfers:
+            return errors
+
+        with self.pty_shell.rlock :
+
+            info = self.pty_info
+            mode = info['copy_mode']
+            tmp  = tempfile.mkdtemp (prefix='rs_copy_')
+
+            self._trace ("copy batch: %s %d files (%s)"
+                        % (direction, len(transfers), mode))
+
+            try :
+                # the local helper script runs the actual copy process
+                if   mode == 'sftp' :
+                    script = self._copy_batch_sftp (transfers, direction,
+                                                    cp_flags, tmp, errors)
+                elif mode == 'scp'  :
+                    script = self._copy_batch_tar  (transfers, direction,
+                                                    tmp, errors)
+                else :
+                    script = self._copy_batch_sh   (transfers, cp_flags)
+
+                with open ('%s/copy.sh' % tmp, 'w') as fout :
+                    fout.write (script)
+
+                cp_proc = supp.PTYProcess (['/bin/sh', '%s/copy.sh' % tmp],
+                                           cfg=self.cfg)
+                out = cp_proc.wait ()
+
+                info['logger'].debug ("copy batch output: %s" % out)
+
+                results = self._copy_batch_parse (out)
+
+                for idx, (src, tgt) in enumerate (transfers) :
+
+                    if errors[idx] :
+                        continue
+
+                    if idx not in results :
+                        errors[idx] = rse.NoSuccess ("file copy failed: %s"
+                                                    % out)
+                        continue
+
+                    ret, txt = results[idx]
+                    if ret or [e for e in _COPY_ERRORS if e in txt] :
+
+                        if 'No such file or directory' in txt :
+                            errors[idx] = rse.DoesNotExist (
+                                                 "file copy failed: %s" % txt)
+                        elif 'is not a directory' in txt or \
+                             'not found'          in txt :
+                            errors[idx] = rse.BadParameter (
+                                                 "file copy failed: %s" % txt)
+                        else :
+                            errors[idx] = rse.NoSuccess (
+                                                 "file copy failed: %s" % txt)
+                        continue
+
+                    # `tar` transfers from remote are completed locally
+                    if mode == 'scp' and direction == 'from' :
+                        errors[idx] = self._copy_batch_move (
+                                                 '%s/data/%d' % (tmp, idx),
+                                                 src, tgt)
+
+            finally :
+                shutil.rmtree (tmp, ignore_errors=True)
+
+            info['logger'].debug ("copy batch done: %d of %d failed"
+                                 % (len([e for e in errors if e]),
+                                    len(transfers)))
+
+            return errors
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_batch_parse (self, out) :
+        """
+        Split the output of a batched copy at the marker lines, and return
+        a dict `{index: (exit code, output)}`.  The exit code is `None` if the
+        copy process does not report it.
+        """
+
+        ret   = dict()
+        lines = list()
+
+        for line in out.replace ('\r', '').split ('\n') :
+
+            if line.strip () == _COPY_START :
+                lines = list()
+                continue
+
+            match = _COPY_RE.match (line.strip ())
+            if not match :
+                lines.append (line)
+                continue
+
+            code = match.group (2)
+            if code is not None :
+                code = int(code)
+
+            ret[int(match.group (1))] = (code, '\n'.join (lines).strip ())
+            lines = list()
+
+        return ret
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_batch_sh (self, transfers, cp_flags) :
+        """
+        local shells: one `cp` per transfer, in one script
+        """
+
+        cp_exe = self.pty_info['cp_exe']
+        script = 'cd ~ || exit 1\nprintf "%s\\n"\n' % _COPY_START
+
+        for idx, (src, tgt) in enumerate (transfers) :
+            script += '"%s" %s "%s" "%s" 2>&1 </dev/null; printf "%s-%%d\\n" $?\n' \
+                    % (cp_exe, cp_flags, src, tgt, _COPY_MARK % idx)
+
+        return script
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_batch_sftp (self, transfers, direction, cp_flags, tmp, errors) :
+        """
+        `sftp` copy mode: one sftp batch script.  Commands are prefixed with `-`
+        so that sftp continues after failed transfers.  Marker lines are
+        printed via sftp's local shell escape.
+        """
+
+        info  = self.pty_info
+        batch = ''
+
+        if direction == 'to' :
+            cmd = 'put'
+
+            # like `run_copy_to`, we need to create target dirs for recursive
+            # copies.
+            for src, tgt in transfers :
+                if '-r' in cp_flags and os.path.isdir (src) :
+                    batch += '-mkdir "%s"\n' % tgt.rstrip ('/')
+
+        else :
+            cmd = 'get'
+
+        batch += '!printf "%s\\n"\n' % _COPY_START
+
+        for idx, (src, tgt) in enumerate (transfers) :
+
+            if direction == 'to' and not os.path.exists (src) :
+                errors[idx] = rse.DoesNotExist ("file copy failed: %s: "
+                                   "No such file or directory" % src)
+
+            batch += '-%s %s "%s" "%s"\n' % (cmd, cp_flags, src, tgt)
+            batch += '!printf "%s\\n"\n' % (_COPY_MARK % idx)
+
+        with open ('%s/batch' % tmp, 'w') as fout :
+            fout.write (batch)
+
+        repl = dict (list(info.items ()) + [('batch', '%s/batch' % tmp)])
+
+        return '%(sftp_env)s "%(sftp_exe)s" %(sftp_args)s %(s_flags)s ' \
+               '-b "%(batch)s" %(host_str)s 2>&1\n' % repl
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_batch_tar (self, transfers, direction, tmp, errors) :
+        """
+        `scp` copy mode: stream all files as one tar archive through ssh.  The
+        files are named by their index in the archive, and are moved to their
+        targets by a script on the receiving end.
+        """
+
+        info = self.pty_info
+        data = '%s/data' % tmp
+        os.mkdir (data)
+
+        # `-T` overrides the `-t` in `ssh_args`: we need a clean data stream
+        ssh  = '%(ssh_env)s "%(ssh_exe)s" %(ssh_args)s -T %(s_flags)s ' \
+               '%(host_str)s' % info
+
+        if direction == 'to' :
+
+            # the archive contains links to the source files (which are
+            # dereferenced by tar), and the script which moves them in place.
+            # Output before the start marker (ssh, mktemp, tar) belongs to no
+            # transfer.
+            remote = 'cd ~ || exit 1\nprintf "%s\\n"\n' % _COPY_START
+
+            for idx, (src, tgt) in enumerate (transfers) :
+
+                if not os.path.exists (src) :
+                    errors[idx] = rse.DoesNotExist ("file copy failed: %s: "
+                                       "No such file or directory" % src)
+                    continue
+
+                os.symlink (os.path.abspath (src), '%s/%d' % (data, idx))
+                remote += 't="%s"; test -d "$t" && t="$t/%s"; ' \
+                          '\\mv -f "$1/%d" "$t" 2>&1; printf "%s-%%d\\n" $?\n' \
+                        % (tgt, os.path.basename (src.rstrip ('/')), idx,
+                           _COPY_MARK % idx)
+
+            with open ('%s/copy.sh' % data, 'w') as fout :
+                fout.write (remote)
+
+            return 'cd "%s" && tar -chf - . | %s \'T=`mktemp -d` && ' \
+                   'tar -xf - -C $T && sh $T/copy.sh $T; rm -rf $T\' 2>&1\n' \
+                   % (data, ssh)
+
+        else :
+
+            # the remote end archives links to the source files, which we
+            # extract locally and then move in place (`_copy_batch_move()`).
+            # Missing sources show up as missing archive members.
+            remote = 'cd ~ && T=`mktemp -d` || exit 1; '
+
+            for idx, (src, tgt) in enumerate (transfers) :
+                if not src.startswith ('/') :
+                    src = '$HOME/%s' % src
+                remote += 'ln -s "%s" $T/%d; ' % (src, idx)
+
+            remote += 'tar -chf - -C $T . ; rm -rf $T'
+            script  = "%s '%s' | tar -xf - -C \"%s\" 2>&1\n" \
+                    % (ssh, remote, data)
+            script += 'printf "%s\\n"\n' % _COPY_START
+
+            # no exit codes per file, only markers
+            for idx in range (len(transfers)) :
+                script += 'test -e "%s/%d" || printf "%s: ' \
+                          'No such file or directory\\n"; ' \
+                          'printf "%s\\n"\n' \
+                        % (data, idx, transfers[idx][0], _COPY_MARK % idx)
+
+            return script
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_batch_move (self, path, src, tgt) :
+        """
+        move a file received by a batched `tar` transfer to its local target
+        """
+
+        try :
+            if os.path.isdir (tgt) :
+                tgt = os.path.join (tgt, os.path.basename (src.rstrip ('/')))
+            shutil.move (path, tgt)
+
+        except Exception as e :
+            return rse.NoSuccess ("file copy failed: %s" % e)
+
+        return None
+
+
 # ------------------------------------------------------------------------------
 
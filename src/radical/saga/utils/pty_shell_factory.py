@@ -99,6 +99,68 @@ _SCRIPTS = {
 }
 
 
+# ------------------------------------------------------------------------------
+#
+# The login dialog: prompts we may find when starting a shell.  The dialog is
+# run by `PTYShellFactory._initialize_pty()` and by
+# `pty_async.AsyncPTYShell._login()`, which share the prompt patterns and the
+# replies to credential and hostkey prompts.
+#
+def _login_patterns (prompt) :
+    """
+    Return the login dialog patterns, ending with the given native prompt.
+    """
+
+    return ["[Pp]assword:\\s*$",              # 0: password   prompt
+            "Enter passphrase for .*:\\s*$",  # 1: passphrase prompt
+            "Token_Response.*:\\s*$",         # 2: passtoken  prompt
+            "Enter PASSCODE:$",               # 3: RSA SecureID
+            "want to continue connecting",    # 4: hostkey confirmation
+            ".*HELLO_\\d+_SAGA$",             # 5: prompt detection helper
+            prompt]                           # 6: greedy native prompt
+
+
+def _login_reply (n, match, info) :
+    """
+    Return the reply to the password (0), passphrase (1) or hostkey (4) prompt
+    `match` found by `_login_patterns()` pattern `n`, based on the credentials
+    in the shell `info`.  Raises `AuthenticationFailed` if no credentials are
+    available.
+    """
+
+    if n == 0 :
+        info['logger'].info ("got password prompt")
+
+        if  not info['pass'] :
+            raise rse.AuthenticationFailed ("prompted for unknown password (%s)"
+                                           % match)
+        return info['pass']
+
+    if n == 1 :
+        info['logger'].info ("got passphrase prompt : %s" % match)
+
+        start = match.find("'", 0)
+        end   = match.find("'", start + 1)
+
+        if start == -1 or end == -1 :
+            raise rse.AuthenticationFailed(
+                    "could not extract key name (%s)" % match)
+
+        key = match[start + 1:end]
+
+        if  key not in info['key_pass'] :
+            raise rse.AuthenticationFailed(
+                    "prompted for unknown key password (%s)" % key)
+
+        return info['key_pass'][key]
+
+    if n == 4 :
+        info['logger'].info ("got hostkey prompt")
+        return "yes"
+
+    raise rse.BadParameter ("no login reply for prompt %s (%s)" % (n, match))
+
+
 # ------------------------------------------------------------------------------
 #
 class PTYShellFactory (object, metaclass=ru.Singleton) :
@@ -233,8 +295,6 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
             # import pprint
             # pprint.pprint(info)
 
-            shell_pass = info['pass']
-            key_pass   = info['key_pass']
             prompt     = info['prompt']
             logger     = info['logger']
             latency    = info['latency']
@@ -253,14 +313,7 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
             delay = min (1.0, max (0.1, 10 * latency))
 
             try :
-                prompt_patterns = [
-                     "[Pp]assword:\s*$",              # password   prompt
-                     "Enter passphrase for .*:\s*$",  # passphrase prompt
-                     "Token_Response.*:\s*$",         # passtoken  prompt
-                     "Enter PASSCODE:$",              # RSA SecureID
-                     "want to continue connecting",   # hostkey confirmation
-                     ".*HELLO_\\d+_SAGA$",            # prompt detection helper
-                     prompt]                          # greedy native prompt
+                prompt_patterns = _login_patterns (prompt)
 
                 # use a very aggressive, but portable prompt setting scheme.
                 # Error messages may appear for tcsh and others.  Excuse
@@ -319,34 +372,10 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
 
 
                     # --------------------------------------------------------------
-                    elif n == 0 :
-                        logger.info ("got password prompt")
-                        if  not shell_pass :
-                            raise rse.AuthenticationFailed ("prompted for unknown password (%s)" \
-                                                          % match)
-
-                        pty_shell.write ("%s\n" % shell_pass, nolog=True)
-                        n, match = pty_shell.find (prompt_patterns, delay)
-
-
-                    # --------------------------------------------------------------
-                    elif n == 1 :
-                        logger.info ("got passphrase prompt : %s" % match)
-
-                        start = match.find("'", 0)
-                        end   = match.find("'", start + 1)
-
-                        if start == -1 or end == -1 :
-                            raise rse.AuthenticationFailed(
-                                    "could not extract key name (%s)" % match)
-
-                        key = match[start + 1:end]
-
-                        if  key not in key_pass    :
-                            raise rse.AuthenticationFailed(
-                                "prompted for unknown key password (%s)" % key)
-
-                        pty_shell.write ("%s\n" % key_pass[key], nolog=True)
+                    elif n in [0, 1, 4] :
+                        # password, passphrase or hostkey prompt
+                        reply = _login_reply (n, match, info)
+                        pty_shell.write ("%s\n" % reply, nolog=True)
                         n, match = pty_shell.find (prompt_patterns, delay)
 
 
@@ -359,13 +388,6 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
                         n, match = pty_shell.find (prompt_patterns, delay)
 
 
-                    # --------------------------------------------------------------
-                    elif n == 4:
-                        logger.info ("got hostkey prompt")
-                        pty_shell.write ("yes\n")
-                        n, match = pty_shell.find (prompt_patterns, delay)
-
-
                     # --------------------------------------------------------------
                     elif n == 5:
 
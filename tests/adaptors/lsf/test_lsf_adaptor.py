@@ -9,9 +9,14 @@ __license__   = 'MIT'
 This test tests the LSF script generator function as well as the LSF adaptor
 '''
 
+import json
+
 import radical.saga     as rs
 import radical.saga.url as rsurl
 
+from unittest import mock
+
+from radical.saga.adaptors.lsf        import lsfjob
 from radical.saga.adaptors.lsf.lsfjob import _lsfscript_generator
 
 
@@ -54,11 +59,160 @@ def test_lsfscript_generator():
     assert (script == tgt_script)
 
 
+# ------------------------------------------------------------------------------
+#
+def _get_service():
+
+    with mock.patch.object(lsfjob.LSFJobService, '__init__',
+                           return_value=None):
+        js = lsfjob.LSFJobService(api=None, adaptor=None)
+
+    js._adaptor     = lsfjob.Adaptor()
+    js._logger      = js.shell = mock.Mock()
+    js._commands    = {'bjobs': {'path': 'bjobs', 'version': None},
+                       'bsub' : {'path': 'bsub'},
+                       'bkill': {'path': 'bkill'}}
+    js._bjobs_json  = True
+    js.rm           = rsurl.Url('lsf+ssh://summit.ccs.ornl.gov/')
+    js.mt           = None
+    js.ppn          = 1
+    js.queue        = None
+    js.jobs         = dict()
+
+    return js
+
+
+# ------------------------------------------------------------------------------
+#
+def test_lsf_job_get_states():
+
+    js   = _get_service()
+    jobs = list()
+
+    for pid in ['101', '102', '103', '104']:
+        job = mock.Mock()
+        job._id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job] = {'state'      : rs.job.PENDING,
+                        'job_id'     : job._id,
+                        'exec_hosts' : None,
+                        'returncode' : None,
+                        'gone'       : False}
+        jobs.append(job)
+
+    out = json.dumps({'COMMAND': 'bjobs',
+                      'JOBS'   : 4,
+                      'RECORDS': [{'JOBID'    : '101',
+                                   'STAT'     : 'RUN',
+                                   'EXIT_CODE': '',
+                                   'EXEC_HOST': 'batch1:h1'},
+                                  {'JOBID'    : '102',
+                                   'STAT'     : 'DONE',
+                                   'EXIT_CODE': '',
+                                   'EXEC_HOST': 'batch1:h2'},
+                                  {'JOBID'    : '103',
+                                   'STAT'     : 'EXIT',
+                                   'EXIT_CODE': '2',
+                                   'EXEC_HOST': 'batch1:h3'},
+                                  {'JOBID'    : '104',
+                                   'ERROR'    : 'Job <104> is not found'}]})
+
+    js.shell.run_pipelined.return_value = [(0, out, None)]
+
+    states = js._job_get_states(jobs)
+
+    # one bjobs call for all jobs
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) == 1)
+    assert ('-json 101 102 103 104' in cmds[0])
+    js.shell.run_sync.assert_not_called()
+
+    assert ([states[job] for job in jobs] == [rs.job.RUNNING, rs.job.DONE,
+                                              rs.job.FAILED,  rs.job.DONE])
+    assert (js.jobs[jobs[0]]['exec_hosts'] == 'batch1:h1')
+    assert (js.jobs[jobs[1]]['returncode'] == 0)
+    assert (js.jobs[jobs[2]]['returncode'] == 2)
+    assert (js.jobs[jobs[3]]['gone'] is True)
+
+    for job in jobs:
+        assert (job._api()._attributes_i_set.called)
+
+    # long job lists are split into several bjobs calls, which all fit the
+    # pty line length limit
+    js.shell.run_pipelined.return_value = [(0, '{}', None)]
+    js._bjobs([str(pid) for pid in range(5000000, 5001000)])
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) > 1)
+    assert (max([len(cmd) for cmd in cmds]) < 4095)
+    js.shell.run_pipelined.return_value = [(0, out, None)]
+
+    # final jobs are not queried again
+    js.shell.run_pipelined.reset_mock()
+    js._job_get_states(jobs)
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert ('-json 101' in cmds[0])
+
+    # fall back to delimited output for LSF versions without `-json`
+    js.shell.run_pipelined.side_effect = [[(255, 'bjobs: illegal option', '')],
+                                          [(0, '101,DONE,-,batch1:h1\n', '')]]
+    states = js._job_get_states(jobs[:1])
+
+    assert (js._bjobs_json is False)
+    assert (states[jobs[0]] == rs.job.DONE)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_lsf_container_run():
+
+    js   = _get_service()
+    jobs = list()
+
+    for idx in range(3):
+        jd = rs.job.Description()
+        jd.executable = '/bin/echo'
+        jd.arguments  = ['"%d"' % idx]
+
+        job = mock.Mock()
+        job._adaptor.jd = jd
+        js.jobs[job._adaptor] = {'state': rs.job.NEW, 'job_id': None}
+        jobs.append(job)
+
+    js.shell.run_sync.return_value = (0, '/home/u/SAGA-Python-LSF.1\n', '')
+    js.shell.run_pipelined.return_value = \
+        [(0, 'Job <%d> is submitted to default queue <batch>.' % (200 + idx), '')
+         for idx in range(3)] + [(0, '', '')]
+
+    js.container_run(jobs)
+
+    # all scripts are written with one command -- the scripts are passed line
+    # by line, as the pty limits the length of single lines
+    cmd = js.shell.run_sync.call_args[0][0]
+    for idx in range(3):
+        assert ('\n/bin/echo \\"%d\\"' % idx in cmd)
+        assert ('> $SCRIPTDIR/%d' % idx in cmd)
+    assert (max([len(line) for line in cmd.split('\n')]) < 4095)
+
+    # all jobs are submitted with one pipelined sequence of single-line
+    # commands
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (cmds == ['bsub /home/u/SAGA-Python-LSF.1/0',
+                     'bsub /home/u/SAGA-Python-LSF.1/1',
+                     'bsub /home/u/SAGA-Python-LSF.1/2',
+                     'rm -rf /home/u/SAGA-Python-LSF.1'])
+
+    for idx, job in enumerate(jobs):
+        assert (job._adaptor._id == '[%s]-[%d]' % (js.rm, 200 + idx))
+        assert (job._adaptor._started is True)
+        assert (js.jobs[job._adaptor]['state'] == rs.job.PENDING)
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
 
     test_lsfscript_generator()
+    test_lsf_job_get_states()
+    test_lsf_container_run()
 
 
 # ------------------------------------------------------------------------------
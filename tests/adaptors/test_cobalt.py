@@ -65,10 +65,113 @@ def test_cobaltscript_generator():
     assert (script == tgt_script)
 
 
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(rsacj.CobaltJobService, '__init__', return_value=None)
+def test_cobalt_container_get_states(mocked_init):
+
+    js = rsacj.CobaltJobService(api=None, adaptor=None)
+    js._adaptor  = rsacj.Adaptor()
+    js._logger   = js.shell = mock.Mock()
+    js._commands = {'qstat': {'path': '/usr/bin/qstat'}}
+    js.rm        = 'cobalt+ssh://theta.alcf.anl.gov/'
+    js.mt        = None
+    js.jobs      = dict()
+
+    jobs = list()
+    for pid in ['32', '35', '41']:
+        job_id  = '[%s]-[%s]' % (js.rm, pid)
+        job     = mock.Mock()
+        job._adaptor._id      = job_id
+        job._adaptor._started = True
+        js.jobs[job_id] = {'obj'   : mock.Mock(),
+                           'state' : rs.job.PENDING,
+                           'gone'  : False}
+        jobs.append(job)
+
+    js.shell.run_pipelined.return_value = [(0, 'JobID  S\n'
+                                               '========\n'
+                                               '32     R\n'
+                                               '35     Q\n', '')]
+
+    # job 41 left the queue
+    def get_info(job_id, reconnect):
+        return dict(js.jobs[job_id], state=rs.job.DONE)
+
+    js._job_get_info = mock.Mock(side_effect=get_info)
+
+    states = js.container_get_states(jobs)
+    assert (states == [rs.job.RUNNING, rs.job.PENDING, rs.job.DONE])
+
+    # one qstat call for all jobs, and one fallback for the finished job
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (js.shell.run_pipelined.call_count == 1)
+    assert (len(cmds) == 1)
+    assert (cmds[0].endswith(' 32 35 41'))
+    js._job_get_info.assert_called_once_with(jobs[2]._adaptor._id,
+                                             reconnect=False)
+
+    # callbacks are fired for changed states only
+    assert (js.jobs[jobs[0]._adaptor._id]['obj']._attributes_i_set.called)
+    assert (not js.jobs[jobs[1]._adaptor._id]['obj']._attributes_i_set.called)
+
+    # final jobs are not queried again
+    js.shell.run_pipelined.reset_mock()
+    js._job_get_info.reset_mock()
+    js.container_get_states(jobs[2:])
+    assert (not js.shell.run_pipelined.called)
+    assert (not js._job_get_info.called)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(rsacj.CobaltJobService, '__init__', return_value=None)
+def test_cobalt_line_length(mocked_init):
+
+    js = rsacj.CobaltJobService(api=None, adaptor=None)
+    js._adaptor  = rsacj.Adaptor()
+    js._logger   = js.shell = mock.Mock()
+    js._commands = {'qstat': {'path': '/usr/bin/qstat'}}
+    js.rm        = 'cobalt+ssh://theta.alcf.anl.gov/'
+    js.mt        = None
+    js.jobs      = dict()
+
+    pids    = [str(1000000 + i) for i in range(3000)]
+    job_ids = list()
+    for pid in pids:
+        job_id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job_id] = {'obj'   : mock.Mock(),
+                           'state' : rs.job.PENDING,
+                           'gone'  : False}
+        job_ids.append(job_id)
+
+    # all jobs are still queued
+    def qstat(cmds):
+        return [(0, '\n'.join(['%s Q' % pid for pid in cmd.split()[2:]]), '')
+                for cmd in cmds]
+
+    js.shell.run_pipelined.side_effect = qstat
+    js._job_get_info = mock.Mock()
+
+    states = js._job_get_states(job_ids)
+    assert (set(states.values()) == set([rs.job.PENDING]))
+    assert (not js._job_get_info.called)
+
+    # all ids are covered, in command lines of bounded length
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) > 1)
+    for cmd in cmds:
+        assert (len(cmd) < rsacj._QUERY_LINE_MAX + 100)
+
+    assert ([pid for cmd in cmds for pid in cmd.split()[2:]] == pids)
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
 
     test_cobaltscript_generator()
+    test_cobalt_container_get_states()
+    test_cobalt_line_length()
 
 # ------------------------------------------------------------------------------
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the bulk job state retrieval of the Condor adaptor.
+"""
+
+import threading
+
+import radical.saga     as rs
+import radical.saga.url as rsurl
+
+from unittest import mock
+
+# the condor adaptor module expects the job CPI to be loaded
+import radical.saga.adaptors.cpi.job
+
+from radical.saga.adaptors.condor import condorjob
+
+
+# ------------------------------------------------------------------------------
+#
+class _Stream(list):
+    """
+    stands in for a `PTYStream` over the given output
+    """
+
+    def __init__(self, out, ret=0):
+        super(_Stream, self).__init__(out.split('\n'))
+        self.ret = ret
+
+
+# ------------------------------------------------------------------------------
+#
+def _get_service(use_hist=True):
+
+    with mock.patch.object(condorjob.CondorJobService, '__init__',
+                           return_value=None):
+        js = condorjob.CondorJobService(api=None, adaptor=None)
+
+    js._adaptor          = condorjob.Adaptor()
+    js._adaptor.use_hist = use_hist
+    js._logger           = js.shell = mock.Mock()
+    js._commands         = {'condor_q'      : 'condor_q',
+                            'condor_history': 'condor_history'}
+    js.rm                = rsurl.Url('condor+ssh://condor.example.org/')
+    js.mt                = None
+    js.jobs              = dict()
+    js._monitored        = dict()
+    js._mlock            = threading.Lock()
+    js._ulock            = threading.Lock()
+
+    return js
+
+
+# ------------------------------------------------------------------------------
+#
+def test_condor_update_jobs():
+
+    js      = _get_service()
+    job_ids = list()
+
+    for pid in ['10.0', '10.1', '10.2', '11.0', '11.1']:
+        job_id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job_id] = js._new_job_info()
+        js.jobs[job_id]['state'] = rs.job.PENDING
+        job_ids.append(job_id)
+
+        job = mock.Mock()
+        job._id = job_id
+        js._monitored[job_id] = job
+
+    condor_q_out  = '10,0,2,0,false,0\n' \
+                    '10,1,1,0,false,0\n' \
+                    '10,7,2,0,false,0\n' \
+                    '11,0,2,0,false,0\n'
+    condor_hist_out = '11,1,0,false,1600000100,1600000010,1600000000,' \
+                      'err.txt,out.txt\n'
+    js.shell.run_stream.side_effect = [_Stream(condor_q_out),
+                                       _Stream(condor_hist_out)]
+
+    with mock.patch.object(js, '_handle_file_transfers') as mocked_ft:
+        js._update_jobs(job_ids)
+
+    # one condor_q call for all clusters, one condor_history call for all jobs
+    # which left the queue
+    cmds = [call[0][0] for call in js.shell.run_stream.call_args_list]
+    assert (len(cmds) == 2)
+    assert ('condor_q 10 11 -autoformat:, ClusterId ProcId' in cmds[0])
+    assert (cmds[1].startswith('condor_history -match 2 -constraint '
+                               "'(ClusterId == 10 && ProcId == 2) || "
+                               "(ClusterId == 11 && ProcId == 1)'"))
+
+    assert ([js.jobs[job_id]['state'] for job_id in job_ids] ==
+            [rs.job.RUNNING, rs.job.PENDING, rs.job.DONE,
+             rs.job.RUNNING, rs.job.DONE])
+
+    # the job not found in the history is assumed to be done
+    assert (js.jobs[job_ids[2]]['gone'] is True)
+    assert (js.jobs[job_ids[4]]['returncode'] == 0)
+    assert (js.jobs[job_ids[4]]['stdout']     == 'out.txt')
+
+    # output files are staged for all finished jobs
+    assert (mocked_ft.call_count == 2)
+
+    # state changes are pushed to the jobs
+    for job_id in job_ids:
+        job = js._monitored[job_id]
+        if js.jobs[job_id]['state'] == rs.job.PENDING:
+            job._api()._attributes_i_set.assert_not_called()
+        else:
+            job._api()._attributes_i_set.assert_called_with(
+                    'state', js.jobs[job_id]['state'], job._api()._UP, True)
+
+    # final jobs are not monitored anymore
+    js.shell.run_stream.reset_mock()
+    js.shell.run_stream.side_effect = [_Stream('10,0,4,0,false,1600000200\n'
+                                               '10,1,1,0,false,0\n'
+                                               '11,0,2,0,false,0\n')]
+    with mock.patch.object(js, '_handle_file_transfers'):
+        js._update_states()
+
+    cmds = [call[0][0] for call in js.shell.run_stream.call_args_list]
+    assert ('condor_q 10 11 ' in cmds[0])
+    assert (js.jobs[job_ids[0]]['state'] == rs.job.DONE)
+    assert (sorted(js._monitored.keys()) == [job_ids[1], job_ids[3]])
+
+
+# ------------------------------------------------------------------------------
+#
+def test_condor_q_retry():
+
+    js = _get_service()
+
+    job_id = '[%s]-[12.0]' % js.rm
+    js.jobs[job_id] = js._new_job_info()
+    js.jobs[job_id]['state'] = rs.job.PENDING
+
+    # the error message of the failed attempt is skipped
+    js.shell.run_stream.side_effect = [_Stream('Failed to connect', ret=1),
+                                       _Stream('12,0,2,0,false,0')]
+
+    with mock.patch.object(condorjob.time, 'sleep'):
+        js._update_jobs([job_id])
+
+    assert (js.shell.run_stream.call_count == 2)
+    assert (js.jobs[job_id]['state'] == rs.job.RUNNING)
+
+    # all attempts fail
+    js.jobs[job_id]['timestamp'] = 0.0
+    js.shell.run_stream.side_effect = [_Stream('Failed', ret=1)] * 3
+
+    with mock.patch.object(condorjob.time, 'sleep'):
+        try:
+            js._update_jobs([job_id])
+            assert False, 'expected NoSuccess'
+        except rs.NoSuccess:
+            pass
+
+
+# ------------------------------------------------------------------------------
+#
+def test_condor_line_length():
+
+    js      = _get_service()
+    job_ids = list()
+
+    # many clusters which all left the queue
+    for cluster in range(1000000, 1000500):
+        job_id = '[%s]-[%d.0]' % (js.rm, cluster)
+        js.jobs[job_id] = js._new_job_info()
+        js.jobs[job_id]['state'] = rs.job.PENDING
+        job_ids.append(job_id)
+
+    js.shell.run_stream.side_effect = lambda cmd: _Stream('')
+
+    with mock.patch.object(js, '_handle_file_transfers'):
+        js._update_jobs(job_ids)
+
+    # all jobs are covered, in command lines of bounded length
+    cmds  = [call[0][0] for call in js.shell.run_stream.call_args_list]
+    q_cmd = [cmd for cmd in cmds if 'condor_q '       in cmd]
+    h_cmd = [cmd for cmd in cmds if 'condor_history ' in cmd]
+
+    assert (len(q_cmd) > 1)
+    assert (len(h_cmd) > 1)
+    for cmd in cmds:
+        assert (len(cmd) < 2 * condorjob._QUERY_LINE_MAX)
+
+    clusters = list()
+    for cmd in q_cmd:
+        clusters += cmd.split('condor_q ')[1].split(' -autoformat')[0].split()
+    assert (clusters == [str(c) for c in range(1000000, 1000500)])
+
+    assert (sum([cmd.count('ClusterId ==') for cmd in h_cmd]) == 500)
+    for cmd in h_cmd:
+        assert (cmd.count("'") == 2)
+
+    for job_id in job_ids:
+        assert (js.jobs[job_id]['state'] == rs.job.DONE)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_condor_update_jobs()
+    test_condor_q_retry()
+    test_condor_line_length()
+
+
+# ------------------------------------------------------------------------------
+
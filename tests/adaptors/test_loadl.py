@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the bulk job state retrieval of the LoadLeveler adaptor.
+"""
+
+import radical.saga     as rs
+import radical.saga.url as rsurl
+
+from unittest import mock
+
+from radical.saga.adaptors.loadl import loadljob
+
+
+# ------------------------------------------------------------------------------
+#
+def _get_service(pids):
+
+    with mock.patch.object(loadljob.LOADLJobService, '__init__',
+                           return_value=None):
+        js = loadljob.LOADLJobService(api=None, adaptor=None)
+
+    js._adaptor  = loadljob.Adaptor()
+    js._logger   = js.shell = mock.Mock()
+    js._commands = {'llq': {'path': 'llq'}}
+    js.rm        = rsurl.Url('loadl+ssh://v4c064.example.org/')
+    js.jobs      = dict()
+
+    jobs = list()
+    for pid in pids:
+        job = mock.Mock()
+        job._adaptor._id      = '[%s]-[%s]' % (js.rm, pid)
+        job._adaptor._started = True
+        js.jobs[job._adaptor._id] = {'state'      : rs.job.PENDING,
+                                     'exec_hosts' : None,
+                                     'returncode' : None,
+                                     'gone'       : False}
+        jobs.append(job)
+
+    return js, jobs
+
+
+# ------------------------------------------------------------------------------
+#
+def test_loadl_container_get_states():
+
+    js, jobs = _get_service(['v4c064.8637', 'v4c064.8638', 'v4c064.8639'])
+
+    js.shell.run_pipelined.return_value = [(0, 'v4c064.8637.0!R\n'
+                                               'v4c064.8638.0!I\n', '')]
+
+    # job 8639 left the queue
+    def get_info(job_id):
+        return dict(js.jobs[job_id], state=rs.job.DONE)
+
+    js._job_get_info = mock.Mock(side_effect=get_info)
+
+    states = js.container_get_states(jobs)
+    assert (states == [rs.job.RUNNING, rs.job.PENDING, rs.job.DONE])
+
+    # one llq call for all jobs, and one fallback for the finished job
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (cmds == ['llq -j v4c064.8637 v4c064.8638 v4c064.8639 -r %id %st'])
+    js._job_get_info.assert_called_once_with(job_id=jobs[2]._adaptor._id)
+
+    # callbacks are fired for changed states only
+    assert (jobs[0]._attributes_i_set.called)
+    assert (not jobs[1]._attributes_i_set.called)
+    jobs[2]._attributes_i_set.assert_called_with('state', rs.job.DONE,
+                                                 jobs[2]._UP, True)
+
+    # if llq fails, no job is assumed to have left the queue
+    js._job_get_info.reset_mock()
+    js.shell.run_pipelined.return_value = [(1, 'llq: error', '')]
+
+    states = js.container_get_states(jobs)
+    assert (states == [rs.job.RUNNING, rs.job.PENDING, rs.job.DONE])
+    assert (not js._job_get_info.called)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_loadl_line_length():
+
+    pids     = ['v4c064.%d' % (10000 + i) for i in range(3000)]
+    js, jobs = _get_service(pids)
+
+    # all jobs are still queued
+    def llq(cmds):
+        return [(0, '\n'.join(['%s.0!I' % pid for pid in cmd.split()[2:-3]]),
+                 '') for cmd in cmds]
+
+    js.shell.run_pipelined.side_effect = llq
+    js._job_get_info = mock.Mock()
+
+    states = js.container_get_states(jobs)
+    assert (set(states) == set([rs.job.PENDING]))
+    assert (not js._job_get_info.called)
+
+    # all ids are covered, in command lines of bounded length
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) > 1)
+    for cmd in cmds:
+        assert (len(cmd) < loadljob._QUERY_LINE_MAX + 100)
+
+    assert ([pid for cmd in cmds for pid in cmd.split()[2:-3]] == pids)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_loadl_container_get_states()
+    test_loadl_line_length()
+
+
+# ------------------------------------------------------------------------------
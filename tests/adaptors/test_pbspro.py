@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the bulk job submission and state queries of the PBSPro adaptor.
+"""
+
+import radical.saga  as rs
+import radical.utils as ru
+
+from unittest import mock
+
+from radical.saga.adaptors.pbspro import pbsprojob
+
+JOB_MANAGER_ENDPOINT = 'pbspro+ssh://cheyenne.ucar.edu/'
+
+QSTAT_OUT = '''Job Id: 101.chadmin1
+    Job_Name = job.101
+    job_state = R
+    exec_host = r1i0n0/0*36+r1i0n1/0*36
+    ctime = Mon Mar  1 10:00:00 2021
+    stime = Mon Mar  1 10:01:00 2021
+Job Id: 102.chadmin1
+    Job_Name = job.102
+    job_state = F
+    Exit_status = 0
+Job Id: 103.chadmin1
+    Job_Name = job.103
+    job_state = F
+    Exit_status = 1
+'''
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(pbsprojob.PBSProJobService, '__init__', return_value=None)
+def test_pbspro_get_infos(mocked_init):
+
+    js = pbsprojob.PBSProJobService(api=None, adaptor=None)
+    js._adaptor   = pbsprojob.Adaptor()
+    js._logger    = js.shell = mock.Mock()
+    js._commands  = {'qstat': {'path'   : '/usr/bin/qstat',
+                               'version': 'pbs_version = 18.2.5'}}
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.jobs       = dict()
+    js.mt         = None
+
+    for pid in ['101', '102', '103', '104']:
+        job_id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job_id] = {'obj'         : mock.Mock(),
+                           'job_id'      : job_id,
+                           'name'        : None,
+                           'state'       : rs.job.PENDING,
+                           'exec_hosts'  : None,
+                           'returncode'  : None,
+                           'create_time' : None,
+                           'start_time'  : None,
+                           'end_time'    : None,
+                           'gone'        : False}
+
+    js.shell.run_pipelined.return_value = [(0, QSTAT_OUT, None)]
+    js._job_get_info = mock.Mock(return_value={'state': rs.job.DONE})
+
+    job_ids = sorted(js.jobs.keys())
+    infos   = js._job_get_infos(job_ids)
+
+    # one qstat call for all jobs
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) == 1)
+    assert ("qstat -fx '101' '102' '103' '104'" in cmds[0])
+
+    assert (infos[job_ids[0]]['state']      == rs.job.RUNNING)
+    assert (infos[job_ids[0]]['exec_hosts'] == ['r1i0n0/0*36', 'r1i0n1/0*36'])
+    assert (infos[job_ids[1]]['state']      == rs.job.DONE)
+    assert (infos[job_ids[2]]['state']      == rs.job.FAILED)
+
+    # jobs not reported by qstat are queried individually
+    js._job_get_info.assert_called_once_with(job_ids[3], reconnect=False)
+    assert (infos[job_ids[3]]['state']      == rs.job.DONE)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(pbsprojob.PBSProJobService, '__init__', return_value=None)
+def test_pbspro_container_run(mocked_init):
+
+    js = pbsprojob.PBSProJobService(api=None, adaptor=None)
+    js._logger    = js.shell = mock.Mock()
+    js._commands  = {'qstat': {'path'   : '/usr/bin/qstat',
+                               'version': 'pbs_version = 18.2.5'},
+                     'qsub' : {'path'   : '/usr/bin/qsub'}}
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.ppn        = 36
+    js.gres       = None
+    js.is_cray    = False
+    js.queue      = None
+    js.jobs       = dict()
+    js.mt         = None
+    js._array_max = 1000
+
+    js.shell.run_sync.side_effect = [(0, '1234[].chadmin1\n', None),
+                                     (0, '1235.chadmin1\n',   None)]
+
+    # jobs 0, 1, 3 only differ in arguments and output, and form an array job
+    jobs = list()
+    for idx in range(4):
+
+        jd = rs.job.Description()
+        jd.executable = '/bin/echo'
+        jd.arguments  = [str(idx)]
+        jd.output     = '/tmp/out.%d' % idx
+        jd.queue      = 'economy' if idx == 2 else 'regular'
+
+        job = mock.Mock()
+        job.get_description.return_value = jd
+        jobs.append(job)
+
+    js.container_run(jobs)
+
+    # one array job, one individual job
+    cmds = [call[0][0] for call in js.shell.run_sync.call_args_list]
+    assert (len(cmds) == 2)
+    assert ('#PBS -J 0-2\n'                    in cmds[0])
+    assert ('case \\$PBS_ARRAY_INDEX in\n'     in cmds[0])
+    assert ('exec 1>/tmp/out.3\n'              in cmds[0])
+    assert ('/tmp/out.2'                   not in cmds[0])
+    assert ('#PBS -o /tmp/out.2'                in cmds[1])
+    assert ('#PBS -J'                      not in cmds[1])
+
+    # subjobs map back to the individual jobs
+    ids = [job._adaptor._id for job in jobs]
+    assert (ids == ['[%s]-[1234[0]]' % js.rm, '[%s]-[1234[1]]' % js.rm,
+                    '[%s]-[1235]'    % js.rm, '[%s]-[1234[2]]' % js.rm])
+
+    for job in jobs:
+        assert (job._adaptor._started)
+        assert (js.jobs[job._adaptor._id]['state'] == rs.job.PENDING)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(pbsprojob.PBSProJobService, '__init__', return_value=None)
+def test_pbspro_array_support(mocked_init):
+
+    assert (pbsprojob._pbspro_version('pbs_version = 18.2.5')   == (18, 2))
+    assert (pbsprojob._pbspro_version('pbs_version = 2021.1.3') == (2021, 1))
+    assert (pbsprojob._pbspro_version('pbs_version = PBSPro_13.1.0.160576')
+                                                                == (13, 1))
+    assert (pbsprojob._pbspro_version('Version: 6.1.2')         is None)
+
+    js = pbsprojob.PBSProJobService(api=None, adaptor=None)
+    js._logger    = js.shell = mock.Mock()
+    js._commands  = {'qstat': {'path'   : '/usr/bin/qstat',
+                               'version': 'pbs_version = 19.1.3'}}
+    js._array_max = 2
+    js.mt         = None
+
+    js._job_script      = mock.Mock(return_value='script')
+    js._split_script    = mock.Mock(return_value=('#PBS', 'body', 'task'))
+    js._qsub            = mock.Mock(return_value='1235')
+    js._job_array_run   = mock.Mock(return_value=['1234[0]', '1234[1]'])
+    js._job_register    = mock.Mock(side_effect=lambda job, bs_id: bs_id)
+
+    # arrays are limited to `array_max` subjobs
+    jobs = [mock.Mock() for _ in range(3)]
+    js.container_run(jobs)
+
+    js._job_array_run.assert_called_once()
+    js._qsub.assert_called_once_with('script')
+    assert ([job._adaptor._id for job in jobs] ==
+            ['1234[0]', '1234[1]', '1235'])
+
+    # TORQUE does not support array jobs
+    js._commands['qstat']['version'] = 'Version: 6.1.2'
+    jobs = [mock.Mock() for _ in range(3)]
+    js.container_run(jobs)
+
+    for job in jobs:
+        job.run.assert_called_once_with()
+
+
+# ------------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    test_pbspro_get_infos()
+    test_pbspro_container_run()
+    test_pbspro_array_support()
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the bulk job state retrieval of the SGE adaptor.
+"""
+
+import radical.saga       as rs
+import radical.saga.url   as rsurl
+
+from unittest import mock
+
+from radical.saga.adaptors.sge import sgejob
+
+
+QSTAT_XML = """<?xml version='1.0'?>
+<job_info  xmlns:xsd="http://arc.liv.ac.uk/repos/darcs/sge/source/dist/util/resources/schemas/qstat/qstat.xsd">
+  <queue_info>
+    <job_list state="running">
+      <JB_job_number>101</JB_job_number>
+      <JAT_prio>0.55500</JAT_prio>
+      <JB_name>job_101</JB_name>
+      <JB_owner>user</JB_owner>
+      <state>r</state>
+      <JAT_start_time>2013-06-24T17:24:50</JAT_start_time>
+      <queue_name>all.q@node1</queue_name>
+      <slots>1</slots>
+    </job_list>
+    <job_list state="running">
+      <JB_job_number>103</JB_job_number>
+      <JAT_prio>0.55500</JAT_prio>
+      <JB_name>job_103</JB_name>
+      <JB_owner>user</JB_owner>
+      <state>Eqw</state>
+      <JAT_start_time>2013-06-24T17:24:50</JAT_start_time>
+      <queue_name>all.q@node2</queue_name>
+      <slots>1</slots>
+    </job_list>
+  </queue_info>
+  <job_info>
+    <job_list state="pending">
+      <JB_job_number>102</JB_job_number>
+      <JAT_prio>0.00000</JAT_prio>
+      <JB_name>job_102</JB_name>
+      <JB_owner>user</JB_owner>
+      <state>qw</state>
+      <JB_submission_time>2013-06-24T17:24:43</JB_submission_time>
+      <queue_name></queue_name>
+      <slots>1</slots>
+    </job_list>
+  </job_info>
+</job_info>
+"""
+
+REMOTE_INFO = """sge_job_id: 104
+hostname: node3
+jobname: job_104
+qsub_time: 1372094683
+start_time: 1372094690
+exit_status: 0
+end_time: 1372095890
+sge_job_id: 105
+sge_job_id: 106
+"""
+
+QACCT = """jobnumber    103
+jobname      job_103
+hostname     node2
+failed       26  : opening input/output file
+exit_status  0
+jobnumber    105
+jobname      job_105
+hostname     node4
+failed       0
+exit_status  3
+"""
+
+
+# ------------------------------------------------------------------------------
+#
+class _Stream(list):
+    """
+    stands in for a `PTYStream` over the given output
+    """
+
+    def __init__(self, out, ret=0):
+        super(_Stream, self).__init__(out.split('\n'))
+        self.ret = ret
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+# ------------------------------------------------------------------------------
+#
+def _get_service():
+
+    with mock.patch.object(sgejob.SGEJobService, '__init__',
+                           return_value=None):
+        js = sgejob.SGEJobService(api=None, adaptor=None)
+
+    js._adaptor     = sgejob.Adaptor()
+    js._logger      = js.shell = mock.Mock()
+    js._commands    = {'qstat': {'path': 'qstat'},
+                       'qacct': {'path': 'qacct'},
+                       'qdel' : {'path': 'qdel'}}
+    js.rm           = rsurl.Url('sge+ssh://sge.example.org/')
+    js.jobs         = dict()
+    js.accounting   = True
+    js.temp_path    = '/tmp/sge_job'
+    js._qstat_lock  = sgejob.threading.Lock()
+    js._qstat_cache = None
+    js._qstat_pids  = set()
+    js._qstat_time  = 0.0
+    js._missing     = dict()
+
+    return js
+
+
+# ------------------------------------------------------------------------------
+#
+def test_sge_job_get_states():
+
+    js      = _get_service()
+    job_ids = list()
+
+    for pid in ['101', '102', '103', '104', '105', '106']:
+        job_id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job_id] = {'state'       : rs.job.PENDING,
+                           'name'        : None,
+                           'exec_hosts'  : None,
+                           'returncode'  : None,
+                           'create_time' : None,
+                           'start_time'  : None,
+                           'end_time'    : None,
+                           'gone'        : False}
+        job_ids.append(job_id)
+
+    js.shell.run_stream.side_effect = [_Stream(QSTAT_XML),
+                                       _Stream(REMOTE_INFO),
+                                       _Stream(QACCT)]
+
+    states = js._job_get_states(job_ids)
+
+    # one qstat call for all jobs, one lookup of the remote job info and one
+    # accounting pass for all jobs which left the queue
+    cmds = [call[0][0] for call in js.shell.run_stream.call_args_list]
+    assert (len(cmds) == 3)
+    assert (cmds[0].startswith('qstat -xml'))
+    assert ('for id in 104 105 106;' in cmds[1])
+    assert ('for id in 103 105 106;' in cmds[2])
+    assert ('qacct -j $id' in cmds[2])
+
+    assert ([states[job_id] for job_id in job_ids] ==
+            [rs.job.RUNNING, rs.job.PENDING, rs.job.FAILED,
+             rs.job.DONE,    rs.job.DONE,    rs.job.PENDING])
+
+    assert (js.jobs[job_ids[0]]['exec_hosts']  == 'node1')
+    assert (js.jobs[job_ids[0]]['start_time']  == 1372094690.0)
+    assert (js.jobs[job_ids[1]]['create_time'] == 1372094683.0)
+    assert (js.jobs[job_ids[1]]['name']        == 'job_102')
+    assert (js.jobs[job_ids[3]]['returncode']  == 0)
+    assert (js.jobs[job_ids[4]]['returncode']  == 3)
+
+    # only the jobs known to the service are kept from the qstat output
+    assert (sorted(js._qstat_cache.keys()) == ['101', '102', '103'])
+
+    # the job not found anywhere keeps its state for a while
+    assert ('106' in js._missing)
+
+    # within the qstat interval, the qstat results are reused
+    js.shell.run_stream.reset_mock()
+    js.shell.run_stream.side_effect = [_Stream('sge_job_id: 106'),
+                                       _Stream('')]
+    js._job_get_states(job_ids)
+
+    cmds = [call[0][0] for call in js.shell.run_stream.call_args_list]
+    assert (len(cmds) == 2)
+    assert ('for id in 106;' in cmds[0])
+
+    # jobs which did not show up in the accounting eventually fail, without
+    # affecting the other jobs
+    js._missing['106'] -= sgejob._ACCOUNTING_DELAY + 1
+    js.shell.run_stream.reset_mock()
+    js.shell.run_stream.side_effect = [_Stream('sge_job_id: 106'),
+                                       _Stream('')]
+    states = js._job_get_states(job_ids)
+
+    assert (states[job_ids[5]] == rs.job.FAILED)
+    assert (states[job_ids[0]] == rs.job.RUNNING)
+    assert ('106' not in js._missing)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_sge_line_length():
+
+    js   = _get_service()
+    pids = [str(1000000 + i) for i in range(1000)]
+
+    js.shell.run_stream.side_effect = lambda cmd: _Stream('')
+    js.shell.run_sync.return_value  = (0, '', '')
+
+    assert (js._get_remote_job_infos(pids)      == dict())
+    assert (js._jobs_info_from_accounting(pids) == dict())
+
+    jobs = list()
+    for pid in pids:
+        job = mock.Mock()
+        job._adaptor._started = True
+        job._adaptor._id      = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job._adaptor._id] = {'state': rs.job.RUNNING}
+        jobs.append(job)
+
+    js.container_cancel(jobs, None)
+
+    # all ids and paths are covered, in command lines of bounded length
+    cmds = [call[0][0] for call in js.shell.run_stream.call_args_list] + \
+           [call[0][0] for call in js.shell.run_sync.call_args_list]
+    assert (len(cmds) > 6)
+    for cmd in cmds:
+        assert (len(cmd) < 2 * sgejob._QUERY_LINE_MAX)
+
+    for prefix in ['for id in', 'qdel']:
+        found = list()
+        for cmd in cmds:
+            if cmd.startswith(prefix):
+                found += cmd.split(';')[0].split()[len(prefix.split()):]
+        assert (found == pids * (2 if prefix == 'for id in' else 1))
+
+    paths = list()
+    for cmd in cmds:
+        if cmd.startswith('rm -f'):
+            paths += cmd.split()[2:]
+    assert (paths == ['/tmp/sge_job/%s' % pid for pid in pids])
+
+
+# ------------------------------------------------------------------------------
+#
+def test_sge_container_cancel():
+
+    js   = _get_service()
+    jobs = list()
+
+    for pid in ['101', '102']:
+        job = mock.Mock()
+        job._adaptor._started = True
+        job._adaptor._id      = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job._adaptor._id] = {'state': rs.job.RUNNING}
+        jobs.append(job)
+
+    js.shell.run_sync.return_value = (0, '', '')
+
+    js.container_cancel(jobs, None)
+
+    cmds = [call[0][0] for call in js.shell.run_sync.call_args_list]
+    assert (cmds[0].strip() == 'qdel 101 102')
+    assert (cmds[1] == 'rm -f /tmp/sge_job/101 /tmp/sge_job/102')
+
+    for job in jobs:
+        assert (js.jobs[job._adaptor._id]['state'] == rs.job.CANCELED)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_sge_job_get_states()
+    test_sge_line_length()
+    test_sge_container_cancel()
+
+
+# ------------------------------------------------------------------------------
+
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the wrapper shell pool of the shell job adaptor.
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+
+import threading as mt
+
+import pytest
+
+import radical.utils as ru
+
+from unittest import mock
+
+from radical.saga.adaptors.shell import shell_job
+
+JOB_MANAGER_ENDPOINT = 'ssh://localhost/'
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(shell_job.ShellJobService, '__init__', return_value=None)
+def test_shell_pool(mocked_init):
+
+    js = shell_job.ShellJobService(api=None, adaptor=None)
+    js._adaptor   = shell_job.Adaptor()
+    js._logger    = mock.Mock()
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js._shells    = [[mock.Mock(), mt.RLock()], [mock.Mock(), mt.RLock()]]
+    js._idle      = list(js._shells)
+    js._pool_cond = mt.Condition()
+
+    for shell, _ in js._shells:
+        shell.run_sync.return_value = (0, 'OK\n0\n', None)
+
+    # concurrent leases get different shells
+    with js._pooled_shell() as (shell_1, _):
+        with js._pooled_shell() as (shell_2, _):
+            assert (shell_1 is not shell_2)
+            assert (not js._idle)
+
+    assert (len(js._idle) == 2)
+
+    # a lease waits for a shell to be returned if all shells are busy
+    leased  = list()
+    release = mt.Event()
+
+    def lease():
+        with js._pooled_shell() as (shell, _):
+            leased.append(shell)
+            release.wait()
+
+    threads = [mt.Thread(target=lease) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    for _ in range(100):
+        if len(leased) == 2:
+            break
+        release.wait(0.01)
+
+    assert (len(leased) == 2)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert (len(leased) == 3)
+    assert (len(js._idle) == 2)
+
+    # job requests are served by the pool
+    assert (js._job_get_exit_code('[%s]-[1234]' % js.rm) == 0)
+    calls = [shell.run_sync.call_count for shell, _ in js._shells]
+    assert (sum(calls) == 1)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(shell_job.ShellJobService, '__init__', return_value=None)
+def test_container_get_states(mocked_init):
+
+    js = shell_job.ShellJobService(api=None, adaptor=None)
+    js._adaptor   = shell_job.Adaptor()
+    js._logger    = mock.Mock()
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js._shells    = [[mock.Mock(), mt.RLock()]]
+    js._idle      = list(js._shells)
+    js._pool_cond = mt.Condition()
+
+    shell = js._shells[0][0]
+    shell.find_prompt.side_effect = [
+            (0, 'OK\n1 RUNNING\n2 DONE\n3 NOK\n'),
+            (0, 'BULK COMPLETED\n')]
+
+    jobs = list()
+    for pid in ['1', '2', '3']:
+        job = mock.Mock()
+        job.id = '[%s]-[%s]' % (js.rm, pid)
+        jobs.append(job)
+
+    states = js.container_get_states(jobs)
+
+    # all states are requested with a single `STATES` command
+    shell.run_async.assert_called_once_with('BULK\nSTATES 1 2 3\nBULK_RUN\n')
+    assert (shell.find_prompt.call_count == 2)
+
+    assert (states == [shell_job.api.RUNNING, shell_job.api.DONE])
+    jobs[0]._adaptor._update_state.assert_called_once_with(
+                                                     shell_job.api.RUNNING)
+    jobs[1]._adaptor._update_state.assert_called_once_with(
+                                                     shell_job.api.DONE)
+    jobs[2]._adaptor._set_state.assert_called_once_with(shell_job.api.FAILED)
+
+    # long id lists are split over multiple `STATES` commands
+    pids = [str(100000 + i) for i in range(1000)]
+    shell.run_async.reset_mock()
+    shell.find_prompt.side_effect = [(0, 'OK\n')] * 10
+
+    states = js._job_get_states(pids)
+    cmds   = shell.run_async.call_args[0][0].split('\n')[1:-2]
+
+    assert (len(cmds) > 1)
+    assert (all(len(cmd) < shell_job._STATES_LINE_MAX for cmd in cmds))
+    assert (sum(len(cmd.split()) - 1 for cmd in cmds) == len(pids))
+    assert (states == {pid: 'UNKNOWN' for pid in pids})
+
+
+# ------------------------------------------------------------------------------
+#
+def test_monitor_resume():
+
+    js = mock.Mock()
+    js._adaptor     = shell_job.Adaptor()
+    js.base_workdir = '/tmp/saga_base/'
+    job             = mock.Mock()
+    js.get_job.return_value = job
+
+    def monitor(lines):
+        channel = mock.Mock()
+        channel.alive.side_effect = [True] * len(lines) + [False]
+        channel.find.side_effect  = [(0, '%s\n' % line) for line in lines]
+        mon = shell_job._job_state_monitor(js=js, channel=channel,
+                                           rm=ru.Url(JOB_MANAGER_ENDPOINT),
+                                           logger=mock.Mock())
+        mon.run()
+        return channel
+
+    # replayed history is not counted, events of the live journal are
+    channel = monitor(['1.0:DONE:0 ', 'JOURNAL 3 5', '2.0:RUNNING: ',
+                       '2.0:DONE:0 '])
+    channel.run_async.assert_called_once_with('MONITOR')
+    assert (job._adaptor._set_state.call_count == 3)
+    assert (list(js._adaptor._journals.values()) == [['3', 7]])
+
+    # the next monitor resumes from there
+    channel = monitor(['JOURNAL 3 7', '3.0:RUNNING: '])
+    channel.run_async.assert_called_once_with('MONITOR 3 7')
+    assert (list(js._adaptor._journals.values()) == [['3', 8]])
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(shell_job.pty_shell, 'PTYShell')
+def test_staging_manager(mocked_shell):
+
+    release   = mt.Event()
+    shells    = list()
+    started   = list()
+    transfers = list()
+
+    def stage_to_remote_batch(pairs):
+        started.append(pairs)
+        release.wait(10)
+        transfers.extend(pairs)
+        return [None] * len(pairs)
+
+    def stage_to_remote(src, tgt):
+        transfers.append((src, tgt))
+
+    def stage_from_remote_batch(pairs):
+        transfers.extend(pairs)
+        return [shell_job.rse.DoesNotExist('no such file')
+                if src == 'missing' else None for src, _ in pairs]
+
+    # mock call counting is not thread safe, so we count copy channels here
+    def new_shell(*args, **kwargs):
+        shell = mock.Mock()
+        shell.stage_to_remote_batch.side_effect   = stage_to_remote_batch
+        shell.stage_to_remote.side_effect         = stage_to_remote
+        shell.stage_from_remote_batch.side_effect = stage_from_remote_batch
+        shells.append(shell)
+        return shell
+
+    mocked_shell.side_effect = new_shell
+
+    staging = shell_job._staging_manager(rm=ru.Url(JOB_MANAGER_ENDPOINT),
+                                         session=None, logger=mock.Mock(),
+                                         cfg={}, size=2)
+    try:
+        jd_1 = mock.Mock(file_transfer=['shared > shared', 'in_1 > in_1',
+                                        'out_1 < out_1'])
+        jd_2 = mock.Mock(file_transfer=['shared > shared', 'in_2 > in_2',
+                                        'in_* > dir', 'missing < missing'])
+
+        # identical pending transfers are shared across jobs
+        futures_1 = staging.stage_input(jd_1)
+        futures_2 = staging.stage_input(jd_2)
+        assert (futures_1[0] is futures_2[0])
+        assert (not staging.done(futures_1 + futures_2))
+
+        # the new transfers of each job are batched, and batches run
+        # concurrently, on at most `size` copy channels
+        for _ in range(100):
+            if len(started) == 2:
+                break
+            release.wait(0.01)
+        assert (sorted(started) == [[('in_2', 'in_2')],
+                                    [('shared', 'shared'), ('in_1', 'in_1')]])
+
+        release.set()
+        staging.wait(futures_1 + futures_2)
+
+        assert (staging.done(futures_1 + futures_2))
+        # wildcards are staged one by one
+        assert (sorted(transfers) == [('in_*', 'dir'), ('in_1', 'in_1'),
+                                      ('in_2', 'in_2'), ('shared', 'shared')])
+        assert (len(shells) == 2)
+
+        # output staging swaps source and target, and reports errors on wait
+        staging.wait(staging.stage_output(jd_1))
+        assert (('out_1', 'out_1') in transfers)
+
+        with pytest.raises(shell_job.rse.DoesNotExist):
+            staging.wait(staging.stage_output(jd_2))
+
+        assert (staging.stage_input(mock.Mock(file_transfer=None)) == [])
+
+    finally:
+        staging.close()
+
+
+# ------------------------------------------------------------------------------
+#
+def test_python_agent():
+
+    base  = tempfile.mkdtemp()
+    agent = '%s/shell_agent.py' % os.path.dirname(shell_job.__file__)
+    proc  = subprocess.Popen([sys.executable, agent, base],
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def send(cmd):
+        proc.stdin.write(cmd.encode('utf-8'))
+        proc.stdin.flush()
+
+    def find_prompt():
+        lines = list()
+        while True:
+            line = proc.stdout.readline().decode('utf-8')
+            assert (line), lines
+            match = re.match(r'^PROMPT-(\d+)->$', line.strip())
+            if match:
+                return int(match.group(1)), lines
+            lines.append(line.rstrip('\n'))
+
+    try:
+        # the agent reports its pid, then prompts
+        _, lines = find_prompt()
+        assert (lines == ['PID: %d' % proc.pid])
+
+        send('RUN echo hello ; exit 3\n')
+        ret, lines = find_prompt()
+        assert (ret == 0 and lines[-2] == 'OK'), lines
+        job_id = lines[-1]
+
+        send('WAIT %s\n' % job_id)
+        assert (find_prompt() == (0, ['OK', 'FAILED']))
+
+        send('RESULT %s\n' % job_id)
+        assert (find_prompt() == (0, ['OK', '3']))
+
+        send('STDOUT %s\n' % job_id)
+        assert (find_prompt() == (0, ['OK', b'hello\n'.hex()]))
+
+        send('STATE unknown\n')
+        assert (find_prompt() == (1, ['ERROR', 'pid unknown not known', '']))
+
+        # bulks report one prompt per command, plus one for the bulk itself
+        send('BULK\nRUN sleep 10\nRUN sleep 10\nBULK_RUN\n')
+        job_ids = [find_prompt()[1][-1] for _ in range(2)]
+        assert (find_prompt() == (0, ['OK', 'BULK COMPLETED']))
+
+        for job_id in job_ids:
+            send('CANCEL %s\n' % job_id)
+            assert (find_prompt()[1][0] == 'OK')
+            send('STATE %s\n' % job_id)
+            assert (find_prompt() == (0, ['OK', 'CANCELED']))
+
+        with open('%s/notifications' % base) as fin:
+            events = fin.read().split()
+        assert ('%s:CANCELED:' % job_ids[0] in events), events
+
+        send('QUIT\n')
+        assert (proc.wait(timeout=10) == 0)
+
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        shutil.rmtree(base)
+
+
+# ------------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+
+    test_shell_pool()
+    test_container_get_states()
+    test_monitor_resume()
+    test_staging_manager()
+    test_python_agent()
+
+# ------------------------------------------------------------------------------
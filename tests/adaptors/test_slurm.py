@@ -8,12 +8,17 @@ __license__   = 'MIT'
 Tests for the Slurm script generator function as well as the Slurm adaptor.
 """
 
+import threading
+
+import pytest
+
 import radical.saga  as rs
 import radical.utils as ru
 
 from unittest import mock
 
-from radical.saga.adaptors.slurm import slurm_job
+from radical.saga.adaptors.slurm   import slurm_job
+from radical.saga.adaptors.cpi.job import StateCache
 
 PROCESSES_PER_NODE   = 56
 JOB_MANAGER_ENDPOINT = 'slurm+ssh://frontera.tacc.utexas.edu/'
@@ -102,11 +107,326 @@ echo $test_env
     assert (js.jobs[job_id]['output'] == jd.output)
     assert (js.jobs[job_id]['error']  == jd.error)
 
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJobService, '__init__', return_value=None)
+def test_slurm_get_states(mocked_init):
+
+    js = slurm_job.SLURMJobService(api=None, adaptor=None)
+    js._logger = js.shell = mock.Mock()
+
+    squeue_out = '101|RUNNING\n102|PENDING\n'
+    sacct_out  = '103|COMPLETED\n103.batch|COMPLETED\n' \
+                 '104|CANCELLED by 900369\n104.batch|CANCELLED\n'
+
+    js.shell.run_pipelined.side_effect = [[(1, squeue_out, None)],
+                                          [(0, sacct_out,  None)]]
+
+    states = js._get_states(['101', '102', '103', '104', '105'])
+
+    assert (states == {'101': 'RUNNING',
+                       '102': 'PENDING',
+                       '103': 'COMPLETED',
+                       '104': 'CANCELLED'})
+
+    # one squeue for all jobs, one sacct for the jobs squeue did not report
+    squeue_cmds = js.shell.run_pipelined.call_args_list[0][0][0]
+    sacct_cmds  = js.shell.run_pipelined.call_args_list[1][0][0]
+
+    assert (len(squeue_cmds) == 1)
+    assert (len(sacct_cmds)  == 1)
+    assert ('squeue' in squeue_cmds[0])
+    assert ('--jobs=101,102,103,104,105' in squeue_cmds[0])
+    assert ('sacct' in sacct_cmds[0])
+    assert ('--jobs=103,104,105' in sacct_cmds[0])
+
+    # large job lists are split into chunks which fit the pty line limit
+    js.shell.run_pipelined.side_effect = None
+    js.shell.run_pipelined.return_value = [(0, '', None)]
+
+    pids = [str(i) for i in range(5000000, 5001200)]
+    js._get_states(pids)
+    cmds = js.shell.run_pipelined.call_args_list[-1][0][0]
+    assert (len(cmds) == 5)
+    assert (max([len(cmd) for cmd in cmds]) < 4095)
+    assert ([cmd.split('=')[-1] for cmd in cmds] ==
+            [','.join(chunk) for chunk in
+             rs.utils.misc.split_by_length(pids, 2000)])
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJobService, '__init__', return_value=None)
+def test_slurm_update_states(mocked_init):
+
+    js = slurm_job.SLURMJobService(api=None, adaptor=None)
+    js._mcond     = mock.MagicMock()
+    js._adaptor   = slurm_job.Adaptor()
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.mt         = mock.Mock()
+    js._monitored = dict()
+    js._missing   = dict()
+    js._logger    = mock.Mock()
+
+    jobs = dict()
+    for pid in ['101', '102']:
+        job        = mock.Mock()
+        job._id    = '[%s]-[%s]' % (js.rm, pid)
+        job._state = rs.job.PENDING
+
+        def set_state(state, job=job):
+            job._state = state
+
+        job._set_state.side_effect = set_state
+        jobs[pid] = job
+        js._monitor_job(job)
+
+    assert (sorted(js._monitored.keys()) == ['101', '102'])
+
+    js._get_states = mock.Mock(return_value={'101': 'RUNNING',
+                                             '102': 'COMPLETED'})
+    js._update_states()
+
+    js._get_states.assert_called_once()
+    assert (jobs['101']._state == rs.job.RUNNING)
+    assert (jobs['102']._state == rs.job.DONE)
+
+    # final jobs are not monitored anymore
+    assert (list(js._monitored.keys()) == ['101'])
+
+    # jobs which squeue and sacct do not report anymore are dropped after
+    # a couple of updates, and their state becomes unknown
+    js._get_states = mock.Mock(return_value=dict())
+    for _ in range(slurm_job._MISSING_MAX):
+        assert (list(js._monitored.keys()) == ['101'])
+        js._update_states()
+
+    assert (js._monitored == dict())
+    assert (jobs['101']._state == rs.job.UNKNOWN)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJobService, '__init__', return_value=None)
+def test_slurm_monitor_exit(mocked_init):
+
+    js = slurm_job.SLURMJobService(api=None, adaptor=None)
+    js._adaptor   = slurm_job.Adaptor()
+    js._logger    = mock.Mock()
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.mt         = None
+    js._monitored = dict()
+    js._missing   = dict()
+    js._waiters   = 0
+    js._mcond     = threading.Condition()
+    js._interval  = 10.0
+    js._wait_int  = 0.01
+
+    # the monitor gives up after repeated errors ...
+    js._update_states = mock.Mock(side_effect=RuntimeError('no squeue'))
+
+    job = mock.Mock()
+    job._id    = '[%s]-[101]' % js.rm
+    job._state = rs.job.PENDING
+    js._monitor_job(job)
+
+    js._waiters = 1
+    js.mt.join(10)
+    js._waiters = 0
+    assert (js._update_states.call_count == 3)
+
+    # ... and then clears its slot, so that waiting threads poll for themselves
+    assert (js.mt is None)
+
+    polls = list()
+
+    def poll():
+        polls.append(1)
+        if len(polls) == 2:
+            job._state = rs.job.DONE
+
+    assert (js._wait_states(lambda: job._state in rs.job.FINAL, poll, 10.0))
+    assert (len(polls) == 2)
+    assert (js._waiters == 0)
+
+    # ... and a new monitor is started on demand
+    js._update_states = mock.Mock()
+    js._monitor_job(job)
+    assert (js.mt is not None)
+    js.mt.stop()
+    js.mt.join(10)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJob, '__init__', return_value=None)
+def test_slurm_state_cache(mocked_init):
+
+    job = slurm_job.SLURMJob(api=None, adaptor=None)
+    job._id            = '[%s]-[101]' % JOB_MANAGER_ENDPOINT
+    job._state         = rs.job.PENDING
+    job._api           = lambda: None
+    job._state_cache   = StateCache(ttl=60.0)
+    job._job_get_state = mock.Mock(return_value=rs.job.RUNNING)
+
+    # first read queries the backend, second read is served from the cache
+    assert (job._get_state_cached() == rs.job.RUNNING)
+    assert (job._get_state_cached() == rs.job.RUNNING)
+    job._job_get_state.assert_called_once()
+
+    # states reported by the monitor are picked up without a query
+    job._set_state(rs.job.DONE)
+    assert (job._get_state_cached() == rs.job.DONE)
+    job._job_get_state.assert_called_once()
+
+    # final states are final
+    job._state_cache.update(job._id, rs.job.RUNNING)
+    assert (job._state_cache.get(job._id) == rs.job.DONE)
+
+    # stale states are queried again
+    job._state_cache = StateCache(ttl=0.0)
+    job._state       = rs.job.PENDING
+    job._get_state_cached()
+    job._get_state_cached()
+    assert (job._job_get_state.call_count == 3)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJobService, '__init__', return_value=None)
+def test_slurm_container_wait(mocked_init):
+
+    js = slurm_job.SLURMJobService(api=None, adaptor=None)
+    js._adaptor   = slurm_job.Adaptor()
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.mt         = mock.Mock()
+    js._monitored = dict()
+    js._waiters   = 0
+    js._mcond     = threading.Condition()
+
+    jobs = list()
+    for pid in ['101', '102', '103']:
+        job = mock.Mock()
+        job._adaptor._id      = '[%s]-[%s]' % (js.rm, pid)
+        job._adaptor._started = True
+        job._adaptor._state   = rs.job.PENDING
+
+        def set_state(state, cpi=job._adaptor):
+            cpi._state = state
+
+        job._adaptor._set_state.side_effect = set_state
+        jobs.append(job)
+
+    js._get_states = mock.Mock(return_value={'101': 'RUNNING',
+                                             '102': 'COMPLETED',
+                                             '103': 'PENDING'})
+
+    # one bulk query for all jobs
+    states = js.container_get_states(jobs)
+    assert (states == [rs.job.RUNNING, rs.job.DONE, rs.job.PENDING])
+    js._get_states.assert_called_once()
+    assert (sorted(js._get_states.call_args[0][0]) == ['101', '102', '103'])
+
+    # wait(ANY) returns the final job
+    assert (js.container_wait(jobs, rs.ANY, 1.0) is jobs[1])
+
+    # wait(ALL) times out, non-final jobs are handed to the state monitor
+    assert (js.container_wait(jobs, rs.ALL, 0.1) is None)
+    assert (sorted(js._monitored.keys()) == ['101', '103'])
+
+    # jobs slurm does not know about cannot be waited for
+    js._get_states = mock.Mock(return_value={'101': 'RUNNING'})
+    with pytest.raises(rs.IncorrectState):
+        js.container_get_states(jobs)
+    with pytest.raises(rs.IncorrectState):
+        js.container_wait(jobs, rs.ALL, -1.0)
+
+    # neither if the state monitor lost track of them
+    def lose_track():
+        jobs[2]._adaptor._state = rs.job.UNKNOWN
+
+    js._get_states = mock.Mock(return_value={'101': 'RUNNING',
+                                             '103': 'PENDING'})
+    js.mt.trigger.side_effect = lose_track
+    with pytest.raises(rs.IncorrectState):
+        js.container_wait(jobs, rs.ALL, -1.0)
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(slurm_job.SLURMJobService, '__init__', return_value=None)
+@mock.patch.object(slurm_job.SLURMJobService, '_handle_file_transfers')
+@mock.patch.object(slurm_job.SLURMJobService, '_monitor_job')
+def test_slurm_container_run(mocked_monitor, mocked_handle_ft, mocked_init):
+
+    js = slurm_job.SLURMJobService(api=None, adaptor=None)
+    js._ppn       = PROCESSES_PER_NODE
+    js._array_max = 1000
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.jobs       = {}
+    js._logger    = js.shell = mock.Mock()
+
+    scripts = list()
+
+    def get_slurm_script(src, tgt):
+        scripts.append(src)
+
+    js.shell.write_to_remote.side_effect = get_slurm_script
+    js.shell.run_sync.side_effect = [(0, 'Submitted batch job 200', None),
+                                     (0, 'Submitted batch job 201', None)]
+
+    # jobs 0, 1, 3 only differ in arguments and output, and form an array job
+    jobs = list()
+    for idx in range(4):
+
+        jd = rs.job.Description()
+        jd.executable = '/bin/echo'
+        jd.arguments  = [str(idx)]
+        jd.output     = 'out.%d' % idx
+        jd.queue      = 'development' if idx == 2 else 'normal'
+
+        job = mock.Mock()
+        job._adaptor.jd = jd
+        jobs.append(job)
+
+    js.container_run(jobs)
+
+    # one array job, one individual job
+    assert (len(scripts) == 2)
+    assert ('#SBATCH --array=0-2\n'            in scripts[0])
+    assert ('case "$SLURM_ARRAY_TASK_ID" in\n' in scripts[0])
+    assert ('exec 1>"out.3"\n'                 in scripts[0])
+    assert ('/bin/echo 3'                      in scripts[0])
+    assert ('out.2'                        not in scripts[0])
+    assert ('#SBATCH --output "out.2"\n'       in scripts[1])
+    assert ('--array'                      not in scripts[1])
+
+    # array tasks map back to the individual jobs
+    ids = [job._adaptor._id for job in jobs]
+    assert (ids == ['[%s]-[200_0]' % js.rm, '[%s]-[200_1]' % js.rm,
+                    '[%s]-[201]'   % js.rm, '[%s]-[200_2]' % js.rm])
+
+    for job in jobs:
+        assert (job._adaptor._started)
+        job._adaptor._set_state.assert_called_once_with(rs.job.PENDING)
+        assert (js.jobs[job._adaptor._id]['output'] == job._adaptor.jd.output)
+
+    assert (mocked_monitor.call_count == 4)
+
+
 # ------------------------------------------------------------------------------
 
 
 if __name__ == '__main__':
 
     test_slurm_generator()
+    test_slurm_get_states()
+    test_slurm_update_states()
+    test_slurm_monitor_exit()
+    test_slurm_state_cache()
+    test_slurm_container_wait()
+    test_slurm_container_run()
 
 # ------------------------------------------------------------------------------
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the bulk job state queries of the TORQUE adaptor.
+"""
+
+import radical.saga  as rs
+import radical.utils as ru
+
+from unittest import mock
+
+from radical.saga.adaptors.torque import torquejob
+
+JOB_MANAGER_ENDPOINT = 'torque+ssh://cluster.example.org/'
+
+QSTAT_OUT = '''Job Id: 101.cluster
+    job_state = R
+    exec_host = node01/0+node01/1
+Job Id: 102.cluster
+    job_state = Q
+'''
+
+
+# ------------------------------------------------------------------------------
+#
+@mock.patch.object(torquejob.TORQUEJobService, '__init__', return_value=None)
+def test_torque_get_infos(mocked_init):
+
+    js = torquejob.TORQUEJobService(api=None, adaptor=None)
+    js._adaptor   = torquejob.Adaptor()
+    js._logger    = js.shell = mock.Mock()
+    js._commands  = {'qstat': '/usr/bin/qstat'}
+    js.rm         = ru.Url(JOB_MANAGER_ENDPOINT)
+    js.jobs       = dict()
+    js.mt         = None
+
+    pids = ['101', '102'] + [str(pid) for pid in range(5000000, 5001000)]
+    for pid in pids:
+        job_id = '[%s]-[%s]' % (js.rm, pid)
+        js.jobs[job_id] = {'obj'         : mock.Mock(),
+                           'job_id'      : job_id,
+                           'name'        : None,
+                           'state'       : rs.job.PENDING,
+                           'exec_hosts'  : None,
+                           'returncode'  : None,
+                           'create_time' : None,
+                           'start_time'  : None,
+                           'end_time'    : None,
+                           'gone'        : False}
+
+    js.shell.run_pipelined.return_value = [(0, QSTAT_OUT, None)]
+    js._job_get_info = mock.Mock(return_value={'state': rs.job.DONE})
+
+    job_ids = ['[%s]-[%s]' % (js.rm, pid) for pid in pids]
+    infos   = js._job_get_infos(job_ids)
+
+    # long job lists are split into several qstat calls, which all fit the
+    # pty line length limit, and which together query each job once
+    cmds = js.shell.run_pipelined.call_args[0][0]
+    assert (len(cmds) > 1)
+    assert (max([len(cmd) for cmd in cmds]) < 4095)
+
+    queried = list()
+    for cmd in cmds:
+        queried += cmd.split(' | ')[0].split()[4:]
+    assert (queried == pids)
+
+    assert (infos[job_ids[0]]['state'] == rs.job.RUNNING)
+    assert (infos[job_ids[1]]['state'] == rs.job.PENDING)
+
+    # jobs not reported by qstat are queried individually
+    assert (js._job_get_info.call_count == len(pids) - 2)
+    assert (infos[job_ids[2]]['state'] == rs.job.DONE)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_torque_get_infos()
+
+
+# ------------------------------------------------------------------------------
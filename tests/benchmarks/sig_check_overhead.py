@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+'''
+Measure the per-call overhead of the API signature checks (`rus.takes`,
+`rus.returns`).  The benchmark runs the same set of API calls in two
+subprocesses, one with `RADICAL_SAGA_SIG_CHECK=true` and one in production
+mode (`RADICAL_SAGA_SIG_CHECK=false`), and reports the time per call for both.
+
+    python sig_check_overhead.py [iterations]
+'''
+
+import os
+import sys
+import json
+import timeit
+import subprocess
+
+
+# ------------------------------------------------------------------------------
+#
+def measure(iterations):
+
+    import radical.saga as rs
+
+    jd  = rs.job.Description()
+    url = rs.Url('ssh://localhost/tmp/')
+
+    def attr_set():
+        jd.executable = '/bin/date'
+
+    def attr_get():
+        return jd.executable
+
+    def url_create():
+        return rs.Url('ssh://localhost/tmp/')
+
+    def url_get():
+        return url.host
+
+    def desc_create():
+        return rs.job.Description()
+
+    ret = dict()
+    for name, call in [('attribute set',      attr_set),
+                       ('attribute get',      attr_get),
+                       ('url create',         url_create),
+                       ('url property',       url_get),
+                       ('description create', desc_create)]:
+        call()
+        ret[name] = timeit.timeit(call, number=iterations) / iterations
+
+    return ret
+
+
+# ------------------------------------------------------------------------------
+#
+def run(mode, iterations):
+
+    env = dict(os.environ)
+    env['RADICAL_SAGA_SIG_CHECK'] = mode
+
+    out = subprocess.check_output([sys.executable, __file__, '--measure',
+                                   str(iterations)], env=env)
+    return json.loads(out.decode('utf-8').strip().split('\n')[-1])
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--measure':
+        print(json.dumps(measure(int(sys.argv[2]))))
+        sys.exit(0)
+
+    iterations = 10000
+    if len(sys.argv) > 1:
+        iterations = int(sys.argv[1])
+
+    checked    = run('true',  iterations)
+    production = run('false', iterations)
+
+    print('%-20s  %12s  %12s  %8s' % ('call', 'checked', 'production',
+                                      'speedup'))
+    for name in checked:
+        print('%-20s  %10.2fus  %10.2fus  %7.1fx'
+              % (name, checked[name] * 1e6, production[name] * 1e6,
+                 checked[name] / production[name]))
+
+
+# ------------------------------------------------------------------------------
+
@@ -57,6 +57,28 @@ def test_environment ():
         assert (False), "expected BadParameter exception, got %s" % se
 
 
+def test_shared_schema ():
+    """ Test that descriptions share attribute schemas, but not values """
+
+    jd1 = rs.job.Description ()
+    jd2 = rs.job.Description ()
+
+    a1  = jd1._attributes_t_init ()['attributes']
+    a2  = jd2._attributes_t_init ()['attributes']
+    assert (a1['executable'].schema is a2['executable'].schema)
+
+    jd1.executable = '/bin/date'
+    jd1.system_architecture['arch'] = 'x86'
+    assert (jd2.executable          is None)
+    assert (jd2.system_architecture == {})
+    assert (jd1.system_architecture == {'arch': 'x86'})
+
+    # checks and callbacks are per instance
+    jd1.add_callback ('executable', lambda key, val, obj: True)
+    assert (len(a1['executable'].callbacks) == 1)
+    assert (len(a2['executable'].callbacks) == 0)
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
@@ -65,6 +87,7 @@ if __name__ == '__main__':
     test_environment_list()
     test_environment_dict()
     test_environment()
+    test_shared_schema()
 
 
 # ------------------------------------------------------------------------------
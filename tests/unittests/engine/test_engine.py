@@ -10,7 +10,12 @@ __license__   = "MIT"
 
 import os
 import sys
+import json
+import shutil
 import pprint
+import tempfile
+
+import radical.utils as ru
 
 from   radical.saga.engine.engine import Engine
 
@@ -116,6 +121,209 @@ def test_load_broken_adaptor():
     sys.path = old_sys_path
 
 
+def test_load_adaptor_lazy():
+    """ Test that an adaptor with static adaptor info is only loaded when it
+    is used
+    """
+    # store old sys.path
+    old_sys_path = sys.path
+    path = os.path.split(os.path.abspath(__file__))[0]
+    sys.path.append(path)
+
+    registry = {'adaptor_registry' : ['mockadaptor_enabled'],
+                'adaptor_info'     : {'mockadaptor_enabled' : {
+                                        'name'    : 'radical.saga.adaptors.mock',
+                                        'schemas' : ['mock'],
+                                        'cpis'    : ['radical.saga.job.Job']}}}
+    Engine()._load_adaptors(registry)
+
+    # the adaptor is registered, but not loaded
+    mocks = Engine().loaded_adaptors()['radical.saga.job.Job']['mock']
+    assert len(mocks) == 1
+    assert mocks[0]['cpi_class']        is None
+    assert mocks[0]['adaptor_instance'] is None
+
+    # looking for the adaptor loads it
+    names = Engine().find_adaptors('radical.saga.job.Job', 'mock')
+    assert names == ['radical.saga.adaptors.mock']
+
+    mocks = Engine().loaded_adaptors()['radical.saga.job.Job']['mock']
+    assert len(mocks) == 1
+    assert mocks[0]['cpi_class'].__name__ == 'MockJob'
+    assert mocks[0]['adaptor_instance'] is not None
+
+    # restore sys.path
+    sys.path = old_sys_path
+
+
+def test_load_broken_adaptor_lazy():
+    """ Test that a lazily loaded adaptor which fails its sanity_check() is
+    removed from the registry
+    """
+    # store old sys.path
+    old_sys_path = sys.path
+    path = os.path.split(os.path.abspath(__file__))[0]
+    sys.path.append(path)
+
+    registry = {'adaptor_registry' : ['mockadaptor_broken'],
+                'adaptor_info'     : {'mockadaptor_broken' : {
+                                        'name'    : 'radical.saga.adaptors.mock',
+                                        'schemas' : ['mock'],
+                                        'cpis'    : ['radical.saga.job.Job']}}}
+    Engine()._load_adaptors(registry)
+    assert len(Engine().loaded_adaptors()) == 1
+
+    assert Engine().find_adaptors('radical.saga.job.Job', 'mock') == []
+    assert len(Engine().loaded_adaptors()) == 0
+
+    # restore sys.path
+    sys.path = old_sys_path
+
+
+def test_static_adaptor_info():
+    """ Test that the static adaptor info in the registry config matches the
+    adaptor info the adaptors register -- the lazy registration relies on it
+    """
+    registry = ru.Config('radical.saga.registry')
+    infos    = registry['adaptor_info']
+
+    for module_name, info in infos.items():
+
+        assert module_name in registry['adaptor_registry'], module_name
+
+        adaptor_info = ru.import_module(module_name)._ADAPTOR_INFO
+        cpi_types    = set([cpi['type'] for cpi in adaptor_info['cpis']])
+
+        assert info['name']            == adaptor_info['name'],    module_name
+        assert sorted(info['schemas']) == sorted(adaptor_info['schemas']), \
+                                                                   module_name
+        assert sorted(info['cpis'])    == sorted(cpi_types),       module_name
+
+
+def test_registry_cache():
+    """ Test that the results of adaptor loads are cached for later engine
+    instances
+    """
+    # store old sys.path
+    old_sys_path = sys.path
+    path = os.path.split(os.path.abspath(__file__))[0]
+    sys.path.append(path)
+
+    tmp      = tempfile.mkdtemp()
+    registry = {'adaptor_registry' : ['mockadaptor_enabled',
+                                      'mockadaptor_broken'],
+                'registry_cache'   : tmp}
+
+    # no cache yet: both adaptors are loaded, the broken one fails
+    Engine()._load_adaptors(registry)
+    mocks = Engine().loaded_adaptors()['radical.saga.job.Job']['mock']
+    assert len(mocks) == 1
+    assert mocks[0]['cpi_class'].__name__ == 'MockJob'
+
+    cache = Engine()._cache_file
+    assert os.path.dirname(cache) == tmp
+    with open(cache) as fin:
+        data = json.load(fin)
+    adaptors = data['adaptors']
+    assert 'mockadaptor_broken' not in adaptors
+    assert 'mockadaptor_broken' in data['failed']
+    assert adaptors['mockadaptor_enabled'] == {
+                                   'name'    : 'radical.saga.adaptors.mock',
+                                   'schemas' : ['mock'],
+                                   'cpis'    : ['radical.saga.job.Job']}
+
+    # with cache: the working adaptor is registered without loading it, the
+    # broken one is skipped
+    Engine()._load_adaptors(registry)
+    assert Engine()._cache_file == cache
+    mocks = Engine().loaded_adaptors()['radical.saga.job.Job']['mock']
+    assert len(mocks) == 1
+    assert mocks[0]['cpi_class'] is None
+
+    names = Engine().find_adaptors('radical.saga.job.Job', 'mock')
+    assert names == ['radical.saga.adaptors.mock']
+    assert 'mockadaptor_broken' in Engine()._cache_fails
+
+    # failed loads expire: the broken adaptor is tried again
+    Engine()._load_adaptors(dict(registry, registry_fail_ttl=0))
+    assert Engine()._cache_file == cache
+    assert 'mockadaptor_broken' in Engine()._cache_fails
+    with open(cache) as fin:
+        failed = json.load(fin)['failed']['mockadaptor_broken']
+    assert failed > data['failed']['mockadaptor_broken']
+
+    # a different registry uses a different cache
+    Engine()._load_adaptors({'adaptor_registry' : ['mockadaptor_enabled'],
+                             'registry_cache'   : tmp})
+    assert Engine()._cache_file != cache
+    assert len(os.listdir(tmp)) == 2
+
+    shutil.rmtree(tmp)
+
+    # restore sys.path
+    sys.path = old_sys_path
+
+
+def test_bind_cache():
+    """ Test that bind_adaptor tries the adaptor last bound first, and skips
+    adaptors which failed recently
+    """
+    calls = list()
+
+    class _Broken(object):
+        def __init__(self, api, adaptor):
+            calls.append('broken')
+            raise RuntimeError('broken')
+
+    class _Working(object):
+        def __init__(self, api, adaptor):
+            calls.append('working')
+
+    infos = [{'cpi_cname'        : '_Broken',
+              'cpi_class'        : _Broken,
+              'adaptor_name'     : 'broken',
+              'adaptor_instance' : 'broken'},
+             {'cpi_cname'        : '_Working',
+              'cpi_class'        : _Working,
+              'adaptor_name'     : 'working',
+              'adaptor_instance' : 'working'}]
+
+    Engine()._load_adaptors([])
+    Engine()._adaptor_registry = {'radical.saga.job.Job' : {'mock' : infos}}
+
+    cpi = Engine().bind_adaptor(None, 'radical.saga.job.Job', 'mock', None)
+    assert isinstance(cpi, _Working)
+    assert calls == ['broken', 'working']
+
+    # the working adaptor is tried first from now on
+    del calls[:]
+    for _ in range(10):
+        Engine().bind_adaptor(None, 'radical.saga.job.Job', 'mock', None)
+    assert calls == ['working'] * 10
+
+    # if the working adaptor fails, the recently failed one is skipped
+    del calls[:]
+    infos.append({'cpi_cname'        : '_Working',
+                  'cpi_class'        : _Working,
+                  'adaptor_name'     : 'other',
+                  'adaptor_instance' : 'other'})
+    infos[1]['cpi_class'] = _Broken
+    cpi = Engine().bind_adaptor(None, 'radical.saga.job.Job', 'mock', None)
+    assert isinstance(cpi, _Working)
+    assert calls == ['broken', 'working']
+
+    # recently failed adaptors are still tried as last resort
+    del calls[:]
+    infos[2]['cpi_class'] = _Broken
+    try:
+        Engine().bind_adaptor(None, 'radical.saga.job.Job', 'mock', None)
+        assert False
+    except Exception:
+        assert calls == ['broken'] * 3
+
+    Engine()._load_adaptors([])
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
@@ -128,6 +336,11 @@ if __name__ == '__main__':
     test_load_adaptor()
     test_load_adaptor_twice()
     test_load_broken_adaptor()
+    test_load_adaptor_lazy()
+    test_load_broken_adaptor_lazy()
+    test_static_adaptor_info()
+    test_registry_cache()
+    test_bind_cache()
 
 
 # ------------------------------------------------------------------------------
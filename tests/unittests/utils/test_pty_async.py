@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# pylint: disable=no-member
+
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2020, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+import asyncio
+
+import radical.utils                as ru
+import radical.saga                 as saga
+import radical.saga.utils.pty_shell as sups
+import radical.saga.utils.pty_async as supa
+
+
+# ------------------------------------------------------------------------------
+#
+def config():
+
+    ru.set_test_config(ns='radical.saga')
+    ru.add_test_config(ns='radical.saga', cfg_name='fork_localhost')
+
+    return ru.get_test_config()
+
+
+# ------------------------------------------------------------------------------
+#
+def test_async_ptyprocess_find () :
+    """ Test async pty_process writing and finding data """
+
+    async def _test () :
+        pty = supa.AsyncPTYProcess ("cat")
+        await pty.write ("______1_____2______3_____\n")
+        out = await pty.find (['2', '3'], timeout=1.0)
+        pty.finalize ()
+        return out
+
+    out = supa.run_coroutine (_test ())
+    assert (out == (0, '______1_____2')), "'%s' == '%s'" % \
+           (out ,  (0, '______1_____2'))
+
+
+# ------------------------------------------------------------------------------
+#
+def test_async_ptyprocess_find_chunks () :
+    """ Test async pty_process finding data which arrive in chunks """
+
+    async def _test () :
+        pty = supa.AsyncPTYProcess ("cat")
+
+        # feed the data like the loop callback would, in chunks which split
+        # the pattern and an escape sequence
+        def feed (data) :
+            pty.cache += data
+            pty._wakeup ()
+
+        chunks = ['x' * 5000 + 'aaa\x1b[3', '1mbb\x1b[0mX', 'Y\nrest']
+        for n, chunk in enumerate (chunks) :
+            pty.loop.call_later (0.1 * (n + 1), feed, chunk)
+
+        out  = await pty.find (['nomatch', 'a+bbXY$'], timeout=5.0)
+        rest = pty.cache
+        pty.finalize ()
+        return out, rest
+
+    out, rest = supa.run_coroutine (_test ())
+    assert (out  == (1, 'x' * 5000 + 'aaabbXY')), out
+    assert (rest == '\nrest'), rest
+
+
+# ------------------------------------------------------------------------------
+#
+def test_async_ptyprocess_exit () :
+    """ Test async pty_process which finishes unsuccessfully """
+
+    async def _test () :
+        pty = supa.AsyncPTYProcess ("false")
+        while pty.alive () :
+            await asyncio.sleep (0.01)
+        return pty
+
+    pty = supa.run_coroutine (_test ())
+    assert (pty.exit_code == 1), pty.exit_code
+    pty.finalize ()
+
+
+# ------------------------------------------------------------------------------
+#
+def test_async_ptyshell_run () :
+    """ Test async pty_shell running concurrent commands """
+    conf = config()
+
+    async def _test () :
+        shell = supa.AsyncPTYShell (saga.Url(conf.job_service_url),
+                                    conf.session)
+        await shell.initialize ()
+
+        cmds  = ["printf \"%d\"" % n for n in range(100)]
+        res   = await asyncio.gather (*[shell.run (cmd) for cmd in cmds])
+        nok   = await shell.run ("printf \"txt\" ; false")
+        sep   = await shell.run ("printf \"out\" ; ls /no/such/dir",
+                                 iomode=sups.SEPARATE)
+        shell.finalize ()
+        return res, nok, sep
+
+    res, nok, sep = supa.run_coroutine (_test ())
+
+    for n in range(100) :
+        assert (res[n] == (0, str(n), None)), "%s" % (repr(res[n]))
+
+    assert (nok == (1, 'txt', None))       , "%s" % (repr(nok))
+    assert (sep[0] != 0)                   , "%s" % (repr(sep))
+    assert (sep[1] == 'out')               , "%s" % (repr(sep))
+    assert ('/no/such/dir' in sep[2])      , "%s" % (repr(sep))
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_async_ptyprocess_find()
+    test_async_ptyprocess_find_chunks()
+    test_async_ptyprocess_exit()
+    test_async_ptyshell_run()
+
+
+# ------------------------------------------------------------------------------
+
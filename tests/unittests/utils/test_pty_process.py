@@ -5,8 +5,12 @@ __copyright__ = "Copyright 2013, The SAGA Project"
 __license__   = "MIT"
 
 import os
+import glob
 import time
+import shutil
 import signal
+import tempfile
+
 import radical.saga.utils.pty_process as supp
 
 
@@ -114,6 +118,48 @@ def test_ptyprocess_find () :
            (out ,  (0, '______1_____2'))
 
 
+# ------------------------------------------------------------------------------
+#
+def test_ptyprocess_find_chunks () :
+    """ Test pty_process matching data which arrive in chunks"""
+    # split an escape sequence and a multibyte character across chunks
+    cmd = "printf 'ab\\033[1' ; sleep 0.2 ; printf 'mcd \\303' ; sleep 0.2 ; " \
+          "printf '\\274 PROMPT> rest'"
+    pty = supp.PTYProcess (['sh', '-c', cmd])
+    out = pty.find (['PROMPT> '], timeout=2.0)
+    assert (out == (0, 'abcd \u00fc PROMPT> ')), "'%s' == '%s'" % \
+           (out ,  (0, 'abcd \u00fc PROMPT> '))
+
+    out = pty.read (timeout=1.0)
+    assert (out == 'rest'), "'%s' == '%s'" % (out , 'rest')
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyprocess_capture () :
+    """ Test pty_process capturing I/O into a trace file"""
+    tmp = tempfile.mkdtemp ()
+    try :
+        pty = supp.PTYProcess ("cat", cfg={'pty' : {'capture_dir' : tmp}})
+        pty.write ("______1______2_____3_____\n")
+        pty.write ("secret\n", nolog=True)
+        pty.find  (['secret\n'], timeout=1.0)
+        pty.finalize ()
+
+        fnames = glob.glob ('%s/*.cap' % tmp)
+        assert (len(fnames) == 1), fnames
+
+        recs  = list(supp.read_capture (fnames[0]))
+        wdata = b''.join ([rec[2] for rec in recs if rec[1] == 'w'])
+        rdata = b''.join ([rec[2] for rec in recs if rec[1] == 'r'])
+
+        assert (wdata == b'______1______2_____3_____\nXXXXXX\n'), wdata
+        assert (rdata.startswith (b'______1______2_____3_____\r\n')), rdata
+
+    finally :
+        shutil.rmtree (tmp)
+
+
 # ------------------------------------------------------------------------------
 #
 def test_ptyprocess_restart () :
@@ -144,6 +190,8 @@ if __name__ == '__main__':
     test_ptyprocess_stderr()
     test_ptyprocess_write()
     test_ptyprocess_find()
+    test_ptyprocess_find_chunks()
+    test_ptyprocess_capture()
     test_ptyprocess_restart()
 
 
@@ -6,6 +6,13 @@ __author__    = "Andre Merzky"
 __copyright__ = "Copyright 2013, The SAGA Project"
 __license__   = "MIT"
 
+import os
+import shutil
+import tempfile
+import threading                    as mt
+
+import pytest
+
 import radical.utils                as ru
 import radical.saga                 as saga
 import radical.saga.utils.pty_shell as sups
@@ -103,6 +110,253 @@ def test_ptyshell_prompt () :
     assert (not shell.alive ())
 
 
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_pipelined () :
+    """ Test pty_shell which runs pipelined commands """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+
+    cmds  = ["printf \"%d\"" % n for n in range(100)]
+    cmds += ["printf \"txt\" ; false"]
+
+    res = shell.run_pipelined (cmds)
+    assert (len(res) == 101)                , "%s" % (repr(res))
+    for n in range(100) :
+        assert (res[n] == (0, str(n), None)), "%s" % (repr(res[n]))
+    assert (res[100] == (1, 'txt', None))   , "%s" % (repr(res[100]))
+
+    res = shell.run_pipelined (["printf \"out\" ; ls /no/such/dir"],
+                               iomode=sups.SEPARATE)
+    ret, out, err = res[0]
+    assert (ret != 0)              , "%s" % (repr(ret))
+    assert (out == 'out')          , "%s" % (repr(out))
+    assert ('/no/such/dir' in err) , "%s" % (repr(err))
+
+    # shell must be back in ground state
+    txt = "______1______2_____3_____"
+    ret, out, _ = shell.run_sync ("printf \"%s\"" % txt)
+    assert (ret == 0)    , "%s"       % (repr(ret))
+    assert (out == txt)  , "%s == %s" % (repr(out), repr(txt))
+
+    assert (shell.alive ())
+    shell.finalize (True)
+    assert (not shell.alive ())
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_pipelined_concurrent () :
+    """ Test pty_shell with pipelined and sync commands from several threads """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+    errs  = list()
+
+    def pipelined (n) :
+        try :
+            for i in range (20) :
+                res = shell.run_pipelined (["printf \"%d.%d\"" % (n, i)])
+                assert (res == [(0, '%d.%d' % (n, i), None)]), repr(res)
+        except Exception as e :
+            errs.append (e)
+
+    def sync (n) :
+        try :
+            for i in range (20) :
+                ret, out, _ = shell.run_sync ("printf \"s%d.%d\"" % (n, i))
+                assert (out == 's%d.%d' % (n, i)), repr(out)
+        except Exception as e :
+            errs.append (e)
+
+    threads  = [mt.Thread (target=pipelined, args=[n]) for n in range (3)]
+    threads += [mt.Thread (target=sync,      args=[n]) for n in range (3)]
+    for thread in threads : thread.start ()
+    for thread in threads : thread.join  (60)
+
+    assert (not [t for t in threads if t.is_alive ()])
+    assert (not errs)   , "%s" % (repr(errs))
+
+    # overlong lines would be truncated by the pty, and are rejected
+    with pytest.raises (saga.BadParameter) :
+        shell.run_pipelined_async ("echo %s" % ('x' * 5000))
+    with pytest.raises (saga.BadParameter) :
+        shell.run_sync ("echo %s" % ('x' * 5000))
+
+    # waiting for pipelined commands can time out
+    future  = shell.run_pipelined_async ("sleep 1")
+    _, todo = shell.wait_pipelined ([future], timeout=0.1)
+    assert (future in todo)
+    _, todo = shell.wait_pipelined ([future])
+    assert (not todo)
+    assert (future.result () == (0, '', None))
+
+    shell.finalize (True)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_stream () :
+    """ Test pty_shell which streams command output line by line """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+
+    with shell.run_stream ("seq 1 1000") as stream :
+        lines = [line for line in stream]
+    assert (len(lines) == 1000)   , "%s" % (repr(len(lines)))
+    assert (lines[-1]  == '1000') , "%s" % (repr(lines[-1]))
+    assert (stream.ret == 0)      , "%s" % (repr(stream.ret))
+
+    stream = shell.run_stream ("echo txt ; false")
+    lines  = list(stream)
+    assert (lines      == ['txt']), "%s" % (repr(lines))
+    assert (stream.ret == 1)      , "%s" % (repr(stream.ret))
+
+    # closing a stream early drains the remaining output
+    stream = shell.run_stream ("seq 1 100000")
+    for line in stream :
+        if line == '10' :
+            break
+    stream.close ()
+
+    # shell must be back in ground state
+    txt = "______1______2_____3_____"
+    ret, out, _ = shell.run_sync ("printf \"%s\"" % txt)
+    assert (ret == 0)    , "%s"       % (repr(ret))
+    assert (out == txt)  , "%s == %s" % (repr(out), repr(txt))
+
+    assert (shell.alive ())
+    shell.finalize (True)
+    assert (not shell.alive ())
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_batch_stage () :
+    """ Test pty_shell batched file staging """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+    tmp   = tempfile.mkdtemp ()
+
+    try :
+        os.mkdir ('%s/src' % tmp)
+        os.mkdir ('%s/tgt' % tmp)
+        for name in ['a', 'b', 'c'] :
+            with open ('%s/src/%s' % (tmp, name), 'w') as fout :
+                fout.write (name)
+
+        # per-file results: a missing source does not fail other transfers
+        errors = shell.stage_to_remote_batch ([
+                        ('%s/src/a'    % tmp, '%s/tgt/x' % tmp),
+                        ('%s/src/nope' % tmp, '%s/tgt/'  % tmp),
+                        ('%s/src/b'    % tmp, '%s/tgt/'  % tmp)])
+
+        assert (errors[0] is None)                    , "%s" % (repr(errors))
+        assert (isinstance (errors[1], saga.DoesNotExist)), \
+                                                        "%s" % (repr(errors))
+        assert (errors[2] is None)                    , "%s" % (repr(errors))
+        assert (sorted(os.listdir ('%s/tgt' % tmp)) == ['b', 'x'])
+
+        errors = shell.stage_from_remote_batch ([
+                        ('%s/tgt/x' % tmp, '%s/y' % tmp),
+                        ('%s/src/c' % tmp, '%s/z' % tmp)])
+        assert (errors == [None, None])               , "%s" % (repr(errors))
+
+        with open ('%s/y' % tmp) as fin : assert (fin.read () == 'a')
+        with open ('%s/z' % tmp) as fin : assert (fin.read () == 'c')
+
+        assert (shell.stage_to_remote_batch ([]) == [])
+
+    finally :
+        shutil.rmtree (tmp, ignore_errors=True)
+        shell.finalize (True)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_batch_tar () :
+    """ Test pty_shell batched file staging via tar over ssh """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+    tmp   = tempfile.mkdtemp ()
+
+    # a fake ssh which runs the remote command locally, after printing an ssh
+    # warning which must not be attributed to any transfer
+    with open ('%s/ssh' % tmp, 'w') as fout :
+        fout.write ('#!/bin/sh\n'
+                    'echo "Could not create directory (Permission denied)." >&2\n'
+                    'while [ "${1#-}" != "$1" ]; do shift; done\n'
+                    'shift\n'
+                    'exec sh -c "$*"\n')
+    os.chmod ('%s/ssh' % tmp, 0o755)
+
+    shell.pty_info = dict (shell.pty_info, copy_mode='scp',
+                           ssh_env='', ssh_exe='%s/ssh' % tmp, ssh_args='',
+                           s_flags='', host_str='localhost')
+
+    try :
+        os.mkdir ('%s/src' % tmp)
+        os.mkdir ('%s/tgt' % tmp)
+        for name in ['a', 'b'] :
+            with open ('%s/src/%s' % (tmp, name), 'w') as fout :
+                fout.write (name)
+
+        errors = shell.stage_to_remote_batch ([
+                        ('%s/src/a'    % tmp, '%s/tgt/x' % tmp),
+                        ('%s/src/nope' % tmp, '%s/tgt/'  % tmp),
+                        ('%s/src/b'    % tmp, '%s/tgt/'  % tmp)])
+
+        assert (errors[0] is None)                    , "%s" % (repr(errors))
+        assert (isinstance (errors[1], saga.DoesNotExist)), \
+                                                        "%s" % (repr(errors))
+        assert (errors[2] is None)                    , "%s" % (repr(errors))
+        assert (sorted(os.listdir ('%s/tgt' % tmp)) == ['b', 'x'])
+
+        # the complaint about the missing source only fails its own transfer
+        errors = shell.stage_from_remote_batch ([
+                        ('%s/tgt/x'    % tmp, '%s/y' % tmp),
+                        ('%s/src/nope' % tmp, '%s/n' % tmp),
+                        ('%s/tgt/b'    % tmp, '%s/z' % tmp)])
+
+        assert (errors[0] is None)                    , "%s" % (repr(errors))
+        assert (isinstance (errors[1], saga.DoesNotExist)), \
+                                                        "%s" % (repr(errors))
+        assert (errors[2] is None)                    , "%s" % (repr(errors))
+        assert ('Permission denied' not in str(errors[1])), \
+                                                        "%s" % (repr(errors))
+
+        with open ('%s/y' % tmp) as fin : assert (fin.read () == 'a')
+        with open ('%s/z' % tmp) as fin : assert (fin.read () == 'b')
+        assert (not os.path.exists ('%s/n' % tmp))
+
+    finally :
+        shutil.rmtree (tmp, ignore_errors=True)
+        shell.finalize (True)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_batch_parse () :
+    """ Test parsing of batched copy output """
+    conf  = config()
+    shell = sups.PTYShell (saga.Url(conf.job_service_url), conf.session)
+
+    # sftp reports no exit codes, only output per transfer
+    out = "sftp> -mkdir \"d\"\r\nRS-COPY-START\r\n"          \
+          "sftp> -put  \"a\" \"b\"\r\nUploading a to b\r\n"     \
+          "RS-COPY-0\r\n"                                          \
+          "stat c: No such file or directory\r\nRS-COPY-1\r\n"    \
+          "cp: x\nRS-COPY-2-1\n"
+
+    ret = shell._copy_batch_parse (out)
+    assert (ret[0] == (None, 'sftp> -put  "a" "b"\nUploading a to b')), \
+                                                          "%s" % (repr(ret))
+    assert (ret[1] == (None, 'stat c: No such file or directory')), \
+                                                          "%s" % (repr(ret))
+    assert (ret[2] == (1, 'cp: x'))                 , "%s" % (repr(ret))
+
+    shell.finalize (True)
+
+
 # ------------------------------------------------------------------------------
 #
 # def test_ptyshell_file_stage () :
@@ -130,6 +384,12 @@ if __name__ == '__main__':
   # test_ptyshell_nok()
   # test_ptyshell_async()
   # test_ptyshell_prompt()
+  # test_ptyshell_pipelined()
+  # test_ptyshell_pipelined_concurrent()
+  # test_ptyshell_stream()
+  # test_ptyshell_batch_stage()
+  # test_ptyshell_batch_tar()
+  # test_ptyshell_batch_parse()
   # test_ptyshell_file_stage()
 
 